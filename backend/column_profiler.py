@@ -0,0 +1,213 @@
+"""
+Column Profiler
+Restore edilen tablolar için kolon bazında profil: null oranı, HyperLogLog ile
+distinct tahmini, min/max ve en sık değerler (top-k). Büyük tablolarda
+TABLESAMPLE ile örneklem alınır ve örneklem pandas/numpy ile vektörel işlenir.
+Sonuçlar query_cache üzerinden tablo versiyonuna bağlı olarak cache'lenir.
+"""
+import math
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from query_cache import table_versions
+from restore_service import get_connection
+from table_browser import TablePlan, TableBrowserError, UNSORTABLE_TYPES, quote_identifier, approximate_row_count
+
+# Bu satır sayısının üstündeki tablolar örneklenir
+PROFILE_SAMPLE_ROWS = int(os.environ.get('PROFILE_SAMPLE_ROWS', '100000'))
+# Örneklem ne çıkarsa çıksın belleğe alınacak en fazla satır
+PROFILE_MAX_ROWS = int(os.environ.get('PROFILE_MAX_ROWS', '500000'))
+PROFILE_SAMPLE_SEED = 42
+HLL_PRECISION = 14
+
+# min/max ve top-k hesaplanmayan tipler
+_OPAQUE_TYPES = UNSORTABLE_TYPES | {'binary', 'varbinary', 'timestamp', 'rowversion'}
+
+
+# ==================== HYPERLOGLOG ====================
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """uint64 dizisi için vektörel leading-zero sayısı"""
+    values = values.copy()
+    counts = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values < np.uint64(1 << (64 - shift))
+        counts[mask] += shift
+        values[mask] <<= np.uint64(shift)
+    counts[values == 0] = 64
+    return counts
+
+
+class HyperLogLog:
+    """64-bit hash'ler üzerinde HyperLogLog (2^precision register)"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = np.zeros(self.m, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if hashes.size == 0:
+            return
+        hashes = hashes.astype(np.uint64, copy=False)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        rank = np.minimum(_leading_zeros(hashes << np.uint64(self.precision)), 64 - self.precision) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def estimate(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))  # küçük kardinalite düzeltmesi
+        return int(round(raw))
+
+
+def _hash_series(series: pd.Series) -> np.ndarray:
+    try:
+        return pd.util.hash_pandas_object(series, index=False).to_numpy()
+    except TypeError:
+        # Karışık tipli object kolonlar
+        return pd.util.hash_pandas_object(series.astype(str), index=False).to_numpy()
+
+
+# ==================== PROFILING ====================
+
+def _native(value: Any) -> Any:
+    """numpy / pandas skalarlarını JSON'a yazılabilir Python tiplerine çevir"""
+    if value is None or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+def profile_column(series: pd.Series, column: Dict[str, Any], top_k: int) -> Dict[str, Any]:
+    total = len(series)
+    values = series.dropna()
+    null_count = total - len(values)
+
+    hll = HyperLogLog()
+    hll.add_hashes(_hash_series(values))
+
+    profile = {
+        'name': column['column_name'],
+        'data_type': column['data_type'],
+        'null_count': int(null_count),
+        'null_ratio': round(null_count / total, 6) if total else 0.0,
+        'distinct_estimate': hll.estimate() if len(values) else 0,
+        'min': None,
+        'max': None,
+        'top_values': [],
+    }
+    if column['data_type'] in _OPAQUE_TYPES or values.empty:
+        return profile
+
+    try:
+        profile['min'] = _native(values.min())
+        profile['max'] = _native(values.max())
+    except TypeError:
+        pass  # karşılaştırılamayan karışık değerler
+
+    counts = values.value_counts(sort=True).head(top_k)
+    profile['top_values'] = [
+        {'value': _native(value), 'count': int(count), 'ratio': round(int(count) / total, 6)}
+        for value, count in counts.items()
+    ]
+    return profile
+
+
+def profile_table(
+    database_name: str,
+    table_name: str,
+    schema_name: str = 'dbo',
+    sample_percent: Optional[float] = None,
+    columns: Optional[Sequence[str]] = None,
+    top_k: int = 10
+) -> Dict[str, Any]:
+    """
+    Tabloyu (ya da TABLESAMPLE örneklemini) tek sorguda çek ve kolonları profille.
+
+    Args:
+        sample_percent: Verilmezse tablo PROFILE_SAMPLE_ROWS'tan büyükse otomatik seçilir
+        columns: Sadece bu kolonlar (varsayılan: tümü)
+    """
+    started = time.perf_counter()
+    plan = TablePlan(database_name, table_name, schema_name)
+    selected = [plan.column(name) for name in columns] if columns else plan.columns
+
+    approx_rows = approximate_row_count(database_name, table_name, schema_name)
+    if sample_percent is None and approx_rows > PROFILE_SAMPLE_ROWS:
+        sample_percent = max(0.01, round(PROFILE_SAMPLE_ROWS / approx_rows * 100, 4))
+    if sample_percent is not None and not 0 < sample_percent <= 100:
+        raise TableBrowserError("sample_percent must be between 0 and 100")
+    sampled = sample_percent is not None and sample_percent < 100
+
+    select_list = ', '.join(quote_identifier(c['column_name']) for c in selected)
+    sql = f"SELECT TOP ({PROFILE_MAX_ROWS}) {select_list} FROM {plan.source}"
+    if sampled:
+        sql += f" TABLESAMPLE SYSTEM ({float(sample_percent)} PERCENT) REPEATABLE ({PROFILE_SAMPLE_SEED})"
+
+    conn = get_connection(database_name)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+    fetched = time.perf_counter()
+
+    frame = pd.DataFrame.from_records(rows, columns=[c['column_name'] for c in selected])
+    profiles = [profile_column(frame[c['column_name']], c, top_k) for c in selected]
+
+    return {
+        'database': database_name,
+        'schema': schema_name,
+        'table': table_name,
+        'approx_rows': approx_rows,
+        'sampled': sampled,
+        'sample_percent': sample_percent if sampled else 100.0,
+        'sample_rows': len(frame),
+        'columns': profiles,
+        'timing_ms': {
+            'fetch': round((fetched - started) * 1000.0, 1),
+            'profile': round((time.perf_counter() - fetched) * 1000.0, 1),
+        },
+    }
+
+
+# ==================== CACHE VERSIONING ====================
+
+def table_change_marker(database_name: str, schema_name: str, table_name: str) -> tuple:
+    """(satır sayısı, son yazma zamanı) - tabloyu taramadan"""
+    conn = get_connection(database_name)
+    try:
+        cursor = conn.cursor()
+        object_name = f"{quote_identifier(schema_name)}.{quote_identifier(table_name)}"
+        cursor.execute("""
+            SELECT
+                (SELECT SUM(p.rows) FROM sys.partitions p
+                 WHERE p.object_id = OBJECT_ID(%s) AND p.index_id IN (0, 1)),
+                (SELECT MAX(us.last_user_update) FROM sys.dm_db_index_usage_stats us
+                 WHERE us.database_id = DB_ID() AND us.object_id = OBJECT_ID(%s))
+        """, (object_name, object_name))
+        return tuple(cursor.fetchone())
+    finally:
+        conn.close()
+
+
+def profile_cache_table(database_name: str, schema_name: str, table_name: str) -> str:
+    """
+    Profil cache'inin bağlı olduğu tablo versiyon adı; ilk kullanımda probe kaydedilir.
+    Restore sonrası bump_prefix(f"{database}.") bu kayıtları da geçersiz kılar.
+    """
+    name = f"{database_name}.{schema_name}.{table_name}"
+    table_versions.register_probe(name, lambda: table_change_marker(database_name, schema_name, table_name))
+    return name
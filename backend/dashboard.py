@@ -0,0 +1,222 @@
+"""
+Dashboard
+/dashboard için widget'ları eşzamanlı hesaplayan servis.
+
+Her widget async bir loader'dır (SQL widget'ları run_db ile DB executor'da,
+Mongo widget'ları doğrudan event loop'ta çalışır). Hepsi asyncio.gather ile
+birlikte başlatılır ve her biri kendi süre sınırına tabidir; süresi dolan ya da
+hata veren widget sonuçtan düşer ve 'errors' altında raporlanır. Sonuçlar rol
+bazında kısa süre cache'lenir; aynı rol için eşzamanlı istekler tek hesaplamayı
+bekler.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import case, func, or_, select
+from sqlalchemy.orm import Session
+
+from db_executor import run_db
+from rankings import ranking_index
+from sql_models import SessionLocal, SQLFlight, SQLHotel, SQLReservation
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_WIDGET_TIMEOUT = float(os.environ.get('DASHBOARD_WIDGET_TIMEOUT', '5'))
+DASHBOARD_CACHE_TTL = float(os.environ.get('DASHBOARD_CACHE_TTL', '30'))
+# Eksik widget'lı sonuç daha kısa tutulur ki kaynak düzelince hızla toparlansın
+DASHBOARD_PARTIAL_CACHE_TTL = float(os.environ.get('DASHBOARD_PARTIAL_CACHE_TTL', '5'))
+DASHBOARD_TOP_LIMIT = int(os.environ.get('DASHBOARD_TOP_LIMIT', '5'))
+
+TURKISH_MONTHS = ['Oca', 'Şub', 'Mar', 'Nis', 'May', 'Haz', 'Tem', 'Ağu', 'Eyl', 'Eki', 'Kas', 'Ara']
+
+# İptal edilen rezervasyonlar yolcu sayılarına girmez
+_ACTIVE_RESERVATION = SQLReservation.status != 'cancelled'
+
+
+def day_label(day: date) -> str:
+    """Grafik ekseni için '19 Kas' biçimi"""
+    return f"{day.day} {TURKISH_MONTHS[day.month - 1]}"
+
+
+# ==================== SQL WIDGETS ====================
+
+def stats_widget(db: Session) -> Dict[str, int]:
+    """Stat kartları: tek sorguda koşullu toplamlar"""
+    today = date.today()
+
+    def pax_when(condition):
+        return func.coalesce(func.sum(case((condition, SQLReservation.pax), else_=0)), 0)
+
+    # is_(False) MSSQL'de geçersiz 'IS 0' üretir; PNR'si girilmemiş (NULL) uçuşlar da bekleyen sayılır
+    pending_tickets = select(func.count()).select_from(SQLFlight).where(
+        or_(SQLFlight.hasPNR == False, SQLFlight.hasPNR.is_(None)), SQLFlight.date >= today  # noqa: E712
+    ).scalar_subquery()
+    row = db.execute(
+        select(
+            pax_when(SQLReservation.arrivalDate >= today).label('upcoming'),
+            pax_when(SQLReservation.arrivalDate == today).label('arrivals'),
+            pax_when(SQLReservation.departureDate == today).label('departures'),
+            pax_when(SQLReservation.departureDate < today).label('served'),
+            pending_tickets.label('pending_tickets'),
+        ).where(_ACTIVE_RESERVATION)
+    ).one()
+    return {
+        'totalUpcomingPassengers': int(row.upcoming),
+        'todayArrivals': int(row.arrivals),
+        'todayDepartures': int(row.departures),
+        'totalServedTourists': int(row.served),
+        'pendingTickets': int(row.pending_tickets or 0),
+    }
+
+
+def weekly_widget(db: Session) -> List[Dict[str, Any]]:
+    """Dün ve önümüzdeki 5 gün için günlük geliş/gidiş yolcu sayıları"""
+    today = date.today()
+    days = [today + timedelta(days=offset) for offset in range(-1, 6)]
+    arrivals = dict(db.execute(
+        select(SQLReservation.arrivalDate, func.sum(SQLReservation.pax))
+        .where(_ACTIVE_RESERVATION, SQLReservation.arrivalDate.between(days[0], days[-1]))
+        .group_by(SQLReservation.arrivalDate)
+    ).all())
+    departures = dict(db.execute(
+        select(SQLReservation.departureDate, func.sum(SQLReservation.pax))
+        .where(_ACTIVE_RESERVATION, SQLReservation.departureDate.between(days[0], days[-1]))
+        .group_by(SQLReservation.departureDate)
+    ).all())
+    return [
+        {'date': day_label(day), 'arrivals': int(arrivals.get(day) or 0), 'departures': int(departures.get(day) or 0)}
+        for day in days
+    ]
+
+
+def top_hotels_widget(db: Session, limit: int = DASHBOARD_TOP_LIMIT) -> List[Dict[str, Any]]:
+    """Bu ay en çok misafir ağırlayan oteller (rezervasyon pax toplamı, ranking index'ten)"""
+    ranked = ranking_index.top('hotel', k=limit, by='pax', period=date.today().strftime('%Y-%m'))
+    names = [entry['key'] for entry in ranked]
+    locations = {
+        name: ', '.join(part for part in (city, region) if part)
+        for name, city, region in db.execute(
+            select(SQLHotel.name, SQLHotel.city, SQLHotel.region).where(SQLHotel.name.in_(names))
+        ).all()
+    } if names else {}
+    return [
+        {'name': entry['key'], 'location': locations.get(entry['key'], ''), 'guests': entry['pax']}
+        for entry in ranked
+    ]
+
+
+def top_products_widget(db: Session, limit: int = DASHBOARD_TOP_LIMIT) -> List[Dict[str, Any]]:
+    """Bu ay en çok satan ürünler (rezervasyon sayısı, ranking index'ten)"""
+    ranked = ranking_index.top('product', k=limit, by='reservations', period=date.today().strftime('%Y-%m'))
+    return [{'code': entry['key'], 'name': entry['label'], 'sales': entry['reservations']} for entry in ranked]
+
+
+def sql_widget(fn: Callable[[Session], Any]) -> Callable[[float], Awaitable[Any]]:
+    """Session alan senkron widget'ı, kendi session'ıyla DB executor'da çalışan loader'a çevir"""
+    def _load():
+        db = SessionLocal()
+        try:
+            return fn(db)
+        finally:
+            db.close()
+
+    async def loader(timeout: float):
+        return await run_db(_load, deadline=timeout)
+    loader.__name__ = fn.__name__
+    return loader
+
+
+# ==================== SERVICE ====================
+
+class DashboardService:
+    """Widget kaydı, eşzamanlı hesaplama ve rol bazlı kısa süreli cache"""
+
+    def __init__(self, ttl: float = DASHBOARD_CACHE_TTL, partial_ttl: float = DASHBOARD_PARTIAL_CACHE_TTL):
+        self.ttl = ttl
+        self.partial_ttl = partial_ttl
+        self._widgets: Dict[str, Dict[str, Any]] = {}
+        self._cache: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def widget(
+        self,
+        name: str,
+        loader: Callable[[float], Awaitable[Any]],
+        roles: Optional[Sequence[str]] = None,
+        timeout: float = DASHBOARD_WIDGET_TIMEOUT
+    ):
+        """
+        Widget kaydet. loader(timeout) awaitable döndürür.
+
+        Args:
+            roles: Verilirse widget sadece bu rollere hesaplanır
+        """
+        self._widgets[name] = {'loader': loader, 'roles': set(roles) if roles else None, 'timeout': timeout}
+
+    def widgets_for(self, role: str) -> List[str]:
+        return [name for name, entry in self._widgets.items() if entry['roles'] is None or role in entry['roles']]
+
+    async def _run_widget(self, name: str) -> Dict[str, Any]:
+        entry = self._widgets[name]
+        started = time.perf_counter()
+        try:
+            data = await asyncio.wait_for(entry['loader'](entry['timeout']), timeout=entry['timeout'])
+            result = {'data': data}
+        except (asyncio.TimeoutError, TimeoutError):
+            logger.warning(f"Dashboard widget '{name}' exceeded {entry['timeout']}s")
+            result = {'error': 'timeout'}
+        except Exception as e:
+            logger.error(f"Dashboard widget '{name}' failed: {e}")
+            result = {'error': str(e)}
+        result['duration_ms'] = round((time.perf_counter() - started) * 1000.0, 1)
+        return result
+
+    async def compute(self, role: str) -> Dict[str, Any]:
+        """Rolün widget'larını eşzamanlı hesapla; süre = en yavaş widget"""
+        names = self.widgets_for(role)
+        started = time.perf_counter()
+        results = await asyncio.gather(*(self._run_widget(name) for name in names))
+        widgets, errors, timings = {}, {}, {}
+        for name, result in zip(names, results):
+            timings[name] = result['duration_ms']
+            if 'error' in result:
+                errors[name] = result['error']
+            else:
+                widgets[name] = result['data']
+        return {
+            **widgets,
+            'errors': errors,
+            'partial': bool(errors),
+            'timings_ms': timings,
+            'duration_ms': round((time.perf_counter() - started) * 1000.0, 1),
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+        }
+
+    async def get(self, role: str, refresh: bool = False) -> Dict[str, Any]:
+        """Rol için cache'teki sonuç ya da yeni hesaplama (eşzamanlı istekler birleştirilir)"""
+        lock = self._locks.setdefault(role, asyncio.Lock())
+        async with lock:
+            cached = self._cache.get(role)
+            if cached and not refresh and cached['expires'] > time.monotonic():
+                return {**cached['payload'], 'cached': True}
+            payload = await self.compute(role)
+            ttl = self.partial_ttl if payload['partial'] else self.ttl
+            self._cache[role] = {'payload': payload, 'expires': time.monotonic() + ttl}
+            return {**payload, 'cached': False}
+
+    def invalidate(self, role: Optional[str] = None):
+        if role is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(role, None)
+
+
+dashboard_service = DashboardService()
+dashboard_service.widget('stats', sql_widget(stats_widget))
+dashboard_service.widget('weeklyData', sql_widget(weekly_widget))
+dashboard_service.widget('topHotels', sql_widget(top_hotels_widget))
+dashboard_service.widget('topProducts', sql_widget(top_products_widget))
@@ -0,0 +1,94 @@
+"""
+Date Parsing
+Eski string tarih/saat kolonlarındaki karışık formatları (2026-03-01, 01.03.2026,
+01/03/2026, 14:30, 14.30 ...) DATE / TIME değerlerine çevirir. Tekil değerler
+için parse_date/parse_time, Excel importları için pandas ile vektörel
+normalize_date_series/normalize_time_series kullanılır.
+"""
+from datetime import date, datetime, time
+from functools import lru_cache
+from typing import Any, List, Optional
+
+import pandas as pd
+
+# Gün önce gelen formatlar (Türkiye kullanımı) ISO'dan sonra denenir
+LEGACY_DATE_FORMATS = (
+    '%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y', '%d-%m-%Y', '%Y/%m/%d', '%Y%m%d',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%d.%m.%Y %H:%M', '%d.%m.%Y %H:%M:%S',
+)
+LEGACY_TIME_FORMATS = ('%H:%M', '%H:%M:%S', '%H.%M', '%H%M', '%I:%M %p')
+
+
+def _is_missing(value: Any) -> bool:
+    if value is None or value is pd.NaT:
+        return True
+    if isinstance(value, float) and value != value:  # NaN
+        return True
+    return isinstance(value, str) and value.strip().lower() in ('', 'nan', 'nat', 'none', 'null')
+
+
+@lru_cache(maxsize=8192)
+def _parse_date_text(text: str) -> Optional[date]:
+    try:
+        return datetime.fromisoformat(text).date()
+    except ValueError:
+        pass
+    for fmt in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_time_text(text: str) -> Optional[time]:
+    for fmt in LEGACY_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    try:
+        return datetime.fromisoformat(text).time()  # tam datetime string'i
+    except ValueError:
+        return None
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """Tek değeri date'e çevir; boş ya da tanınmayan değerler None"""
+    if _is_missing(value):
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _parse_date_text(str(value).strip())
+
+
+def parse_time(value: Any) -> Optional[time]:
+    """Tek değeri time'a çevir (saniyeler atılır); boş ya da tanınmayan değerler None"""
+    if _is_missing(value):
+        return None
+    if isinstance(value, datetime):
+        return value.time().replace(second=0, microsecond=0)
+    if isinstance(value, time):
+        return value.replace(second=0, microsecond=0)
+    parsed = _parse_time_text(str(value).strip())
+    return parsed.replace(second=0, microsecond=0) if parsed else None
+
+
+def normalize_date_series(series: pd.Series) -> List[Optional[date]]:
+    """
+    Excel kolonunu tek geçişte date listesine çevir.
+    ISO ve Excel tarih hücreleri vektörel çözülür; kalanlar parse_date ile.
+    """
+    parsed = pd.to_datetime(series, errors='coerce', format='ISO8601')
+    result = [None if pd.isna(value) else value.date() for value in parsed]
+    for index in (i for i, value in enumerate(result) if value is None):
+        result[index] = parse_date(series.iat[index])
+    return result
+
+
+def normalize_time_series(series: pd.Series) -> List[Optional[time]]:
+    """Excel saat kolonunu time listesine çevir (tekrar eden değerler cache'ten gelir)"""
+    return [parse_time(value) for value in series]
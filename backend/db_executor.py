@@ -0,0 +1,149 @@
+"""
+Database Executor
+Senkron veritabanı çağrılarını (SQLAlchemy session'ları, pymssql) event loop'u
+bloklamadan boyutlandırılmış bir thread pool üzerinde çalıştırır.
+Her çağrı için deadline, başlamamış işlerin iptali ve kuyruk bekleme metrikleri sağlar.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pool boyutu SQLAlchemy engine pool'u ile aynı env değişkeninden okunur
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '16'))
+# Varsayılan sorgu deadline'ı (saniye)
+DB_QUERY_TIMEOUT = float(os.environ.get('DB_QUERY_TIMEOUT', '60'))
+
+_DEFAULT = object()
+
+
+class QueryTimeoutError(TimeoutError):
+    """Sorgu deadline'ı aşıldığında fırlatılır"""
+
+
+def _percentile(samples, percent: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class DBExecutor:
+    """Senkron DB çağrıları için thread pool + metrikler"""
+
+    def __init__(self, max_workers: int = DB_POOL_SIZE, default_timeout: Optional[float] = DB_QUERY_TIMEOUT):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db-worker')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._counters = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'timed_out': 0,
+            'cancelled': 0,
+        }
+        self._wait_samples = deque(maxlen=2000)
+        self._run_samples = deque(maxlen=2000)
+
+    async def run(self, fn: Callable[..., Any], *args, deadline: Any = _DEFAULT, **kwargs) -> Any:
+        """
+        fn(*args, **kwargs) çağrısını thread pool'da çalıştır ve sonucunu bekle.
+
+        Args:
+            deadline: Saniye cinsinden üst süre. Verilmezse DB_QUERY_TIMEOUT,
+                None verilirse süre sınırı yok.
+        """
+        timeout = self.default_timeout if deadline is _DEFAULT else deadline
+        submitted_at = time.perf_counter()
+
+        def task():
+            started_at = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._wait_samples.append((started_at - submitted_at) * 1000.0)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._run_samples.append((time.perf_counter() - started_at) * 1000.0)
+
+        with self._lock:
+            self._queued += 1
+            self._counters['submitted'] += 1
+
+        concurrent_future = self._executor.submit(task)
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(concurrent_future), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(concurrent_future, 'timed_out')
+            name = getattr(fn, '__name__', repr(fn))
+            logger.warning(f"DB call {name} exceeded deadline of {timeout}s")
+            raise QueryTimeoutError(f"Database call '{name}' exceeded deadline of {timeout}s")
+        except asyncio.CancelledError:
+            # İstek iptal edildi (ör. client bağlantıyı kapattı)
+            self._abandon(concurrent_future, 'cancelled')
+            raise
+        except Exception:
+            with self._lock:
+                self._counters['failed'] += 1
+            raise
+
+        with self._lock:
+            self._counters['completed'] += 1
+        return result
+
+    def _abandon(self, concurrent_future, counter: str):
+        """Henüz başlamamış işi kuyruktan düşür, başlamışsa arka planda bitmesine izin ver"""
+        with self._lock:
+            self._counters[counter] += 1
+            if concurrent_future.cancelled():
+                self._queued -= 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Pool doluluk ve kuyruk bekleme metrikleri"""
+        with self._lock:
+            wait_samples = list(self._wait_samples)
+            run_samples = list(self._run_samples)
+            return {
+                'pool_size': self.max_workers,
+                'active': self._active,
+                'queued': self._queued,
+                'saturation': round(self._active / self.max_workers, 3) if self.max_workers else 0.0,
+                'default_timeout_seconds': self.default_timeout,
+                **self._counters,
+                'queue_wait_ms': {
+                    'p50': round(_percentile(wait_samples, 50), 2),
+                    'p95': round(_percentile(wait_samples, 95), 2),
+                    'p99': round(_percentile(wait_samples, 99), 2),
+                    'max': round(max(wait_samples), 2) if wait_samples else 0.0,
+                },
+                'run_ms': {
+                    'p50': round(_percentile(run_samples, 50), 2),
+                    'p95': round(_percentile(run_samples, 95), 2),
+                    'p99': round(_percentile(run_samples, 99), 2),
+                    'max': round(max(run_samples), 2) if run_samples else 0.0,
+                },
+            }
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+db_executor = DBExecutor()
+
+
+async def run_db(fn: Callable[..., Any], *args, deadline: Any = _DEFAULT, **kwargs) -> Any:
+    """Modül seviyesindeki executor üzerinden senkron DB çağrısı çalıştır"""
+    return await db_executor.run(fn, *args, deadline=deadline, **kwargs)
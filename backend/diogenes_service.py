@@ -4,24 +4,312 @@ Bu dosya DIOGENESSEJOUR database'inden veri çekmek için kullanılır.
 """
 import pymssql
 import os
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 
+from row_mapper import RowMapper, Const, format_dates, stars_column, join_columns
+
 logger = logging.getLogger(__name__)
 
+# ==================== ROW MAPPERS ====================
+
+CUSTOMER_MAPPER = RowMapper([
+    ('tourOperator', 'Turop'),
+    ('voucher', 'Voucher'),
+    ('sequence', 'Sira'),
+    ('name', 'Adi'),
+    ('title', 'Unvan'),
+    ('age', 'Yasi'),
+    ('nationality', 'Milliyet'),
+    ('arrivalFrom', 'GelYeri'),
+    ('departureTo', 'DonYeri'),
+    ('group1', 'Grup1'),
+    ('group2', 'Grup2'),
+    ('group3', 'Grup3'),
+    ('group4', 'Grup4'),
+    ('group5', 'Grup5'),
+])
+
+HOTEL_MAPPER = RowMapper([
+    ('code', 'Otel'),
+    ('name', 'Adi'),
+    ('region', 'Bolge'),
+    ('category', 'Kategori'),
+    ('country', 'Ulke'),
+    ('phone', 'Tel'),
+    ('fax', 'Fax'),
+    ('email', 'Email'),
+    ('manager', 'Yonetici'),
+    ('address', 'Adres'),
+    ('city', 'Sehir'),
+    ('postalCode', 'PostaKodu'),
+    ('website', 'Web'),
+    ('latitude', 'Enlem'),
+    ('longitude', 'Boylam'),
+    ('stars', (stars_column, 'Kategori')),
+    ('paximumCode', 'PaxmaxKodu'),
+    ('giataCode', 'Giata'),
+])
+
+RESERVATION_MAPPER = RowMapper([
+    ('customerNo', 'MusNo'),
+    ('reservationSeq', 'RezSira'),
+    ('tourOperator', 'Turop'),
+    ('voucherNo', 'Voucher'),
+    ('checkInDate', (format_dates, 'GirTarih')),
+    ('arrivalTransferNo', 'GelTrfNo'),
+    ('departureTransferNo', 'DonTrfNo'),
+    ('infoRootRecNo', 'InfKokRecNo'),
+    ('customerName', 'MusteriAdi'),
+    ('customerTitle', 'MusteriUnvan'),
+    ('nationality', 'Milliyet'),
+])
+
+RESERVATION_DETAIL_MAPPER = RowMapper([
+    ('customerNo', 'MusNo'),
+    ('reservationSeq', 'RezSira'),
+    ('tourOperator', 'Turop'),
+    ('voucherNo', 'Voucher'),
+    ('checkInDate', (format_dates, 'GirTarih')),
+    ('arrivalTransferNo', 'GelTrfNo'),
+    ('departureTransferNo', 'DonTrfNo'),
+    ('infoRootRecNo', 'InfKokRecNo'),
+])
+
+OPERATION_MAPPER = RowMapper([
+    ('id', (join_columns('-'), 'MusNo', 'RezSira')),
+    ('customerNo', 'MusNo'),
+    ('reservationSeq', 'RezSira'),
+    ('tourOperator', 'Turop'),
+    ('voucherNo', 'Voucher'),
+    ('operationDate', (format_dates, 'GirTarih')),
+    ('arrivalTransferNo', 'GelTrfNo'),
+    ('departureTransferNo', 'DonTrfNo'),
+    ('passengerCount', 'PaxCount'),
+    ('status', Const('scheduled')),  # Default status
+])
+
+PASSENGER_MAPPER = RowMapper([
+    ('sequence', 'Sira'),
+    ('name', 'Adi'),
+    ('title', 'Unvan'),
+    ('age', 'Yasi'),
+    ('nationality', 'Milliyet'),
+    ('arrivalFrom', 'GelYeri'),
+    ('departureTo', 'DonYeri'),
+])
+
+# ==================== ACTIVE DATABASE ====================
+# Blue/green restore: panel her zaman mantıksal DIOGENESSEJOUR'u okur, fiziksel
+# database adı cut-over ile değişir. Aktif ad dosyada saklanır (restart sonrası korunur)
+# ve her okumada dosya değişmiş mi bakılır; başka bir worker'ın yaptığı cut-over
+# bir sonraki bağlantıda görülür.
+
+DIOGENES_DATABASE = os.environ.get('DIOGENES_DATABASE', 'DIOGENESSEJOUR')
+DIOGENES_STATE_FILE = Path(os.environ.get(
+    'DIOGENES_STATE_FILE', str(Path(__file__).parent / 'diogenes_active_db.json')
+))
+
+_db_state_lock = threading.Lock()
+_connections_closed = threading.Condition(_db_state_lock)
+_db_state = {'database': DIOGENES_DATABASE, 'previous': None, 'generation': 0}
+# Son okunan state dosyasının (mtime_ns, size) imzası
+_db_state_stamp: Optional[tuple] = None
+_open_connections: Dict[int, int] = {}
+# __del__ kilit alamaz: GC, _db_state_lock'u tutan thread içinde de çalışabilir.
+# Sahipsiz kapanan bağlantının generation'ı buraya atılır, sayaçtan bir sonraki
+# kilitli bölümde düşülür.
+_released_generations: deque = deque()
+_DRAIN_POLL_SECONDS = 0.5
+
+
+def _drain_released():
+    """__del__ ile bırakılan bağlantıları sayaçtan düş (_db_state_lock tutulurken çağrılır)"""
+    while True:
+        try:
+            generation = _released_generations.popleft()
+        except IndexError:
+            return
+        _open_connections[generation] -= 1
+
+
+def _state_file_stamp() -> Optional[tuple]:
+    try:
+        stat = DIOGENES_STATE_FILE.stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_db_state():
+    """State dosyası son okumadan beri değiştiyse yeniden oku (_db_state_lock tutulurken çağrılır)"""
+    global _db_state_stamp
+    stamp = _state_file_stamp()
+    if stamp == _db_state_stamp:
+        return
+    try:
+        if stamp is None:
+            saved = {}
+        else:
+            with open(DIOGENES_STATE_FILE, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+    except Exception as e:
+        logger.error(f"Could not read active database state: {e}")
+        return
+    _db_state_stamp = stamp
+    database = saved.get('database') or DIOGENES_DATABASE
+    if database != _db_state['database']:
+        # Başka bir process cut-over yaptı; yeni bağlantılar yeni generation'a açılır
+        logger.info(f"Active DIOGENES database changed externally {_db_state['database']} -> {database}")
+        _db_state['generation'] += 1
+    _db_state['database'] = database
+    _db_state['previous'] = saved.get('previous')
+
+
+def _save_db_state():
+    global _db_state_stamp
+    tmp_path = DIOGENES_STATE_FILE.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'database': _db_state['database'],
+            'previous': _db_state['previous'],
+            'switched_at': datetime.now().isoformat()
+        }, f)
+    os.replace(tmp_path, DIOGENES_STATE_FILE)
+    _db_state_stamp = _state_file_stamp()
+
+
+with _db_state_lock:
+    _load_db_state()
+
+
+def get_active_database() -> str:
+    """Panel sorgularının gittiği fiziksel database adı"""
+    with _db_state_lock:
+        _load_db_state()
+        return _db_state['database']
+
+
+def resolve_database_name(database_name: str) -> str:
+    """Mantıksal DIOGENESSEJOUR adını aktif fiziksel database'e çevir; diğer adlar aynen döner"""
+    if database_name.upper() == DIOGENES_DATABASE.upper():
+        return get_active_database()
+    return database_name
+
+
+def get_database_state() -> Dict[str, Any]:
+    with _db_state_lock:
+        _load_db_state()
+        _drain_released()
+        return {
+            **_db_state,
+            'open_connections': {str(gen): count for gen, count in _open_connections.items() if count}
+        }
+
+
+def activate_database(database_name: str, drain_timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Aktif database'i atomik olarak değiştir.
+    Yeni bağlantılar hemen yeni database'e açılır; eski generation'a ait açık
+    bağlantıların kapanması drain_timeout saniyeye kadar beklenir.
+    """
+    with _db_state_lock:
+        _load_db_state()
+        previous = _db_state['database']
+        old_generation = _db_state['generation']
+        _db_state['database'] = database_name
+        _db_state['previous'] = previous
+        _db_state['generation'] = old_generation + 1
+        _save_db_state()
+
+        deadline = time.monotonic() + drain_timeout
+        while True:
+            _drain_released()
+            if _open_connections.get(old_generation, 0) <= 0:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # __del__ notify edemez; kuyruğu periyodik olarak boşalt
+            _connections_closed.wait(min(remaining, _DRAIN_POLL_SECONDS))
+        still_open = _open_connections.get(old_generation, 0)
+
+    logger.info(f"Active DIOGENES database switched {previous} -> {database_name} "
+                f"(drained: {still_open == 0}, open: {still_open})")
+    return {
+        'active': database_name,
+        'previous': previous,
+        'generation': old_generation + 1,
+        'drained': still_open == 0,
+        'open_connections': still_open
+    }
+
+
+class _TrackedConnection:
+    """pymssql bağlantısı + açıldığı generation; close() drain sayacını düşürür"""
+
+    def __init__(self, conn, generation: int):
+        self._conn = conn
+        self._generation = generation
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._conn.close()
+        finally:
+            with _db_state_lock:
+                _open_connections[self._generation] -= 1
+                _connections_closed.notify_all()
+
+    def __del__(self):
+        # Hata yolunda close() çağrılmadan bırakılan bağlantılar. Kilit alınmaz
+        # (bkz. _released_generations); sayaç bir sonraki kilitli bölümde düşer.
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        finally:
+            _released_generations.append(self._generation)
+
+
 def get_diogenes_connection():
-    """DIOGENESSEJOUR database'ine bağlantı oluştur"""
+    """Aktif DIOGENESSEJOUR database'ine bağlantı oluştur"""
+    with _db_state_lock:
+        _load_db_state()
+        _drain_released()
+        database = _db_state['database']
+        generation = _db_state['generation']
+        _open_connections[generation] = _open_connections.get(generation, 0) + 1
     try:
         conn = pymssql.connect(
             server=os.environ.get('SQL_SERVER_HOST'),
             user=os.environ.get('SQL_SERVER_USER'),
             password=os.environ.get('SQL_SERVER_PASSWORD'),
-            database='DIOGENESSEJOUR',  # DIOGENESSEJOUR database
-            port=os.environ.get('SQL_SERVER_PORT', '1433')
+            database=database,
+            port=os.environ.get('SQL_SERVER_PORT', '1433'),
+            timeout=int(float(os.environ.get('DB_QUERY_TIMEOUT', '60'))),  # Per-query deadline (seconds)
+            login_timeout=15
         )
-        return conn
+        return _TrackedConnection(conn, generation)
     except Exception as e:
+        with _db_state_lock:
+            _open_connections[generation] -= 1
+            _connections_closed.notify_all()
         logger.error(f"DIOGENESSEJOUR connection error: {e}")
         raise
 
@@ -39,6 +327,45 @@ def test_diogenes_connection() -> bool:
         logger.error(f"❌ DIOGENESSEJOUR connection test failed: {e}")
         return False
 
+def get_table_checksum(table_name: str) -> tuple:
+    """
+    Tablo için (satır sayısı, CHECKSUM_AGG) döndür - cache versiyon probe'u olarak kullanılır
+    
+    Args:
+        table_name: DIOGENESSEJOUR tablo adı (ör. Otel)
+    """
+    conn = get_diogenes_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT COUNT_BIG(*), CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM [dbo].[{table_name}] WITH (NOLOCK)"
+        )
+        return tuple(cursor.fetchone())
+    finally:
+        conn.close()
+
+def get_table_change_marker(table_name: str) -> tuple:
+    """
+    Büyük tablolar için ucuz değişiklik işareti: (satır sayısı, son yazma zamanı)
+    sys.partitions ve sys.dm_db_index_usage_stats üzerinden - tabloyu taramaz
+    
+    Args:
+        table_name: DIOGENESSEJOUR tablo adı (ör. Musteri, MusteriOpr)
+    """
+    conn = get_diogenes_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                (SELECT SUM(p.rows) FROM sys.partitions p
+                 WHERE p.object_id = OBJECT_ID(%s) AND p.index_id IN (0, 1)),
+                (SELECT MAX(us.last_user_update) FROM sys.dm_db_index_usage_stats us
+                 WHERE us.database_id = DB_ID() AND us.object_id = OBJECT_ID(%s))
+        """, (f"dbo.{table_name}", f"dbo.{table_name}"))
+        return tuple(cursor.fetchone())
+    finally:
+        conn.close()
+
 # ==================== MUSTERI (CUSTOMERS) ====================
 
 def get_customers(
@@ -59,7 +386,7 @@ def get_customers(
     """
     try:
         conn = get_diogenes_connection()
-        cursor = conn.cursor(as_dict=True)
+        cursor = conn.cursor()
         
         # Count query
         count_query = "SELECT COUNT(*) as total FROM Musteri"
@@ -75,7 +402,7 @@ def get_customers(
             count_query += " WHERE " + " AND ".join(where_conditions)
         
         cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        total = cursor.fetchone()[0]
         
         # Use a very high limit if -1 is passed (means fetch all)
         actual_limit = 100000 if limit == -1 else limit
@@ -95,28 +422,12 @@ def get_customers(
         
         cursor.execute(data_query, [actual_limit] + params + [offset])
         customers = cursor.fetchall()
+        description = cursor.description
         
         conn.close()
         
         # Map to English field names
-        mapped_customers = []
-        for customer in customers:
-            mapped_customers.append({
-                'tourOperator': customer.get('Turop', ''),
-                'voucher': customer.get('Voucher', ''),
-                'sequence': customer.get('Sira', 0),
-                'name': customer.get('Adi', ''),
-                'title': customer.get('Unvan', ''),
-                'age': customer.get('Yasi', 0),
-                'nationality': customer.get('Milliyet', ''),
-                'arrivalFrom': customer.get('GelYeri', ''),
-                'departureTo': customer.get('DonYeri', ''),
-                'group1': customer.get('Grup1', ''),
-                'group2': customer.get('Grup2', ''),
-                'group3': customer.get('Grup3', ''),
-                'group4': customer.get('Grup4', ''),
-                'group5': customer.get('Grup5', '')
-            })
+        mapped_customers = CUSTOMER_MAPPER.map_rows(description, customers)
         
         return {
             'customers': mapped_customers,
@@ -150,7 +461,7 @@ def get_hotels(
     """
     try:
         conn = get_diogenes_connection()
-        cursor = conn.cursor(as_dict=True)
+        cursor = conn.cursor()
         
         # Count query
         count_query = "SELECT COUNT(*) as total FROM Otel"
@@ -169,7 +480,7 @@ def get_hotels(
             count_query += " WHERE " + " AND ".join(where_conditions)
         
         cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        total = cursor.fetchone()[0]
         
         # Use a very high limit if -1 is passed (means fetch all)
         actual_limit = 100000 if limit == -1 else limit
@@ -190,41 +501,12 @@ def get_hotels(
         
         cursor.execute(data_query, [actual_limit] + params + [offset])
         hotels = cursor.fetchall()
+        description = cursor.description
         
         conn.close()
         
-        # Map to English field names
-        mapped_hotels = []
-        for hotel in hotels:
-            # Extract stars from Kategori (e.g., "5 YILDIZ" -> 5)
-            kategori = hotel.get('Kategori', '')
-            stars = 0
-            if 'YILDIZ' in kategori or 'STAR' in kategori.upper():
-                try:
-                    stars = int(''.join(filter(str.isdigit, kategori.split()[0])))
-                except:
-                    stars = 0
-            
-            mapped_hotels.append({
-                'code': hotel.get('Otel', ''),
-                'name': hotel.get('Adi', ''),
-                'region': hotel.get('Bolge', ''),
-                'category': hotel.get('Kategori', ''),
-                'country': hotel.get('Ulke', ''),
-                'phone': hotel.get('Tel', ''),
-                'fax': hotel.get('Fax', ''),
-                'email': hotel.get('Email', ''),
-                'manager': hotel.get('Yonetici', ''),
-                'address': hotel.get('Adres', ''),
-                'city': hotel.get('Sehir', ''),
-                'postalCode': hotel.get('PostaKodu', ''),
-                'website': hotel.get('Web', ''),
-                'latitude': hotel.get('Enlem', 0.0),
-                'longitude': hotel.get('Boylam', 0.0),
-                'stars': stars,
-                'paximumCode': hotel.get('PaxmaxKodu', ''),
-                'giataCode': hotel.get('Giata', '')
-            })
+        # Map to English field names (stars extracted from Kategori, e.g. "5 YILDIZ" -> 5)
+        mapped_hotels = HOTEL_MAPPER.map_rows(description, hotels)
         
         return {
             'hotels': mapped_hotels,
@@ -249,7 +531,7 @@ def get_hotel_regions() -> List[str]:
         return regions
     except Exception as e:
         logger.error(f"Error fetching hotel regions: {e}")
-        return []
+        raise
 
 # ==================== MUSTERIOPR (RESERVATIONS/OPERATIONS) ====================
 
@@ -275,7 +557,7 @@ def get_reservations(
     """
     try:
         conn = get_diogenes_connection()
-        cursor = conn.cursor(as_dict=True)
+        cursor = conn.cursor()
         
         # Count query
         count_query = """
@@ -303,7 +585,7 @@ def get_reservations(
             count_query += " WHERE " + " AND ".join(where_conditions)
         
         cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        total = cursor.fetchone()[0]
         
         # Use a very high limit if -1 is passed (means fetch all)
         actual_limit = 100000 if limit == -1 else limit
@@ -325,25 +607,12 @@ def get_reservations(
         
         cursor.execute(data_query, [actual_limit] + params + [offset])
         reservations = cursor.fetchall()
+        description = cursor.description
         
         conn.close()
         
         # Map to English field names
-        mapped_reservations = []
-        for res in reservations:
-            mapped_reservations.append({
-                'customerNo': res.get('MusNo', ''),
-                'reservationSeq': res.get('RezSira', 0),
-                'tourOperator': res.get('Turop', ''),
-                'voucherNo': res.get('Voucher', ''),
-                'checkInDate': res.get('GirTarih').strftime('%Y-%m-%d') if res.get('GirTarih') else '',
-                'arrivalTransferNo': res.get('GelTrfNo', ''),
-                'departureTransferNo': res.get('DonTrfNo', ''),
-                'infoRootRecNo': res.get('InfKokRecNo', 0),
-                'customerName': res.get('MusteriAdi', ''),
-                'customerTitle': res.get('MusteriUnvan', ''),
-                'nationality': res.get('Milliyet', '')
-            })
+        mapped_reservations = RESERVATION_MAPPER.map_rows(description, reservations)
         
         return {
             'reservations': mapped_reservations,
@@ -379,7 +648,7 @@ def get_operations(
     """
     try:
         conn = get_diogenes_connection()
-        cursor = conn.cursor(as_dict=True)
+        cursor = conn.cursor()
         
         # Count query
         count_query = """
@@ -406,7 +675,7 @@ def get_operations(
             count_query += " WHERE " + " AND ".join(where_conditions)
         
         cursor.execute(count_query, params)
-        total = cursor.fetchone()['total']
+        total = cursor.fetchone()[0]
         
         # Use a very high limit if -1 is passed (means fetch all)
         actual_limit = 100000 if limit == -1 else limit
@@ -427,24 +696,12 @@ def get_operations(
         
         cursor.execute(data_query, [actual_limit] + params + [offset])
         operations = cursor.fetchall()
+        description = cursor.description
         
         conn.close()
         
         # Map to English field names
-        mapped_operations = []
-        for op in operations:
-            mapped_operations.append({
-                'id': f"{op.get('MusNo', '')}-{op.get('RezSira', 0)}",
-                'customerNo': op.get('MusNo', ''),
-                'reservationSeq': op.get('RezSira', 0),
-                'tourOperator': op.get('Turop', ''),
-                'voucherNo': op.get('Voucher', ''),
-                'operationDate': op.get('GirTarih').strftime('%Y-%m-%d') if op.get('GirTarih') else '',
-                'arrivalTransferNo': op.get('GelTrfNo', ''),
-                'departureTransferNo': op.get('DonTrfNo', ''),
-                'passengerCount': op.get('PaxCount', 0),
-                'status': 'scheduled'  # Default status
-            })
+        mapped_operations = OPERATION_MAPPER.map_rows(description, operations)
         
         return {
             'operations': mapped_operations,
@@ -469,7 +726,7 @@ def get_reservation_details(voucher: str, tour_operator: str) -> Dict[str, Any]:
     """
     try:
         conn = get_diogenes_connection()
-        cursor = conn.cursor(as_dict=True)
+        cursor = conn.cursor()
         
         # Get reservation info
         cursor.execute("""
@@ -480,6 +737,7 @@ def get_reservation_details(voucher: str, tour_operator: str) -> Dict[str, Any]:
         """, (voucher, tour_operator))
         
         reservation = cursor.fetchone()
+        reservation_description = cursor.description
         
         if not reservation:
             conn.close()
@@ -494,33 +752,15 @@ def get_reservation_details(voucher: str, tour_operator: str) -> Dict[str, Any]:
         """, (voucher, tour_operator))
         
         passengers = cursor.fetchall()
+        passenger_description = cursor.description
         
         conn.close()
         
         # Map passengers
-        mapped_passengers = []
-        for passenger in passengers:
-            mapped_passengers.append({
-                'sequence': passenger.get('Sira', 0),
-                'name': passenger.get('Adi', ''),
-                'title': passenger.get('Unvan', ''),
-                'age': passenger.get('Yasi', 0),
-                'nationality': passenger.get('Milliyet', ''),
-                'arrivalFrom': passenger.get('GelYeri', ''),
-                'departureTo': passenger.get('DonYeri', '')
-            })
+        mapped_passengers = PASSENGER_MAPPER.map_rows(passenger_description, passengers)
         
         return {
-            'reservation': {
-                'customerNo': reservation.get('MusNo', ''),
-                'reservationSeq': reservation.get('RezSira', 0),
-                'tourOperator': reservation.get('Turop', ''),
-                'voucherNo': reservation.get('Voucher', ''),
-                'checkInDate': reservation.get('GirTarih').strftime('%Y-%m-%d') if reservation.get('GirTarih') else '',
-                'arrivalTransferNo': reservation.get('GelTrfNo', ''),
-                'departureTransferNo': reservation.get('DonTrfNo', ''),
-                'infoRootRecNo': reservation.get('InfKokRecNo', 0)
-            },
+            'reservation': RESERVATION_DETAIL_MAPPER.map_row(reservation_description, reservation),
             'passengers': mapped_passengers,
             'passengerCount': len(mapped_passengers)
         }
@@ -0,0 +1,225 @@
+"""
+Health
+Load balancer sağlık kontrolleri için arka planda çalışan prober.
+
+- liveness: I/O yok, süreç ayakta mı
+- readiness: kayıtlı probe'lar (SQL Server, DIOGENESSEJOUR, Mongo) her
+  HEALTH_PROBE_INTERVAL saniyede bir arka planda pinglenir; istek sadece
+  cache'teki sonucu okur. Kritik probe'lardan biri başarısızsa ya da sonuç
+  bayatsa hazır değil.
+- deep: tablo sayıları gibi pahalı kontroller HEALTH_DEEP_INTERVAL saniyede
+  bir hesaplanır ve admin görünümü için cache'lenir. Ayrı bir task'ta çalışır;
+  uzun süren COUNT(*) probe turlarını geciktirip readiness'ı bayatlatmaz.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+HEALTH_PROBE_INTERVAL = float(os.environ.get('HEALTH_PROBE_INTERVAL', '10'))
+HEALTH_PROBE_TIMEOUT = float(os.environ.get('HEALTH_PROBE_TIMEOUT', '3'))
+HEALTH_DEEP_INTERVAL = float(os.environ.get('HEALTH_DEEP_INTERVAL', '300'))
+# Son başarılı tur bu kadar eskiyse readiness bayat sayılır
+HEALTH_STALE_AFTER = float(os.environ.get('HEALTH_STALE_AFTER', str(HEALTH_PROBE_INTERVAL * 3)))
+HEALTH_LATENCY_WINDOW = int(os.environ.get('HEALTH_LATENCY_WINDOW', '100'))
+
+
+def _percentile(samples, percent: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(percent / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def engine_pool_metrics(engine) -> Dict[str, Any]:
+    """SQLAlchemy QueuePool doluluğu (I/O yok)"""
+    pool = engine.pool
+    try:
+        size, checked_out, overflow = pool.size(), pool.checkedout(), pool.overflow()
+    except AttributeError:
+        # QueuePool olmayan pool'lar (ör. testlerde SingletonThreadPool)
+        return {'pool': type(pool).__name__}
+    capacity = size + max(getattr(pool, '_max_overflow', 0), 0)
+    return {
+        'pool': type(pool).__name__,
+        'size': size,
+        'checked_out': checked_out,
+        'overflow': overflow,
+        'capacity': capacity,
+        'saturation': round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+def sync_probe(fn: Callable[[], Any]) -> Callable[[], Awaitable[Any]]:
+    """Senkron bir kontrolü default thread pool'da çalıştır (DB executor kuyruğuna girmez)"""
+    async def probe():
+        return await asyncio.to_thread(fn)
+    probe.__name__ = fn.__name__
+    return probe
+
+
+class HealthProber:
+    """Probe kaydı, arka plan döngüsü ve cache'lenmiş sonuçlar"""
+
+    def __init__(
+        self,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+        deep_interval: float = HEALTH_DEEP_INTERVAL,
+        stale_after: float = HEALTH_STALE_AFTER
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.deep_interval = deep_interval
+        self.stale_after = stale_after
+        self.started_at = time.monotonic()
+        self._probes: Dict[str, Dict[str, Any]] = {}
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._deep_loader: Optional[Callable[[], Awaitable[Dict[str, Any]]]] = None
+        self._deep: Optional[Dict[str, Any]] = None
+        self._deep_at = 0.0
+        self._deep_task: Optional[asyncio.Task] = None
+        self._last_round = 0.0
+
+    def probe(self, name: str, check: Callable[[], Awaitable[Any]], critical: bool = True):
+        """
+        Probe kaydet. check() awaitable döndürür; exception ya da timeout başarısızlıktır.
+
+        Args:
+            critical: False ise başarısızlık readiness'ı düşürmez, sadece raporlanır
+        """
+        self._probes[name] = {
+            'check': check,
+            'critical': critical,
+            'ok': None,
+            'error': None,
+            'checked_at': None,
+            'consecutive_failures': 0,
+            'latencies': deque(maxlen=HEALTH_LATENCY_WINDOW),
+        }
+
+    def gauge(self, name: str, read: Callable[[], Dict[str, Any]]):
+        """Pool doluluğu gibi bellekten okunan metrikler (readiness'ta her istekte okunur)"""
+        self._gauges[name] = read
+
+    def deep(self, loader: Callable[[], Awaitable[Dict[str, Any]]]):
+        """Pahalı kontroller (sayılar); deep_interval'de bir hesaplanır"""
+        self._deep_loader = loader
+
+    async def _run_probe(self, name: str):
+        entry = self._probes[name]
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(entry['check'](), timeout=self.timeout)
+            entry['ok'], entry['error'] = True, None
+            entry['consecutive_failures'] = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = 'timeout' if isinstance(e, (asyncio.TimeoutError, TimeoutError)) else str(e)
+            if entry['ok'] is not False:
+                logger.warning(f"Health probe '{name}' failed: {error}")
+            entry['ok'], entry['error'] = False, error
+            entry['consecutive_failures'] += 1
+        entry['latencies'].append((time.perf_counter() - started) * 1000.0)
+        entry['checked_at'] = datetime.now(timezone.utc).isoformat()
+
+    async def run_once(self):
+        """Bütün probe'ları eşzamanlı çalıştır; deep kontrol vakti geldiyse arka planda başlat"""
+        await asyncio.gather(*(self._run_probe(name) for name in self._probes))
+        self._last_round = time.monotonic()
+        if (self._deep_loader and (self._deep_task is None or self._deep_task.done())
+                and (self._deep is None or time.monotonic() - self._deep_at >= self.deep_interval)):
+            self._deep_task = asyncio.create_task(self.refresh_deep())
+
+    async def refresh_deep(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            data = await self._deep_loader()
+            self._deep = {'data': data, 'error': None}
+        except Exception as e:
+            logger.error(f"Deep health check failed: {e}")
+            self._deep = {'data': (self._deep or {}).get('data'), 'error': str(e)}
+        self._deep.update({
+            'computed_at': datetime.now(timezone.utc).isoformat(),
+            'duration_ms': round((time.perf_counter() - started) * 1000.0, 1),
+        })
+        self._deep_at = time.monotonic()
+        return self._deep
+
+    async def run_forever(self):
+        try:
+            while True:
+                try:
+                    await self.run_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Health prober round failed: {e}")
+                await asyncio.sleep(self.interval)
+        finally:
+            if self._deep_task and not self._deep_task.done():
+                self._deep_task.cancel()
+
+    # ---------- reads (I/O yok) ----------
+
+    def liveness(self) -> Dict[str, Any]:
+        return {'status': 'alive', 'uptime_seconds': round(time.monotonic() - self.started_at, 1)}
+
+    def readiness(self) -> Dict[str, Any]:
+        """Cache'teki probe sonuçları; 'ready' False ise load balancer trafiği kesmeli"""
+        age = time.monotonic() - self._last_round if self._last_round else None
+        probes = {}
+        ready = self._last_round > 0 and age <= self.stale_after
+        for name, entry in self._probes.items():
+            latencies = list(entry['latencies'])
+            probes[name] = {
+                'ok': entry['ok'],
+                'critical': entry['critical'],
+                'error': entry['error'],
+                'checked_at': entry['checked_at'],
+                'consecutive_failures': entry['consecutive_failures'],
+                'latency_ms': {
+                    'last': round(latencies[-1], 2) if latencies else None,
+                    'p50': round(_percentile(latencies, 50), 2),
+                    'p95': round(_percentile(latencies, 95), 2),
+                    'p99': round(_percentile(latencies, 99), 2),
+                },
+            }
+            if entry['critical'] and not entry['ok']:
+                ready = False
+        if not self._last_round:
+            status = 'starting'
+        elif age > self.stale_after:
+            status = 'stale'
+        elif not ready:
+            status = 'unavailable'
+        elif any(not entry['ok'] for entry in self._probes.values()):
+            status = 'degraded'
+        else:
+            status = 'ready'
+        gauges = {}
+        for name, read in self._gauges.items():
+            try:
+                gauges[name] = read()
+            except Exception as e:
+                gauges[name] = {'error': str(e)}
+        return {
+            'status': status,
+            'ready': ready,
+            'last_probe_age_seconds': round(age, 1) if age is not None else None,
+            'probes': probes,
+            'pools': gauges,
+        }
+
+    def deep_snapshot(self) -> Optional[Dict[str, Any]]:
+        return self._deep
+
+
+health_prober = HealthProber()
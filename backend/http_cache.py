@@ -0,0 +1,199 @@
+"""
+HTTP Conditional GET & Compression
+Büyük liste endpoint'leri için tablo versiyonu + sorgu parametrelerinden türetilen
+ETag / Last-Modified, 304 Not Modified ve eşik üstü gzip/brotli sıkıştırma.
+"""
+import gzip
+import hashlib
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from db_executor import run_db
+from query_cache import query_cache, table_versions, normalize_params
+
+try:
+    import brotli
+except ImportError:  # brotli opsiyonel - yoksa sadece gzip
+    brotli = None
+
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', '1024'))
+COMPRESSED_CACHE_MAX_BYTES = int(os.environ.get('COMPRESSED_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+
+# Versiyon sayaçları process'e özel olduğundan ETag'e instance kimliği katılır;
+# böylece farklı worker'lar aynı ETag'i farklı içerik için üretmez.
+INSTANCE_ID = uuid.uuid4().hex[:12]
+STARTED_AT = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+# ==================== VALIDATORS ====================
+
+def make_etag(endpoint: str, params: Optional[Dict[str, Any]], versions: Tuple) -> str:
+    """Endpoint + normalize parametreler + tablo versiyonlarından weak ETag üret"""
+    seed = f"{INSTANCE_ID}|{endpoint}|{normalize_params(params)}|{versions!r}"
+    return 'W/"' + hashlib.sha1(seed.encode('utf-8')).hexdigest() + '"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match weak karşılaştırması"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    target = _opaque(etag)
+    return any(_opaque(candidate) == target for candidate in if_none_match.split(','))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """RFC 9110: If-None-Match varsa If-Modified-Since yok sayılır"""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+def _validator_headers(etag: str, last_modified: datetime) -> Dict[str, str]:
+    return {
+        'ETag': etag,
+        'Last-Modified': format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        # Tarayıcı saklayabilir ama her kullanımda yeniden doğrulamalı
+        'Cache-Control': 'private, no-cache',
+        'Vary': 'Accept-Encoding',
+    }
+
+
+def not_modified_response(etag: str, last_modified: datetime) -> Response:
+    return Response(status_code=304, headers=_validator_headers(etag, last_modified))
+
+
+# ==================== COMPRESSION ====================
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Accept-Encoding'e göre br > gzip tercih et (q=0 olanları atla)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        pieces = part.strip().split(';')
+        coding = pieces[0].strip().lower()
+        quality = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+
+    def allowed(coding: str) -> bool:
+        return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+    if brotli is not None and allowed('br'):
+        return 'br'
+    if allowed('gzip'):
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+class CompressedBodies:
+    """(etag, encoding) -> sıkıştırılmış gövde; bellek bütçeli LRU"""
+
+    def __init__(self, max_bytes: int = COMPRESSED_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, str], bytes]' = OrderedDict()
+        self._bytes = 0
+
+    def get_or_compress(self, etag: str, encoding: str, body: bytes) -> bytes:
+        key = (etag, encoding)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                return cached
+        compressed = compress(body, encoding)
+        with self._lock:
+            if key not in self._entries and len(compressed) <= self.max_bytes:
+                self._entries[key] = compressed
+                self._bytes += len(compressed)
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+        return compressed
+
+
+compressed_bodies = CompressedBodies()
+
+
+def conditional_json_response(request: Request, body: bytes, etag: str, last_modified: datetime) -> Response:
+    """JSON gövdesini ETag/Last-Modified ve müzakere edilmiş sıkıştırmayla döndür"""
+    headers = _validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        encoding = choose_encoding(request.headers.get('accept-encoding'))
+        if encoding:
+            body = compressed_bodies.get_or_compress(etag, encoding, body)
+            headers['Content-Encoding'] = encoding
+    return Response(content=body, media_type='application/json', headers=headers)
+
+
+# ==================== CACHED ENDPOINTS ====================
+
+def _current_versions(tables: Tuple[str, ...]) -> Tuple:
+    table_versions.refresh(tables)
+    return table_versions.current(tables)
+
+
+async def serve_cached(
+    request: Request,
+    endpoint: str,
+    params: Optional[Dict[str, Any]],
+    tables: Iterable[str],
+    loader: Callable[[], Any]
+) -> Response:
+    """
+    Liste endpoint'ini query_cache üzerinden koşullu GET ile sun.
+    ETag sorgu çalışmadan önce hesaplanır; eşleşirse veri hiç okunmaz.
+    """
+    tables = tuple(tables)
+    versions = await run_db(_current_versions, tables)
+    last_modified = table_versions.last_modified(tables) or STARTED_AT
+    etag = make_etag(endpoint, params, versions)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    entry = await run_db(query_cache.get_or_load, endpoint, params, tables, loader)
+    etag = make_etag(endpoint, params, entry.versions)
+    last_modified = table_versions.last_modified(tables) or STARTED_AT
+    return conditional_json_response(request, entry.body, etag, last_modified)
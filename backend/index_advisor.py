@@ -0,0 +1,81 @@
+"""
+Index Advisor
+SQL Server missing-index DMV'lerinden (sys.dm_db_missing_index_*) database
+bazında index önerileri üretir. Öneriler tahmini fayda skoruna göre sıralanır
+ve her biri için çalıştırılabilir bir CREATE INDEX cümlesi döner; hiçbiri
+otomatik uygulanmaz. DMV'ler instance yeniden başlayınca sıfırlanır.
+"""
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from restore_service import get_connection
+
+INDEX_ADVISOR_LIMIT = int(os.environ.get('INDEX_ADVISOR_LIMIT', '25'))
+
+
+def _index_name(table_name: str, equality: Optional[str], inequality: Optional[str]) -> str:
+    columns = ', '.join(filter(None, [equality, inequality]))
+    parts = [part.strip().strip('[]') for part in columns.split(',') if part.strip()]
+    return f"IX_{table_name}_{'_'.join(parts)}"[:128]
+
+
+def missing_index_report(database_name: str, limit: int = INDEX_ADVISOR_LIMIT) -> Dict[str, Any]:
+    """
+    Database için eksik index önerileri.
+
+    improvement_measure = avg_total_user_cost * avg_user_impact/100 * (user_seeks + user_scans)
+    """
+    conn = get_connection(database_name)
+    try:
+        cursor = conn.cursor(as_dict=True)
+        cursor.execute("""
+            SELECT TOP (%s)
+                OBJECT_SCHEMA_NAME(d.object_id, d.database_id) AS schema_name,
+                OBJECT_NAME(d.object_id, d.database_id) AS table_name,
+                d.equality_columns,
+                d.inequality_columns,
+                d.included_columns,
+                s.user_seeks,
+                s.user_scans,
+                s.avg_total_user_cost,
+                s.avg_user_impact,
+                s.last_user_seek,
+                s.avg_total_user_cost * (s.avg_user_impact / 100.0) * (s.user_seeks + s.user_scans) AS improvement_measure
+            FROM sys.dm_db_missing_index_details d
+            INNER JOIN sys.dm_db_missing_index_groups g ON d.index_handle = g.index_handle
+            INNER JOIN sys.dm_db_missing_index_group_stats s ON g.index_group_handle = s.group_handle
+            WHERE d.database_id = DB_ID()
+            ORDER BY improvement_measure DESC
+        """, (limit,))
+        rows = cursor.fetchall()
+    finally:
+        conn.close()
+
+    suggestions: List[Dict[str, Any]] = []
+    for row in rows:
+        key_columns = ', '.join(filter(None, [row['equality_columns'], row['inequality_columns']]))
+        statement = (
+            f"CREATE NONCLUSTERED INDEX [{_index_name(row['table_name'], row['equality_columns'], row['inequality_columns'])}] "
+            f"ON [{row['schema_name']}].[{row['table_name']}] ({key_columns})"
+        )
+        if row['included_columns']:
+            statement += f" INCLUDE ({row['included_columns']})"
+        suggestions.append({
+            'table': f"{row['schema_name']}.{row['table_name']}",
+            'equality_columns': row['equality_columns'],
+            'inequality_columns': row['inequality_columns'],
+            'included_columns': row['included_columns'],
+            'user_seeks': row['user_seeks'],
+            'user_scans': row['user_scans'],
+            'avg_user_impact': float(row['avg_user_impact'] or 0),
+            'improvement_measure': round(float(row['improvement_measure'] or 0), 1),
+            'last_user_seek': row['last_user_seek'],
+            'create_statement': statement,
+        })
+
+    return {
+        'database': database_name,
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'suggestions': suggestions,
+    }
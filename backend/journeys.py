@@ -0,0 +1,258 @@
+"""
+Journeys
+Paket rezervasyonları için bacak (leg) tarihlerini toplu hesaplayan motor.
+
+Bir paketin bacak tarihleri sadece (paket, geliş tarihi) ikilisine bağlıdır:
+konaklama bacakları (hotel/accommodation) duration_nights kadar ilerletir,
+diğerleri (transfer...) o günün tarihini alır. Bu yüzden paket başına bacak
+offset'leri bir kez (numpy cumsum; bacaklar package_catalog'dan) hesaplanır ve
+aynı paketin tüm geliş tarihleri için tarih matrisi tek işlemde çıkarılır.
+Sonuçlar (paket, geliş tarihi) bazında LRU cache'te tutulur; packages /
+package_legs tablo versiyonu değişince cache boşaltılır. Rezervasyona özel tek
+kısım bacak durumudur (current_leg'e göre completed / in_progress / pending).
+"""
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from date_parsing import parse_date
+from package_catalog import PACKAGE_TABLES, package_catalog
+from query_cache import table_versions
+from sql_helpers import RESERVATION_SERIALIZER
+from sql_models import SQLReservation
+
+JOURNEY_SCHEDULE_CACHE_SIZE = int(os.environ.get('JOURNEY_SCHEDULE_CACHE_SIZE', '4096'))
+# Bir istekte hesaplanabilecek en fazla rezervasyon
+JOURNEY_MAX_BATCH = int(os.environ.get('JOURNEY_MAX_BATCH', '5000'))
+
+STAY_LEG_TYPES = ('hotel', 'accommodation')
+
+ScheduleKey = Tuple[str, date]
+
+
+class JourneyError(ValueError):
+    """Geçersiz tarih ya da limit aşımı"""
+
+
+def leg_offsets(legs: List[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Geliş gününe göre her bacağın giriş/çıkış gün offset'leri"""
+    nights = np.array(
+        [int(leg.get('duration_nights') or 0) if leg.get('leg_type') in STAY_LEG_TYPES else 0 for leg in legs],
+        dtype='int64'
+    )
+    ends = np.cumsum(nights)
+    return ends - nights, ends
+
+
+def _display(days: np.ndarray) -> List[str]:
+    """datetime64[D] dizisi -> 'gg.aa.yyyy' (mevcut JourneyTimeline biçimi)"""
+    return [f"{iso[8:10]}.{iso[5:7]}.{iso[0:4]}" for iso in np.datetime_as_string(days, unit='D')]
+
+
+def leg_status(step_number: int, current_leg: int) -> str:
+    if step_number < current_leg:
+        return 'completed'
+    if step_number == current_leg:
+        return 'in_progress'
+    return 'pending'
+
+
+def _raw_date(value: Any) -> str:
+    """Rezervasyondaki tarih olduğu gibi (ISO 'yyyy-mm-dd'); paketsiz yolculuk bu biçimi kullanır"""
+    if isinstance(value, date):
+        return value.isoformat()
+    return value or ''
+
+
+def single_leg_journey(reservation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Paketsiz rezervasyon: tek otel bacağı (önceki yanıtla aynı alanlar ve tarih biçimi)"""
+    return [{
+        'step_number': 1,
+        'leg_type': 'hotel',
+        'location': reservation.get('destination', 'N/A'),
+        'hotel_name': reservation.get('hotel', 'N/A'),
+        'check_in_date': _raw_date(reservation.get('arrivalDate')),
+        'check_out_date': _raw_date(reservation.get('departureDate')),
+        'duration_nights': 0,
+        'room_type': reservation.get('room_type'),
+        'board_type': reservation.get('board_type'),
+        'status': 'confirmed' if reservation.get('status') == 'confirmed' else 'pending',
+    }]
+
+
+class JourneyEngine:
+    """Paket bazlı bacak offset'leri + (paket, geliş tarihi) schedule cache'i"""
+
+    def __init__(self, versions=table_versions, cache_size: int = JOURNEY_SCHEDULE_CACHE_SIZE):
+        self.versions = versions
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._version = None
+        # package_id -> (giriş offset'leri, çıkış offset'leri)
+        self._packages: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._schedules: 'OrderedDict[ScheduleKey, List[Dict[str, Any]]]' = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def _sync_version(self):
+        """packages / package_legs değiştiyse paket ve schedule cache'lerini boşalt"""
+        self.versions.refresh(PACKAGE_TABLES)
+        current = self.versions.current(PACKAGE_TABLES)
+        with self._lock:
+            if current != self._version:
+                self._version = current
+                self._packages.clear()
+                self._schedules.clear()
+
+    def _load_packages(self, db: Session, package_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Paketleri (bacaklarıyla) katalogdan al; bacak offset'lerini paket başına bir kez hesapla"""
+        packages = package_catalog.get_many(db, package_ids)
+        with self._lock:
+            for package_id, package in packages.items():
+                if package is not None and package_id not in self._packages:
+                    self._packages[package_id] = leg_offsets(package['legs'])
+        return packages
+
+    def schedules(self, db: Session, keys: Iterable[ScheduleKey]) -> Dict[ScheduleKey, Optional[List[Dict[str, Any]]]]:
+        """
+        (paket, geliş tarihi) ikilileri için bacak listeleri (tarihler hesaplanmış, durum hariç).
+        Paket bulunamazsa değer None.
+        """
+        self._sync_version()
+        keys = list(dict.fromkeys(keys))
+        result: Dict[ScheduleKey, Optional[List[Dict[str, Any]]]] = {}
+        missing: Dict[str, List[date]] = {}
+        with self._lock:
+            for key in keys:
+                cached = self._schedules.get(key)
+                if cached is not None:
+                    self._schedules.move_to_end(key)
+                    result[key] = cached
+                    self._hits += 1
+                else:
+                    missing.setdefault(key[0], []).append(key[1])
+                    self._misses += 1
+        if not missing:
+            return result
+
+        packages = self._load_packages(db, list(missing))
+        computed: Dict[ScheduleKey, List[Dict[str, Any]]] = {}
+        for package_id, arrivals in missing.items():
+            package = packages.get(package_id)
+            if package is None:
+                for arrival in arrivals:
+                    result[(package_id, arrival)] = None
+                continue
+            with self._lock:
+                offsets = self._packages.get(package_id)
+            starts, ends = offsets if offsets is not None else leg_offsets(package['legs'])
+            # (geliş tarihi x bacak) tarih matrisi tek işlemde
+            base = np.array(arrivals, dtype='datetime64[D]')[:, None]
+            check_in = (base + starts[None, :]).ravel()
+            check_out = (base + ends[None, :]).ravel()
+            check_in_text, check_out_text = _display(check_in), _display(check_out)
+            leg_count = len(package['legs'])
+            for row, arrival in enumerate(arrivals):
+                legs = []
+                for column, leg in enumerate(package['legs']):
+                    index = row * leg_count + column
+                    legs.append({
+                        **leg,
+                        'check_in_date': check_in_text[index],
+                        'check_out_date': check_out_text[index],
+                    })
+                computed[(package_id, arrival)] = legs
+        with self._lock:
+            for key, legs in computed.items():
+                self._schedules[key] = legs
+            while len(self._schedules) > self.cache_size:
+                self._schedules.popitem(last=False)
+        result.update(computed)
+        return result
+
+    def journeys(self, db: Session, reservations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Rezervasyon listesi için {reservation, package, journey}; paketler ve schedule'lar toplu çözülür"""
+        keys = {}
+        for reservation in reservations:
+            arrival = parse_date(reservation.get('arrivalDate'))
+            if reservation.get('package_id') and arrival:
+                keys[reservation['id']] = (reservation['package_id'], arrival)
+        schedules = self.schedules(db, keys.values())
+        packages = self._load_packages(db, {package_id for package_id, _ in keys.values()})
+
+        results = []
+        for reservation in reservations:
+            key = keys.get(reservation['id'])
+            legs = schedules.get(key) if key else None
+            if legs is None:
+                results.append({
+                    'reservation': reservation,
+                    'package': None,
+                    'journey': single_leg_journey(reservation),
+                })
+                continue
+            current_leg = reservation.get('current_leg') or 0
+            results.append({
+                'reservation': reservation,
+                'package': packages[key[0]],
+                'journey': [{**leg, 'status': leg_status(leg['step_number'], current_leg)} for leg in legs],
+            })
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'schedules': len(self._schedules),
+                'packages': len(self._packages),
+                'capacity': self.cache_size,
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_ratio': round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+journey_engine = JourneyEngine()
+
+
+def reservation_journeys(
+    db: Session,
+    reservation_ids: Optional[List[str]] = None,
+    arrival_date: Any = None,
+    package_id: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Id listesi ya da geliş tarihi (opsiyonel paket) ile seçilen rezervasyonların yolculukları"""
+    query = RESERVATION_SERIALIZER.select()
+    if reservation_ids is not None:
+        if len(reservation_ids) > JOURNEY_MAX_BATCH:
+            raise JourneyError(f"At most {JOURNEY_MAX_BATCH} reservations per request")
+        if not reservation_ids:
+            return []
+        query = query.where(SQLReservation.id.in_(reservation_ids))
+    else:
+        day = parse_date(arrival_date)
+        if day is None:
+            raise JourneyError("arrival_date must be a valid date")
+        query = query.where(SQLReservation.arrivalDate == day)
+    if package_id:
+        query = query.where(SQLReservation.package_id == package_id)
+    reservations = RESERVATION_SERIALIZER.fetch_all(db, query.order_by(SQLReservation.id).limit(JOURNEY_MAX_BATCH + 1))
+    if len(reservations) > JOURNEY_MAX_BATCH:
+        raise JourneyError(f"More than {JOURNEY_MAX_BATCH} reservations match; narrow the selection")
+    return journey_engine.journeys(db, reservations)
+
+
+def package_schedule(db: Session, package_id: str, arrival_date: Any) -> Optional[Dict[str, Any]]:
+    """Tek bir (paket, geliş tarihi) schedule'ı; paket yoksa None"""
+    day = parse_date(arrival_date)
+    if day is None:
+        raise JourneyError("arrival_date must be a valid date")
+    legs = journey_engine.schedules(db, [(package_id, day)])[(package_id, day)]
+    if legs is None:
+        return None
+    return {'package_id': package_id, 'arrival_date': day.isoformat(), 'legs': legs}
@@ -0,0 +1,229 @@
+"""
+List Query
+/flights, /reservations, /operations, /hotels ve /packages için ortak sorgu dili.
+Tablo tarayıcısıyla (table_browser) aynı filtre ve cursor biçimini kullanır:
+
+    ?limit=50&cursor=<opaque>            keyset (cursor) sayfalama
+    ?sort=-arrivalDate,voucherNo         çok alanlı sıralama ('-' azalan)
+    ?filter=status:eq:confirmed          eq, ne, lt, lte, gt, gte, contains,
+    ?filter=pax:gte:2                    startswith, in, isnull, notnull
+    ?filter=hasPNR:eq:false              boolean kolonlarda NULL false sayılır
+    ?fields=id,voucherNo,hotel           alan projeksiyonu
+
+Sorgu ModelSerializer kolonları üzerinden Core select()'e çevrilir; sıralamaya
+her zaman primary key eklenir, böylece cursor tek ve sabit bir satırı gösterir.
+"""
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Boolean, Date, DateTime, Time, and_, or_
+from sqlalchemy.orm import Session
+
+from date_parsing import parse_date, parse_time
+from sql_helpers import ModelSerializer
+from table_browser import FILTER_OPERATORS, TableBrowserError, decode_cursor, encode_cursor
+
+LIST_DEFAULT_LIMIT = int(os.environ.get('LIST_DEFAULT_LIMIT', '100'))
+LIST_MAX_LIMIT = int(os.environ.get('LIST_MAX_LIMIT', '1000'))
+
+
+class ListQueryError(TableBrowserError):
+    """Geçersiz alan, filtre, sıralama ya da cursor"""
+
+
+def parse_field_list(raw: Optional[str]) -> List[str]:
+    """'a,b,-c' -> ['a', 'b', '-c'] (boşlar atılır)"""
+    return [part.strip() for part in (raw or '').split(',') if part.strip()]
+
+
+def _coerce(column, value: str) -> Any:
+    """Query string değerini kolon tipine çevir"""
+    if isinstance(column.type, Boolean):
+        return value.lower() in ('1', 'true', 'yes')
+    if isinstance(column.type, DateTime):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            raise ListQueryError(f"Invalid datetime for {column.name}: {value}")
+    if isinstance(column.type, (Date, Time)):
+        parsed = parse_date(value) if isinstance(column.type, Date) else parse_time(value)
+        if parsed is None:
+            raise ListQueryError(f"Invalid {'date' if isinstance(column.type, Date) else 'time'} for {column.name}: {value}")
+        return parsed
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type in (int, float):
+        try:
+            return python_type(value)
+        except ValueError:
+            raise ListQueryError(f"Invalid number for {column.name}: {value}")
+    return value
+
+
+class ListQuery:
+    """Bir liste isteğinin sıralama, filtre, projeksiyon ve sayfa bilgisi"""
+
+    def __init__(
+        self,
+        serializer: ModelSerializer,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        filters: Optional[Sequence[Tuple[str, str, Optional[str]]]] = None,
+        fields: Optional[str] = None,
+        default_sort: str = 'id'
+    ):
+        self.serializer = serializer
+        self.limit = limit
+        if limit is not None and not 1 <= limit <= LIST_MAX_LIMIT:
+            raise ListQueryError(f"limit must be between 1 and {LIST_MAX_LIMIT}")
+        if cursor and limit is None:
+            self.limit = LIST_DEFAULT_LIMIT
+
+        self.fields = parse_field_list(fields) or None
+        for name in self.fields or []:
+            self._column(name)
+
+        self.order: List[Tuple[str, bool]] = []
+        for item in parse_field_list(sort) or parse_field_list(default_sort):
+            name, descending = (item[1:], True) if item.startswith('-') else (item, False)
+            self._column(name)
+            if name in serializer.json_fields:
+                raise ListQueryError(f"Cannot sort by {name}")
+            if name not in (n for n, _ in self.order):
+                self.order.append((name, descending))
+        if 'id' not in (name for name, _ in self.order):
+            self.order.append(('id', False))
+
+        self.filters = list(filters or [])
+        for name, op, _ in self.filters:
+            self._column(name)
+            if op not in FILTER_OPERATORS:
+                raise ListQueryError(f"Unknown filter operator: {op}")
+
+        self.after = decode_cursor(cursor) if cursor else None
+        if self.after is not None and len(self.after) != len(self.order):
+            raise ListQueryError("Cursor does not match sort order")
+
+    @property
+    def paged(self) -> bool:
+        return self.limit is not None
+
+    def _column(self, name: str):
+        column = self.serializer.columns.get(name)
+        if column is None:
+            raise ListQueryError(f"Unknown field: {name}")
+        return column
+
+    # ==================== SQL ====================
+
+    @staticmethod
+    def _boolean_predicate(column, wanted: bool):
+        # Girilmemiş (NULL) bayrak false sayılır (dashboard'daki hasPNR tanımıyla aynı)
+        return column == True if wanted else or_(column == False, column.is_(None))  # noqa: E712
+
+    def _filter_predicates(self) -> List[Any]:
+        predicates = []
+        for name, op, value in self.filters:
+            column = self._column(name)
+            if op == 'isnull':
+                predicates.append(column.is_(None))
+            elif op == 'notnull':
+                predicates.append(column.isnot(None))
+            elif op == 'in':
+                values = [_coerce(column, v) for v in (value or '').split(',') if v != '']
+                if not values:
+                    raise ListQueryError(f"Filter {name}:in needs at least one value")
+                if isinstance(column.type, Boolean):
+                    predicates.append(or_(*(self._boolean_predicate(column, v) for v in set(values))))
+                else:
+                    predicates.append(column.in_(values))
+            elif op in ('contains', 'startswith'):
+                escaped = (value or '').replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+                predicates.append(column.like(f"%{escaped}%" if op == 'contains' else f"{escaped}%"))
+            else:
+                if value is None:
+                    raise ListQueryError(f"Filter {name}:{op} needs a value")
+                coerced = _coerce(column, value)
+                if isinstance(column.type, Boolean) and op in ('eq', 'ne'):
+                    predicates.append(self._boolean_predicate(column, coerced if op == 'eq' else not coerced))
+                    continue
+                predicates.append({
+                    'eq': column == coerced, 'ne': column != coerced,
+                    'lt': column < coerced, 'lte': column <= coerced,
+                    'gt': column > coerced, 'gte': column >= coerced,
+                }[op])
+        return predicates
+
+    def _after_predicate(self):
+        """
+        Cursor'daki satırdan sonra gelen satırlar.
+        SQL Server'da NULL'lar ASC'de başta, DESC'te sonda sıralanır.
+        """
+        alternatives = []
+        for index, (name, descending) in enumerate(self.order):
+            parts = []
+            for (prev_name, _), prev_value in zip(self.order[:index], self.after[:index]):
+                prev_column = self._column(prev_name)
+                parts.append(prev_column.is_(None) if prev_value is None else prev_column == prev_value)
+
+            column = self._column(name)
+            value = self.after[index]
+            if not descending:
+                parts.append(column.isnot(None) if value is None else column > value)
+            elif value is None:
+                continue  # DESC'te NULL'dan sonra bu kolonda başka değer yok
+            else:
+                parts.append(or_(column < value, column.is_(None)))
+            alternatives.append(and_(*parts))
+        return or_(*alternatives)
+
+    def statement(self, where: Sequence[Any] = ()):
+        """Projeksiyon + cursor için gereken sıralama alanlarını seçen sorgu"""
+        selected = list(self.fields) if self.fields else self.serializer.field_names
+        selected += [name for name, _ in self.order if name not in selected]
+
+        query = self.serializer.select(selected)
+        predicates = list(where) + self._filter_predicates()
+        if self.after is not None:
+            predicates.append(self._after_predicate())
+        if predicates:
+            query = query.where(and_(*predicates))
+
+        query = query.order_by(*(
+            self._column(name).desc() if descending else self._column(name).asc()
+            for name, descending in self.order
+        ))
+        if self.paged:
+            query = query.limit(self.limit + 1)
+        return query
+
+    def fetch(self, db: Session, where: Sequence[Any] = ()) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Returns:
+            (satırlar, sonraki sayfanın cursor'ı ya da None)
+        """
+        rows = self.serializer.fetch_all(db, self.statement(where))
+
+        next_cursor = None
+        if self.paged and len(rows) > self.limit:
+            rows = rows[:self.limit]
+            next_cursor = encode_cursor([rows[-1][name] for name, _ in self.order])
+
+        if self.fields:
+            keep = self.fields
+            rows = [{name: row[name] for name in keep} for row in rows]
+        return rows, next_cursor
+
+    def cache_params(self) -> Dict[str, Any]:
+        """query_cache / ETag anahtarı için normalize edilmiş parametreler"""
+        return {
+            'limit': self.limit,
+            'after': self.after,
+            'order': self.order,
+            'filters': self.filters,
+            'fields': self.fields,
+        }
@@ -0,0 +1,381 @@
+"""
+Metadata Catalog
+Admin database browser'ı için database / tablo / satır sayısı / kolon şeması
+bilgilerini process içinde tutar. Yenileme database'ler arasında paralel yapılır
+(database başına tek kolon sorgusu), periyodik olarak ve restore sonrası çalışır.
+Her yenilemede önceki snapshot ile karşılaştırılıp şema farkları (drift) kaydedilir.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from db_executor import run_db
+from restore_service import get_connection
+
+logger = logging.getLogger(__name__)
+
+CATALOG_PARALLELISM = int(os.environ.get('CATALOG_PARALLELISM', '4'))
+CATALOG_REFRESH_INTERVAL = float(os.environ.get('CATALOG_REFRESH_INTERVAL', '900'))
+# Catalog'da bulunamayan database/tablo istekleri aynı database'i bu aralıkta en fazla bir kez yeniler
+CATALOG_MISS_REFRESH_INTERVAL = float(os.environ.get('CATALOG_MISS_REFRESH_INTERVAL', '30'))
+
+SYSTEM_DATABASES = ('master', 'tempdb', 'model', 'msdb', 'rdsadmin')
+
+# Drift karşılaştırmasında dikkate alınan kolon alanları
+_COLUMN_SIGNATURE = ('data_type', 'max_length', 'precision', 'scale', 'is_nullable', 'is_primary_key')
+
+
+# ==================== FETCH ====================
+
+def fetch_databases() -> List[Dict[str, Any]]:
+    conn = get_connection('master')
+    try:
+        cursor = conn.cursor(as_dict=True)
+        cursor.execute(f"""
+            SELECT name, database_id, create_date, state_desc, recovery_model_desc, compatibility_level
+            FROM sys.databases
+            WHERE name NOT IN ({', '.join(['%s'] * len(SYSTEM_DATABASES))})
+            ORDER BY name
+        """, SYSTEM_DATABASES)
+        return [{
+            "name": row['name'],
+            "database_id": row['database_id'],
+            "create_date": str(row['create_date']) if row['create_date'] else None,
+            "state": row['state_desc'],
+            "recovery_model": row['recovery_model_desc'],
+            "compatibility_level": row['compatibility_level']
+        } for row in cursor]
+    finally:
+        conn.close()
+
+
+def fetch_database_metadata(database_name: str) -> Dict[str, Dict[str, Any]]:
+    """Bir database'in tüm tabloları, satır sayıları, kolonları ve tekil (unique) key'leri - üç sorguda"""
+    conn = get_connection(database_name)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.name, t.name, SUM(p.rows)
+            FROM sys.tables t
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            LEFT JOIN sys.partitions p ON t.object_id = p.object_id AND p.index_id IN (0, 1)
+            GROUP BY s.name, t.name
+        """)
+        tables = {
+            f"{schema}.{table}": {
+                "table_name": table,
+                "schema_name": schema,
+                "row_count": rows or 0,
+                "columns": [],
+                "unique_key": [],
+            }
+            for schema, table, rows in cursor.fetchall()
+        }
+
+        cursor.execute("""
+            SELECT
+                s.name, t.name, c.column_id,
+                c.name, ty.name, c.max_length, c.precision, c.scale,
+                c.is_nullable, c.is_identity, pk.key_ordinal,
+                OBJECT_NAME(fkc.referenced_object_id),
+                COL_NAME(fkc.referenced_object_id, fkc.referenced_column_id)
+            FROM sys.tables t
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            INNER JOIN sys.columns c ON c.object_id = t.object_id
+            INNER JOIN sys.types ty ON c.user_type_id = ty.user_type_id
+            LEFT JOIN (
+                SELECT ic.object_id, ic.column_id, ic.key_ordinal
+                FROM sys.index_columns ic
+                INNER JOIN sys.indexes i ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+                WHERE i.is_primary_key = 1
+            ) pk ON c.object_id = pk.object_id AND c.column_id = pk.column_id
+            LEFT JOIN sys.foreign_key_columns fkc
+                ON c.object_id = fkc.parent_object_id AND c.column_id = fkc.parent_column_id
+            ORDER BY s.name, t.name, c.column_id
+        """)
+        last_key = None
+        for (schema, table, column_id, name, data_type, max_length, precision, scale,
+             is_nullable, is_identity, key_ordinal, fk_table, fk_column) in cursor.fetchall():
+            entry = tables.get(f"{schema}.{table}")
+            if entry is None:
+                continue
+            # Birden fazla FK'ya katılan kolon birden fazla satır döndürür - ilki yeterli
+            if last_key == (schema, table, column_id):
+                continue
+            last_key = (schema, table, column_id)
+            entry['columns'].append({
+                "column_name": name,
+                "data_type": data_type,
+                "max_length": max_length,
+                "precision": precision,
+                "scale": scale,
+                "is_nullable": bool(is_nullable),
+                "is_identity": bool(is_identity),
+                "is_primary_key": key_ordinal is not None,
+                "primary_key_ordinal": key_ordinal,
+                "is_foreign_key": fk_table is not None,
+                "foreign_key_table": fk_table,
+                "foreign_key_column": fk_column
+            })
+
+        # Primary key'i olmayan tablolarda deterministik sıra için: en az kolonlu unique index
+        cursor.execute("""
+            SELECT s.name, t.name, i.index_id, c.name
+            FROM sys.indexes i
+            INNER JOIN sys.tables t ON i.object_id = t.object_id
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+            INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+            WHERE i.is_unique = 1 AND i.is_primary_key = 0 AND i.has_filter = 0
+                AND i.is_disabled = 0 AND i.is_hypothetical = 0 AND ic.is_included_column = 0
+            ORDER BY s.name, t.name, i.index_id, ic.key_ordinal
+        """)
+        unique_indexes: Dict[str, Dict[int, List[str]]] = {}
+        for schema, table, index_id, column_name in cursor.fetchall():
+            unique_indexes.setdefault(f"{schema}.{table}", {}).setdefault(index_id, []).append(column_name)
+        for key, indexes in unique_indexes.items():
+            if key in tables:
+                tables[key]['unique_key'] = min(indexes.values(), key=len)
+        return tables
+    finally:
+        conn.close()
+
+
+# ==================== DRIFT ====================
+
+def diff_catalogs(old: Dict[str, Any], new: Dict[str, Any], databases: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """İki catalog snapshot'ı arasındaki database / tablo / kolon farkları"""
+    names = set(databases) if databases is not None else set(old) | set(new)
+    drift = {
+        'databases_added': sorted(n for n in names if n in new and n not in old),
+        'databases_removed': sorted(n for n in names if n in old and n not in new),
+        'tables_added': [], 'tables_removed': [],
+        'columns_added': [], 'columns_removed': [], 'columns_changed': [],
+    }
+    for db_name in sorted(n for n in names if n in old and n in new):
+        old_tables, new_tables = old[db_name]['tables'], new[db_name]['tables']
+        drift['tables_added'] += [f"{db_name}.{t}" for t in sorted(set(new_tables) - set(old_tables))]
+        drift['tables_removed'] += [f"{db_name}.{t}" for t in sorted(set(old_tables) - set(new_tables))]
+        for table_key in sorted(set(old_tables) & set(new_tables)):
+            before = {c['column_name']: c for c in old_tables[table_key]['columns']}
+            after = {c['column_name']: c for c in new_tables[table_key]['columns']}
+            prefix = f"{db_name}.{table_key}"
+            drift['columns_added'] += [f"{prefix}.{c}" for c in sorted(set(after) - set(before))]
+            drift['columns_removed'] += [f"{prefix}.{c}" for c in sorted(set(before) - set(after))]
+            for column in sorted(set(before) & set(after)):
+                old_sig = {k: before[column][k] for k in _COLUMN_SIGNATURE}
+                new_sig = {k: after[column][k] for k in _COLUMN_SIGNATURE}
+                if old_sig != new_sig:
+                    drift['columns_changed'].append({
+                        'column': f"{prefix}.{column}", 'before': old_sig, 'after': new_sig
+                    })
+    drift['has_drift'] = any(drift[k] for k in drift if k != 'has_drift')
+    return drift
+
+
+# ==================== CATALOG ====================
+
+class MetadataCatalog:
+    """Database metadata'sının bellek içi kopyası"""
+
+    def __init__(self, parallelism: int = CATALOG_PARALLELISM):
+        self.parallelism = parallelism
+        self._refresh_lock = threading.Lock()
+        self._databases: Dict[str, Dict[str, Any]] = {}
+        self._refreshed_at: Optional[str] = None
+        self._last_duration_ms: Optional[float] = None
+        self._drift_history = deque(maxlen=20)
+        self._miss_lock = threading.Lock()
+        self._miss_refreshed: Dict[str, float] = {}
+
+    def refresh(self, databases: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Catalog'u yenile (senkron - run_db ile çağrılmalı).
+
+        Args:
+            databases: Verilirse sadece bu database'ler yenilenir
+        """
+        with self._refresh_lock:
+            started = time.perf_counter()
+            listed = {db['name']: db for db in fetch_databases()}
+            targets = list(listed) if databases is None else [d for d in databases if d in listed]
+
+            fetched: Dict[str, Dict[str, Any]] = {}
+            errors: Dict[str, str] = {}
+            online = [name for name in targets if listed[name]['state'] == 'ONLINE']
+            with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix='catalog') as pool:
+                futures = {name: pool.submit(fetch_database_metadata, name) for name in online}
+                for name, future in futures.items():
+                    try:
+                        fetched[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Catalog refresh failed for {name}: {e}")
+                        errors[name] = str(e)
+
+            new_databases = {} if databases is None else dict(self._databases)
+            if databases is not None:
+                for name in databases:
+                    new_databases.pop(name, None)
+            for name in targets:
+                if name in fetched:
+                    tables = fetched[name]
+                else:
+                    # Okunamayan / ONLINE olmayan database için eski tablo bilgisi korunur
+                    tables = self._databases.get(name, {}).get('tables', {})
+                new_databases[name] = {'info': listed[name], 'tables': tables}
+
+            if self._refreshed_at is not None:
+                drift = diff_catalogs(self._databases, new_databases, databases)
+                if drift['has_drift']:
+                    logger.warning(f"Schema drift detected: {drift}")
+                self._drift_history.appendleft({'detected_at': datetime.now(timezone.utc).isoformat(), **drift})
+            else:
+                drift = None
+
+            self._databases = new_databases
+            self._refreshed_at = datetime.now(timezone.utc).isoformat()
+            self._last_duration_ms = round((time.perf_counter() - started) * 1000.0, 1)
+            logger.info(f"Metadata catalog refreshed ({len(targets)} databases) in {self._last_duration_ms}ms")
+
+            return {
+                'refreshed_at': self._refreshed_at,
+                'duration_ms': self._last_duration_ms,
+                'databases': targets,
+                'errors': errors,
+                'drift': drift,
+            }
+
+    def refresh_on_miss(self, database_name: str, interval: float = CATALOG_MISS_REFRESH_INTERVAL) -> bool:
+        """
+        Catalog'da bulunamayan database/tablo için o database'i yenile; database başına
+        interval saniyede en fazla bir kez. Yenileme yapıldıysa True döner.
+        """
+        key = database_name.casefold()
+        now = time.monotonic()
+        with self._miss_lock:
+            if now - self._miss_refreshed.get(key, float('-inf')) < interval:
+                return False
+            # Var olmayan adlarla dolmasın: süresi geçen kayıtları at
+            self._miss_refreshed = {
+                name: stamp for name, stamp in self._miss_refreshed.items() if now - stamp < interval
+            }
+            self._miss_refreshed[key] = now
+        self.refresh([database_name])
+        return True
+
+    @property
+    def loaded(self) -> bool:
+        return self._refreshed_at is not None
+
+    def _database(self, database_name: str) -> Optional[Dict[str, Any]]:
+        entry = self._databases.get(database_name)
+        if entry is None:
+            folded = database_name.casefold()
+            for name, candidate in self._databases.items():
+                if name.casefold() == folded:
+                    return candidate
+        return entry
+
+    def has_database(self, database_name: str) -> bool:
+        return self._database(database_name) is not None
+
+    # restore_service fonksiyonlarıyla aynı dönüş şekilleri
+
+    def list_databases(self) -> Dict[str, Any]:
+        databases = [entry['info'] for _, entry in sorted(self._databases.items())]
+        return {
+            "success": True,
+            "databases": databases,
+            "count": len(databases),
+            "catalog_refreshed_at": self._refreshed_at
+        }
+
+    def get_database_tables(self, database_name: str) -> Optional[Dict[str, Any]]:
+        entry = self._database(database_name)
+        if entry is None:
+            return None
+        tables = [
+            {"table_name": t['table_name'], "schema_name": t['schema_name'], "row_count": t['row_count']}
+            for t in sorted(entry['tables'].values(), key=lambda t: t['table_name'])
+        ]
+        return {
+            "success": True,
+            "database": database_name,
+            "tables": tables,
+            "count": len(tables),
+            "catalog_refreshed_at": self._refreshed_at
+        }
+
+    def get_table_schema(self, database_name: str, table_name: str, schema_name: str = 'dbo') -> Optional[Dict[str, Any]]:
+        entry = self._database(database_name)
+        if entry is None:
+            return None
+        table = entry['tables'].get(f"{schema_name}.{table_name}")
+        if table is None:
+            folded = f"{schema_name}.{table_name}".casefold()
+            table = next((t for k, t in entry['tables'].items() if k.casefold() == folded), None)
+        if table is None:
+            return None
+        return {
+            "success": True,
+            "database": database_name,
+            "table": table['table_name'],
+            "schema": table['schema_name'],
+            "columns": table['columns'],
+            "unique_key": table.get('unique_key', []),
+            "count": len(table['columns'])
+        }
+
+    def drift_history(self) -> List[Dict[str, Any]]:
+        return list(self._drift_history)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'loaded': self.loaded,
+            'refreshed_at': self._refreshed_at,
+            'duration_ms': self._last_duration_ms,
+            'databases': len(self._databases),
+            'tables': sum(len(entry['tables']) for entry in self._databases.values()),
+            'refresh_interval_seconds': CATALOG_REFRESH_INTERVAL,
+        }
+
+
+metadata_catalog = MetadataCatalog()
+
+
+async def refresh_periodically(interval: float = CATALOG_REFRESH_INTERVAL):
+    """Catalog'u başlangıçta ve her interval saniyede bir yenile"""
+    while True:
+        try:
+            await run_db(metadata_catalog.refresh, deadline=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled catalog refresh failed: {e}")
+        await asyncio.sleep(interval)
+
+
+def get_table_schema_cached(database_name: str, table_name: str, schema_name: str = 'dbo') -> Dict[str, Any]:
+    """
+    Catalog'tan tablo şeması; catalog'da yoksa o database'i yenileyip tekrar dene
+    (refresh_on_miss ile sınırlı). Senkron - run_db içinden çağrılır.
+    """
+    schema = metadata_catalog.get_table_schema(database_name, table_name, schema_name)
+    if schema is None and metadata_catalog.refresh_on_miss(database_name):
+        schema = metadata_catalog.get_table_schema(database_name, table_name, schema_name)
+    if schema is None:
+        return {
+            "success": True,
+            "database": database_name,
+            "table": table_name,
+            "schema": schema_name,
+            "columns": [],
+            "count": 0
+        }
+    return schema
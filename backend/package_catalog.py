@@ -0,0 +1,152 @@
+"""
+Package Catalog
+Paketleri bacaklarıyla birlikte process içinde tutan versiyonlu katalog.
+
+Paket sayısı küçük ve sık okunduğu için bütün katalog tek seferde yüklenir:
+packages tek SELECT, bacaklar selectinload ile tek IN sorgusu (N+1 yok).
+Katalog packages / package_legs tablo versiyonuna bağlıdır; CRUD yolları
+table_versions.bump() ile, başka worker'ların yazdıkları versiyon probe'u ile
+katalogu geçersiz kılar ve bir sonraki okuma yeniden yükler. Liste, detay ve
+arama bellekten servis edilir; COUNT/OFFSET sorgusu yoktur.
+"""
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+
+from query_cache import table_versions
+from sql_helpers import PACKAGE_LEG_SERIALIZER, PACKAGE_SERIALIZER
+from sql_models import SQLPackage
+
+logger = logging.getLogger(__name__)
+
+PACKAGE_TABLES = ('diogenesDB.packages', 'diogenesDB.package_legs')
+SEARCH_FIELDS = ('package_code', 'name', 'description')
+
+
+class PackageCatalog:
+    """packages + package_legs için bellek içi, versiyonlu katalog"""
+
+    def __init__(self, versions=table_versions):
+        self.versions = versions
+        self._lock = threading.Lock()
+        self._version = None
+        # Yeniden yüklemede tek referans değişir; okuyucular tutarlı bir snapshot görür
+        self._snapshot: Dict[str, Any] = {'packages': {}, 'by_code': {}, 'ordered': [], 'search_text': {}}
+        self._loaded_at: Optional[float] = None
+        self._load_ms = 0.0
+        self._loads = 0
+
+    def _load(self, db: Session):
+        started = time.perf_counter()
+        packages = {}
+        for instance in db.execute(select(SQLPackage).options(selectinload(SQLPackage.legs))).scalars():
+            package = PACKAGE_SERIALIZER.from_instance(instance)
+            package['legs'] = [PACKAGE_LEG_SERIALIZER.from_instance(leg) for leg in instance.legs]
+            packages[package['id']] = package
+        self._snapshot = {
+            'packages': packages,
+            'by_code': {package['package_code']: package_id for package_id, package in packages.items()},
+            'ordered': sorted(packages, key=lambda package_id: packages[package_id]['package_code']),
+            'search_text': {
+                package_id: ' '.join(str(package.get(field) or '') for field in SEARCH_FIELDS).casefold()
+                for package_id, package in packages.items()
+            },
+        }
+        self._loaded_at = time.time()
+        self._load_ms = round((time.perf_counter() - started) * 1000.0, 1)
+        self._loads += 1
+        logger.info(f"Package catalog loaded: {len(packages)} packages in {self._load_ms} ms")
+
+    def ensure(self, db: Session) -> Dict[str, Any]:
+        """Tablo versiyonu değiştiyse (ya da ilk okumada) katalogu yeniden yükle; güncel snapshot'ı döndür"""
+        self.versions.refresh(PACKAGE_TABLES)
+        current = self.versions.current(PACKAGE_TABLES)
+        with self._lock:
+            if current != self._version:
+                self._load(db)
+                self._version = current
+            return self._snapshot
+
+    def invalidate(self):
+        """Katalogu düşür; bir sonraki okuma yeniden yükler"""
+        with self._lock:
+            self._version = None
+
+    # ---------- reads ----------
+
+    def get(self, db: Session, package_id: str) -> Optional[Dict[str, Any]]:
+        return self.ensure(db)['packages'].get(package_id)
+
+    def get_many(self, db: Session, package_ids: Iterable[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        packages = self.ensure(db)['packages']
+        return {package_id: packages.get(package_id) for package_id in package_ids}
+
+    def get_by_code(self, db: Session, package_code: str) -> Optional[Dict[str, Any]]:
+        snapshot = self.ensure(db)
+        package_id = snapshot['by_code'].get(package_code)
+        return snapshot['packages'].get(package_id) if package_id else None
+
+    def list(
+        self,
+        db: Session,
+        search: Optional[str] = None,
+        active_only: bool = False,
+        order: str = 'package_code',
+        offset: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Filtrelenmiş ve sıralanmış paketler + toplam sayı.
+
+        Args:
+            search: package_code / name / description içinde geçen terimler (hepsi, büyük/küçük harf duyarsız)
+            order: 'package_code' ya da 'newest' (created_at azalan, sonra id)
+        """
+        snapshot = self.ensure(db)
+        packages, ids = snapshot['packages'], snapshot['ordered']
+        if order == 'newest':
+            # id artan, sonra created_at azalan (stabil sıralama id sırasını korur)
+            ids = sorted(ids)
+            ids.sort(
+                key=lambda package_id: (packages[package_id]['created_at'] is not None, packages[package_id]['created_at']),
+                reverse=True
+            )
+        if active_only:
+            ids = [package_id for package_id in ids if packages[package_id].get('is_active')]
+        if search:
+            terms = search.casefold().split()
+            ids = [package_id for package_id in ids if all(term in snapshot['search_text'][package_id] for term in terms)]
+        end = offset + limit if limit is not None else None
+        return [packages[package_id] for package_id in ids[offset:end]], len(ids)
+
+    def search(self, db: Session, query: str, limit: int = 20, active_only: bool = True) -> List[Dict[str, Any]]:
+        """Kod eşleşmeleri önde: tam kod, kod başlangıcı, sonra diğer eşleşmeler"""
+        matches, _ = self.list(db, search=query, active_only=active_only)
+        needle = query.strip().casefold()
+
+        def rank(package: Dict[str, Any]) -> int:
+            code = str(package.get('package_code') or '').casefold()
+            if code == needle:
+                return 0
+            if code.startswith(needle):
+                return 1
+            return 2
+        return sorted(matches, key=rank)[:limit]
+
+    def status(self) -> Dict[str, Any]:
+        packages = self._snapshot['packages']
+        return {
+            'packages': len(packages),
+            'legs': sum(len(package['legs']) for package in packages.values()),
+            'version': dict(self._version) if self._version else None,
+            'loaded_at': self._loaded_at,
+            'load_ms': self._load_ms,
+            'loads': self._loads,
+        }
+
+
+package_catalog = PackageCatalog()
@@ -0,0 +1,401 @@
+"""
+Panel Backup
+Panel verilerinin (sql_models tabloları + son sistem logları) yedeğini
+stream edilen bir zip arşivi olarak üretir:
+
+    tables/<tablo>.ndjson   her satır bir JSON objesi
+    keys/<tablo>.json       (incremental yedek) yedek anındaki tüm primary key'ler
+    logs.ndjson             son sistem logları
+    manifest.json           format versiyonu, tablo kolonları, satır sayıları,
+                            watermark'lar ve zincirdeki parent yedek
+
+Tablolar server'dan parça parça okunur (fetchmany), her parça sıkıştırılıp
+hemen gönderilir; bellek kullanımı veri boyutundan bağımsızdır.
+
+BACKUP_DIR'e yazılan yedekler full + incremental zinciri oluşturur; incremental
+yedek sadece son watermark'tan (updated_at/created_at) sonra değişen satırları
+içerir. restore_backup zinciri tek transaction içinde batch'ler halinde uygular.
+"""
+import logging
+import os
+import time
+import zipfile
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import orjson
+from sqlalchemy import Date, DateTime, Time, func, select
+
+from row_mapper import dumps
+from sql_models import Base, engine
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+
+BACKUP_FORMAT_VERSION = "2.0"
+BACKUP_BATCH_SIZE = int(os.environ.get('BACKUP_BATCH_SIZE', '2000'))
+BACKUP_COMPRESSLEVEL = int(os.environ.get('BACKUP_COMPRESSLEVEL', '6'))
+BACKUP_DIR = Path(os.environ.get('BACKUP_DIR', str(ROOT_DIR / 'backups')))
+# Sunucular arası saat farkı için watermark geriye kaydırılır; upsert tekrarları zararsız
+BACKUP_WATERMARK_OVERLAP = timedelta(seconds=int(os.environ.get('BACKUP_WATERMARK_OVERLAP', '300')))
+# SQL Server sorgu başına en fazla 2100 parametre kabul eder
+BACKUP_RESTORE_BATCH = int(os.environ.get('BACKUP_RESTORE_BATCH', '1000'))
+
+# FK sırasına göre (packages package_legs'ten, operations operation_flights'tan önce)
+BACKUP_TABLES: List[str] = [table.name for table in Base.metadata.sorted_tables]
+
+# Incremental yedeklerde değişiklik tespiti yapılan tablolar
+WATERMARK_TABLES = ['flights', 'reservations', 'operations', 'hotels', 'packages']
+
+
+class BackupError(Exception):
+    """Yedek bulunamadı ya da zincir eksik"""
+
+
+class _ChunkSink:
+    """
+    ZipFile'ın yazdığı byte'ları biriktiren, seek edilemeyen hedef.
+    ZipFile bu durumda data descriptor kullanır ve geriye dönüp yazmaz.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+# ==================== ARCHIVE ====================
+
+def _iter_table_rows(table_name: str, where=None) -> Iterator[List[Dict[str, Any]]]:
+    """Tabloyu BACKUP_BATCH_SIZE'lık parçalar halinde oku"""
+    table = Base.metadata.tables[table_name]
+    query = table.select()
+    if where is not None:
+        query = query.where(where)
+    query = query.order_by(*table.primary_key.columns)
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=BACKUP_BATCH_SIZE).execute(query)
+        keys = tuple(result.keys())
+        for partition in result.partitions(BACKUP_BATCH_SIZE):
+            yield [dict(zip(keys, row)) for row in partition]
+
+
+def _iter_table_keys(table_name: str) -> Iterator[List[Any]]:
+    table = Base.metadata.tables[table_name]
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=BACKUP_BATCH_SIZE).execute(
+            select(_primary_key(table))
+        )
+        for partition in result.partitions(BACKUP_BATCH_SIZE):
+            yield [row[0] for row in partition]
+
+
+def _row_watermark(row: Dict[str, Any]) -> Optional[datetime]:
+    return row.get('updated_at') or row.get('created_at')
+
+
+def iter_backup_archive(
+    tables: Optional[List[str]] = None,
+    logs: Optional[List[Dict[str, Any]]] = None,
+    filters: Optional[Dict[str, Any]] = None,
+    manifest_extra: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    include_keys: bool = False
+) -> Iterator[bytes]:
+    """
+    Yedek arşivini byte parçaları halinde üret.
+
+    Args:
+        tables: Yedeklenecek tablolar (varsayılan: BACKUP_TABLES)
+        logs: Arşive eklenecek log kayıtları
+        filters: tablo adı -> SQLAlchemy where ifadesi (ör. incremental yedek)
+        manifest_extra: manifest.json'a eklenecek alanlar (watermarks dahil)
+        stats: Verilirse üretim bitince manifest içeriği buraya yazılır
+        include_keys: Silinen satırların restore'da tespiti için tüm primary key'leri yaz
+    """
+    tables = tables or BACKUP_TABLES
+    filters = filters or {}
+    manifest = {
+        "version": BACKUP_FORMAT_VERSION,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "format": "ndjson",
+        "tables": {},
+        "watermarks": {},
+        **(manifest_extra or {}),
+    }
+    watermarks = {
+        name: datetime.fromisoformat(value)
+        for name, value in manifest["watermarks"].items() if value
+    }
+
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=BACKUP_COMPRESSLEVEL) as archive:
+        for table_name in tables:
+            table = Base.metadata.tables[table_name]
+            row_count = 0
+            with archive.open(f"tables/{table_name}.ndjson", 'w', force_zip64=True) as entry:
+                for rows in _iter_table_rows(table_name, filters.get(table_name)):
+                    entry.write(b''.join(dumps(row) + b'\n' for row in rows))
+                    row_count += len(rows)
+                    if table_name in WATERMARK_TABLES:
+                        marks = [mark for mark in map(_row_watermark, rows) if mark is not None]
+                        if marks and (table_name not in watermarks or max(marks) > watermarks[table_name]):
+                            watermarks[table_name] = max(marks)
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            manifest["tables"][table_name] = {
+                "rows": row_count,
+                "columns": [column.name for column in table.columns],
+                "primary_key": [column.name for column in table.primary_key.columns],
+            }
+
+            if include_keys:
+                with archive.open(f"keys/{table_name}.json", 'w', force_zip64=True) as entry:
+                    separator = b'['
+                    for keys in _iter_table_keys(table_name):
+                        if keys:
+                            entry.write(separator + dumps(keys)[1:-1])
+                            separator = b','
+                        chunk = sink.drain()
+                        if chunk:
+                            yield chunk
+                    entry.write(b'[]' if separator == b'[' else b']')
+
+        if logs is not None:
+            with archive.open("logs.ndjson", 'w') as entry:
+                entry.write(b''.join(dumps(log) + b'\n' for log in logs))
+            manifest["logs"] = len(logs)
+
+        manifest["watermarks"] = {name: mark.isoformat() for name, mark in watermarks.items()}
+        archive.writestr("manifest.json", dumps(manifest))
+    yield sink.drain()
+
+    if stats is not None:
+        stats.update(manifest)
+
+
+# ==================== BACKUP CHAIN ====================
+
+def read_manifest(path: Path) -> Dict[str, Any]:
+    with zipfile.ZipFile(path) as archive:
+        manifest = orjson.loads(archive.read("manifest.json"))
+    manifest["file"] = path.name
+    manifest["size_bytes"] = path.stat().st_size
+    return manifest
+
+
+def list_backups() -> List[Dict[str, Any]]:
+    """BACKUP_DIR'deki yedekler, eskiden yeniye"""
+    if not BACKUP_DIR.exists():
+        return []
+    backups = []
+    for path in BACKUP_DIR.glob("*.zip"):
+        try:
+            backups.append(read_manifest(path))
+        except (zipfile.BadZipFile, KeyError, ValueError) as e:
+            logger.warning(f"Skipping unreadable backup {path.name}: {e}")
+    return sorted(backups, key=lambda m: m["timestamp"])
+
+
+def backup_chain(backup_id: str) -> List[Dict[str, Any]]:
+    """Full yedekten başlayarak verilen yedeğe kadar uygulanacak zincir"""
+    by_id = {manifest["backup_id"]: manifest for manifest in list_backups() if "backup_id" in manifest}
+    chain = []
+    current = by_id.get(backup_id)
+    if current is None:
+        raise BackupError(f"Backup not found: {backup_id}")
+    while True:
+        chain.append(current)
+        if current["type"] == "full":
+            return list(reversed(chain))
+        parent = by_id.get(current.get("parent"))
+        if parent is None:
+            raise BackupError(f"Backup chain of {backup_id} is broken at {current.get('parent')}")
+        current = parent
+
+
+def _watermark_filter(table_name: str, since: str):
+    table = Base.metadata.tables[table_name]
+    cutoff = datetime.fromisoformat(since) - BACKUP_WATERMARK_OVERLAP
+    return func.coalesce(table.c.updated_at, table.c.created_at) >= cutoff
+
+
+def create_backup_file(kind: str = "incremental", logs: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    BACKUP_DIR'e full ya da incremental yedek yaz.
+    Zincirde full yedek yoksa incremental istek full'e döner.
+
+    Returns:
+        Yedeğin manifest'i
+    """
+    if kind not in ("full", "incremental"):
+        raise BackupError(f"Unknown backup type: {kind}")
+    started = time.perf_counter()
+    parent = (list_backups() or [None])[-1]
+    if parent is None:
+        kind = "full"
+
+    filters = {}
+    manifest_extra = {"type": kind, "parent": None}
+    if kind == "incremental":
+        manifest_extra["parent"] = parent["backup_id"]
+        manifest_extra["watermarks"] = dict(parent.get("watermarks", {}))
+        for table_name, since in manifest_extra["watermarks"].items():
+            filters[table_name] = _watermark_filter(table_name, since)
+        if "packages" in filters:
+            # package_legs'te zaman damgası yok; değişen paketlerin tüm bacakları alınır
+            packages = Base.metadata.tables["packages"]
+            legs = Base.metadata.tables["package_legs"]
+            filters["package_legs"] = legs.c.package_id.in_(select(packages.c.id).where(filters["packages"]))
+        if "operations" in filters:
+            # operation_flights için de aynısı: değişen operasyonların uçuşları
+            operations = Base.metadata.tables["operations"]
+            flights = Base.metadata.tables["operation_flights"]
+            filters["operation_flights"] = flights.c.operation_id.in_(select(operations.c.id).where(filters["operations"]))
+
+    backup_id = f"{kind}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    manifest_extra["backup_id"] = backup_id
+
+    BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+    path = BACKUP_DIR / f"{backup_id}.zip"
+    tmp_path = path.with_suffix(".tmp")
+    stats: Dict[str, Any] = {}
+    with open(tmp_path, "wb") as f:
+        for chunk in iter_backup_archive(
+            logs=logs, filters=filters, manifest_extra=manifest_extra,
+            stats=stats, include_keys=kind == "incremental"
+        ):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+
+    manifest = read_manifest(path)
+    manifest["duration_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    logger.info(f"Backup {backup_id} written ({manifest['size_bytes']} bytes, {manifest['duration_ms']} ms)")
+    return manifest
+
+
+# ==================== RESTORE ====================
+
+def _primary_key(table):
+    return list(table.primary_key.columns)[0]
+
+
+def _row_converter(table):
+    """NDJSON değerlerini kolon tiplerine geri çevir (tarih/saatler ISO string olarak yazılır)"""
+    parsers = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            parsers[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Date):
+            parsers[column.name] = date.fromisoformat
+        elif isinstance(column.type, Time):
+            parsers[column.name] = dt_time.fromisoformat
+
+    def convert(row: Dict[str, Any]) -> Dict[str, Any]:
+        for name, parse in parsers.items():
+            if isinstance(row.get(name), str):
+                row[name] = parse(row[name])
+        return row
+    return convert
+
+
+def _iter_archive_rows(archive: zipfile.ZipFile, table_name: str) -> Iterator[List[Dict[str, Any]]]:
+    name = f"tables/{table_name}.ndjson"
+    if name not in archive.namelist():
+        return
+    batch = []
+    with archive.open(name) as entry:
+        for line in entry:
+            if line.strip():
+                batch.append(orjson.loads(line))
+            if len(batch) >= BACKUP_RESTORE_BATCH:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _delete_keys(conn, table, keys: List[Any]):
+    """Verilen primary key'leri, onlara FK ile bağlı child satırlarla birlikte sil"""
+    pk = _primary_key(table)
+    for child in Base.metadata.sorted_tables:
+        for fk in child.foreign_keys:
+            if fk.column is pk:
+                conn.execute(child.delete().where(fk.parent.in_(keys)))
+    conn.execute(table.delete().where(pk.in_(keys)))
+
+
+def _apply_archive(conn, path: Path, full: bool, counts: Dict[str, Dict[str, int]]):
+    with zipfile.ZipFile(path) as archive:
+        if full:
+            for table in reversed(Base.metadata.sorted_tables):
+                counts[table.name]["deleted"] += conn.execute(table.delete()).rowcount or 0
+        else:
+            # Upsert: değişen satırlar önce silinir (child'lardan geriye doğru), sonra yeniden eklenir
+            for table in reversed(Base.metadata.sorted_tables):
+                pk_name = _primary_key(table).name
+                for batch in _iter_archive_rows(archive, table.name):
+                    _delete_keys(conn, table, [row[pk_name] for row in batch])
+
+        for table in Base.metadata.sorted_tables:
+            convert = _row_converter(table)
+            columns = {column.name for column in table.columns}
+            for batch in _iter_archive_rows(archive, table.name):
+                rows = [convert({k: v for k, v in row.items() if k in columns}) for row in batch]
+                conn.execute(table.insert(), rows)
+                counts[table.name]["upserted"] += len(rows)
+
+
+def _apply_deletions(conn, path: Path, counts: Dict[str, Dict[str, int]]):
+    """Son yedekteki key listesinde olmayan satırları sil"""
+    with zipfile.ZipFile(path) as archive:
+        for table in reversed(Base.metadata.sorted_tables):
+            name = f"keys/{table.name}.json"
+            if name not in archive.namelist():
+                continue
+            keep = set(orjson.loads(archive.read(name)))
+            pk = _primary_key(table)
+            existing = [row[0] for row in conn.execute(select(pk))]
+            stale = [key for key in existing if key not in keep]
+            for start in range(0, len(stale), BACKUP_RESTORE_BATCH):
+                _delete_keys(conn, table, stale[start:start + BACKUP_RESTORE_BATCH])
+            counts[table.name]["deleted"] += len(stale)
+
+
+def restore_backup(backup_id: str) -> Dict[str, Any]:
+    """
+    Full yedekten verilen yedeğe kadar zinciri tek transaction içinde uygula.
+    Herhangi bir adım hata verirse tüm değişiklikler geri alınır.
+    """
+    started = time.perf_counter()
+    chain = backup_chain(backup_id)
+    counts = {table_name: {"upserted": 0, "deleted": 0} for table_name in BACKUP_TABLES}
+
+    with engine.begin() as conn:
+        for manifest in chain:
+            _apply_archive(conn, BACKUP_DIR / manifest["file"], manifest["type"] == "full", counts)
+        if len(chain) > 1:
+            _apply_deletions(conn, BACKUP_DIR / chain[-1]["file"], counts)
+
+    duration_ms = round((time.perf_counter() - started) * 1000.0, 1)
+    logger.info(f"Restored backup chain {[m['backup_id'] for m in chain]} in {duration_ms} ms")
+    return {
+        "backup_id": backup_id,
+        "chain": [manifest["backup_id"] for manifest in chain],
+        "tables": counts,
+        "duration_ms": duration_ms,
+    }
@@ -0,0 +1,211 @@
+"""
+Panel Stats
+Dashboard/istatistik sayıları için materialize edilmiş panel_stats tablosu.
+
+Her satır (metric, dimension, value): tablo sayıları dimension'sız, gruplu
+sayılar (bölgeye göre oteller, tarihe göre operasyonlar...) dimension ile tutulur.
+- rebuild(): tüm metrikler tek bir UNION ALL sorgusuyla hesaplanıp tablo
+  yeniden yazılır (başlangıçta, restore/migration sonrası ve periyodik olarak)
+- record(): yazma ve importlarda aynı transaction içinde +/- delta uygular
+- snapshot(): dashboard okumaları; tek SELECT, hesaplama yok
+
+Güncellemelerde değişen boyutlar (ör. otel bölgesi) delta ile izlenmez;
+periyodik rebuild bunları düzeltir.
+"""
+import asyncio
+import logging
+import os
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, Column, DateTime, MetaData, String, Table, and_, cast, func, literal_column, select, union_all
+from sqlalchemy.exc import IntegrityError
+
+from db_executor import run_db
+from sql_models import Base, engine
+
+logger = logging.getLogger(__name__)
+
+STATS_REBUILD_INTERVAL = float(os.environ.get('STATS_REBUILD_INTERVAL', '3600'))
+
+# Panel tablolarından (Base.metadata) ayrı tutulur; türetilmiş veri, yedeklere girmez
+stats_metadata = MetaData()
+panel_stats_table = Table(
+    'panel_stats', stats_metadata,
+    Column('metric', String(100), primary_key=True),
+    Column('dimension', String(200), primary_key=True, default=''),
+    Column('value', BigInteger, nullable=False, default=0),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+# tablo -> [(metric, dimension kolonu, toplanan kolon)]; None: dimension yok / satır sayısı
+STAT_DEFINITIONS: Dict[str, List[Tuple[str, Optional[str], Optional[str]]]] = {
+    'users': [('users', None, None)],
+    'flights': [('flights', None, None)],
+    'reservations': [
+        ('reservations', None, None),
+        ('passengers', None, 'pax'),
+        ('reservations_by_arrival_date', 'arrivalDate', None),
+    ],
+    'operations': [
+        ('operations', None, None),
+        ('operations_by_date', 'date', None),
+    ],
+    'hotels': [
+        ('hotels', None, None),
+        ('hotels_by_region', 'region', None),
+    ],
+    'packages': [('packages', None, None)],
+}
+
+
+def _dimension_text(value: Any) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()[:10]
+    return str(value)[:200]
+
+
+def _read(row: Any, key: str) -> Any:
+    return row.get(key) if isinstance(row, dict) else getattr(row, key, None)
+
+
+def stats_query():
+    """Bütün metrikler için tek sorgu: (metric, dimension, value) satırları"""
+    # Sabitler bind parametresi değil literal olarak yazılır; GROUP BY ifadesi SELECT'tekiyle aynı kalmalı
+    empty = literal_column("''")
+    selects = []
+    for table_name, definitions in STAT_DEFINITIONS.items():
+        table = Base.metadata.tables[table_name]
+        for metric, dimension_column, sum_column in definitions:
+            value = func.coalesce(func.sum(table.c[sum_column]), 0) if sum_column else func.count()
+            if dimension_column:
+                # NULL ve '' aynı boyut satırına düşer
+                dimension = func.coalesce(cast(table.c[dimension_column], String(200)), empty)
+                selects.append(
+                    select(literal_column(f"'{metric}'").label('metric'), dimension.label('dimension'), value.label('value'))
+                    .select_from(table).group_by(dimension)
+                )
+            else:
+                selects.append(
+                    select(literal_column(f"'{metric}'").label('metric'), empty.label('dimension'), value.label('value'))
+                    .select_from(table)
+                )
+    return union_all(*selects)
+
+
+class PanelStats:
+    """panel_stats tablosunun okuma/yazma noktası"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._ready = False
+        self.last_rebuild: Optional[Dict[str, Any]] = None
+
+    def _ensure_table(self):
+        if not self._ready:
+            stats_metadata.create_all(self.engine)
+            self._ready = True
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Bütün metrikleri tek sorguda yeniden hesapla ve tabloyu atomik olarak değiştir"""
+        self._ensure_table()
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        with self.engine.begin() as conn:
+            rows = [
+                {'metric': metric, 'dimension': dimension or '', 'value': int(value or 0), 'updated_at': now}
+                for metric, dimension, value in conn.execute(stats_query())
+            ]
+            conn.execute(panel_stats_table.delete())
+            if rows:
+                conn.execute(panel_stats_table.insert(), rows)
+        self.last_rebuild = {
+            'rebuilt_at': now.isoformat(),
+            'rows': len(rows),
+            'duration_ms': round((time.perf_counter() - started) * 1000.0, 1),
+        }
+        logger.info(f"Panel stats rebuilt: {self.last_rebuild}")
+        return self.last_rebuild
+
+    def record(self, conn, table_name: str, rows: Iterable[Any], sign: int = 1):
+        """
+        Eklenen (sign=1) ya da silinen (sign=-1) satırlar için delta uygula.
+        conn çağıranın Session/Connection'ı olmalı ki delta yazmayla aynı transaction'da olsun.
+        Satırlar dict ya da ORM nesnesi olabilir.
+        """
+        definitions = STAT_DEFINITIONS.get(table_name)
+        if not definitions:
+            return
+        deltas: Dict[Tuple[str, str], int] = {}
+        for row in rows:
+            for metric, dimension_column, sum_column in definitions:
+                dimension = _dimension_text(_read(row, dimension_column)) if dimension_column else ''
+                amount = int(_read(row, sum_column) or 0) if sum_column else 1
+                deltas[(metric, dimension)] = deltas.get((metric, dimension), 0) + sign * amount
+        if not deltas:
+            return
+        self._ensure_table()
+        now = datetime.now(timezone.utc)
+        for (metric, dimension), delta in deltas.items():
+            key = and_(panel_stats_table.c.metric == metric, panel_stats_table.c.dimension == dimension)
+            update = panel_stats_table.update().where(key).values(value=panel_stats_table.c.value + delta, updated_at=now)
+            if conn.execute(update).rowcount:
+                continue
+            try:
+                with conn.begin_nested():
+                    conn.execute(panel_stats_table.insert().values(
+                        metric=metric, dimension=dimension, value=delta, updated_at=now
+                    ))
+            except IntegrityError:
+                # Aynı anda başka bir yazma satırı oluşturdu
+                conn.execute(update)
+
+    def _rows(self) -> List[Tuple[str, str, int]]:
+        self._ensure_table()
+        with self.engine.connect() as conn:
+            return [tuple(row) for row in conn.execute(
+                select(panel_stats_table.c.metric, panel_stats_table.c.dimension, panel_stats_table.c.value)
+            )]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Materialize sayılar: {'totals': {metric: value}, 'by': {metric: {dimension: value}}}.
+        Tablo boşsa (ilk çalıştırma) önce rebuild edilir.
+        """
+        rows = self._rows()
+        if not rows:
+            self.rebuild()
+            rows = self._rows()
+        grouped = {
+            metric for definitions in STAT_DEFINITIONS.values()
+            for metric, dimension_column, _ in definitions if dimension_column
+        }
+        totals: Dict[str, int] = {
+            metric: 0 for definitions in STAT_DEFINITIONS.values()
+            for metric, dimension_column, _ in definitions if not dimension_column
+        }
+        by: Dict[str, Dict[str, int]] = {metric: {} for metric in grouped}
+        for metric, dimension, value in rows:
+            if metric in grouped:
+                by[metric][dimension] = int(value)
+            else:
+                totals[metric] = int(value)
+        return {'totals': totals, 'by': by}
+
+
+panel_stats = PanelStats(engine)
+
+
+async def rebuild_periodically(interval: float = STATS_REBUILD_INTERVAL):
+    """Başlangıçta ve her interval saniyede bir stats tablosunu yeniden hesapla (delta kaymalarını düzeltir)"""
+    while True:
+        try:
+            await run_db(panel_stats.rebuild, deadline=None)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Scheduled stats rebuild failed: {e}")
+        await asyncio.sleep(interval)
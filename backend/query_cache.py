@@ -0,0 +1,259 @@
+"""
+Query Result Cache
+Endpoint + normalize edilmiş parametrelerle anahtarlanan, tablo versiyonlarıyla
+geçersiz kılınan, bellek bütçeli LRU sonuç cache'i.
+
+Tablo versiyonları iki yoldan ilerler:
+    - Açık invalidation: import / restore / CRUD yolları table_versions.bump() çağırır
+    - Probe: kayıtlı probe fonksiyonu (COUNT + CHECKSUM_AGG / MAX(updated_at))
+      belirli aralıklarla çalışır, değer değişirse versiyon ilerletilir.
+      Bu sayede başka worker/process'lerin yaptığı değişiklikler de yakalanır.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from row_mapper import dumps
+
+logger = logging.getLogger(__name__)
+
+QUERY_CACHE_MAX_BYTES = int(os.environ.get('QUERY_CACHE_MAX_BYTES', str(128 * 1024 * 1024)))
+QUERY_CACHE_PROBE_INTERVAL = float(os.environ.get('QUERY_CACHE_PROBE_INTERVAL', '60'))
+
+
+# ==================== TABLE VERSIONS ====================
+
+class TableVersions:
+    """Tablo adı -> (versiyon, değişiklik zamanı) kaydı"""
+
+    def __init__(self, probe_interval: float = QUERY_CACHE_PROBE_INTERVAL):
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._changed_at: Dict[str, datetime] = {}
+        self._probes: Dict[str, Callable[[], Any]] = {}
+        self._probe_values: Dict[str, Any] = {}
+        self._probe_checked: Dict[str, float] = {}
+
+    def _touch(self, table: str):
+        self._versions[table] = self._versions.get(table, 0) + 1
+        self._changed_at[table] = datetime.now(timezone.utc)
+
+    def bump(self, *tables: str):
+        """Verilen tabloların versiyonunu ilerlet (açık invalidation)"""
+        with self._lock:
+            for table in tables:
+                self._touch(table)
+
+    def bump_prefix(self, prefix: str):
+        """Prefix ile başlayan tüm bilinen tabloların versiyonunu ilerlet (ör. restore sonrası)"""
+        with self._lock:
+            for table in list(self._versions) + list(self._probes):
+                if table.startswith(prefix):
+                    self._touch(table)
+                    self._probe_values.pop(table, None)
+
+    def register_probe(self, table: str, probe: Callable[[], Any]):
+        """Tablo için değişiklik probe'u kaydet (senkron, DB sorgusu yapabilir)"""
+        with self._lock:
+            self._probes[table] = probe
+
+    def refresh(self, tables: Iterable[str]):
+        """Süresi gelen probe'ları çalıştır, değer değiştiyse versiyonu ilerlet"""
+        now = time.monotonic()
+        for table in tables:
+            probe = self._probes.get(table)
+            if probe is None:
+                continue
+            if now - self._probe_checked.get(table, float('-inf')) < self.probe_interval:
+                continue
+            self._probe_checked[table] = now
+            try:
+                value = probe()
+            except Exception as e:
+                logger.warning(f"Version probe failed for {table}: {e}")
+                continue
+            with self._lock:
+                previous = self._probe_values.get(table)
+                self._probe_values[table] = value
+                if previous is not None and previous != value:
+                    self._touch(table)
+
+    def current(self, tables: Iterable[str]) -> Tuple[Tuple[str, int], ...]:
+        with self._lock:
+            return tuple((table, self._versions.get(table, 0)) for table in tables)
+
+    def last_modified(self, tables: Iterable[str]) -> Optional[datetime]:
+        with self._lock:
+            stamps = [self._changed_at[t] for t in tables if t in self._changed_at]
+        return max(stamps) if stamps else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                table: {
+                    'version': version,
+                    'changed_at': self._changed_at[table].isoformat() if table in self._changed_at else None,
+                    'probed': table in self._probes,
+                }
+                for table, version in sorted(self._versions.items())
+            }
+
+
+# ==================== CACHE ====================
+
+class CacheEntry:
+    __slots__ = ('key', 'endpoint', 'body', 'versions', 'created_at', 'last_modified')
+
+    def __init__(self, key, endpoint, body: bytes, versions, last_modified):
+        self.key = key
+        self.endpoint = endpoint
+        self.body = body
+        self.versions = versions
+        self.created_at = datetime.now(timezone.utc)
+        self.last_modified = last_modified or self.created_at
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+def normalize_params(params: Optional[Dict[str, Any]]) -> str:
+    """None değerleri at, string'leri kırp, anahtarları sırala"""
+    normalized = {}
+    for key, value in (params or {}).items():
+        if value is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        normalized[key] = value
+    return json.dumps(normalized, sort_keys=True, default=str, separators=(',', ':'))
+
+
+class QueryCache:
+    """Bellek bütçeli LRU sonuç cache'i (değerler JSON byte olarak tutulur)"""
+
+    def __init__(self, versions: TableVersions, max_bytes: int = QUERY_CACHE_MAX_BYTES):
+        self.versions = versions
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Tuple[str, str], CacheEntry]' = OrderedDict()
+        self._key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        self._bytes = 0
+        self._evictions = 0
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _count(self, endpoint: str, field: str):
+        stats = self._stats.setdefault(endpoint, {'hits': 0, 'misses': 0, 'stale': 0})
+        stats[field] += 1
+
+    def _lookup(self, key, versions) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.versions != versions:
+                self._remove(key)
+                self._count(key[0], 'stale')
+                return None
+            self._entries.move_to_end(key)
+            self._count(key[0], 'hits')
+            return entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, entry: CacheEntry):
+        with self._lock:
+            self._remove(entry.key)
+            if entry.size > self.max_bytes:
+                return
+            self._entries[entry.key] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and self._entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self._evictions += 1
+
+    def get_or_load(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]],
+        tables: Iterable[str],
+        loader: Callable[[], Any]
+    ) -> CacheEntry:
+        """
+        Cache'ten döndür ya da loader() ile üret ve sakla.
+        Senkron çalışır - async handler'lardan run_db ile çağrılmalıdır.
+        """
+        tables = tuple(tables)
+        key = (endpoint, normalize_params(params))
+        self.versions.refresh(tables)
+        versions = self.versions.current(tables)
+
+        entry = self._lookup(key, versions)
+        if entry is not None:
+            return entry
+
+        # Aynı anahtar için eşzamanlı miss'lerde sorgu tek sefer çalışsın
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        try:
+            with key_lock:
+                entry = self._lookup(key, versions)
+                if entry is not None:
+                    return entry
+                with self._lock:
+                    self._count(endpoint, 'misses')
+                payload = loader()
+                # Loader JSON byte'larını hazır döndürebilir (sql_helpers serializer'ları)
+                body = payload if isinstance(payload, bytes) else dumps(payload)
+                entry = CacheEntry(key, endpoint, body, versions, self.versions.last_modified(tables))
+                self._store(entry)
+                return entry
+        finally:
+            # loader() hata verse de anahtar kilidi sızmasın
+            with self._lock:
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {}
+            total_hits = total_lookups = 0
+            for endpoint, counts in self._stats.items():
+                # 'stale' lookups are also counted as misses
+                lookups = counts['hits'] + counts['misses']
+                total_hits += counts['hits']
+                total_lookups += lookups
+                endpoints[endpoint] = {
+                    **counts,
+                    'hit_ratio': round(counts['hits'] / lookups, 4) if lookups else 0.0,
+                }
+            return {
+                'entries': len(self._entries),
+                'bytes_used': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self._evictions,
+                'hit_ratio': round(total_hits / total_lookups, 4) if total_lookups else 0.0,
+                'endpoints': endpoints,
+                'tables': self.versions.snapshot(),
+            }
+
+
+table_versions = TableVersions()
+query_cache = QueryCache(table_versions)
@@ -0,0 +1,275 @@
+"""
+Rankings
+En yoğun oteller / en çok satan ürünler için artımlı sayaçlar.
+
+ranking_counters tablosunda (tür, ay, acente, otel/ürün) başına pax ve
+rezervasyon sayısı tutulur. Rezervasyon oluşturma ve importlarda sayaçlar
+aynı transaction içinde artırılır; okumalar bellekteki index'ten heap ile
+(heapq.nsmallest, -metrik) top-k döner. İptal edilen rezervasyonlar sayılmaz; sonradan
+değişen durum/otel/tarih bilgisi rebuild ile düzelir.
+
+    python rankings.py check     # sayaçları rezervasyonlardan hesaplananla karşılaştır
+    python rankings.py rebuild   # sayaçları baştan yaz
+"""
+import heapq
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import BigInteger, Column, DateTime, MetaData, String, Table, and_, extract, func, select
+from sqlalchemy.exc import IntegrityError
+
+from sql_models import SQLReservation, engine
+
+logger = logging.getLogger(__name__)
+
+# Bellekteki index'in tablodan yeniden okunma aralığı (diğer worker'ların yazdıkları için)
+RANKING_INDEX_TTL = float(os.environ.get('RANKING_INDEX_TTL', '60'))
+
+KINDS = ('hotel', 'product')
+METRICS = ('pax', 'reservations')
+
+# Panel tablolarından (Base.metadata) ayrı tutulur; türetilmiş veri, yedeklere girmez
+ranking_metadata = MetaData()
+ranking_counters_table = Table(
+    'ranking_counters', ranking_metadata,
+    Column('kind', String(20), primary_key=True),
+    Column('period', String(7), primary_key=True),  # YYYY-MM (geliş tarihi)
+    Column('agency', String(100), primary_key=True),
+    Column('item_key', String(200), primary_key=True),
+    Column('label', String(200), nullable=False, default=''),
+    Column('pax', BigInteger, nullable=False, default=0),
+    Column('reservations', BigInteger, nullable=False, default=0),
+    Column('updated_at', DateTime, nullable=False),
+)
+
+CounterKey = Tuple[str, str, str, str]  # (kind, period, agency, item_key)
+
+
+def _read(row: Any, key: str) -> Any:
+    return row.get(key) if isinstance(row, dict) else getattr(row, key, None)
+
+
+def _period(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.strftime('%Y-%m')
+    return str(value or '')[:7]
+
+
+def reservation_counters(rows: Iterable[Any]) -> Dict[CounterKey, List[Any]]:
+    """Rezervasyon satırlarından (dict ya da ORM nesnesi) sayaç deltaları: key -> [label, pax, reservations]"""
+    counters: Dict[CounterKey, List[Any]] = {}
+    for row in rows:
+        if _read(row, 'status') == 'cancelled':
+            continue
+        period = _period(_read(row, 'arrivalDate'))
+        agency = str(_read(row, 'source_agency') or '')[:100]
+        pax = int(_read(row, 'pax') or 0)
+        items = (
+            ('hotel', _read(row, 'hotel'), _read(row, 'hotel')),
+            ('product', _read(row, 'product_code'), _read(row, 'product_name')),
+        )
+        for kind, item_key, label in items:
+            if not item_key:
+                continue
+            entry = counters.setdefault((kind, period, agency, str(item_key)[:200]), [str(label or '')[:200], 0, 0])
+            entry[1] += pax
+            entry[2] += 1
+    return counters
+
+
+class RankingIndex:
+    """ranking_counters tablosu + bellekte (tür, ay, acente) bazında sayaç index'i"""
+
+    def __init__(self, engine, ttl: float = RANKING_INDEX_TTL):
+        self.engine = engine
+        self.ttl = ttl
+        self._ready = False
+        self._lock = threading.Lock()
+        # (kind, period, agency) -> {item_key: [label, pax, reservations]}
+        self._buckets: Dict[Tuple[str, str, str], Dict[str, List[Any]]] = {}
+        self._loaded_at = 0.0
+        self._dirty = True
+        # Boş tablo process başına bir kez rebuild edilir; sonrasında boş sonuç da cache'lenir
+        self._bootstrapped = False
+
+    def _ensure_table(self):
+        if not self._ready:
+            ranking_metadata.create_all(self.engine)
+            self._ready = True
+
+    # ---------- writes ----------
+
+    def record(self, conn, rows: Iterable[Any]):
+        """Yeni rezervasyonlar için sayaçları çağıranın transaction'ında artır"""
+        counters = reservation_counters(rows)
+        if not counters:
+            return
+        self._ensure_table()
+        table = ranking_counters_table
+        now = datetime.now(timezone.utc)
+        for (kind, period, agency, item_key), (label, pax, reservations) in counters.items():
+            key = and_(table.c.kind == kind, table.c.period == period, table.c.agency == agency, table.c.item_key == item_key)
+            update = table.update().where(key).values(
+                pax=table.c.pax + pax, reservations=table.c.reservations + reservations, label=label, updated_at=now
+            )
+            if conn.execute(update).rowcount:
+                continue
+            try:
+                with conn.begin_nested():
+                    conn.execute(table.insert().values(
+                        kind=kind, period=period, agency=agency, item_key=item_key,
+                        label=label, pax=pax, reservations=reservations, updated_at=now
+                    ))
+            except IntegrityError:
+                conn.execute(update)
+        self._dirty = True
+
+    def compute(self) -> Dict[CounterKey, List[Any]]:
+        """Sayaçları rezervasyonlardan tek GROUP BY geçişiyle hesapla (okuma, yazmaz)"""
+        year = extract('year', SQLReservation.arrivalDate)
+        month = extract('month', SQLReservation.arrivalDate)
+        agency = func.coalesce(SQLReservation.source_agency, '')
+        counters: Dict[CounterKey, List[Any]] = {}
+        groupings = (
+            ('hotel', SQLReservation.hotel, func.max(SQLReservation.hotel)),
+            ('product', SQLReservation.product_code, func.max(SQLReservation.product_name)),
+        )
+        with self.engine.connect() as conn:
+            for kind, item_column, label in groupings:
+                rows = conn.execute(
+                    select(year, month, agency, item_column, label, func.sum(SQLReservation.pax), func.count())
+                    .where(SQLReservation.status != 'cancelled', item_column != '')
+                    .group_by(year, month, agency, item_column)
+                )
+                for row_year, row_month, row_agency, item_key, row_label, pax, reservations in rows:
+                    period = f"{int(row_year):04d}-{int(row_month):02d}" if row_year else ''
+                    counters[(kind, period, row_agency[:100], str(item_key)[:200])] = [
+                        str(row_label or '')[:200], int(pax or 0), int(reservations)
+                    ]
+        return counters
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Sayaçları baştan hesapla ve tabloyu atomik olarak değiştir"""
+        self._ensure_table()
+        started = time.perf_counter()
+        counters = self.compute()
+        now = datetime.now(timezone.utc)
+        with self.engine.begin() as conn:
+            conn.execute(ranking_counters_table.delete())
+            rows = [
+                {'kind': kind, 'period': period, 'agency': agency, 'item_key': item_key,
+                 'label': label, 'pax': pax, 'reservations': reservations, 'updated_at': now}
+                for (kind, period, agency, item_key), (label, pax, reservations) in counters.items()
+            ]
+            for start in range(0, len(rows), 1000):
+                conn.execute(ranking_counters_table.insert(), rows[start:start + 1000])
+        self._dirty = True
+        result = {'counters': len(counters), 'duration_ms': round((time.perf_counter() - started) * 1000.0, 1)}
+        logger.info(f"Ranking counters rebuilt: {result}")
+        return result
+
+    def check(self) -> Dict[str, Any]:
+        """Tablodaki sayaçları yeniden hesaplananla karşılaştır; farkları döndür"""
+        expected = self.compute()
+        actual = self._load_counters()
+        differences = []
+        for key in sorted(set(expected) | set(actual)):
+            want, have = expected.get(key), actual.get(key)
+            if want is None or have is None or want[1:] != have[1:]:
+                differences.append({
+                    'kind': key[0], 'period': key[1], 'agency': key[2], 'item': key[3],
+                    'expected': {'pax': want[1], 'reservations': want[2]} if want else None,
+                    'actual': {'pax': have[1], 'reservations': have[2]} if have else None,
+                })
+        return {'consistent': not differences, 'counters': len(expected), 'differences': differences[:100]}
+
+    # ---------- reads ----------
+
+    def _load_counters(self) -> Dict[CounterKey, List[Any]]:
+        self._ensure_table()
+        table = ranking_counters_table
+        with self.engine.connect() as conn:
+            return {
+                (kind, period, agency, item_key): [label, int(pax), int(reservations)]
+                for kind, period, agency, item_key, label, pax, reservations in conn.execute(select(
+                    table.c.kind, table.c.period, table.c.agency, table.c.item_key,
+                    table.c.label, table.c.pax, table.c.reservations
+                ))
+            }
+
+    def _refresh(self):
+        with self._lock:
+            if not self._dirty and time.monotonic() - self._loaded_at < self.ttl:
+                return
+            counters = self._load_counters()
+            if not counters and not self._bootstrapped:
+                # İlk çalıştırma: tablo henüz doldurulmadı
+                self.rebuild()
+                counters = self._load_counters()
+            self._bootstrapped = True
+            buckets: Dict[Tuple[str, str, str], Dict[str, List[Any]]] = {}
+            for (kind, period, agency, item_key), entry in counters.items():
+                buckets.setdefault((kind, period, agency), {})[item_key] = entry
+            self._buckets = buckets
+            self._loaded_at = time.monotonic()
+            self._dirty = False
+
+    def top(
+        self,
+        kind: str,
+        k: int = 5,
+        by: str = 'pax',
+        period: Optional[str] = None,
+        agency: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        En yüksek k kayıt. period (YYYY-MM) ya da agency verilmezse o boyutta toplanır.
+        Seçilen bucket'lardaki n kayıt için O(n log k).
+        """
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(KINDS)}")
+        if by not in METRICS:
+            raise ValueError(f"by must be one of: {', '.join(METRICS)}")
+        self._refresh()
+        buckets = [
+            items for (bucket_kind, bucket_period, bucket_agency), items in self._buckets.items()
+            if bucket_kind == kind
+            and (period is None or bucket_period == period)
+            and (agency is None or bucket_agency == agency)
+        ]
+        if len(buckets) == 1:
+            totals = buckets[0]
+        else:
+            totals: Dict[str, List[Any]] = {}
+            for items in buckets:
+                for item_key, (label, pax, reservations) in items.items():
+                    entry = totals.setdefault(item_key, [label, 0, 0])
+                    entry[1] += pax
+                    entry[2] += reservations
+        metric = 1 if by == 'pax' else 2
+        # Eşitlikte ada göre artan sıra
+        best = heapq.nsmallest(k, totals.items(), key=lambda item: (-item[1][metric], item[0]))
+        return [
+            {'key': item_key, 'label': label, 'pax': pax, 'reservations': reservations}
+            for item_key, (label, pax, reservations) in best
+        ]
+
+
+ranking_index = RankingIndex(engine)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check'
+    if command == 'rebuild':
+        print(ranking_index.rebuild())
+    else:
+        report = ranking_index.check()
+        print(f"{'✅' if report['consistent'] else '❌'} {report['counters']} counters, {len(report['differences'])} differences")
+        for difference in report['differences']:
+            print(difference)
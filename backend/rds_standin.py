@@ -0,0 +1,91 @@
+"""
+RDS Restore Stand-in
+msdb.dbo.rds_restore_database / rds_fn_task_status için yerel, bellek içi taklit.
+Gerçek RDS olmadan restore job akışını (ilerleme, başarı, hata) denemek için
+RESTORE_BACKEND=standin ile kullanılır. restore_service ile aynı fonksiyon
+imzalarını ve dönüş şekillerini sağlar.
+"""
+import itertools
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+# Sahte restore süresi (saniye)
+RDS_STANDIN_DURATION = float(os.environ.get('RDS_STANDIN_DURATION', '30'))
+
+
+class RDSStandIn:
+    """
+    Task'lar zamanla ilerler: CREATED -> IN_PROGRESS -> SUCCESS.
+    s3_key içinde 'fail' geçen task'lar %50'de ERROR ile biter.
+    """
+
+    def __init__(self, duration: float = RDS_STANDIN_DURATION):
+        self.duration = duration
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._tasks: Dict[int, Dict] = {}
+
+    def start_restore(self, s3_key: str, target_db_name: str = 'DIOGENESSEJOUR'):
+        s3_arn = f"arn:aws:s3:::standin/{s3_key}"
+        with self._lock:
+            task_id = next(self._ids)
+            self._tasks[task_id] = {
+                "task_id": task_id,
+                "database_name": target_db_name,
+                "s3_key": s3_key,
+                "created_at": datetime.now(),
+                "started": time.monotonic(),
+            }
+        return {
+            "success": True,
+            "task_id": task_id,
+            "message": f"Restore started for {target_db_name}",
+            "s3_arn": s3_arn,
+            "target_db": target_db_name
+        }
+
+    def _snapshot(self, task: Dict) -> Dict:
+        elapsed = time.monotonic() - task['started']
+        percent = min(100, int(elapsed / self.duration * 100)) if self.duration > 0 else 100
+        fails = 'fail' in task['s3_key'].lower()
+
+        if fails and percent >= 50:
+            percent, lifecycle, info = 50, 'ERROR', 'Simulated restore failure'
+        elif percent >= 100:
+            lifecycle, info = 'SUCCESS', 'Restore completed'
+        elif percent == 0:
+            lifecycle, info = 'CREATED', None
+        else:
+            lifecycle, info = 'IN_PROGRESS', f"{percent} percent processed."
+
+        return {
+            "task_id": task['task_id'],
+            "task_type": 'RESTORE_DB',
+            "database_name": task['database_name'],
+            "percent_complete": percent,
+            "lifecycle": lifecycle,
+            "task_info": info,
+            "created_at": str(task['created_at']),
+            "updated_at": str(datetime.now())
+        }
+
+    def check_restore_status(self, task_id: Optional[int] = None):
+        with self._lock:
+            if task_id:
+                tasks = [self._tasks[task_id]] if task_id in self._tasks else []
+            else:
+                tasks = sorted(self._tasks.values(), key=lambda t: t['task_id'], reverse=True)[:10]
+            snapshots = [self._snapshot(task) for task in tasks]
+        return {
+            "success": True,
+            "tasks": snapshots,
+            "count": len(snapshots)
+        }
+
+
+standin = RDSStandIn()
+start_restore = standin.start_restore
+check_restore_status = standin.check_restore_status
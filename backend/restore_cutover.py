@@ -0,0 +1,106 @@
+"""
+Shadow Restore & Cut-over
+Blue/green restore: yedek önce gölge (shadow) bir database adına restore edilir,
+doğrulanıp ısıtıldıktan sonra diogenes_service'in kullandığı database adı
+atomik olarak değiştirilir. Önceki kopya geri dönüş (rollback) için saklanır.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from db_executor import run_db
+from diogenes_service import DIOGENES_DATABASE, activate_database, get_database_state
+from query_cache import table_versions
+from restore_service import get_connection
+from restore_warmup import warmup_pipeline
+
+logger = logging.getLogger(__name__)
+
+# Cut-over öncesi var olması ve boş olmaması gereken tablolar
+REQUIRED_TABLES: List[str] = ['Otel', 'Musteri', 'MusteriOpr']
+# Cut-over sonrası çalıştırılacak (aktif database'e bağlı) warm-up adımları
+POST_CUTOVER_STEPS: List[str] = ['rebuild_panel_cache']
+
+
+class CutoverError(Exception):
+    """Shadow database doğrulamadan geçemediğinde fırlatılır"""
+
+
+def shadow_database_name(logical_name: str = DIOGENES_DATABASE) -> str:
+    """Restore için benzersiz gölge database adı (ör. DIOGENESSEJOUR_20260301_0415)"""
+    return f"{logical_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+
+def validate_database(database_name: str) -> Dict[str, Any]:
+    """Database ONLINE mı ve zorunlu tablolar dolu mu kontrol et"""
+    problems = []
+    tables = {}
+
+    conn = get_connection('master')
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT state_desc FROM sys.databases WHERE name = %s", (database_name,))
+        row = cursor.fetchone()
+    finally:
+        conn.close()
+
+    state = row[0] if row else None
+    if state != 'ONLINE':
+        problems.append(f"Database state is {state or 'MISSING'}")
+    else:
+        conn = get_connection(database_name)
+        try:
+            cursor = conn.cursor()
+            for table in REQUIRED_TABLES:
+                cursor.execute("""
+                    SELECT SUM(p.rows) FROM sys.partitions p
+                    WHERE p.object_id = OBJECT_ID(%s) AND p.index_id IN (0, 1)
+                """, (f"dbo.{table}",))
+                rows = cursor.fetchone()[0]
+                tables[table] = rows
+                if rows is None:
+                    problems.append(f"Table {table} is missing")
+                elif rows == 0:
+                    problems.append(f"Table {table} is empty")
+        finally:
+            conn.close()
+
+    return {
+        'database': database_name,
+        'state': state,
+        'valid': not problems,
+        'tables': tables,
+        'problems': problems,
+    }
+
+
+async def cut_over(database_name: str, drain_timeout: float = 30.0) -> Dict[str, Any]:
+    """
+    Doğrulanan database'i aktif yap, panel cache'ini geçersiz kıl ve yeniden doldur.
+
+    Raises:
+        CutoverError: Database doğrulamadan geçemezse (aktif database değişmez)
+    """
+    validation = await run_db(validate_database, database_name)
+    if not validation['valid']:
+        raise CutoverError(f"{database_name} failed validation: {'; '.join(validation['problems'])}")
+
+    switch = await run_db(activate_database, database_name, drain_timeout, deadline=None)
+    # Cache anahtarları mantıksal ada bağlı - fiziksel database değişti
+    table_versions.bump_prefix(f"{DIOGENES_DATABASE}.")
+    warmup = await run_db(warmup_pipeline.run, database_name, POST_CUTOVER_STEPS, deadline=None)
+
+    return {
+        'validation': validation,
+        'switch': switch,
+        'warmup': warmup,
+    }
+
+
+async def rollback(drain_timeout: float = 30.0) -> Dict[str, Any]:
+    """Bir önceki database kopyasına geri dön"""
+    previous = get_database_state()['previous']
+    if not previous:
+        raise CutoverError("No previous database to roll back to")
+    logger.warning(f"Rolling back active DIOGENES database to {previous}")
+    return await cut_over(previous, drain_timeout)
@@ -0,0 +1,298 @@
+"""
+Restore Job Manager
+RDS restore işlemlerini arka planda takip edilen job'lar olarak çalıştırır.
+Task durumu event loop'u bloklamadan (asyncio.sleep + run_db) poll edilir,
+job kayıtları yerel JSON dosyasında saklanır ve ilerleme abonelere
+(Server-Sent Events) yayınlanır.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from db_executor import run_db
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+
+RESTORE_JOBS_FILE = Path(os.environ.get('RESTORE_JOBS_FILE', str(ROOT_DIR / 'restore_jobs.json')))
+RESTORE_POLL_INTERVAL = float(os.environ.get('RESTORE_POLL_INTERVAL', '10'))
+# Bu süreyi aşan job 'stalled' işaretlenir ama takip edilmeye devam eder; büyük
+# restore'lar RDS tarafında 20 dakikadan uzun sürebilir
+RESTORE_JOB_TIMEOUT = float(os.environ.get('RESTORE_JOB_TIMEOUT', '1200'))
+# Art arda bu kadar status sorgusu başarısız olursa job ERROR'a düşer
+RESTORE_POLL_MAX_ERRORS = int(os.environ.get('RESTORE_POLL_MAX_ERRORS', '5'))
+# Registry'de tutulacak en fazla job sayısı (eski bitmiş job'lar atılır)
+RESTORE_JOBS_KEEP = int(os.environ.get('RESTORE_JOBS_KEEP', '100'))
+
+# Eski sürümlerin yazdığı 'TIMEOUT' terminal değildir: RDS task'ı hâlâ sürüyor
+# olabilir, resume() bu job'ları da takibe alır
+TERMINAL_STATUSES = {'SUCCESS', 'ERROR', 'FAILED', 'CANCELLED'}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class RestoreJobManager:
+    """
+    Restore job registry'si.
+
+    start_fn / status_fn restore_service.start_restore / check_restore_status
+    (veya rds_standin) ile aynı imzaya sahip senkron fonksiyonlardır.
+    """
+
+    def __init__(
+        self,
+        start_fn: Callable[..., Dict],
+        status_fn: Callable[..., Dict],
+        state_path: Path = RESTORE_JOBS_FILE,
+        poll_interval: float = RESTORE_POLL_INTERVAL,
+        timeout: float = RESTORE_JOB_TIMEOUT
+    ):
+        self.start_fn = start_fn
+        self.status_fn = status_fn
+        self.state_path = Path(state_path)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._file_lock = threading.Lock()
+        self._pollers: Dict[str, asyncio.Task] = {}
+        self._done: Dict[str, asyncio.Event] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._success_hooks: List[Callable[[Dict], Awaitable[Any]]] = []
+
+    # ==================== PERSISTENCE ====================
+
+    def load(self):
+        """Kayıtlı job'ları dosyadan yükle"""
+        if not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+            self._jobs = {job['job_id']: job for job in jobs}
+            logger.info(f"Loaded {len(self._jobs)} restore jobs from {self.state_path}")
+        except Exception as e:
+            logger.error(f"Failed to load restore jobs from {self.state_path}: {e}")
+
+    def _save(self):
+        jobs = sorted(self._jobs.values(), key=lambda job: job['created_at'])
+        finished = [job for job in jobs if job['status'] in TERMINAL_STATUSES]
+        for job in finished[:max(0, len(jobs) - RESTORE_JOBS_KEEP)]:
+            self._jobs.pop(job['job_id'], None)
+            jobs.remove(job)
+
+        with self._file_lock:
+            tmp_path = self.state_path.with_suffix('.tmp')
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(jobs, f, ensure_ascii=False, indent=2, default=str)
+                os.replace(tmp_path, self.state_path)
+            except Exception as e:
+                logger.error(f"Failed to persist restore jobs: {e}")
+
+    # ==================== REGISTRY ====================
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def find_by_task(self, task_id: int) -> Optional[Dict[str, Any]]:
+        for job in self._jobs.values():
+            if job.get('task_id') == task_id:
+                return dict(job)
+        return None
+
+    def list(self, limit: int = 10) -> List[Dict[str, Any]]:
+        jobs = sorted(self._jobs.values(), key=lambda job: job['created_at'], reverse=True)
+        return [dict(job) for job in jobs[:limit]]
+
+    def on_success(self, hook: Callable[[Dict], Awaitable[Any]]):
+        """Restore SUCCESS olduğunda çağrılacak async hook ekle"""
+        self._success_hooks.append(hook)
+        return hook
+
+    def annotate(self, job_id: str, **fields):
+        """Job kaydına ek bilgi yaz (ör. warm-up raporu) ve abonelere yayınla"""
+        if job_id in self._jobs:
+            self._update(job_id, **fields)
+
+    def _update(self, job_id: str, **fields):
+        job = self._jobs[job_id]
+        job.update(fields)
+        job['updated_at'] = _now()
+        if job['status'] in TERMINAL_STATUSES and not job.get('finished_at'):
+            job['finished_at'] = job['updated_at']
+        self._save()
+        self._publish(job_id)
+
+    # ==================== JOB LIFECYCLE ====================
+
+    async def submit(
+        self,
+        s3_key: str,
+        target_db_name: str,
+        requested_by: Optional[str] = None,
+        **extra
+    ) -> Dict[str, Any]:
+        """Restore'u başlat ve arka planda takibe al (extra alanlar job kaydına eklenir)"""
+        result = await run_db(self.start_fn, s3_key, target_db_name)
+        if not result.get('success'):
+            return result
+
+        job_id = str(uuid.uuid4())
+        self._jobs[job_id] = {
+            'job_id': job_id,
+            'task_id': result.get('task_id'),
+            's3_key': s3_key,
+            's3_arn': result.get('s3_arn'),
+            'target_db': target_db_name,
+            'requested_by': requested_by,
+            'status': 'CREATED',
+            'lifecycle': None,
+            'percent_complete': 0,
+            'task_info': None,
+            'error': None,
+            'stalled': False,
+            'created_at': _now(),
+            'updated_at': _now(),
+            'finished_at': None,
+            **extra,
+        }
+        self._save()
+        self._start_polling(job_id)
+        logger.info(f"Restore job {job_id} started (task {result.get('task_id')}, target {target_db_name})")
+        return {**result, 'success': True, 'job': self.get(job_id)}
+
+    def resume(self):
+        """Process yeniden başladığında yarım kalan job'ların takibine devam et"""
+        for job_id, job in self._jobs.items():
+            if job['status'] not in TERMINAL_STATUSES and job.get('task_id'):
+                logger.info(f"Resuming restore job {job_id} (task {job['task_id']})")
+                if job['status'] == 'TIMEOUT':
+                    job.update(status=job.get('lifecycle') or 'CREATED', stalled=True, error=None, finished_at=None)
+                self._start_polling(job_id)
+
+    def _start_polling(self, job_id: str):
+        self._done.setdefault(job_id, asyncio.Event())
+        self._pollers[job_id] = asyncio.create_task(self._poll(job_id))
+
+    async def _poll(self, job_id: str):
+        job = self._jobs[job_id]
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        errors = 0
+        try:
+            while True:
+                if not job.get('stalled') and loop.time() - started > self.timeout:
+                    # Yavaş task hata değildir; bildir ve poll etmeye devam et
+                    logger.warning(f"Restore job {job_id} not finished after {int(self.timeout)}s, still polling")
+                    self._update(job_id, stalled=True)
+
+                try:
+                    status = await run_db(self.status_fn, job['task_id'])
+                except Exception as e:
+                    status = {'success': False, 'message': str(e)}
+
+                if not status.get('success') or not status.get('tasks'):
+                    errors += 1
+                    message = status.get('message') or 'Task not found'
+                    logger.warning(f"Restore job {job_id} status check failed ({errors}): {message}")
+                    if errors >= RESTORE_POLL_MAX_ERRORS:
+                        self._update(job_id, status='ERROR', error=message)
+                        return
+                else:
+                    errors = 0
+                    task = status['tasks'][0]
+                    lifecycle = task.get('lifecycle')
+                    self._update(
+                        job_id,
+                        status=lifecycle or job['status'],
+                        lifecycle=lifecycle,
+                        percent_complete=task.get('percent_complete') or job['percent_complete'],
+                        task_info=task.get('task_info'),
+                    )
+                    if lifecycle in TERMINAL_STATUSES:
+                        if lifecycle == 'SUCCESS':
+                            await self._run_success_hooks(job_id)
+                        return
+
+                await asyncio.sleep(self.poll_interval)
+        except asyncio.CancelledError:
+            # Shutdown - job dosyada açık kalır, sonraki açılışta resume edilir
+            raise
+        except Exception as e:
+            logger.error(f"Restore job {job_id} poller crashed: {e}")
+            self._update(job_id, status='ERROR', error=str(e))
+        finally:
+            self._pollers.pop(job_id, None)
+            if self._jobs.get(job_id, {}).get('status') in TERMINAL_STATUSES:
+                self._done[job_id].set()
+
+    async def _run_success_hooks(self, job_id: str):
+        for hook in self._success_hooks:
+            try:
+                await hook(self.get(job_id))
+            except Exception as e:
+                logger.error(f"Restore success hook {getattr(hook, '__name__', hook)} failed: {e}")
+
+    async def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Job bitene kadar (ya da timeout'a kadar) bekle - worker thread bloklanmaz"""
+        event = self._done.get(job_id)
+        if event is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(event.wait()), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.get(job_id)
+
+    def shutdown(self):
+        for task in list(self._pollers.values()):
+            task.cancel()
+
+    # ==================== PROGRESS STREAMING ====================
+
+    def _publish(self, job_id: str):
+        snapshot = self.get(job_id)
+        for queue in self._subscribers.get(job_id, []):
+            queue.put_nowait(snapshot)
+
+    async def subscribe(self, job_id: str, keepalive: Optional[float] = None) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        Job'un güncel halini ve sonraki her değişikliği terminal duruma kadar yayınla.
+        keepalive verilirse bu süre boyunca değişiklik olmadığında None üretilir.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+        try:
+            snapshot = self.get(job_id)
+            while snapshot is not None:
+                yield snapshot
+                if snapshot['status'] in TERMINAL_STATUSES:
+                    return
+                while True:
+                    try:
+                        snapshot = await asyncio.wait_for(queue.get(), keepalive)
+                        break
+                    except asyncio.TimeoutError:
+                        yield None
+        finally:
+            self._subscribers[job_id].remove(queue)
+            if not self._subscribers[job_id]:
+                self._subscribers.pop(job_id, None)
+
+
+async def sse_events(manager: RestoreJobManager, job_id: str, keepalive: float = 15.0) -> AsyncIterator[str]:
+    """Job ilerlemesini text/event-stream formatında üret (proxy'ler için keepalive yorumlarıyla)"""
+    async for job in manager.subscribe(job_id, keepalive=keepalive):
+        if job is None:
+            yield ": keepalive\n\n"
+        else:
+            yield f"event: progress\ndata: {json.dumps(job, default=str)}\n\n"
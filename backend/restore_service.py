@@ -18,13 +18,14 @@ SQL_SERVER_HOST = os.environ['SQL_SERVER_HOST']
 SQL_SERVER_PORT = int(os.environ['SQL_SERVER_PORT'])
 SQL_SERVER_USER = os.environ['SQL_SERVER_USER']
 SQL_SERVER_PASSWORD = os.environ['SQL_SERVER_PASSWORD']
+SQL_QUERY_TIMEOUT = int(float(os.environ.get('DB_QUERY_TIMEOUT', '60')))
 
 # AWS details
 AWS_S3_BUCKET = os.environ['AWS_S3_BUCKET']
 AWS_IAM_ROLE_ARN = os.environ['AWS_IAM_ROLE_ARN']
 
 
-def get_connection(database='master'):
+def get_connection(database='master', timeout: int = SQL_QUERY_TIMEOUT):
     """Create SQL Server connection"""
     return pymssql.connect(
         server=SQL_SERVER_HOST,
@@ -32,7 +33,9 @@ def get_connection(database='master'):
         password=SQL_SERVER_PASSWORD,
         database=database,
         port=SQL_SERVER_PORT,
-        autocommit=True
+        autocommit=True,
+        timeout=timeout,  # Per-query deadline (seconds)
+        login_timeout=15
     )
 
 
@@ -117,40 +120,22 @@ def check_restore_status(task_id: int = None):
         conn = get_connection('master')
         cursor = conn.cursor(as_dict=True)
         
-        # Query restore task status using AWS RDS function
-        if task_id:
-            sql = """
-            SELECT TOP 10
-                task_id,
-                task_type,
-                database_name,
-                '%' as [percent_complete],
-                lifecycle,
-                task_info,
-                created_at,
-                last_updated
-            FROM msdb.dbo.rds_fn_task_status(NULL, 0)
-            WHERE task_id = %s
-            ORDER BY created_at DESC
-            """
-            cursor.execute(sql, (task_id,))
-        else:
-            # Get all restore tasks
-            sql = """
-            SELECT TOP 10
-                task_id,
-                task_type,
-                database_name,
-                '%' as [percent_complete],
-                lifecycle,
-                task_info,
-                created_at,
-                last_updated
-            FROM msdb.dbo.rds_fn_task_status(NULL, 0)
-            WHERE task_type = 'RESTORE_DB'
-            ORDER BY created_at DESC
-            """
-            cursor.execute(sql)
+        # rds_fn_task_status(db_name, task_id) - task_id 0 returns all tasks
+        sql = """
+        SELECT TOP 10
+            task_id,
+            task_type,
+            database_name,
+            [%% complete] AS percent_complete,
+            lifecycle,
+            task_info,
+            created_at,
+            last_updated
+        FROM msdb.dbo.rds_fn_task_status(NULL, %s)
+        WHERE task_type = 'RESTORE_DB'
+        ORDER BY created_at DESC
+        """
+        cursor.execute(sql, (task_id or 0,))
         
         tasks = []
         for row in cursor:
@@ -158,6 +143,7 @@ def check_restore_status(task_id: int = None):
                 "task_id": row['task_id'],
                 "task_type": row['task_type'],
                 "database_name": row['database_name'],
+                "percent_complete": row['percent_complete'],
                 "lifecycle": row['lifecycle'],
                 "task_info": row['task_info'],
                 "created_at": str(row['created_at']) if row['created_at'] else None,
@@ -359,13 +345,14 @@ def get_table_schema(database_name: str, table_name: str, schema_name: str = 'db
             c.is_nullable,
             c.is_identity,
             CASE WHEN pk.column_id IS NOT NULL THEN 1 ELSE 0 END AS is_primary_key,
+            pk.key_ordinal AS primary_key_ordinal,
             CASE WHEN fk.parent_column_id IS NOT NULL THEN 1 ELSE 0 END AS is_foreign_key,
             fk_ref.referenced_table AS foreign_key_table,
             fk_ref.referenced_column AS foreign_key_column
         FROM sys.columns c
         INNER JOIN sys.types t ON c.user_type_id = t.user_type_id
         LEFT JOIN (
-            SELECT ic.object_id, ic.column_id
+            SELECT ic.object_id, ic.column_id, ic.key_ordinal
             FROM sys.index_columns ic
             INNER JOIN sys.indexes i ON ic.object_id = i.object_id AND ic.index_id = i.index_id
             WHERE i.is_primary_key = 1
@@ -397,6 +384,7 @@ def get_table_schema(database_name: str, table_name: str, schema_name: str = 'db
                 "is_nullable": bool(row['is_nullable']),
                 "is_identity": bool(row['is_identity']),
                 "is_primary_key": bool(row['is_primary_key']),
+                "primary_key_ordinal": row['primary_key_ordinal'],
                 "is_foreign_key": bool(row['is_foreign_key']),
                 "foreign_key_table": row['foreign_key_table'],
                 "foreign_key_column": row['foreign_key_column']
@@ -422,73 +410,6 @@ def get_table_schema(database_name: str, table_name: str, schema_name: str = 'db
         }
 
 
-def get_table_data(database_name: str, table_name: str, schema_name: str = 'dbo', page: int = 1, page_size: int = 100):
-    """Get paginated data from a table"""
-    try:
-        conn = get_connection(database_name)
-        cursor = conn.cursor(as_dict=True)
-        
-        # Calculate offset
-        offset = (page - 1) * page_size
-        
-        # Get total count
-        count_sql = f"SELECT COUNT(*) as total FROM [{schema_name}].[{table_name}]"
-        cursor.execute(count_sql)
-        total_rows = cursor.fetchone()['total']
-        
-        # Get paginated data
-        data_sql = f"""
-        SELECT * FROM [{schema_name}].[{table_name}]
-        ORDER BY (SELECT NULL)
-        OFFSET {offset} ROWS
-        FETCH NEXT {page_size} ROWS ONLY
-        """
-        
-        cursor.execute(data_sql)
-        rows = cursor.fetchall()
-        
-        # Convert datetime objects to strings
-        data = []
-        for row in rows:
-            row_dict = {}
-            for key, value in row.items():
-                if isinstance(value, datetime):
-                    row_dict[key] = value.isoformat()
-                elif value is None:
-                    row_dict[key] = None
-                else:
-                    row_dict[key] = str(value)
-            data.append(row_dict)
-        
-        cursor.close()
-        conn.close()
-        
-        total_pages = (total_rows + page_size - 1) // page_size
-        
-        return {
-            "success": True,
-            "database": database_name,
-            "table": table_name,
-            "schema": schema_name,
-            "data": data,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_rows": total_rows,
-                "total_pages": total_pages,
-                "has_next": page < total_pages,
-                "has_prev": page > 1
-            }
-        }
-        
-    except Exception as e:
-        print(f"❌ Error getting table data: {e}")
-        return {
-            "success": False,
-            "message": str(e)
-        }
-
-
 if __name__ == "__main__":
     # Test connection
     print("Testing SQL Server connection...")
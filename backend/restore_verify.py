@@ -0,0 +1,243 @@
+"""
+Restore Verification
+Bir database'in tüm tabloları için satır sayısı + CHECKSUM_AGG değerlerini
+sınırlı sayıda paralel bağlantıyla hesaplar, sonucu snapshot olarak saklar ve
+önceki snapshot'a (ya da verilen manifest'e) göre fark raporu üretir.
+"""
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from db_executor import run_db
+from restore_service import get_connection
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+
+VERIFY_PARALLELISM = int(os.environ.get('VERIFY_PARALLELISM', '8'))
+# Büyük tablolarda checksum taraması DB_QUERY_TIMEOUT'tan uzun sürebilir
+VERIFY_QUERY_TIMEOUT = int(os.environ.get('VERIFY_QUERY_TIMEOUT', '900'))
+VERIFY_DIR = Path(os.environ.get('VERIFY_DIR', str(ROOT_DIR / 'verification')))
+# Bellekte tutulacak son doğrulama job sayısı
+VERIFY_JOBS_KEEP = 20
+
+_SHADOW_SUFFIX = re.compile(r'_\d{8}_\d{6}$')
+
+
+def snapshot_key(database_name: str) -> str:
+    """Shadow kopyalar (DIOGENESSEJOUR_20260301_041500) mantıksal adla eşleşir"""
+    return _SHADOW_SUFFIX.sub('', database_name)
+
+
+# ==================== FINGERPRINTS ====================
+
+def list_tables(database_name: str) -> List[Dict[str, Any]]:
+    """Tablolar ve yaklaşık satır sayıları (sys.partitions - tarama yapmaz)"""
+    conn = get_connection(database_name)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.name, t.name, SUM(p.rows)
+            FROM sys.tables t
+            INNER JOIN sys.schemas s ON t.schema_id = s.schema_id
+            INNER JOIN sys.partitions p ON t.object_id = p.object_id AND p.index_id IN (0, 1)
+            WHERE t.is_ms_shipped = 0
+            GROUP BY s.name, t.name
+        """)
+        return [{'schema': row[0], 'table': row[1], 'approx_rows': row[2] or 0} for row in cursor.fetchall()]
+    finally:
+        conn.close()
+
+
+def table_fingerprint(database_name: str, schema_name: str, table_name: str) -> Dict[str, Any]:
+    """Tek tablo için kesin satır sayısı ve aggregate checksum"""
+    started = time.perf_counter()
+    conn = get_connection(database_name, timeout=VERIFY_QUERY_TIMEOUT)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT COUNT_BIG(*), CHECKSUM_AGG(BINARY_CHECKSUM(*)) "
+            f"FROM [{schema_name}].[{table_name}] WITH (NOLOCK)"
+        )
+        rows, checksum = cursor.fetchone()
+    finally:
+        conn.close()
+    return {
+        'rows': rows,
+        'checksum': checksum,
+        'duration_ms': round((time.perf_counter() - started) * 1000.0, 1),
+    }
+
+
+def compute_snapshot(database_name: str, parallelism: int = VERIFY_PARALLELISM) -> Dict[str, Any]:
+    """Tüm tabloların fingerprint'ini paralel hesapla (en büyük tablolar önce başlar)"""
+    started = time.perf_counter()
+    tables = sorted(list_tables(database_name), key=lambda t: t['approx_rows'], reverse=True)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix='verify') as pool:
+        futures = {
+            pool.submit(table_fingerprint, database_name, t['schema'], t['table']): f"{t['schema']}.{t['table']}"
+            for t in tables
+        }
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Verification of {database_name}.{name} failed: {e}")
+                errors[name] = str(e)
+
+    return {
+        'database': database_name,
+        'key': snapshot_key(database_name),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+        'duration_ms': round((time.perf_counter() - started) * 1000.0, 1),
+        'parallelism': parallelism,
+        'tables': dict(sorted(results.items())),
+        'errors': errors,
+    }
+
+
+# ==================== SNAPSHOTS ====================
+
+def save_snapshot(snapshot: Dict[str, Any]) -> Path:
+    VERIFY_DIR.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    path = VERIFY_DIR / f"{snapshot['key']}_{stamp}.json"
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2, default=str)
+    return path
+
+
+def latest_snapshot(key: str) -> Optional[Dict[str, Any]]:
+    """Aynı mantıksal database için en son kaydedilen snapshot"""
+    if not VERIFY_DIR.exists():
+        return None
+    candidates = sorted(p for p in VERIFY_DIR.glob(f"{key}_*.json") if snapshot_key(p.stem) == key)
+    if not candidates:
+        return None
+    with open(candidates[-1], 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def diff_snapshots(baseline: Dict[str, Dict[str, Any]], current: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    İki tablo haritasını karşılaştır.
+    Manifest'lerde checksum verilmemişse sadece satır sayısı karşılaştırılır.
+    """
+    added = sorted(set(current) - set(baseline))
+    removed = sorted(set(baseline) - set(current))
+    changed = []
+    unchanged = 0
+    for name in sorted(set(current) & set(baseline)):
+        before, after = baseline[name], current[name]
+        row_delta = (after.get('rows') or 0) - (before.get('rows') or 0)
+        checksum_changed = before.get('checksum') is not None and before.get('checksum') != after.get('checksum')
+        if row_delta or checksum_changed:
+            changed.append({
+                'table': name,
+                'rows_before': before.get('rows'),
+                'rows_after': after.get('rows'),
+                'row_delta': row_delta,
+                'checksum_changed': checksum_changed,
+            })
+        else:
+            unchanged += 1
+    return {
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'unchanged': unchanged,
+        'identical': not (added or removed or changed),
+    }
+
+
+def verify_database(database_name: str, manifest: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Snapshot al, manifest'e ya da önceki snapshot'a göre fark raporu üret ve kaydet.
+
+    Args:
+        manifest: {'schema.table': {'rows': int, 'checksum': int (opsiyonel)}}
+    """
+    key = snapshot_key(database_name)
+    if manifest is not None:
+        baseline, baseline_source = manifest, 'manifest'
+    else:
+        previous = latest_snapshot(key)
+        baseline = previous['tables'] if previous else None
+        baseline_source = f"snapshot {previous['database']} @ {previous['created_at']}" if previous else None
+
+    snapshot = compute_snapshot(database_name)
+    path = save_snapshot(snapshot)
+
+    return {
+        'database': database_name,
+        'snapshot_file': path.name,
+        'table_count': len(snapshot['tables']),
+        'total_rows': sum(t['rows'] or 0 for t in snapshot['tables'].values()),
+        'duration_ms': snapshot['duration_ms'],
+        'errors': snapshot['errors'],
+        'baseline': baseline_source,
+        'diff': diff_snapshots(baseline, snapshot['tables']) if baseline is not None else None,
+    }
+
+
+# ==================== JOBS ====================
+
+class VerificationJobs:
+    """Arka planda çalışan doğrulama job'ları (bellek içi, son VERIFY_JOBS_KEEP adet)"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        # Event loop task'lara sadece zayıf referans tutar; bitene kadar burada saklanır
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, database_name: str, manifest: Optional[Dict] = None) -> Dict[str, Any]:
+        job_id = str(uuid.uuid4())
+        self._jobs[job_id] = {
+            'job_id': job_id,
+            'database': database_name,
+            'status': 'RUNNING',
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'finished_at': None,
+            'report': None,
+            'error': None,
+        }
+        while len(self._jobs) > VERIFY_JOBS_KEEP:
+            self._jobs.pop(next(iter(self._jobs)))
+        task = asyncio.create_task(self._run(job_id, database_name, manifest))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return dict(self._jobs[job_id])
+
+    async def _run(self, job_id: str, database_name: str, manifest: Optional[Dict]):
+        job = self._jobs[job_id]
+        try:
+            job['report'] = await run_db(verify_database, database_name, manifest, deadline=None)
+            job['status'] = 'SUCCESS'
+        except Exception as e:
+            logger.error(f"Verification job {job_id} for {database_name} failed: {e}")
+            job['status'] = 'ERROR'
+            job['error'] = str(e)
+        job['finished_at'] = datetime.now(timezone.utc).isoformat()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [dict(job) for job in reversed(list(self._jobs.values()))]
+
+
+verification_jobs = VerificationJobs()
@@ -0,0 +1,173 @@
+"""
+Post-Restore Warm-up
+Restore biten database üzerinde sırayla çalışan adımlar:
+istatistik güncelleme, gerekli index'lerin (idempotent) oluşturulması,
+sık kullanılan tabloların buffer pool'a okunması ve panel cache'lerinin
+yeniden doldurulması. Her adım için süre raporlanır.
+
+Yeni adımlar warmup_pipeline.step() ile kaydedilir; adım fonksiyonu
+database adını alır ve rapora eklenecek bir detay döndürebilir.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from restore_service import get_connection
+
+logger = logging.getLogger(__name__)
+
+# sp_updatestats / index oluşturma / tam tarama büyük database'lerde dakikalar sürer;
+# kısa panel sorgu süre sınırı (SQL_QUERY_TIMEOUT) yerine bu kullanılır. 0 = sınırsız
+WARMUP_QUERY_TIMEOUT = int(os.environ.get('WARMUP_QUERY_TIMEOUT', '1800'))
+
+# Panel sorgularının ihtiyaç duyduğu index'ler: (tablo, index adı, key kolonları)
+REQUIRED_INDEXES: List[Tuple[str, str, str]] = [
+    ('MusteriOpr', 'IX_MusteriOpr_GirTarih', 'GirTarih DESC'),
+    ('Musteri', 'IX_Musteri_Turop_Voucher', 'Turop, Voucher, Sira'),
+]
+
+# Restore sonrası buffer pool'a okunacak sıcak tablolar
+HOT_TABLES: List[str] = ['Otel', 'MusteriOpr', 'Musteri']
+
+
+class WarmupPipeline:
+    """Sıralı, adım bazında zamanlanan warm-up adımları"""
+
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[str], Any], Optional[Callable[[str], bool]]]] = []
+        self._reports: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def step(self, name: str, when: Optional[Callable[[str], bool]] = None):
+        """
+        Adım kaydeden decorator.
+
+        Args:
+            when: Verilirse adım sadece when(database_name) True olduğunda çalışır
+        """
+        def decorator(fn: Callable[[str], Any]):
+            self._steps.append((name, fn, when))
+            return fn
+        return decorator
+
+    def steps(self) -> List[str]:
+        return [name for name, _, _ in self._steps]
+
+    def run(self, database_name: str, only: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Adımları sırayla çalıştır (senkron - run_db ile çağrılmalı).
+        Bir adımın hatası sonraki adımları durdurmaz.
+
+        Args:
+            only: Verilirse sadece bu isimdeki adımlar çalışır
+        """
+        started_at = datetime.now(timezone.utc)
+        pipeline_start = time.perf_counter()
+        results = []
+
+        for name, fn, when in self._steps:
+            if only is not None and name not in only:
+                continue
+            if when is not None and not when(database_name):
+                results.append({'name': name, 'status': 'skipped', 'duration_ms': 0.0})
+                continue
+            step_start = time.perf_counter()
+            try:
+                detail = fn(database_name)
+                result = {'name': name, 'status': 'success'}
+                if detail is not None:
+                    result['detail'] = detail
+            except Exception as e:
+                logger.error(f"Warm-up step '{name}' failed for {database_name}: {e}")
+                result = {'name': name, 'status': 'failed', 'error': str(e)}
+            result['duration_ms'] = round((time.perf_counter() - step_start) * 1000.0, 1)
+            logger.info(f"Warm-up {database_name}: {name} {result['status']} in {result['duration_ms']}ms")
+            results.append(result)
+
+        report = {
+            'database': database_name,
+            'success': all(r['status'] != 'failed' for r in results),
+            'started_at': started_at.isoformat(),
+            'finished_at': datetime.now(timezone.utc).isoformat(),
+            'total_ms': round((time.perf_counter() - pipeline_start) * 1000.0, 1),
+            'steps': results,
+        }
+        with self._lock:
+            self._reports[database_name] = report
+        return report
+
+    def last_reports(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return dict(self._reports)
+
+
+warmup_pipeline = WarmupPipeline()
+
+
+def _execute(database_name: str, sql: str, params: Optional[tuple] = None, fetch: bool = False):
+    conn = get_connection(database_name, timeout=WARMUP_QUERY_TIMEOUT)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, params)
+        return cursor.fetchall() if fetch else None
+    finally:
+        conn.close()
+
+
+# ==================== BUILT-IN STEPS ====================
+
+@warmup_pipeline.step('update_statistics')
+def update_statistics(database_name: str):
+    """Restore edilen istatistikler eski - sorgu planları için güncelle"""
+    _execute(database_name, "EXEC sp_updatestats")
+
+
+@warmup_pipeline.step('ensure_indexes')
+def ensure_indexes(database_name: str) -> Dict[str, str]:
+    """REQUIRED_INDEXES'i yoksa oluştur (tekrar çalıştırmak güvenli)"""
+    outcome = {}
+    conn = get_connection(database_name, timeout=WARMUP_QUERY_TIMEOUT)
+    try:
+        cursor = conn.cursor()
+        for table, index_name, columns in REQUIRED_INDEXES:
+            cursor.execute(
+                "SELECT 1 FROM sys.indexes WHERE name = %s AND object_id = OBJECT_ID(%s)",
+                (index_name, f"dbo.{table}")
+            )
+            if cursor.fetchone():
+                outcome[index_name] = 'exists'
+                continue
+            cursor.execute("SELECT OBJECT_ID(%s)", (f"dbo.{table}",))
+            if cursor.fetchone()[0] is None:
+                outcome[index_name] = 'table missing'
+                continue
+            cursor.execute(
+                f"CREATE NONCLUSTERED INDEX [{index_name}] ON [dbo].[{table}] ({columns}) "
+                f"WITH (SORT_IN_TEMPDB = ON)"
+            )
+            outcome[index_name] = 'created'
+    finally:
+        conn.close()
+    return outcome
+
+
+@warmup_pipeline.step('preread_hot_tables')
+def preread_hot_tables(database_name: str) -> Dict[str, int]:
+    """Sıcak tabloları tam tarayarak data page'lerini buffer pool'a yükle"""
+    row_counts = {}
+    conn = get_connection(database_name, timeout=WARMUP_QUERY_TIMEOUT)
+    try:
+        cursor = conn.cursor()
+        for table in HOT_TABLES:
+            cursor.execute("SELECT OBJECT_ID(%s)", (f"dbo.{table}",))
+            if cursor.fetchone()[0] is None:
+                continue
+            # BINARY_CHECKSUM(*) tüm kolonları okutur - sadece narrow index taranmaz
+            cursor.execute(f"SELECT COUNT_BIG(*), CHECKSUM_AGG(BINARY_CHECKSUM(*)) FROM [dbo].[{table}]")
+            row_counts[table] = cursor.fetchone()[0]
+    finally:
+        conn.close()
+    return row_counts
@@ -0,0 +1,156 @@
+"""
+Row Mapper
+Result set'leri (tuple) kolon pozisyonlarına göre önceden derlenmiş eşleme ile
+dict listesine çevirir ve doğrudan JSON byte'larına serialize eder.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson opsiyonel - yoksa stdlib json kullanılır
+    orjson = None
+
+
+class Const:
+    """Her satır için sabit değer üreten kaynak"""
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class RowMapper:
+    """
+    Cursor tuple'larını önceden hesaplanmış kolon pozisyonlarıyla dict'e çevirir.
+
+    fields: (output_key, source) listesi. source şunlardan biri olabilir:
+        - 'Kolon'                 -> ham değer
+        - (batch_fn, 'K1', 'K2')  -> batch_fn(kolon1_listesi, kolon2_listesi) -> liste
+        - Const(value)            -> sabit değer
+    Dönüşümler satır satır değil kolon bazında (batch) uygulanır.
+    """
+
+    def __init__(self, fields: Sequence[Tuple[str, Any]]):
+        self.fields = list(fields)
+        self.keys = tuple(key for key, _ in self.fields)
+        self._plans: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def _compile(self, column_names: Tuple[str, ...]) -> List[Any]:
+        positions = {name: index for index, name in enumerate(column_names)}
+        plan = []
+        for key, source in self.fields:
+            if isinstance(source, Const):
+                plan.append(('const', source.value, None))
+            elif isinstance(source, tuple):
+                batch_fn, *columns = source
+                plan.append(('batch', batch_fn, [positions[c] for c in columns]))
+            else:
+                plan.append(('column', positions[source], None))
+        return plan
+
+    def plan_for(self, description) -> List[Any]:
+        """cursor.description için derlenmiş planı döndür (kolon seti başına bir kez derlenir)"""
+        column_names = tuple(col[0] for col in description)
+        plan = self._plans.get(column_names)
+        if plan is None:
+            plan = self._compile(column_names)
+            self._plans[column_names] = plan
+        return plan
+
+    def map_rows(self, description, rows: Sequence[tuple]) -> List[Dict[str, Any]]:
+        """Tuple satırlarını dict listesine çevir"""
+        if not rows:
+            return []
+
+        plan = self.plan_for(description)
+        count = len(rows)
+        columns = []
+        for kind, value, positions in plan:
+            if kind == 'column':
+                columns.append([row[value] for row in rows])
+            elif kind == 'const':
+                columns.append([value] * count)
+            else:
+                sources = [[row[pos] for row in rows] for pos in positions]
+                columns.append(value(*sources))
+
+        keys = self.keys
+        return [dict(zip(keys, values)) for values in zip(*columns)]
+
+    def map_row(self, description, row: tuple) -> Dict[str, Any]:
+        """Tek satırı dict'e çevir"""
+        return self.map_rows(description, [row])[0]
+
+
+# ==================== BATCH CONVERTERS ====================
+
+def format_dates(values: Sequence[Any], fmt: str = '%Y-%m-%d') -> List[str]:
+    """Tarih kolonunu tek geçişte string'e çevir (tekrar eden tarihler bir kez formatlanır)"""
+    cache: Dict[Any, str] = {}
+    result = []
+    append = result.append
+    for value in values:
+        if not value:
+            append('')
+            continue
+        text = cache.get(value)
+        if text is None:
+            text = value.strftime(fmt)
+            cache[value] = text
+        append(text)
+    return result
+
+
+@lru_cache(maxsize=4096)
+def parse_stars(kategori: str) -> int:
+    """Kategori'den yıldız sayısını çıkar (örn: "5 YILDIZ" -> 5)"""
+    if not kategori:
+        return 0
+    if 'YILDIZ' in kategori or 'STAR' in kategori.upper():
+        try:
+            return int(''.join(filter(str.isdigit, kategori.split()[0])))
+        except (ValueError, IndexError):
+            return 0
+    return 0
+
+
+def stars_column(values: Sequence[Any]) -> List[int]:
+    """Kategori kolonunu yıldız sayılarına çevir"""
+    return [parse_stars(value) for value in values]
+
+
+def join_columns(separator: str = '-') -> Callable[..., List[str]]:
+    """Birden fazla kolonu separator ile birleştiren batch converter üret"""
+    def _join(*columns):
+        return [separator.join('' if v is None else str(v) for v in values) for values in zip(*columns)]
+    return _join
+
+
+# ==================== JSON ====================
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.hex()
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """Objeyi doğrudan JSON byte'larına serialize et"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Any) -> Any:
+    """JSON string/byte'larını parse et"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
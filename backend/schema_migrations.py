@@ -0,0 +1,438 @@
+"""
+Schema Migrations
+diogenesDB şeması için versiyonlu migration'lar. Uygulanan versiyonlar
+schema_migrations tablosunda tutulur; her migration bir kez çalışır.
+
+    python schema_migrations.py status
+    python schema_migrations.py run [hedef_versiyon]
+
+Uygulama (server startup'ı, admin endpoint'i ya da bu komut) sp_getapplock ile
+alınan bir kilit altında yapılır; aynı anda başlayan worker'lardan sadece biri
+migration çalıştırır, diğerleri kilidi bekleyip bekleyen migration bulamaz.
+Startup'ta çalıştırmak RUN_MIGRATIONS_ON_STARTUP=false ile kapatılabilir.
+
+Migration fonksiyonları engine alır ve transaction'larını kendileri yönetir;
+uzun backfill'ler batch'ler halinde commit edilir ve yarıda kalırsa kaldığı
+yerden devam eder. Index'ler destekleyen sürümlerde (Enterprise/Developer,
+Azure SQL) ONLINE = ON ile oluşturulup düşürülür; tablo kilitlenmez.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Float, Integer, MetaData, String, Table, select, text
+
+from date_parsing import parse_date, parse_time
+from row_mapper import loads
+from sql_models import Base, engine
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_BATCH_SIZE = int(os.environ.get('MIGRATION_BATCH_SIZE', '5000'))
+RUN_MIGRATIONS_ON_STARTUP = os.environ.get('RUN_MIGRATIONS_ON_STARTUP', 'true').lower() != 'false'
+MIGRATION_LOCK_NAME = os.environ.get('MIGRATION_LOCK_NAME', 'diogenesDB.schema_migrations')
+# Başka bir worker migration çalıştırırken en fazla bu kadar beklenir
+MIGRATION_LOCK_TIMEOUT_MS = int(os.environ.get('MIGRATION_LOCK_TIMEOUT_MS', '600000'))
+
+# Panel tablolarından (Base.metadata) ayrı tutulur; yedeklere girmez
+migration_metadata = MetaData()
+schema_migrations_table = Table(
+    'schema_migrations', migration_metadata,
+    Column('version', Integer, primary_key=True, autoincrement=False),
+    Column('name', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+    Column('duration_ms', Float, nullable=False),
+)
+
+
+class MigrationLockError(RuntimeError):
+    """Migration kilidi zaman aşımında alınamadı"""
+
+
+class MigrationRunner:
+    """Versiyon sırasıyla uygulanan migration kaydı"""
+
+    def __init__(self, engine, lock_name: str = MIGRATION_LOCK_NAME, lock_timeout_ms: int = MIGRATION_LOCK_TIMEOUT_MS):
+        self.engine = engine
+        self.lock_name = lock_name
+        self.lock_timeout_ms = lock_timeout_ms
+        self._migrations: Dict[int, Dict[str, Any]] = {}
+        # SQL Server dışındaki engine'lerde (testler) process içi kilit
+        self._local_lock = threading.Lock()
+
+    def migration(self, version: int, name: str):
+        """Migration kaydeden decorator; fn(engine) imzası beklenir"""
+        def decorator(fn: Callable):
+            if version in self._migrations:
+                raise ValueError(f"Duplicate migration version {version}")
+            self._migrations[version] = {'version': version, 'name': name, 'fn': fn}
+            return fn
+        return decorator
+
+    def applied(self) -> Dict[int, Dict[str, Any]]:
+        migration_metadata.create_all(self.engine)
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(schema_migrations_table)).mappings().all()
+        return {row['version']: dict(row) for row in rows}
+
+    def status(self) -> List[Dict[str, Any]]:
+        applied = self.applied()
+        return [
+            {
+                'version': version,
+                'name': entry['name'],
+                'applied_at': applied[version]['applied_at'] if version in applied else None,
+                'duration_ms': applied[version]['duration_ms'] if version in applied else None,
+            }
+            for version, entry in sorted(self._migrations.items())
+        ]
+
+    def pending(self) -> List[Dict[str, Any]]:
+        applied = self.applied()
+        return [entry for version, entry in sorted(self._migrations.items()) if version not in applied]
+
+    @contextmanager
+    def lock(self):
+        """
+        Migration'lar boyunca veritabanı genelinde exclusive kilit.
+        Session'a ait applock kendi bağlantısında tutulur; migration transaction'larından bağımsızdır.
+        """
+        if self.engine.dialect.name != 'mssql':
+            with self._local_lock:
+                yield
+            return
+        with self.engine.connect() as conn:
+            status = conn.execute(text(
+                "DECLARE @result INT; "
+                "EXEC @result = sp_getapplock @Resource = :resource, @LockMode = 'Exclusive', "
+                "@LockOwner = 'Session', @LockTimeout = :timeout; "
+                "SELECT @result"
+            ), {'resource': self.lock_name, 'timeout': self.lock_timeout_ms}).scalar()
+            conn.commit()
+            # 0: hemen alındı, 1: bekledikten sonra alındı; negatifler hata/zaman aşımı
+            if status is None or status < 0:
+                raise MigrationLockError(f"Could not acquire migration lock '{self.lock_name}' (status {status})")
+            try:
+                yield
+            finally:
+                conn.execute(
+                    text("EXEC sp_releaseapplock @Resource = :resource, @LockOwner = 'Session'"),
+                    {'resource': self.lock_name}
+                )
+                conn.commit()
+
+    def run(self, target: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Bekleyen migration'ları (target dahil) kilit altında sırayla uygula"""
+        with self.lock():
+            return self._run_pending(target)
+
+    def _run_pending(self, target: Optional[int]) -> List[Dict[str, Any]]:
+        # Bekleyenler kilit alındıktan sonra okunur; başka worker'ın uyguladıkları tekrar çalışmaz
+        results = []
+        for entry in self.pending():
+            if target is not None and entry['version'] > target:
+                break
+            started = time.perf_counter()
+            logger.info(f"Applying migration {entry['version']} {entry['name']}")
+            details = entry['fn'](self.engine)
+            duration_ms = round((time.perf_counter() - started) * 1000.0, 1)
+            with self.engine.begin() as conn:
+                conn.execute(schema_migrations_table.insert().values(
+                    version=entry['version'],
+                    name=entry['name'],
+                    applied_at=datetime.now(timezone.utc),
+                    duration_ms=duration_ms,
+                ))
+            results.append({
+                'version': entry['version'],
+                'name': entry['name'],
+                'duration_ms': duration_ms,
+                'details': details,
+            })
+        return results
+
+
+migrations = MigrationRunner(engine)
+
+
+# ==================== HELPERS ====================
+
+def column_info(conn, table_name: str, column_name: str) -> Optional[Dict[str, Any]]:
+    row = conn.execute(text("""
+        SELECT DATA_TYPE, IS_NULLABLE, CHARACTER_MAXIMUM_LENGTH
+        FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_NAME = :table AND COLUMN_NAME = :column
+    """), {'table': table_name, 'column': column_name}).first()
+    if row is None:
+        return None
+    return {'data_type': row[0].lower(), 'nullable': row[1] == 'YES', 'max_length': row[2]}
+
+
+def backfill_column(
+    engine,
+    table_name: str,
+    source_column: str,
+    target_column: str,
+    convert: Callable[[Any], Any],
+    batch_size: int = MIGRATION_BATCH_SIZE
+) -> Dict[str, int]:
+    """
+    source_column'u convert ile çevirip target_column'a yaz.
+    Primary key (id) üzerinden keyset ile ilerler; her batch ayrı commit edilir.
+    Sadece target'ı henüz boş satırlar güncellenir, böylece tekrar çalıştırmak güvenlidir.
+    """
+    last_id = ''
+    converted = unparsed = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                f"SELECT TOP ({int(batch_size)}) [id], [{source_column}] FROM [{table_name}] "
+                f"WHERE [id] > :last_id AND [{target_column}] IS NULL ORDER BY [id]"
+            ), {'last_id': last_id}).all()
+            if not rows:
+                break
+            updates = []
+            for row_id, value in rows:
+                parsed = convert(value)
+                if parsed is None:
+                    if value not in (None, ''):
+                        unparsed += 1
+                    continue
+                updates.append({'id': row_id, 'value': parsed})
+            if updates:
+                conn.execute(
+                    text(f"UPDATE [{table_name}] SET [{target_column}] = :value WHERE [id] = :id"),
+                    updates
+                )
+            converted += len(updates)
+            last_id = rows[-1][0]
+    return {'converted': converted, 'unparsed': unparsed}
+
+
+def convert_column_type(engine, table_name: str, column_name: str, sql_type: str, convert: Callable[[Any], Any]) -> Dict[str, Any]:
+    """
+    String kolonu typed kolona çevir: yeni kolon ekle, batch'ler halinde doldur,
+    eski kolonu düşür ve yeni kolonu eski adla yeniden adlandır.
+    Çözülemeyen değer varsa eski kolon düşürülmez, <kolon>_legacy adıyla saklanır.
+    Kolon zaten hedef tipteyse (create_all ile yeni kurulum) hiçbir şey yapmaz.
+    """
+    staging = f"{column_name}__typed"
+    legacy = f"{column_name}_legacy"
+    with engine.begin() as conn:
+        current = column_info(conn, table_name, column_name)
+        if current is None:
+            return {'skipped': 'missing column'}
+        if current['data_type'] == sql_type.split('(')[0].lower():
+            return {'skipped': 'already typed'}
+        if column_info(conn, table_name, staging) is None:
+            conn.execute(text(f"ALTER TABLE [{table_name}] ADD [{staging}] {sql_type} NULL"))
+
+    result = backfill_column(engine, table_name, column_name, staging, convert)
+
+    with engine.begin() as conn:
+        if result['unparsed'] == 0:
+            conn.execute(text(f"ALTER TABLE [{table_name}] DROP COLUMN [{column_name}]"))
+        else:
+            if column_info(conn, table_name, legacy) is not None:
+                raise RuntimeError(f"{table_name}.{legacy} already exists; resolve it before converting {column_name}")
+            conn.execute(text("EXEC sp_rename :old_name, :new_name, 'COLUMN'"), {
+                'old_name': f"{table_name}.{column_name}", 'new_name': legacy,
+            })
+            if not current['nullable']:
+                # Uygulama yeni satırlarda legacy kolonu doldurmaz
+                length = 'MAX' if current['max_length'] in (None, -1) else int(current['max_length'])
+                conn.execute(text(f"ALTER TABLE [{table_name}] ALTER COLUMN [{legacy}] {current['data_type']}({length}) NULL"))
+            result['legacy_column'] = legacy
+            logger.warning(
+                f"{table_name}.{column_name}: {result['unparsed']} values could not be parsed; "
+                f"original values kept in {legacy}"
+            )
+        conn.execute(text("EXEC sp_rename :old_name, :new_name, 'COLUMN'"), {
+            'old_name': f"{table_name}.{staging}", 'new_name': column_name,
+        })
+        # Kaynak NOT NULL idiyse ve her satır çözülebildiyse kısıtı geri koy
+        if not current['nullable'] and result['unparsed'] == 0:
+            nulls = conn.execute(text(f"SELECT COUNT(*) FROM [{table_name}] WHERE [{column_name}] IS NULL")).scalar()
+            if nulls == 0:
+                conn.execute(text(f"ALTER TABLE [{table_name}] ALTER COLUMN [{column_name}] {sql_type} NOT NULL"))
+    logger.info(f"{table_name}.{column_name} -> {sql_type}: {result}")
+    return result
+
+
+# ==================== INDEXES ====================
+
+# SERVERPROPERTY('EngineEdition'): 3 Enterprise/Developer, 5 Azure SQL Database, 8 Managed Instance
+ONLINE_INDEX_EDITIONS = (3, 5, 8)
+
+
+def online_index_supported(conn) -> bool:
+    edition = conn.execute(text("SELECT CAST(SERVERPROPERTY('EngineEdition') AS INT)")).scalar()
+    return edition in ONLINE_INDEX_EDITIONS
+
+
+def index_exists(conn, table_name: str, index_name: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM sys.indexes WHERE name = :name AND object_id = OBJECT_ID(:table)"
+    ), {'name': index_name, 'table': f"dbo.{table_name}"}).first() is not None
+
+
+def create_index(
+    engine,
+    table_name: str,
+    index_name: str,
+    columns: Sequence[str],
+    include: Sequence[str] = (),
+    unique: bool = False
+) -> str:
+    """Index yoksa oluştur (mümkünse ONLINE); tekrar çalıştırmak güvenli"""
+    with engine.begin() as conn:
+        if index_exists(conn, table_name, index_name):
+            return 'exists'
+        online = online_index_supported(conn)
+        options = ['SORT_IN_TEMPDB = ON'] + (['ONLINE = ON'] if online else [])
+        sql = (
+            f"CREATE {'UNIQUE ' if unique else ''}NONCLUSTERED INDEX [{index_name}] "
+            f"ON [dbo].[{table_name}] ({', '.join(f'[{c}]' for c in columns)})"
+        )
+        if include:
+            sql += f" INCLUDE ({', '.join(f'[{c}]' for c in include)})"
+        conn.execute(text(f"{sql} WITH ({', '.join(options)})"))
+    logger.info(f"Created index {index_name} on {table_name}{' (online)' if online else ''}")
+    return 'created online' if online else 'created'
+
+
+def drop_index(engine, table_name: str, index_name: str) -> str:
+    """Index varsa düşür (mümkünse ONLINE)"""
+    with engine.begin() as conn:
+        if not index_exists(conn, table_name, index_name):
+            return 'missing'
+        online = online_index_supported(conn)
+        sql = f"DROP INDEX [{index_name}] ON [dbo].[{table_name}]"
+        conn.execute(text(sql + (" WITH (ONLINE = ON)" if online else "")))
+    logger.info(f"Dropped index {index_name} on {table_name}{' (online)' if online else ''}")
+    return 'dropped online' if online else 'dropped'
+
+
+# ==================== MIGRATIONS ====================
+
+TYPED_DATE_COLUMNS = [
+    ('flights', 'date', 'DATE', parse_date),
+    ('flights', 'time', 'TIME(0)', parse_time),
+    ('reservations', 'arrivalDate', 'DATE', parse_date),
+    ('reservations', 'departureDate', 'DATE', parse_date),
+    ('operations', 'date', 'DATE', parse_date),
+]
+
+
+@migrations.migration(1, 'typed_date_columns')
+def typed_date_columns(engine) -> Dict[str, Any]:
+    """String(20) tarih/saat kolonlarını DATE / TIME'a çevir"""
+    return {
+        f"{table}.{column}": convert_column_type(engine, table, column, sql_type, convert)
+        for table, column, sql_type, convert in TYPED_DATE_COLUMNS
+    }
+
+
+# sql_models'teki Index tanımlarıyla aynı adlar; yeni kurulumda create_all zaten oluşturur
+HOT_QUERY_INDEXES = [
+    ('operations', 'IX_operations_date_type', ['date', 'type']),
+    ('flights', 'IX_flights_date_time', ['date', 'time']),
+    ('reservations', 'IX_reservations_arrivalDate', ['arrivalDate']),
+    ('reservations', 'IX_reservations_leader_name', ['leader_name']),
+    ('hotels', 'IX_hotels_region_category_active', ['region', 'category', 'active']),
+    ('package_legs', 'IX_package_legs_package_step', ['package_id', 'step_number']),
+]
+
+
+@migrations.migration(2, 'hot_query_indexes')
+def hot_query_indexes(engine) -> Dict[str, str]:
+    """Liste, tarih aralığı ve paket sorgularının kullandığı index'ler"""
+    return {
+        index_name: create_index(engine, table, index_name, columns)
+        for table, index_name, columns in HOT_QUERY_INDEXES
+    }
+
+
+OPERATION_FLIGHT_COLUMNS = ('arrivalFlight', 'returnFlight', 'transferFlight')
+
+
+@migrations.migration(3, 'operation_flights_from_json')
+def operation_flights_from_json(engine, batch_size: int = MIGRATION_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    operations'taki JSON uçuş kolonlarını operation_flights satırlarına taşı.
+    Zaten uçuş satırı olan operasyonlar atlanır; yarıda kalırsa kaldığı yerden devam eder.
+    Tüm JSON'lar ve içlerindeki uçuş tarih/saatleri çözülebildiyse eski kolonlar düşürülür.
+    """
+    from sql_helpers import operation_flight_parse_failures, operation_flight_rows
+
+    flights_table = Base.metadata.tables['operation_flights']
+    flights_table.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        present = [name for name in OPERATION_FLIGHT_COLUMNS if column_info(conn, 'operations', name)]
+    if not present:
+        return {'skipped': 'no json columns'}
+
+    last_id = ''
+    operations = flights = unparsed = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(text(
+                f"SELECT TOP ({int(batch_size)}) o.[id], {', '.join(f'o.[{name}]' for name in present)} "
+                f"FROM [operations] o WHERE o.[id] > :last_id "
+                f"AND ({' OR '.join(f'o.[{name}] IS NOT NULL' for name in present)}) "
+                f"AND NOT EXISTS (SELECT 1 FROM [operation_flights] f WHERE f.[operation_id] = o.[id]) "
+                f"ORDER BY o.[id]"
+            ), {'last_id': last_id}).all()
+            if not rows:
+                break
+            inserts = []
+            for row in rows:
+                legs = {}
+                for name, value in zip(present, row[1:]):
+                    if not value:
+                        continue
+                    try:
+                        parsed = loads(value)
+                    except ValueError:
+                        parsed = value
+                    if isinstance(parsed, dict):
+                        legs[name] = parsed
+                    elif parsed is not None:
+                        unparsed += 1
+                # Tarih/saat çözülemeyen bacaklar da eksik taşınmış sayılır; JSON kolonlar korunur
+                unparsed += operation_flight_parse_failures(legs)
+                batch = operation_flight_rows(row[0], legs)
+                operations += 1 if batch else 0
+                inserts.extend(batch)
+            if inserts:
+                conn.execute(flights_table.insert(), inserts)
+            flights += len(inserts)
+            last_id = rows[-1][0]
+
+    result = {'operations': operations, 'flights': flights, 'unparsed': unparsed}
+    if unparsed == 0:
+        with engine.begin() as conn:
+            for name in present:
+                conn.execute(text(f"ALTER TABLE [operations] DROP COLUMN [{name}]"))
+        result['dropped'] = present
+    else:
+        logger.warning(f"operations JSON flight columns kept: {unparsed} values (JSON or flight date/time) could not be parsed")
+    return result
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1] if len(sys.argv) > 1 else 'status'
+    if command == 'run':
+        target_version = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        for applied in migrations.run(target_version):
+            print(f"✅ {applied['version']} {applied['name']} ({applied['duration_ms']} ms) {applied['details']}")
+    else:
+        for entry in migrations.status():
+            mark = '✅' if entry['applied_at'] else '⏳'
+            print(f"{mark} {entry['version']:>4} {entry['name']} {entry['applied_at'] or ''}")
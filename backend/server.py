@@ -1,15 +1,16 @@
-from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Query, Header, Depends, Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, UploadFile, File, HTTPException, Query, Header, Depends, Body, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
 from typing import List, Optional, Dict, Any
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 import pandas as pd
 import io
 from functools import wraps
@@ -37,9 +38,25 @@ mongo_db = client[os.environ['DB_NAME']]
 # SQL Server connection - Used for all business data
 from sql_models import (
     SessionLocal, engine, 
-    SQLUser, SQLFlight, SQLReservation, SQLOperation, SQLHotel, SQLPackage, SQLPackageLeg,
+    SQLUser, SQLFlight, SQLReservation, SQLOperation, SQLOperationFlight, SQLHotel, SQLPackage, SQLPackageLeg,
     test_sql_connection, init_sql_db
 )
+from db_executor import run_db, db_executor, QueryTimeoutError
+from query_cache import query_cache, table_versions
+from http_cache import serve_cached
+from row_mapper import dumps as json_dumps
+from list_query import ListQuery
+from date_parsing import normalize_date_series, normalize_time_series
+from schema_migrations import RUN_MIGRATIONS_ON_STARTUP, migrations
+from panel_stats import panel_stats, rebuild_periodically as rebuild_stats_periodically
+from rankings import ranking_index
+from dashboard import dashboard_service
+from traffic_series import TrafficSeriesError, traffic_series
+from health import engine_pool_metrics, health_prober, sync_probe
+from journeys import JourneyError, package_schedule, reservation_journeys
+from package_catalog import package_catalog
+from table_browser import TableBrowserError, parse_filters
+from panel_backup import BackupError, iter_backup_archive, create_backup_file, list_backups, restore_backup
 
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -52,6 +69,86 @@ def get_db():
     finally:
         db.close()
 
+def json_bytes_response(payload: Any) -> Response:
+    """Serialize payload straight to JSON bytes (skips FastAPI's jsonable_encoder pass)"""
+    return Response(content=json_dumps(payload), media_type="application/json")
+
+async def serve_list_query(
+    request: Request,
+    endpoint: str,
+    tables: List[str],
+    list_query: ListQuery,
+    fetch,
+    params: Optional[Dict[str, Any]] = None
+) -> Response:
+    """
+    Serve a list endpoint through the common list query grammar (see list_query.py).
+    Unpaged requests keep the cached full-list behaviour; paged requests return the
+    page as the body and the next page's cursor in the X-Next-Cursor header.
+    """
+    def _load():
+        sql_db = SessionLocal()
+        try:
+            return fetch(sql_db)
+        finally:
+            sql_db.close()
+
+    if not list_query.paged:
+        cache_params = {**(params or {}), **list_query.cache_params()}
+        return await serve_cached(request, endpoint, cache_params, tables, lambda: json_dumps(_load()[0]))
+
+    rows, next_cursor = await run_db(_load)
+    response = json_bytes_response(rows)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+def with_sql_session(fn, *args):
+    """Run a sql_helpers function with its own short-lived session (on the DB executor)"""
+    sql_db = SessionLocal()
+    try:
+        return fn(sql_db, *args)
+    finally:
+        sql_db.close()
+
+def bulk_insert_rows(model, rows: List[Dict[str, Any]]) -> int:
+    """Insert import rows with batched multi-row INSERTs (no ORM objects)"""
+    sql_db = SessionLocal()
+    try:
+        from sql_helpers import bulk_insert_sql
+        return bulk_insert_sql(sql_db, model, rows)
+    finally:
+        sql_db.close()
+
+def build_list_query(serializer, limit, cursor, sort, filter, fields, default_sort: str = 'id') -> ListQuery:
+    """Parse the common list query parameters; invalid input is a 400"""
+    try:
+        return ListQuery(
+            serializer, limit=limit, cursor=cursor, sort=sort,
+            filters=parse_filters(filter), fields=fields, default_sort=default_sort
+        )
+    except TableBrowserError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _sql_change_marker(model):
+    """Build a cache version probe (row count + MAX(updated_at)) for a diogenesDB table"""
+    def probe():
+        db = SessionLocal()
+        try:
+            from sql_helpers import get_change_marker_sql
+            return get_change_marker_sql(db, model)
+        finally:
+            db.close()
+    return probe
+
+table_versions.register_probe("diogenesDB.hotels", _sql_change_marker(SQLHotel))
+table_versions.register_probe("diogenesDB.reservations", _sql_change_marker(SQLReservation))
+table_versions.register_probe("diogenesDB.flights", _sql_change_marker(SQLFlight))
+table_versions.register_probe("diogenesDB.operations", _sql_change_marker(SQLOperation))
+table_versions.register_probe("diogenesDB.packages", _sql_change_marker(SQLPackage))
+table_versions.register_probe("diogenesDB.package_legs", _sql_change_marker(SQLPackageLeg))
+table_versions.register_probe("diogenesDB.operation_flights", _sql_change_marker(SQLOperationFlight))
+
 # Create the main app without a prefix
 app = FastAPI()
 
@@ -428,12 +525,8 @@ def get_current_user_sync(x_user_id: Optional[str], sql_db: Session) -> Optional
     user = get_user_by_id_sql(sql_db, x_user_id)
     return user
 
-async def get_current_user(x_user_id: Optional[str]) -> Optional[Dict]:
-    """Get current user from header - SQL Server (async wrapper)"""
-    if not x_user_id:
-        return None
-    
-    # Use sync database session
+def _load_user(x_user_id: str) -> Optional[Dict]:
+    """Load a user with its own short-lived session (runs on the DB executor)"""
     db = SessionLocal()
     try:
         from sql_helpers import get_user_by_id_sql
@@ -442,6 +535,14 @@ async def get_current_user(x_user_id: Optional[str]) -> Optional[Dict]:
     finally:
         db.close()
 
+async def get_current_user(x_user_id: Optional[str]) -> Optional[Dict]:
+    """Get current user from header - SQL Server (async wrapper)"""
+    if not x_user_id:
+        return None
+    
+    # Sync session work runs on the DB executor, not on the event loop
+    return await run_db(_load_user, x_user_id)
+
 
 def check_permission(resource: str, action: str):
     """Decorator to check if user has permission for an action"""
@@ -473,6 +574,10 @@ def check_permission(resource: str, action: str):
         return wrapper
     return decorator
 
+def has_permission(user_role: str, resource: str, action: str) -> bool:
+    """Check if a role has permission for an action on a resource"""
+    return user_role in PERMISSIONS and action in PERMISSIONS[user_role].get(resource, [])
+
 # ==================== ROUTES ====================
 
 @api_router.get("/")
@@ -481,7 +586,20 @@ async def root():
 
 # ===== FLIGHTS ENDPOINTS =====
 @api_router.get("/flights", response_model=List[Flight])
-async def get_flights(x_user_id: Optional[str] = Header(None)):
+async def get_flights(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    filter: Optional[List[str]] = Query(default=None),
+    fields: Optional[str] = Query(default=None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Get flights
+    
+    Supports the common list query grammar: limit/cursor paging (next cursor in
+    X-Next-Cursor), sort=-a,b, filter=field:op:value and fields=a,b.
+    """
     # Check permission
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -494,13 +612,53 @@ async def get_flights(x_user_id: Optional[str] = Header(None)):
     if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('flights', []):
         raise HTTPException(status_code=403, detail="You don't have permission to view flights")
     
-    flights = await db.flights.find({}, {"_id": 0}).to_list(1000)
-    for flight in flights:
-        if 'created_at' in flight and isinstance(flight['created_at'], str):
-            flight['created_at'] = datetime.fromisoformat(flight['created_at'])
-        if 'updated_at' in flight and isinstance(flight['updated_at'], str):
-            flight['updated_at'] = datetime.fromisoformat(flight['updated_at'])
-    return flights
+    from sql_helpers import FLIGHT_SERIALIZER
+    list_query = build_list_query(FLIGHT_SERIALIZER, limit, cursor, sort, filter, fields, default_sort='date,time')
+    return await serve_list_query(request, "/flights", ["diogenesDB.flights"], list_query, list_query.fetch)
+
+@api_router.get("/flights/traffic")
+async def get_flight_traffic(
+    request: Request,
+    start: str = Query(...),
+    end: str = Query(...),
+    bucket: str = Query(default="day"),
+    airport: Optional[str] = Query(default=None),
+    direction: Optional[str] = Query(default=None),
+    source: str = Query(default="all"),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Arrivals, departures and pax per hour/day/week for a date range, optionally for one
+    airport / direction. Aggregated server-side from flights and operation flights and
+    cached per range until those tables change.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    user = await get_current_user(x_user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_role = user.get('role', '')
+    if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('flights', []):
+        raise HTTPException(status_code=403, detail="You don't have permission to view flights")
+    
+    params = {"start": start, "end": end, "bucket": bucket, "airport": airport, "direction": direction, "source": source}
+    
+    def _load():
+        sql_db = SessionLocal()
+        try:
+            return json_dumps(traffic_series(sql_db, **params))
+        finally:
+            sql_db.close()
+    
+    try:
+        return await serve_cached(
+            request, "/flights/traffic", params,
+            ["diogenesDB.flights", "diogenesDB.operations", "diogenesDB.operation_flights"], _load
+        )
+    except TrafficSeriesError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @api_router.post("/flights", response_model=Flight)
 async def create_flight(flight: FlightCreate, x_user_id: Optional[str] = Header(None)):
@@ -602,34 +760,39 @@ async def upload_flights(file: UploadFile = File(...), x_user_id: Optional[str]
             raise HTTPException(status_code=400, detail="Unsupported file format. Please upload Excel file.")
         
         # Expected columns: flightCode, airline, from, to, date, time, direction, passengers, hasPNR, pnr
-        flights_added = 0
-        for _, row in df.iterrows():
-            flight_data = {
+        # Dates/times are normalized column-wise and inserted in bulk
+        dates = normalize_date_series(df['date']) if 'date' in df else [None] * len(df)
+        times = normalize_time_series(df['time']) if 'time' in df else [None] * len(df)
+        now = datetime.now(timezone.utc)
+        rows, skipped = [], 0
+        for index, row in enumerate(df.to_dict('records')):
+            if dates[index] is None or times[index] is None:
+                skipped += 1
+                continue
+            rows.append({
+                "id": str(uuid.uuid4()),
                 "flightCode": str(row.get('flightCode', '')),
                 "airline": str(row.get('airline', '')),
-                "from": str(row.get('from', '')),
+                "from_location": str(row.get('from', '')),
                 "to": str(row.get('to', '')),
-                "date": str(row.get('date', '')),
-                "time": str(row.get('time', '')),
+                "date": dates[index],
+                "time": times[index],
                 "direction": str(row.get('direction', 'arrival')),
-                "passengers": int(row.get('passengers', 0)),
+                "passengers": int(row.get('passengers', 0) or 0),
                 "hasPNR": bool(row.get('hasPNR', False)),
                 "pnr": str(row.get('pnr', '')),
-                "daysUntilFlight": int(row.get('daysUntilFlight', 0))
-            }
-            
-            flight = Flight(**flight_data)
-            doc = flight.model_dump(by_alias=True)
-            doc['created_at'] = doc['created_at'].isoformat()
-            doc['updated_at'] = doc['updated_at'].isoformat()
-            
-            await db.flights.insert_one(doc)
-            flights_added += 1
+                "daysUntilFlight": int(row.get('daysUntilFlight', 0) or 0),
+                "created_at": now,
+                "updated_at": now,
+            })
+        
+        flights_added = await run_db(bulk_insert_rows, SQLFlight, rows)
+        table_versions.bump("diogenesDB.flights")
         
         # Log the action
         await log_action(user.get('email', 'admin'), "IMPORT_EXCEL", "flights", "batch", f"Imported {flights_added} flights from {file.filename}")
         
-        return {"message": f"Successfully imported {flights_added} flights", "count": flights_added}
+        return {"message": f"Successfully imported {flights_added} flights", "count": flights_added, "skipped": skipped}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -715,10 +878,12 @@ async def compare_flights(file: UploadFile = File(...), x_user_id: Optional[str]
 
 # ===== USERS ENDPOINTS =====
 @api_router.post("/login", response_model=UserResponse)
-async def login(credentials: UserLogin, sql_db: Session = Depends(get_db)):
+async def login(credentials: UserLogin):
     """Login with email and password - Using SQL Server"""
-    # Find user by email in SQL Server
-    user = sql_db.query(SQLUser).filter(SQLUser.email == credentials.email).first()
+    # Find user by email in SQL Server (own session on the DB executor thread)
+    user = await run_db(
+        with_sql_session, lambda sql_db: sql_db.query(SQLUser).filter(SQLUser.email == credentials.email).first()
+    )
     
     if not user:
         # Log failed login attempt to MongoDB
@@ -732,8 +897,8 @@ async def login(credentials: UserLogin, sql_db: Session = Depends(get_db)):
         })
         raise HTTPException(status_code=401, detail="Email veya şifre hatalı")
     
-    # Verify password
-    if not pwd_context.verify(credentials.password, user.password):
+    # Verify password (bcrypt is CPU-bound, keep it off the event loop)
+    if not await run_db(pwd_context.verify, credentials.password, user.password):
         # Log failed login attempt to MongoDB
         await mongo_db.logs.insert_one({
             "id": str(uuid.uuid4()),
@@ -772,10 +937,10 @@ async def login(credentials: UserLogin, sql_db: Session = Depends(get_db)):
     }
 
 @api_router.get("/users", response_model=List[User])
-async def get_users(x_user_id: Optional[str] = Header(None), sql_db: Session = Depends(get_db)):
+async def get_users(x_user_id: Optional[str] = Header(None)):
     # Get users from SQL Server
     try:
-        sql_users = sql_db.query(SQLUser).all()
+        sql_users = await run_db(with_sql_session, lambda sql_db: sql_db.query(SQLUser).all())
         users = []
         for sql_user in sql_users:
             users.append({
@@ -987,72 +1152,84 @@ async def create_backup(x_user_id: Optional[str] = Header(None)):
         raise HTTPException(status_code=403, detail="Only administrators can create backups")
     
     try:
-        # Collect all data
-        backup_data = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "version": "1.0",
-            "users": [],
-            "flights": [],
-            "reservations": [],
-            "operations": [],
-            "logs": []
-        }
-        
-        # Get all users
-        users = await db.users.find({}, {"_id": 0}).to_list(None)
-        for user in users:
-            if 'created_at' in user and isinstance(user['created_at'], datetime):
-                user['created_at'] = user['created_at'].isoformat()
-        backup_data["users"] = users
-        
-        # Get all flights
-        flights = await db.flights.find({}, {"_id": 0}).to_list(None)
-        for flight in flights:
-            if 'created_at' in flight and isinstance(flight['created_at'], datetime):
-                flight['created_at'] = flight['created_at'].isoformat()
-        backup_data["flights"] = flights
-        
-        # Get all reservations
-        reservations = await db.reservations.find({}, {"_id": 0}).to_list(None)
-        for reservation in reservations:
-            if 'created_at' in reservation and isinstance(reservation['created_at'], datetime):
-                reservation['created_at'] = reservation['created_at'].isoformat()
-        backup_data["reservations"] = reservations
-        
-        # Get all operations
-        operations = await db.operations.find({}, {"_id": 0}).to_list(None)
-        for operation in operations:
-            if 'created_at' in operation and isinstance(operation['created_at'], datetime):
-                operation['created_at'] = operation['created_at'].isoformat()
-        backup_data["operations"] = operations
-        
-        # Get recent logs
-        logs = await db.logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(1000).to_list(1000)
-        for log in logs:
-            if 'timestamp' in log and isinstance(log['timestamp'], datetime):
-                log['timestamp'] = log['timestamp'].isoformat()
-        backup_data["logs"] = logs
-        
-        # Convert to JSON
-        import json
-        backup_json = json.dumps(backup_data, indent=2, ensure_ascii=False)
-        
-        # Log the action
-        await log_action(current_user.get('email', 'admin'), "BACKUP", "system", "full_backup", "Created full system backup")
-        
-        # Return as file download
-        from fastapi.responses import Response
-        return Response(
-            content=backup_json,
-            media_type="application/octet-stream",
-            headers={
-                "Content-Disposition": f"attachment; filename=diogenes_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.bak"
-            }
-        )
-        
+        # Son loglar küçük; arşive eklenmek üzere önceden okunur
+        logs = await mongo_db.logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(1000).to_list(1000)
+    except Exception as e:
+        logging.warning(f"Backup: could not read logs: {e}")
+        logs = []
+
+    await log_action(current_user.get('email', 'admin'), "BACKUP", "system", "full_backup", "Created full system backup")
+
+    # Tablolar server-side cursor ile parça parça okunup zip olarak stream edilir
+    filename = f"diogenes_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+    return StreamingResponse(
+        iter_backup_archive(logs=logs),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@api_router.post("/backup/run")
+async def run_backup(
+    type: str = Body(default='incremental', embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Write a full or incremental backup into BACKUP_DIR.
+    Incremental backups only contain rows changed since the previous backup's
+    watermarks; the first backup of a chain is always full.
+    """
+    current_user = await require_restore_admin(x_user_id, "Only administrators can create backups")
+
+    try:
+        logs = await mongo_db.logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(1000).to_list(1000)
+    except Exception as e:
+        logging.warning(f"Backup: could not read logs: {e}")
+        logs = []
+
+    try:
+        manifest = await run_db(create_backup_file, type, logs, deadline=None)
+    except BackupError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Backup creation failed: {str(e)}")
 
+    await log_action(current_user.get('email', 'admin'), "BACKUP", "system", manifest['backup_id'], f"Created {manifest['type']} backup")
+    return manifest
+
+
+@api_router.get("/backup/list")
+async def get_backup_list(x_user_id: Optional[str] = Header(None)):
+    """Backups in BACKUP_DIR with their manifests (oldest first)"""
+    await require_restore_admin(x_user_id, "Only administrators can view backups")
+    backups = await run_db(list_backups)
+    return {"backups": backups, "count": len(backups)}
+
+
+@api_router.post("/backup/restore")
+async def restore_panel_backup(
+    backup_id: str = Body(..., embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Restore panel tables from a backup chain (full + incrementals up to backup_id).
+    The whole chain is applied in a single transaction.
+    """
+    current_user = await require_restore_admin(x_user_id, "Only administrators can restore backups")
+
+    try:
+        result = await run_db(restore_backup, backup_id, deadline=None)
+    except BackupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backup restore failed: {str(e)}")
+
+    table_versions.bump_prefix("diogenesDB.")
+    await run_db(panel_stats.rebuild, deadline=None)
+    await run_db(ranking_index.rebuild, deadline=None)
+    await log_action(current_user.get('email', 'admin'), "RESTORE", "system", backup_id, f"Restored backup chain {', '.join(result['chain'])}")
+    return result
+
 
 # ===== LOGS ENDPOINTS =====
 @api_router.get("/logs", response_model=List[SystemLog])
@@ -1077,7 +1254,20 @@ async def get_logs(limit: int = 100, x_user_id: Optional[str] = Header(None)):
 
 # ===== RESERVATIONS ENDPOINTS =====
 @api_router.get("/reservations", response_model=List[Reservation])
-async def get_reservations(x_user_id: Optional[str] = Header(None)):
+async def get_reservations(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    filter: Optional[List[str]] = Query(default=None),
+    fields: Optional[str] = Query(default=None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Get reservations
+    
+    Supports the common list query grammar: limit/cursor paging (next cursor in
+    X-Next-Cursor), sort=-a,b, filter=field:op:value and fields=a,b.
+    """
     # Check permission
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -1090,11 +1280,44 @@ async def get_reservations(x_user_id: Optional[str] = Header(None)):
     if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('reservations', []):
         raise HTTPException(status_code=403, detail="You don't have permission to view reservations")
     
-    reservations = await db.reservations.find({}, {"_id": 0}).to_list(1000)
-    for reservation in reservations:
-        if 'created_at' in reservation and isinstance(reservation['created_at'], str):
-            reservation['created_at'] = datetime.fromisoformat(reservation['created_at'])
-    return reservations
+    from sql_helpers import RESERVATION_SERIALIZER
+    list_query = build_list_query(RESERVATION_SERIALIZER, limit, cursor, sort, filter, fields)
+    return await serve_list_query(request, "/reservations", ["diogenesDB.reservations"], list_query, list_query.fetch)
+
+@api_router.get("/rankings/{kind}")
+async def get_rankings(
+    kind: str,
+    period: Optional[str] = Query(default=None, pattern=r"^\d{4}-\d{2}$"),
+    agency: Optional[str] = Query(default=None),
+    by: str = Query(default="pax"),
+    limit: int = Query(default=10, ge=1, le=500),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Top hotels / products by pax or reservation count, for one arrival month (YYYY-MM)
+    and/or source agency (all months / agencies when omitted). Served from the
+    incrementally maintained ranking counters, not from a reservations scan.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    user = await get_current_user(x_user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_role = user.get('role', '')
+    if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('reservations', []):
+        raise HTTPException(status_code=403, detail="You don't have permission to view reservations")
+    
+    kinds = {"hotels": "hotel", "products": "product"}
+    if kind not in kinds:
+        raise HTTPException(status_code=404, detail="Unknown ranking (use hotels or products)")
+    
+    try:
+        items = await run_db(ranking_index.top, kinds[kind], limit, by, period, agency)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"kind": kind, "period": period, "agency": agency, "by": by, "items": items}
 
 @api_router.post("/reservations", response_model=Reservation)
 async def create_reservation(reservation: ReservationCreate, x_user_id: Optional[str] = Header(None)):
@@ -1110,10 +1333,18 @@ async def create_reservation(reservation: ReservationCreate, x_user_id: Optional
     if user_role not in PERMISSIONS or 'create' not in PERMISSIONS[user_role].get('reservations', []):
         raise HTTPException(status_code=403, detail="You don't have permission to create reservations")
     
+    from sql_helpers import create_reservation_sql
+    from date_parsing import parse_date
+    
+    # arrivalDate / departureDate are DATE columns - reject values that can't be parsed
+    for field in ("arrivalDate", "departureDate"):
+        if parse_date(getattr(reservation, field)) is None:
+            raise HTTPException(status_code=400, detail=f"Invalid {field}: {getattr(reservation, field)!r}")
+    
     reservation_obj = Reservation(**reservation.model_dump())
-    doc = reservation_obj.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.reservations.insert_one(doc)
+    # Panel stats and ranking counters are updated in the same transaction
+    await run_db(with_sql_session, create_reservation_sql, reservation_obj.model_dump())
+    table_versions.bump("diogenesDB.reservations")
     
     await log_action(user.get('email', 'system'), "CREATE", "reservations", reservation_obj.id, f"Created reservation {reservation_obj.voucherNo}")
     
@@ -1144,32 +1375,38 @@ async def upload_reservations(file: UploadFile = File(...), x_user_id: Optional[
             raise HTTPException(status_code=400, detail="Unsupported file format. Please upload Excel file.")
         
         # Expected columns: voucherNo, leader_name, leader_passport, product_code, product_name, hotel, arrivalDate, departureDate, pax, status
-        reservations_added = 0
-        for _, row in df.iterrows():
-            reservation_data = {
+        # Dates are normalized column-wise and inserted in bulk
+        arrivals = normalize_date_series(df['arrivalDate']) if 'arrivalDate' in df else [None] * len(df)
+        departures = normalize_date_series(df['departureDate']) if 'departureDate' in df else [None] * len(df)
+        now = datetime.now(timezone.utc)
+        rows, skipped = [], 0
+        for index, row in enumerate(df.to_dict('records')):
+            if arrivals[index] is None or departures[index] is None:
+                skipped += 1
+                continue
+            rows.append({
+                "id": str(uuid.uuid4()),
                 "voucherNo": str(row.get('voucherNo', '')),
                 "leader_name": str(row.get('leader_name', '')),
                 "leader_passport": str(row.get('leader_passport', '')),
                 "product_code": str(row.get('product_code', '')),
                 "product_name": str(row.get('product_name', '')),
                 "hotel": str(row.get('hotel', '')),
-                "arrivalDate": str(row.get('arrivalDate', '')),
-                "departureDate": str(row.get('departureDate', '')),
-                "pax": int(row.get('pax', 0)),
-                "status": str(row.get('status', 'pending'))
-            }
-            
-            reservation = Reservation(**reservation_data)
-            doc = reservation.model_dump()
-            doc['created_at'] = doc['created_at'].isoformat()
-            
-            await db.reservations.insert_one(doc)
-            reservations_added += 1
+                "arrivalDate": arrivals[index],
+                "departureDate": departures[index],
+                "pax": int(row.get('pax', 0) or 0),
+                "status": str(row.get('status', 'pending')),
+                "created_at": now,
+                "updated_at": now,
+            })
+        
+        reservations_added = await run_db(bulk_insert_rows, SQLReservation, rows)
+        table_versions.bump("diogenesDB.reservations")
         
         # Log the action
         await log_action(user.get('email', 'admin'), "IMPORT_EXCEL", "reservations", "batch", f"Imported {reservations_added} reservations from {file.filename}")
         
-        return {"message": f"Successfully imported {reservations_added} reservations", "count": reservations_added}
+        return {"message": f"Successfully imported {reservations_added} reservations", "count": reservations_added, "skipped": skipped}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
@@ -1177,13 +1414,25 @@ async def upload_reservations(file: UploadFile = File(...), x_user_id: Optional[
 # ===== OPERATIONS ENDPOINTS =====
 @api_router.get("/operations")
 async def get_operations(
+    request: Request,
     date: Optional[str] = None, 
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     type: str = "all", 
+    flight_code: Optional[str] = None,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    filter: Optional[List[str]] = Query(default=None),
+    fields: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(None)
 ):
-    """Get operations for a specific date or date range"""
+    """Get operations for a specific date or date range (or on a given flight code),
+    with their arrival/return/transfer flights unless fields= is given
+    
+    Supports the common list query grammar: limit/cursor paging (next cursor in
+    X-Next-Cursor), sort=-a,b, filter=field:op:value and fields=a,b.
+    """
     # Check permission
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -1196,21 +1445,33 @@ async def get_operations(
     if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('operations', []):
         raise HTTPException(status_code=403, detail="You don't have permission to view operations")
     
-    query = {}
-    
     # Handle date filtering - priority: date range > single date
+    legacy_filters = {"type": type}
     if start_date and end_date:
-        # Date range filtering
-        query["date"] = {"$gte": start_date, "$lte": end_date}
+        legacy_filters["start_date"] = start_date
+        legacy_filters["end_date"] = end_date
     elif date:
-        # Single date filtering
-        query["date"] = date
+        legacy_filters["date"] = date
+    if flight_code:
+        legacy_filters["flight_code"] = flight_code
     
-    if type != "all":
-        query["type"] = type
-    
-    operations = await db.operations.find(query, {"_id": 0}).to_list(1000)
-    return operations
+    from sql_helpers import OPERATION_SERIALIZER, operation_predicates, attach_operation_flights
+    list_query = build_list_query(OPERATION_SERIALIZER, limit, cursor, sort, filter, fields, default_sort='date,time')
+    try:
+        where = operation_predicates(legacy_filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def _fetch(sql_db):
+        rows, next_cursor = list_query.fetch(sql_db, where)
+        if not list_query.fields:
+            attach_operation_flights(sql_db, rows)
+        return rows, next_cursor
+    
+    return await serve_list_query(
+        request, "/operations", ["diogenesDB.operations", "diogenesDB.operation_flights"], list_query,
+        _fetch, params=legacy_filters
+    )
 
 @api_router.get("/operations/{operation_id}/details")
 async def get_operation_details(operation_id: str, x_user_id: Optional[str] = Header(None)):
@@ -1227,15 +1488,17 @@ async def get_operation_details(operation_id: str, x_user_id: Optional[str] = He
     if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('operations', []):
         raise HTTPException(status_code=403, detail="You don't have permission to view operations")
     
-    # Get operation
-    operation = await db.operations.find_one({"id": operation_id}, {"_id": 0})
+    from sql_helpers import get_operation_by_id_sql, get_reservation_by_id_sql
+    
+    # Get operation (with its flight legs)
+    operation = await run_db(with_sql_session, get_operation_by_id_sql, operation_id)
     if not operation:
         raise HTTPException(status_code=404, detail="Operation not found")
     
     # Get linked reservation if exists
     reservation = None
     if operation.get('reservationId'):
-        reservation = await db.reservations.find_one({"id": operation['reservationId']}, {"_id": 0})
+        reservation = await run_db(with_sql_session, get_reservation_by_id_sql, operation['reservationId'])
     
     # Combine data
     result = {
@@ -1271,10 +1534,12 @@ async def create_operation(operation: OperationCreate, x_user_id: Optional[str]
     if user_role not in PERMISSIONS or 'create' not in PERMISSIONS[user_role].get('operations', []):
         raise HTTPException(status_code=403, detail="You don't have permission to create operations")
     
+    from sql_helpers import create_operation_sql
+    
     operation_obj = Operation(**operation.model_dump())
-    doc = operation_obj.model_dump(by_alias=True)
-    doc['created_at'] = doc['created_at'].isoformat()
-    await db.operations.insert_one(doc)
+    # Flight dicts are stored as operation_flights rows
+    await run_db(with_sql_session, create_operation_sql, operation_obj.model_dump(by_alias=True))
+    table_versions.bump("diogenesDB.operations", "diogenesDB.operation_flights")
     
     await log_action(user.get('email', 'system'), "CREATE", "operations", operation_obj.id, f"Created operation {operation_obj.flightCode}")
     
@@ -1305,27 +1570,31 @@ async def upload_operations(file: UploadFile = File(...), x_user_id: Optional[st
             raise HTTPException(status_code=400, detail="Unsupported file format. Please upload Excel file.")
         
         # Expected columns: flightCode, type, from, to, date, time, passengers, hotel, transferTime, notes
-        operations_added = 0
-        for _, row in df.iterrows():
-            operation_data = {
+        # Dates are normalized column-wise and inserted in bulk
+        dates = normalize_date_series(df['date']) if 'date' in df else [None] * len(df)
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
                 "flightCode": str(row.get('flightCode', '')),
                 "type": str(row.get('type', 'transfer')),
-                "from": str(row.get('from', '')),
+                "from_location": str(row.get('from', '')),
                 "to": str(row.get('to', '')),
-                "date": str(row.get('date', '')),
+                "date": dates[index],
                 "time": str(row.get('time', '')),
-                "passengers": int(row.get('passengers', 0)),
+                "passengers": int(row.get('passengers', 0) or 0),
                 "hotel": str(row.get('hotel', '')),
                 "transferTime": str(row.get('transferTime', '')),
-                "notes": str(row.get('notes', ''))
+                "notes": str(row.get('notes', '')),
+                "status": "scheduled",
+                "created_at": now,
+                "updated_at": now,
             }
-            
-            operation = Operation(**operation_data)
-            doc = operation.model_dump(by_alias=True)
-            doc['created_at'] = doc['created_at'].isoformat()
-            
-            await db.operations.insert_one(doc)
-            operations_added += 1
+            for index, row in enumerate(df.to_dict('records'))
+        ]
+        
+        operations_added = await run_db(bulk_insert_rows, SQLOperation, rows)
+        table_versions.bump("diogenesDB.operations")
         
         # Log the action
         await log_action(user.get('email', 'admin'), "IMPORT_EXCEL", "operations", "batch", f"Imported {operations_added} operations from {file.filename}")
@@ -1511,13 +1780,58 @@ async def search_passenger(query: str = Query(..., min_length=2), x_user_id: Opt
 # ===== PACKAGE TOUR MANAGEMENT =====
 
 @api_router.get("/packages")
-async def get_all_packages(x_user_id: Optional[str] = Header(None)):
-    """Get all package tours"""
+async def get_all_packages(
+    request: Request,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    filter: Optional[List[str]] = Query(default=None),
+    fields: Optional[str] = Query(default=None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Get all package tours (with legs unless fields= is given)
+    
+    Without query parameters the full list is served from the in-memory package
+    catalog. Also supports the common list query grammar: limit/cursor paging
+    (next cursor in X-Next-Cursor), sort=-a,b, filter=field:op:value and fields=a,b.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    tables = ["diogenesDB.packages", "diogenesDB.package_legs"]
+    if not any((limit, cursor, sort, filter, fields)):
+        def _load_catalog():
+            sql_db = SessionLocal()
+            try:
+                return json_dumps(package_catalog.list(sql_db)[0])
+            finally:
+                sql_db.close()
+        return await serve_cached(request, "/packages", {}, tables, _load_catalog)
+    
+    from sql_helpers import PACKAGE_SERIALIZER, attach_package_legs
+    list_query = build_list_query(PACKAGE_SERIALIZER, limit, cursor, sort, filter, fields, default_sort='package_code')
+    
+    def _fetch(sql_db):
+        rows, next_cursor = list_query.fetch(sql_db)
+        if not list_query.fields:
+            attach_package_legs(sql_db, rows)
+        return rows, next_cursor
+    
+    return await serve_list_query(request, "/packages", tables, list_query, _fetch)
+
+@api_router.get("/packages/search")
+async def search_packages(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(default=20, ge=1, le=200),
+    active_only: bool = Query(default=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Search packages by code / name / description (exact and prefix code matches first)"""
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    packages = await db.packages.find({}, {"_id": 0}).to_list(1000)
-    return packages
+    packages = await run_db(with_sql_session, lambda sql_db: package_catalog.search(sql_db, q, limit, active_only))
+    return json_bytes_response(packages)
 
 @api_router.get("/packages/{package_id}")
 async def get_package(package_id: str, x_user_id: Optional[str] = Header(None)):
@@ -1525,11 +1839,11 @@ async def get_package(package_id: str, x_user_id: Optional[str] = Header(None)):
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    package = await db.packages.find_one({"id": package_id}, {"_id": 0})
+    package = await run_db(with_sql_session, package_catalog.get, package_id)
     if not package:
         raise HTTPException(status_code=404, detail="Package not found")
     
-    return package
+    return json_bytes_response(package)
 
 @api_router.post("/packages")
 async def create_package(package: PackageCreate, x_user_id: Optional[str] = Header(None)):
@@ -1545,17 +1859,15 @@ async def create_package(package: PackageCreate, x_user_id: Optional[str] = Head
     if user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only administrators can create packages")
     
+    from sql_helpers import create_package_sql, package_code_exists_sql
+    
     # Check if package code already exists
-    existing = await db.packages.find_one({"package_code": package.package_code})
-    if existing:
+    if await run_db(with_sql_session, package_code_exists_sql, package.package_code):
         raise HTTPException(status_code=400, detail="Package code already exists")
     
     new_package = Package(**package.model_dump())
-    doc = new_package.model_dump()
-    doc['created_at'] = doc['created_at'].isoformat()
-    doc['updated_at'] = doc['updated_at'].isoformat()
-    
-    await db.packages.insert_one(doc)
+    await run_db(with_sql_session, create_package_sql, new_package.model_dump())
+    table_versions.bump("diogenesDB.packages", "diogenesDB.package_legs")
     await log_action(user['email'], "CREATE", "packages", new_package.id, f"Created package: {package.package_code}")
     
     return new_package
@@ -1574,14 +1886,15 @@ async def update_package(package_id: str, package: PackageCreate, x_user_id: Opt
     if user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only administrators can update packages")
     
-    existing = await db.packages.find_one({"id": package_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Package not found")
+    from sql_helpers import package_code_exists_sql, update_package_sql
     
-    update_data = package.model_dump()
-    update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
+    if await run_db(with_sql_session, package_code_exists_sql, package.package_code, package_id):
+        raise HTTPException(status_code=400, detail="Package code already exists")
     
-    await db.packages.update_one({"id": package_id}, {"$set": update_data})
+    updated = await run_db(with_sql_session, update_package_sql, package_id, package.model_dump())
+    if not updated:
+        raise HTTPException(status_code=404, detail="Package not found")
+    table_versions.bump("diogenesDB.packages", "diogenesDB.package_legs")
     await log_action(user['email'], "UPDATE", "packages", package_id, f"Updated package: {package.package_code}")
     
     return {"message": "Package updated successfully"}
@@ -1600,9 +1913,12 @@ async def delete_package(package_id: str, x_user_id: Optional[str] = Header(None
     if user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Only administrators can delete packages")
     
-    result = await db.packages.delete_one({"id": package_id})
-    if result.deleted_count == 0:
+    from sql_helpers import delete_package_sql
+    
+    deleted = await run_db(with_sql_session, delete_package_sql, package_id)
+    if not deleted:
         raise HTTPException(status_code=404, detail="Package not found")
+    table_versions.bump("diogenesDB.packages", "diogenesDB.package_legs")
     
     await log_action(user['email'], "DELETE", "packages", package_id, "Deleted package")
     
@@ -1611,13 +1927,23 @@ async def delete_package(package_id: str, x_user_id: Optional[str] = Header(None
 # ===== HOTELS ENDPOINTS =====
 @api_router.get("/hotels", response_model=List[Hotel])
 async def get_hotels(
+    request: Request,
     search: Optional[str] = None,
     region: Optional[str] = None,
     category: Optional[str] = None,
     active_only: bool = True,
+    limit: Optional[int] = Query(default=None, ge=1),
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    filter: Optional[List[str]] = Query(default=None),
+    fields: Optional[str] = Query(default=None),
     x_user_id: Optional[str] = Header(None)
 ):
-    """Get list of hotels with optional filters"""
+    """Get list of hotels with optional filters
+    
+    Supports the common list query grammar: limit/cursor paging (next cursor in
+    X-Next-Cursor), sort=-a,b, filter=field:op:value and fields=a,b.
+    """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     
@@ -1629,24 +1955,20 @@ async def get_hotels(
     if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('hotels', []):
         raise HTTPException(status_code=403, detail="You don't have permission to view hotels")
     
-    # Build query
-    query = {}
-    if active_only:
-        query["active"] = True
-    if region:
-        query["region"] = region
-    if category:
-        query["category"] = category
-    if search:
-        query["$or"] = [
-            {"name": {"$regex": search, "$options": "i"}},
-            {"code": {"$regex": search, "$options": "i"}},
-            {"region": {"$regex": search, "$options": "i"}},
-            {"city": {"$regex": search, "$options": "i"}}
-        ]
+    filters = {
+        "search": search,
+        "region": region,
+        "category": category,
+        "active_only": active_only
+    }
     
-    hotels = await db.hotels.find(query, {"_id": 0}).to_list(10000)
-    return hotels
+    from sql_helpers import HOTEL_SERIALIZER, hotel_predicates
+    list_query = build_list_query(HOTEL_SERIALIZER, limit, cursor, sort, filter, fields, default_sort='name')
+    where = hotel_predicates(filters)
+    return await serve_list_query(
+        request, "/hotels", ["diogenesDB.hotels"], list_query,
+        lambda sql_db: list_query.fetch(sql_db, where), params=filters
+    )
 
 @api_router.get("/hotels/{hotel_id}", response_model=Hotel)
 async def get_hotel(hotel_id: str, x_user_id: Optional[str] = Header(None)):
@@ -1693,6 +2015,7 @@ async def create_hotel(hotel: HotelCreate, x_user_id: Optional[str] = Header(Non
     doc['updated_at'] = doc['updated_at'].isoformat()
     
     await db.hotels.insert_one(doc)
+    table_versions.bump("diogenesDB.hotels")
     await log_action(user['email'], "CREATE", "hotels", new_hotel.id, f"Created hotel: {hotel.name}")
     
     return new_hotel
@@ -1719,6 +2042,7 @@ async def update_hotel(hotel_id: str, hotel: HotelCreate, x_user_id: Optional[st
     update_data['updated_at'] = datetime.now(timezone.utc).isoformat()
     
     await db.hotels.update_one({"id": hotel_id}, {"$set": update_data})
+    table_versions.bump("diogenesDB.hotels")
     await log_action(user['email'], "UPDATE", "hotels", hotel_id, f"Updated hotel: {hotel.name}")
     
     return {"message": "Hotel updated successfully"}
@@ -1740,6 +2064,7 @@ async def delete_hotel(hotel_id: str, x_user_id: Optional[str] = Header(None)):
     result = await db.hotels.delete_one({"id": hotel_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Hotel not found")
+    table_versions.bump("diogenesDB.hotels")
     
     await log_action(user['email'], "DELETE", "hotels", hotel_id, "Deleted hotel")
     
@@ -1872,6 +2197,8 @@ async def upload_hotels(file: UploadFile = File(...), x_user_id: Optional[str] =
                 errors.append(f"Row {index + 1}: {str(e)}")
                 continue
         
+        table_versions.bump("diogenesDB.hotels")
+        
         # Log the action
         await log_action(
             user['email'], 
@@ -1894,76 +2221,122 @@ async def upload_hotels(file: UploadFile = File(...), x_user_id: Optional[str] =
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error processing Excel file: {str(e)}")
 
+class JourneyBatchRequest(BaseModel):
+    reservation_ids: List[str]
+
+@api_router.get("/reservations/journeys")
+async def get_reservation_journeys(
+    request: Request,
+    arrival_date: str = Query(...),
+    package_id: Optional[str] = Query(default=None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Journey timelines for all reservations arriving on a day (optionally one package),
+    computed in one pass from cached per-(package, arrival date) leg schedules.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    user = await get_current_user(x_user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_role = user.get('role', '')
+    if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('reservations', []):
+        raise HTTPException(status_code=403, detail="You don't have permission to view reservations")
+    
+    params = {"arrival_date": arrival_date, "package_id": package_id}
+    
+    def _load():
+        sql_db = SessionLocal()
+        try:
+            return json_dumps(reservation_journeys(sql_db, arrival_date=arrival_date, package_id=package_id))
+        finally:
+            sql_db.close()
+    
+    try:
+        return await serve_cached(
+            request, "/reservations/journeys", params,
+            ["diogenesDB.reservations", "diogenesDB.packages", "diogenesDB.package_legs"], _load
+        )
+    except JourneyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/reservations/journeys")
+async def post_reservation_journeys(body: JourneyBatchRequest, x_user_id: Optional[str] = Header(None)):
+    """Journey timelines for a list of reservation ids (same shape as the single journey endpoint)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    user = await get_current_user(x_user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_role = user.get('role', '')
+    if user_role not in PERMISSIONS or 'read' not in PERMISSIONS[user_role].get('reservations', []):
+        raise HTTPException(status_code=403, detail="You don't have permission to view reservations")
+    
+    try:
+        journeys = await run_db(with_sql_session, reservation_journeys, body.reservation_ids)
+    except JourneyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return json_bytes_response(journeys)
+
 @api_router.get("/reservations/{reservation_id}/journey")
 async def get_reservation_journey(reservation_id: str, x_user_id: Optional[str] = Header(None)):
     """Get passenger journey timeline for a multi-leg reservation"""
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    # Get reservation
-    reservation = await db.reservations.find_one({"id": reservation_id}, {"_id": 0})
-    if not reservation:
+    journeys = await run_db(with_sql_session, reservation_journeys, [reservation_id])
+    if not journeys:
         raise HTTPException(status_code=404, detail="Reservation not found")
     
-    # If no package, return simple single-leg journey
-    if not reservation.get('package_id'):
-        return {
-            "reservation": reservation,
-            "package": None,
-            "journey": [{
-                "step_number": 1,
-                "leg_type": "hotel",
-                "location": reservation.get('destination', 'N/A'),
-                "hotel_name": reservation.get('hotel', 'N/A'),
-                "check_in_date": reservation.get('arrivalDate', ''),
-                "check_out_date": reservation.get('departureDate', ''),
-                "duration_nights": 0,
-                "room_type": reservation.get('room_type'),
-                "board_type": reservation.get('board_type'),
-                "status": "confirmed" if reservation.get('status') == 'confirmed' else "pending"
-            }]
-        }
-    
-    # Get package details
-    package = await db.packages.find_one({"id": reservation['package_id']}, {"_id": 0})
-    if not package:
+    journey = journeys[0]
+    if journey['reservation'].get('package_id') and journey['package'] is None:
         raise HTTPException(status_code=404, detail="Package not found")
+    return json_bytes_response(journey)
+
+@api_router.get("/packages/{package_id}/schedule")
+async def get_package_schedule(package_id: str, arrival_date: str = Query(...), x_user_id: Optional[str] = Header(None)):
+    """Leg check-in/check-out dates of a package for a given arrival date (cached)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
     
-    # Calculate dates for each leg based on reservation start date
-    from datetime import datetime, timedelta
-    start_date = datetime.strptime(reservation['arrivalDate'], "%Y-%m-%d")
-    
-    journey = []
-    current_date = start_date
+    try:
+        schedule = await run_db(with_sql_session, package_schedule, package_id, arrival_date)
+    except JourneyError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if schedule is None:
+        raise HTTPException(status_code=404, detail="Package not found")
+    return json_bytes_response(schedule)
+
+# ===== DASHBOARD =====
+async def _recent_activity_widget(timeout: float) -> List[Dict[str, Any]]:
+    """Last system log entries (MongoDB)"""
+    return await mongo_db.logs.find({}, {"_id": 0}).sort("timestamp", -1).limit(10).to_list(10)
+
+dashboard_service.widget(
+    'recentActivity', _recent_activity_widget,
+    roles=[role for role, permissions in PERMISSIONS.items() if 'read' in permissions.get('logs', [])]
+)
+
+@api_router.get("/dashboard")
+async def get_dashboard(refresh: bool = False, x_user_id: Optional[str] = Header(None)):
+    """
+    All dashboard widgets in one response (stats, weeklyData, topHotels, topProducts, ...).
+    Widgets are computed concurrently with per-widget timeouts; failed or slow widgets
+    are listed under 'errors' and the rest is returned. Cached briefly per role.
+    """
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
     
-    for leg in package.get('legs', []):
-        leg_data = leg.copy()
-        
-        if leg['leg_type'] in ['hotel', 'accommodation']:
-            leg_data['check_in_date'] = current_date.strftime("%d.%m.%Y")
-            checkout_date = current_date + timedelta(days=leg.get('duration_nights', 0))
-            leg_data['check_out_date'] = checkout_date.strftime("%d.%m.%Y")
-            current_date = checkout_date
-        else:
-            # Transfer or other types
-            leg_data['check_in_date'] = current_date.strftime("%d.%m.%Y")
-            leg_data['check_out_date'] = current_date.strftime("%d.%m.%Y")
-        
-        # Determine status based on current_leg
-        if leg['step_number'] < reservation.get('current_leg', 0):
-            leg_data['status'] = 'completed'
-        elif leg['step_number'] == reservation.get('current_leg', 0):
-            leg_data['status'] = 'in_progress'
-        else:
-            leg_data['status'] = 'pending'
-        
-        journey.append(leg_data)
+    user = await get_current_user(x_user_id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
     
-    return {
-        "reservation": reservation,
-        "package": package,
-        "journey": journey
-    }
+    return json_bytes_response(await dashboard_service.get(user.get('role', ''), refresh=refresh))
 
 @api_router.get("/source-agencies")
 async def get_source_agencies():
@@ -1971,51 +2344,115 @@ async def get_source_agencies():
     return SOURCE_AGENCIES
 
 # ===== HEALTH CHECK =====
-@api_router.get("/health", response_model=HealthStatus)
-async def health_check(sql_db: Session = Depends(get_db)):
+from diogenes_service import get_diogenes_connection
+
+def _ping_sql_server():
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+
+def _ping_diogenes():
+    conn = get_diogenes_connection()
     try:
-        # Count from SQL Server (business data)
-        total_flights = sql_db.query(func.count(SQLFlight.id)).scalar()
-        total_reservations = sql_db.query(func.count(SQLReservation.id)).scalar()
-        total_users = sql_db.query(func.count(SQLUser.id)).scalar()
-        
-        # Count from MongoDB (logs only)
-        total_logs = await mongo_db.logs.count_documents({})
-        
-        return HealthStatus(
-            database="SQL Server + MongoDB (logs)",
-            total_flights=total_flights,
-            total_reservations=total_reservations,
-            total_users=total_users,
-            total_logs=total_logs,
-            status="healthy"
-        )
-    except Exception as e:
-        return HealthStatus(
-            database=f"error: {str(e)}",
-            total_flights=0,
-            total_reservations=0,
-            total_users=0,
-            total_logs=0,
-            status="unhealthy"
-        )
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    finally:
+        conn.close()
+
+async def _ping_mongo():
+    await mongo_db.command('ping')
+
+async def _deep_health_counts() -> Dict[str, Any]:
+    """Exact table counts; only run by the background prober, never per request"""
+    def _count_sql():
+        sql_db = SessionLocal()
+        try:
+            return (
+                sql_db.query(func.count(SQLFlight.id)).scalar(),
+                sql_db.query(func.count(SQLReservation.id)).scalar(),
+                sql_db.query(func.count(SQLUser.id)).scalar()
+            )
+        finally:
+            sql_db.close()
+    total_flights, total_reservations, total_users = await run_db(_count_sql)
+    total_logs = await mongo_db.logs.count_documents({})
+    return {
+        "total_flights": total_flights,
+        "total_reservations": total_reservations,
+        "total_users": total_users,
+        "total_logs": total_logs,
+    }
+
+health_prober.probe("sql_server", sync_probe(_ping_sql_server), critical=True)
+health_prober.probe("diogenes", sync_probe(_ping_diogenes), critical=False)
+health_prober.probe("mongo", _ping_mongo, critical=False)
+health_prober.gauge("sqlalchemy", lambda: engine_pool_metrics(engine))
+health_prober.gauge("db_executor", lambda: {
+    key: value for key, value in db_executor.metrics().items() if key in ("pool_size", "active", "queued", "saturation")
+})
+health_prober.deep(_deep_health_counts)
+
+@api_router.get("/health/live")
+async def health_live():
+    """Liveness: process is up and serving (no I/O)"""
+    return health_prober.liveness()
+
+@api_router.get("/health/ready")
+async def health_ready():
+    """
+    Readiness from the background prober's cached results (no I/O per request):
+    per-dependency status and latency percentiles, plus pool saturation.
+    503 when a critical dependency is down or the probes are stale.
+    """
+    readiness = health_prober.readiness()
+    return JSONResponse(status_code=200 if readiness["ready"] else 503, content=readiness)
+
+@api_router.get("/health", response_model=HealthStatus)
+async def health_check():
+    """Legacy health summary, served from the prober's cached readiness and deep counts"""
+    readiness = health_prober.readiness()
+    deep = health_prober.deep_snapshot() or {}
+    counts = deep.get("data") or {}
+    failing = [name for name, probe in readiness["probes"].items() if probe["ok"] is False]
+    return HealthStatus(
+        database="SQL Server + MongoDB (logs)" if not failing else f"error: {', '.join(failing)} unavailable",
+        total_flights=counts.get("total_flights", 0),
+        total_reservations=counts.get("total_reservations", 0),
+        total_users=counts.get("total_users", 0),
+        total_logs=counts.get("total_logs", 0),
+        status="healthy" if readiness["ready"] else "unhealthy"
+    )
+
+@api_router.get("/admin/health")
+async def get_deep_health(refresh: bool = Query(default=False), x_user_id: Optional[str] = Header(None)):
+    """Readiness details plus cached deep counts; refresh=true recomputes the counts now (Admin only)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    deep = await health_prober.refresh_deep() if refresh else health_prober.deep_snapshot()
+    return {**health_prober.readiness(), "deep": deep}
 
 
 # ===== DATABASE STATUS =====
 @api_router.get("/database/status/simple")
-async def get_database_status_simple(sql_db: Session = Depends(get_db)):
+async def get_database_status_simple():
     """Get simple database connection status (no auth required)"""
     try:
         # SQL Server status
         sql_server_host = os.getenv('SQL_SERVER_HOST', 'N/A')
         sql_server_db = os.getenv('SQL_SERVER_DB', 'N/A')
         
-        # Get counts from SQL Server
-        users_count = sql_db.query(func.count(SQLUser.id)).scalar()
-        flights_count = sql_db.query(func.count(SQLFlight.id)).scalar()
-        reservations_count = sql_db.query(func.count(SQLReservation.id)).scalar()
-        operations_count = sql_db.query(func.count(SQLOperation.id)).scalar()
-        hotels_count = sql_db.query(func.count(SQLHotel.id)).scalar()
+        # Precomputed counts from the panel_stats table
+        totals = (await run_db(panel_stats.snapshot))['totals']
+        users_count, flights_count, reservations_count = totals['users'], totals['flights'], totals['reservations']
+        operations_count, hotels_count = totals['operations'], totals['hotels']
         
         total_sql_records = users_count + flights_count + reservations_count + operations_count + hotels_count
         
@@ -2060,6 +2497,59 @@ async def get_database_status_simple(sql_db: Session = Depends(get_db)):
             }
         }
 
+# ===== DB EXECUTOR METRICS =====
+@api_router.get("/admin/executor/metrics")
+async def get_executor_metrics(x_user_id: Optional[str] = Header(None)):
+    """DB executor pool saturation, queue wait and deadline metrics (Admin only)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return db_executor.metrics()
+
+# ===== QUERY CACHE =====
+@api_router.get("/admin/cache/stats")
+async def get_query_cache_stats(x_user_id: Optional[str] = Header(None)):
+    """Query result cache hit ratios, memory use and table versions (Admin only)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return query_cache.stats()
+
+@api_router.post("/admin/cache/clear")
+async def clear_query_cache(x_user_id: Optional[str] = Header(None)):
+    """Drop every cached query result (Admin only)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    query_cache.clear()
+    await log_action(current_user.get('email', 'admin'), "CLEAR_CACHE", "system", "query_cache", "Cleared query result cache")
+    return {"message": "Query cache cleared"}
+
+@app.exception_handler(QueryTimeoutError)
+async def query_timeout_handler(request, exc: QueryTimeoutError):
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
+
 # ===== HELPER FUNCTIONS =====
 async def log_action(user: str, action: str, entity: str, entity_id: str, details: str = ""):
     """Log system actions"""
@@ -2072,7 +2562,7 @@ async def log_action(user: str, action: str, entity: str, entity_id: str, detail
     )
     doc = log.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
-    await db.logs.insert_one(doc)
+    await mongo_db.logs.insert_one(doc)
 
 app.add_middleware(
     CORSMiddleware,
@@ -2080,6 +2570,7 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Configure logging
@@ -2105,6 +2596,19 @@ async def startup_db():
         # Create tables if not exist
         init_sql_db()
         
+        # Apply pending schema migrations (typed columns, indexes, ...); the
+        # migration lock lets only one worker apply them, the others wait and skip
+        if RUN_MIGRATIONS_ON_STARTUP:
+            try:
+                applied_migrations = await run_db(migrations.run, deadline=None)
+                for applied in applied_migrations:
+                    print(f"✅ Migration {applied['version']} {applied['name']} applied ({applied['duration_ms']} ms)")
+                if applied_migrations:
+                    # Renamed / retyped / dropped columns must not linger in the table browser
+                    await run_db(metadata_catalog.refresh, [os.environ['SQL_SERVER_DB']], deadline=None)
+            except Exception as e:
+                print(f"❌ Schema migration failed: {e}")
+        
         # Check if users exist in SQL Server
         sql_db = SessionLocal()
         try:
@@ -2181,63 +2685,156 @@ async def startup_db():
 
 # ==================== DATABASE RESTORE ENDPOINTS ====================
 
-from restore_service import (
-    start_restore, check_restore_status, wait_for_restore,
-    list_databases, get_database_tables, get_table_schema, get_table_data
-)
+from metadata_catalog import metadata_catalog, refresh_periodically, get_table_schema_cached
+from table_browser import get_table_data, prepare_export, parse_filters, TableBrowserError
+from column_profiler import profile_table, profile_cache_table
+from restore_jobs import RestoreJobManager, sse_events
+from restore_warmup import warmup_pipeline
+from restore_cutover import CutoverError, cut_over, rollback, shadow_database_name
+from restore_verify import verification_jobs
+from diogenes_service import DIOGENES_DATABASE, get_database_state, resolve_database_name
+from index_advisor import missing_index_report
+
+# RESTORE_BACKEND=standin: RDS prosedürleri yerine yerel taklit (geliştirme / test)
+if os.environ.get('RESTORE_BACKEND', 'rds').lower() == 'standin':
+    from rds_standin import start_restore, check_restore_status
+else:
+    from restore_service import start_restore, check_restore_status
+
+restore_jobs = RestoreJobManager(start_restore, check_restore_status)
+
+
+@restore_jobs.on_success
+async def invalidate_restored_tables(job: Dict):
+    """Restore edilen database'e bağlı cache sonuçlarını geçersiz kıl"""
+    table_versions.bump_prefix(f"{job['target_db']}.")
+
+
+@restore_jobs.on_success
+async def warm_up_restored_database(job: Dict):
+    """Restore biter bitmez istatistik/index/buffer pool/cache warm-up'ını çalıştır"""
+    job_id = job['job_id']
+    restore_jobs.annotate(job_id, warmup={'status': 'running'})
+    report = await run_db(warmup_pipeline.run, job['target_db'], deadline=None)
+    restore_jobs.annotate(job_id, warmup=report)
+
+
+@restore_jobs.on_success
+async def cut_over_shadow_restore(job: Dict):
+    """Shadow modunda restore edilen ve ısıtılan kopyayı aktif database yap"""
+    if job.get('mode') != 'shadow':
+        return
+    try:
+        result = await cut_over(job['target_db'])
+        restore_jobs.annotate(job['job_id'], cutover={'status': 'SUCCESS', **result})
+    except CutoverError as e:
+        logger.error(f"Cut-over for restore job {job['job_id']} aborted: {e}")
+        restore_jobs.annotate(job['job_id'], cutover={'status': 'ABORTED', 'error': str(e)})
+
+
+@restore_jobs.on_success
+async def refresh_catalog_after_restore(job: Dict):
+    """Restore yeni bir database ekler / şemayı değiştirebilir - catalog'u yenile"""
+    result = await run_db(metadata_catalog.refresh, deadline=None)
+    if result.get('drift') and result['drift']['has_drift']:
+        restore_jobs.annotate(job['job_id'], schema_drift=result['drift'])
+
+
+@app.on_event("startup")
+async def startup_restore_jobs():
+    """Kayıtlı restore job'larını yükle ve yarım kalanların takibine devam et"""
+    restore_jobs.load()
+    restore_jobs.resume()
+    # Catalog ilk yüklemesi ve periyodik yenileme
+    app.state.catalog_refresher = asyncio.create_task(refresh_periodically())
+    # panel_stats ilk hesaplama ve periyodik düzeltme
+    app.state.stats_rebuilder = asyncio.create_task(rebuild_stats_periodically())
+    # Readiness probe'ları ve cache'lenmiş deep sayılar
+    app.state.health_prober = asyncio.create_task(health_prober.run_forever())
+
+
+async def require_restore_admin(x_user_id: Optional[str], detail: str) -> Dict:
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if current_user.get('role', '') != 'admin':
+        raise HTTPException(status_code=403, detail=detail)
+    return current_user
+
 
 @api_router.post("/database/restore")
 async def restore_database(
     s3_key: str = Body(..., embed=True),
     target_db_name: str = Body(default='DIOGENESSEJOUR', embed=True),
     wait_for_completion: bool = Body(default=True, embed=True),
+    mode: str = Body(default='direct', embed=True),
     x_user_id: Optional[str] = Header(None)
 ):
     """
     Restore database from S3 .bak file
     
+    The restore runs as a background job; progress can be followed via
+    /api/database/restore/jobs/{job_id}/events (Server-Sent Events).
+    
     Args:
         s3_key: S3 object key (e.g., 'sql-backups/DIOGENESSEJOUR_26_02.bak')
         target_db_name: Target database name (default: DIOGENESSEJOUR)
         wait_for_completion: Wait for restore to complete before returning (default: True)
+        mode: 'direct' restores onto target_db_name; 'shadow' restores into a new
+            copy, validates and warms it, then switches the panel to it
     """
     # Check permission - only admin can restore database
-    if not x_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
+    current_user = await require_restore_admin(x_user_id, "Only admin can restore database")
     
-    current_user = await get_current_user(x_user_id)
-    if not current_user:
-        raise HTTPException(status_code=401, detail="User not found")
+    if mode not in ('direct', 'shadow'):
+        raise HTTPException(status_code=400, detail="mode must be 'direct' or 'shadow'")
     
-    user_role = current_user.get('role', '')
-    if user_role != 'admin':
-        raise HTTPException(status_code=403, detail="Only admin can restore database")
+    if mode == 'shadow':
+        if target_db_name != DIOGENES_DATABASE:
+            raise HTTPException(status_code=400, detail=f"Shadow restore is only supported for {DIOGENES_DATABASE}")
+        restore_db_name = shadow_database_name(target_db_name)
+    else:
+        restore_db_name = target_db_name
     
     # Start restore
-    result = start_restore(s3_key, target_db_name)
+    result = await restore_jobs.submit(
+        s3_key, restore_db_name,
+        requested_by=current_user.get('email'),
+        mode=mode,
+        logical_db=target_db_name
+    )
     
     if not result.get('success'):
         raise HTTPException(status_code=500, detail=result.get('message', 'Restore failed'))
     
-    task_id = result.get('task_id')
+    job = result['job']
+    if mode == 'direct':
+        # Restored database is being replaced - drop cached results that depend on it
+        table_versions.bump_prefix(f"{target_db_name}.")
     
-    # Wait for completion if requested
-    if wait_for_completion and task_id:
-        wait_result = wait_for_restore(task_id, timeout=1200)  # 20 minutes timeout
+    # Wait for completion if requested (awaits the job, no worker thread is held)
+    if wait_for_completion:
+        job = await restore_jobs.wait(job['job_id'], timeout=restore_jobs.timeout)
         
         return {
             "message": "Restore process completed",
             "restore_start": result,
-            "restore_completion": wait_result,
-            "database_name": target_db_name
+            "restore_completion": job,
+            "job_id": job['job_id'],
+            "database_name": restore_db_name
         }
     else:
         return {
             "message": "Restore process started",
-            "task_id": task_id,
+            "job_id": job['job_id'],
+            "task_id": job['task_id'],
             "restore_info": result,
-            "database_name": target_db_name,
-            "note": "Use /api/database/restore/status endpoint to check progress"
+            "database_name": restore_db_name,
+            "note": "Use /api/database/restore/jobs/{job_id}/events to follow progress"
         }
 
 
@@ -2247,29 +2844,219 @@ async def get_restore_status(
     x_user_id: Optional[str] = Header(None)
 ):
     """
-    Check restore task status
+    Check restore task status (served from the restore job registry)
     
     Args:
         task_id: Optional task ID to check specific task
     """
     # Check permission - only admin can check restore status
-    if not x_user_id:
-        raise HTTPException(status_code=401, detail="Authentication required")
+    await require_restore_admin(x_user_id, "Only admin can check restore status")
     
-    current_user = await get_current_user(x_user_id)
-    if not current_user:
-        raise HTTPException(status_code=401, detail="User not found")
+    if task_id:
+        job = restore_jobs.find_by_task(task_id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Restore task not found")
+        tasks = [job]
+    else:
+        tasks = restore_jobs.list(limit=10)
     
-    user_role = current_user.get('role', '')
-    if user_role != 'admin':
-        raise HTTPException(status_code=403, detail="Only admin can check restore status")
+    return {
+        "success": True,
+        "tasks": tasks,
+        "count": len(tasks)
+    }
+
+
+@api_router.get("/database/restore/jobs/{job_id}")
+async def get_restore_job(job_id: str, x_user_id: Optional[str] = Header(None)):
+    """Get a single restore job"""
+    await require_restore_admin(x_user_id, "Only admin can check restore status")
     
-    result = check_restore_status(task_id)
+    job = restore_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Restore job not found")
+    return job
+
+
+@api_router.get("/database/restore/jobs/{job_id}/events")
+async def stream_restore_job(
+    job_id: str,
+    x_user_id: Optional[str] = Header(None),
+    user_id: Optional[str] = Query(None)
+):
+    """
+    Stream restore progress as Server-Sent Events.
+    EventSource cannot send custom headers, so user_id may be passed as a query parameter.
+    """
+    await require_restore_admin(x_user_id or user_id, "Only admin can check restore status")
     
-    if not result.get('success'):
-        raise HTTPException(status_code=500, detail=result.get('message', 'Failed to get status'))
+    if not restore_jobs.get(job_id):
+        raise HTTPException(status_code=404, detail="Restore job not found")
     
-    return result
+    return StreamingResponse(
+        sse_events(restore_jobs, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@api_router.get("/database/restore/warmup")
+async def get_warmup_reports(x_user_id: Optional[str] = Header(None)):
+    """Last post-restore warm-up report per database"""
+    await require_restore_admin(x_user_id, "Only admin can view warm-up reports")
+    
+    return {
+        "steps": warmup_pipeline.steps(),
+        "reports": warmup_pipeline.last_reports()
+    }
+
+
+@api_router.post("/database/restore/warmup")
+async def run_warmup(
+    database_name: str = Body(default='DIOGENESSEJOUR', embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Run the post-restore warm-up pipeline manually"""
+    await require_restore_admin(x_user_id, "Only admin can run warm-up")
+    
+    return await run_db(warmup_pipeline.run, database_name, deadline=None)
+
+
+@api_router.get("/database/active")
+async def get_active_diogenes_database(x_user_id: Optional[str] = Header(None)):
+    """Physical database currently served as DIOGENESSEJOUR, plus the rollback candidate"""
+    await require_restore_admin(x_user_id, "Only admin can view database state")
+    
+    return get_database_state()
+
+
+@api_router.post("/database/cutover")
+async def cutover_database(
+    database_name: str = Body(..., embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Validate a restored copy and switch the panel to it"""
+    await require_restore_admin(x_user_id, "Only admin can switch databases")
+    
+    try:
+        return await cut_over(database_name)
+    except CutoverError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@api_router.post("/database/rollback")
+async def rollback_database(x_user_id: Optional[str] = Header(None)):
+    """Switch the panel back to the previous database copy"""
+    await require_restore_admin(x_user_id, "Only admin can switch databases")
+    
+    try:
+        return await rollback()
+    except CutoverError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@api_router.post("/database/{database_name}/verify")
+async def verify_database_endpoint(
+    database_name: str,
+    manifest: Optional[Dict[str, Dict[str, Any]]] = Body(default=None, embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Start a verification job: row counts + CHECKSUM_AGG for every table, computed in
+    parallel and diffed against the manifest (if given) or the previous snapshot
+    """
+    await require_restore_admin(x_user_id, "Only admin can verify databases")
+    
+    return verification_jobs.start(resolve_database_name(database_name), manifest)
+
+
+@api_router.get("/database/verify/jobs")
+async def list_verification_jobs(x_user_id: Optional[str] = Header(None)):
+    """Recent verification jobs"""
+    await require_restore_admin(x_user_id, "Only admin can verify databases")
+    
+    return {"jobs": verification_jobs.list()}
+
+
+@api_router.get("/database/verify/jobs/{job_id}")
+async def get_verification_job(job_id: str, x_user_id: Optional[str] = Header(None)):
+    """Verification job status and diff report"""
+    await require_restore_admin(x_user_id, "Only admin can verify databases")
+    
+    job = verification_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Verification job not found")
+    return job
+
+
+@api_router.get("/database/catalog")
+async def get_catalog_status(x_user_id: Optional[str] = Header(None)):
+    """Metadata catalog status and recent schema drift reports"""
+    await require_restore_admin(x_user_id, "Only admin can view the metadata catalog")
+    
+    return {
+        **metadata_catalog.status(),
+        "drift_history": metadata_catalog.drift_history()
+    }
+
+
+@api_router.post("/database/catalog/refresh")
+async def refresh_catalog(
+    databases: Optional[List[str]] = Body(default=None, embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Refresh the metadata catalog (all databases, or only the given ones)"""
+    await require_restore_admin(x_user_id, "Only admin can refresh the metadata catalog")
+    
+    return await run_db(metadata_catalog.refresh, databases, deadline=None)
+
+
+@api_router.get("/database/migrations")
+async def get_migration_status(x_user_id: Optional[str] = Header(None)):
+    """Schema migrations for diogenesDB and whether each one is applied"""
+    await require_restore_admin(x_user_id, "Only admin can view schema migrations")
+
+    return {"migrations": await run_db(migrations.status)}
+
+
+@api_router.post("/database/migrations/run")
+async def run_migrations(
+    target: Optional[int] = Body(default=None, embed=True),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Apply pending schema migrations (up to and including target, if given)"""
+    current_user = await require_restore_admin(x_user_id, "Only admin can run schema migrations")
+
+    applied = await run_db(migrations.run, target, deadline=None)
+    if applied:
+        table_versions.bump_prefix("diogenesDB.")
+        await run_db(panel_stats.rebuild, deadline=None)
+        await run_db(ranking_index.rebuild, deadline=None)
+        await run_db(metadata_catalog.refresh, [os.environ['SQL_SERVER_DB']], deadline=None)
+        await log_action(current_user.get('email', 'admin'), "MIGRATE", "system", "diogenesDB",
+                         f"Applied migrations {', '.join(str(m['version']) for m in applied)}")
+    return {"applied": applied}
+
+
+@api_router.get("/database/index-advisor")
+async def get_index_advisor(
+    database: Optional[str] = Query(None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Missing-index suggestions for diogenesDB and the active DIOGENESSEJOUR copy"""
+    await require_restore_admin(x_user_id, "Only admin can view index suggestions")
+
+    databases = [database] if database else [
+        os.environ['SQL_SERVER_DB'], get_database_state()['database']
+    ]
+    reports = []
+    for database_name in dict.fromkeys(databases):
+        try:
+            reports.append(await run_db(missing_index_report, database_name, deadline=None))
+        except Exception as e:
+            logging.error(f"Index advisor failed for {database_name}: {e}")
+            reports.append({"database": database_name, "error": str(e), "suggestions": []})
+    return {"reports": reports}
 
 
 @api_router.get("/database/list")
@@ -2287,12 +3074,10 @@ async def list_all_databases(x_user_id: Optional[str] = Header(None)):
     if user_role != 'admin':
         raise HTTPException(status_code=403, detail="Only admin can list databases")
     
-    result = list_databases()
+    if not metadata_catalog.loaded:
+        await run_db(metadata_catalog.refresh, deadline=None)
     
-    if not result.get('success'):
-        raise HTTPException(status_code=500, detail=result.get('message', 'Failed to list databases'))
-    
-    return result
+    return metadata_catalog.list_databases()
 
 
 @api_router.get("/database/{database_name}/tables")
@@ -2310,10 +3095,15 @@ async def get_tables(database_name: str, x_user_id: Optional[str] = Header(None)
     if user_role != 'admin':
         raise HTTPException(status_code=403, detail="Only admin can view database tables")
     
-    result = get_database_tables(database_name)
+    database_name = resolve_database_name(database_name)
+    result = metadata_catalog.get_database_tables(database_name)
+    if result is None:
+        # Catalog'da olmayan (ör. yeni restore edilmiş) database - sadece onu yenile
+        if await run_db(metadata_catalog.refresh_on_miss, database_name, deadline=None):
+            result = metadata_catalog.get_database_tables(database_name)
     
-    if not result.get('success'):
-        raise HTTPException(status_code=500, detail=result.get('message', 'Failed to get tables'))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Database not found")
     
     return result
 
@@ -2338,7 +3128,8 @@ async def get_schema(
     if user_role != 'admin':
         raise HTTPException(status_code=403, detail="Only admin can view table schema")
     
-    result = get_table_schema(database_name, table_name, schema_name)
+    database_name = resolve_database_name(database_name)
+    result = await run_db(get_table_schema_cached, database_name, table_name, schema_name)
     
     if not result.get('success'):
         raise HTTPException(status_code=500, detail=result.get('message', 'Failed to get table schema'))
@@ -2353,9 +3144,19 @@ async def get_data(
     schema_name: str = Query(default='dbo'),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=100, ge=1, le=1000),
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    direction: str = Query(default='asc', pattern='^(asc|desc)$'),
+    filter: Optional[List[str]] = Query(default=None),
     x_user_id: Optional[str] = Header(None)
 ):
-    """Get paginated data from a table"""
+    """
+    Get a page of data from a table
+    
+    Pages are read with keyset paging on the primary key; pass pagination.next_cursor
+    back as `cursor` for the next page. Filters use `column:op:value`
+    (op: eq, ne, lt, lte, gt, gte, contains, startswith, in, isnull, notnull).
+    """
     # Check permission - only admin can view table data
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -2368,12 +3169,113 @@ async def get_data(
     if user_role != 'admin':
         raise HTTPException(status_code=403, detail="Only admin can view table data")
     
-    result = get_table_data(database_name, table_name, schema_name, page, page_size)
+    database_name = resolve_database_name(database_name)
+    try:
+        filters = parse_filters(filter)
+    except TableBrowserError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    result = await run_db(
+        get_table_data, database_name, table_name, schema_name, page, page_size,
+        cursor=cursor, sort=sort, direction=direction, filters=filters
+    )
     
     if not result.get('success'):
-        raise HTTPException(status_code=500, detail=result.get('message', 'Failed to get table data'))
+        status_code = 400 if result.get('bad_request') else 500
+        raise HTTPException(status_code=status_code, detail=result.get('message', 'Failed to get table data'))
     
-    return result
+    return json_bytes_response(result)
+
+
+@api_router.get("/database/{database_name}/tables/{table_name}/profile")
+async def get_table_profile(
+    request: Request,
+    database_name: str,
+    table_name: str,
+    schema_name: str = Query(default='dbo'),
+    sample_percent: Optional[float] = Query(default=None, gt=0, le=100),
+    columns: Optional[str] = Query(default=None),
+    top_k: int = Query(default=10, ge=1, le=100),
+    x_user_id: Optional[str] = Header(None)
+):
+    """
+    Per-column profile: null ratio, distinct estimate (HyperLogLog), min/max and top values.
+    Large tables are sampled with TABLESAMPLE; results are cached per table version.
+    """
+    # Check permission - only admin can profile tables
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_role = current_user.get('role', '')
+    if user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can profile tables")
+    
+    database_name = resolve_database_name(database_name)
+    column_list = [c.strip() for c in columns.split(',') if c.strip()] if columns else None
+    params = {
+        "database": database_name, "schema": schema_name, "table": table_name,
+        "sample_percent": sample_percent, "columns": column_list, "top_k": top_k
+    }
+    try:
+        return await serve_cached(
+            request,
+            "/database/profile",
+            params,
+            [profile_cache_table(database_name, schema_name, table_name)],
+            lambda: profile_table(
+                database_name, table_name, schema_name,
+                sample_percent=sample_percent, columns=column_list, top_k=top_k
+            )
+        )
+    except TableBrowserError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@api_router.get("/database/{database_name}/tables/{table_name}/export")
+async def export_data(
+    database_name: str,
+    table_name: str,
+    schema_name: str = Query(default='dbo'),
+    format: str = Query(default='csv', pattern='^(csv|parquet)$'),
+    sort: Optional[str] = Query(default=None),
+    direction: str = Query(default='asc', pattern='^(asc|desc)$'),
+    filter: Optional[List[str]] = Query(default=None),
+    x_user_id: Optional[str] = Header(None)
+):
+    """Stream a whole table (optionally filtered) as CSV or Parquet"""
+    # Check permission - only admin can export table data
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    user_role = current_user.get('role', '')
+    if user_role != 'admin':
+        raise HTTPException(status_code=403, detail="Only admin can export table data")
+    
+    database_name = resolve_database_name(database_name)
+    try:
+        chunks = await run_db(
+            prepare_export, database_name, table_name, schema_name, format,
+            sort=sort, direction=direction, filters=parse_filters(filter)
+        )
+    except TableBrowserError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    media_type = "text/csv; charset=utf-8" if format == 'csv' else "application/vnd.apache.parquet"
+    filename = f"{database_name}_{schema_name}_{table_name}.{format}"
+    # Senkron generator - Starlette her chunk'ı threadpool'da üretir, event loop bloklanmaz
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 # ==================== DIOGENESSEJOUR DATABASE ENDPOINTS ====================
@@ -2383,6 +3285,35 @@ from diogenes_service import (
     get_reservations, get_operations, get_reservation_details,
     test_diogenes_connection
 )
+from diogenes_service import get_table_checksum, get_table_change_marker, get_active_database
+
+# Cache version probes for DIOGENESSEJOUR tables: CHECKSUM_AGG for the small
+# Otel table, partition row counts + last write time for the large ones
+table_versions.register_probe("DIOGENESSEJOUR.Otel", lambda: get_table_checksum("Otel"))
+table_versions.register_probe("DIOGENESSEJOUR.Musteri", lambda: get_table_change_marker("Musteri"))
+table_versions.register_probe("DIOGENESSEJOUR.MusteriOpr", lambda: get_table_change_marker("MusteriOpr"))
+
+
+# Sadece panelin okuduğu (aktif) database için - shadow restore'da cut-over'dan sonra çalışır
+@warmup_pipeline.step('rebuild_panel_cache', when=lambda database_name: database_name == get_active_database())
+def rebuild_panel_cache(database_name: str) -> Dict[str, int]:
+    """Diogenes list endpoint'lerinin varsayılan sayfalarını cache'e önceden yükle"""
+    defaults = {"limit": 100000, "offset": 0}
+    warm = [
+        ("/diogenes/hotels", ["DIOGENESSEJOUR.Otel"], lambda: get_hotels(**defaults)),
+        ("/diogenes/customers", ["DIOGENESSEJOUR.Musteri"], lambda: get_customers(**defaults)),
+        ("/diogenes/reservations", ["DIOGENESSEJOUR.MusteriOpr", "DIOGENESSEJOUR.Musteri"],
+         lambda: get_reservations(**defaults)),
+        ("/diogenes/operations", ["DIOGENESSEJOUR.MusteriOpr", "DIOGENESSEJOUR.Musteri"],
+         lambda: get_operations(**defaults)),
+    ]
+    sizes = {}
+    for endpoint, tables, loader in warm:
+        sizes[endpoint] = query_cache.get_or_load(endpoint, defaults, tables, loader).size
+    sizes["/diogenes/hotels/regions"] = query_cache.get_or_load(
+        "/diogenes/hotels/regions", None, ["DIOGENESSEJOUR.Otel"], lambda: {"regions": get_hotel_regions()}
+    ).size
+    return sizes
 
 @api_router.get("/diogenes/test")
 async def test_diogenes_db(x_user_id: Optional[str] = Header(None)):
@@ -2395,7 +3326,7 @@ async def test_diogenes_db(x_user_id: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="User not found")
     
     try:
-        is_connected = test_diogenes_connection()
+        is_connected = await run_db(test_diogenes_connection)
         return {
             "success": is_connected,
             "message": "DIOGENESSEJOUR database connection successful" if is_connected else "Connection failed"
@@ -2406,6 +3337,7 @@ async def test_diogenes_db(x_user_id: Optional[str] = Header(None)):
 
 @api_router.get("/diogenes/customers")
 async def get_diogenes_customers(
+    request: Request,
     limit: int = Query(default=100000, ge=1, le=100000),
     offset: int = Query(default=0, ge=0),
     search: Optional[str] = Query(default=None),
@@ -2428,12 +3360,19 @@ async def get_diogenes_customers(
     
     # Permission check
     user_role = current_user.get('role', '')
-    if not check_permission(user_role, "reservations", "read"):
+    if not has_permission(user_role, "reservations", "read"):
         raise HTTPException(status_code=403, detail="No permission to view customers")
     
     try:
-        result = get_customers(limit=limit, offset=offset, search=search)
-        return result
+        return await serve_cached(
+            request,
+            "/diogenes/customers",
+            {"limit": limit, "offset": offset, "search": search},
+            ["DIOGENESSEJOUR.Musteri"],
+            lambda: get_customers(limit=limit, offset=offset, search=search)
+        )
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error in get_diogenes_customers: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch customers: {str(e)}")
@@ -2441,6 +3380,7 @@ async def get_diogenes_customers(
 
 @api_router.get("/diogenes/hotels")
 async def get_diogenes_hotels(
+    request: Request,
     limit: int = Query(default=100000, ge=1, le=100000),
     offset: int = Query(default=0, ge=0),
     search: Optional[str] = Query(default=None),
@@ -2465,19 +3405,26 @@ async def get_diogenes_hotels(
     
     # Permission check
     user_role = current_user.get('role', '')
-    if not check_permission(user_role, "hotels", "read"):
+    if not has_permission(user_role, "hotels", "read"):
         raise HTTPException(status_code=403, detail="No permission to view hotels")
     
     try:
-        result = get_hotels(limit=limit, offset=offset, search=search, region=region)
-        return result
+        return await serve_cached(
+            request,
+            "/diogenes/hotels",
+            {"limit": limit, "offset": offset, "search": search, "region": region},
+            ["DIOGENESSEJOUR.Otel"],
+            lambda: get_hotels(limit=limit, offset=offset, search=search, region=region)
+        )
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error in get_diogenes_hotels: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch hotels: {str(e)}")
 
 
 @api_router.get("/diogenes/hotels/regions")
-async def get_diogenes_hotel_regions(x_user_id: Optional[str] = Header(None)):
+async def get_diogenes_hotel_regions(request: Request, x_user_id: Optional[str] = Header(None)):
     """Get all hotel regions from DIOGENESSEJOUR database"""
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -2487,8 +3434,15 @@ async def get_diogenes_hotel_regions(x_user_id: Optional[str] = Header(None)):
         raise HTTPException(status_code=401, detail="User not found")
     
     try:
-        regions = get_hotel_regions()
-        return {"regions": regions}
+        return await serve_cached(
+            request,
+            "/diogenes/hotels/regions",
+            None,
+            ["DIOGENESSEJOUR.Otel"],
+            lambda: {"regions": get_hotel_regions()}
+        )
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error in get_diogenes_hotel_regions: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch regions: {str(e)}")
@@ -2496,6 +3450,7 @@ async def get_diogenes_hotel_regions(x_user_id: Optional[str] = Header(None)):
 
 @api_router.get("/diogenes/reservations")
 async def get_diogenes_reservations(
+    request: Request,
     limit: int = Query(default=100000, ge=1, le=100000),
     offset: int = Query(default=0, ge=0),
     search: Optional[str] = Query(default=None),
@@ -2522,18 +3477,25 @@ async def get_diogenes_reservations(
     
     # Permission check
     user_role = current_user.get('role', '')
-    if not check_permission(user_role, "reservations", "read"):
+    if not has_permission(user_role, "reservations", "read"):
         raise HTTPException(status_code=403, detail="No permission to view reservations")
     
     try:
-        result = get_reservations(
-            limit=limit, 
-            offset=offset, 
-            search=search,
-            date_from=date_from,
-            date_to=date_to
+        return await serve_cached(
+            request,
+            "/diogenes/reservations",
+            {"limit": limit, "offset": offset, "search": search, "date_from": date_from, "date_to": date_to},
+            ["DIOGENESSEJOUR.MusteriOpr", "DIOGENESSEJOUR.Musteri"],
+            lambda: get_reservations(
+                limit=limit, 
+                offset=offset, 
+                search=search,
+                date_from=date_from,
+                date_to=date_to
+            )
         )
-        return result
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error in get_diogenes_reservations: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch reservations: {str(e)}")
@@ -2541,6 +3503,7 @@ async def get_diogenes_reservations(
 
 @api_router.get("/diogenes/operations")
 async def get_diogenes_operations(
+    request: Request,
     limit: int = Query(default=100000, ge=1, le=100000),
     offset: int = Query(default=0, ge=0),
     search: Optional[str] = Query(default=None),
@@ -2569,19 +3532,29 @@ async def get_diogenes_operations(
     
     # Permission check
     user_role = current_user.get('role', '')
-    if not check_permission(user_role, "operations", "read"):
+    if not has_permission(user_role, "operations", "read"):
         raise HTTPException(status_code=403, detail="No permission to view operations")
     
     try:
-        result = get_operations(
-            limit=limit,
-            offset=offset,
-            search=search,
-            date_from=date_from,
-            date_to=date_to,
-            operation_type=operation_type
+        return await serve_cached(
+            request,
+            "/diogenes/operations",
+            {
+                "limit": limit, "offset": offset, "search": search,
+                "date_from": date_from, "date_to": date_to, "operation_type": operation_type
+            },
+            ["DIOGENESSEJOUR.MusteriOpr", "DIOGENESSEJOUR.Musteri"],
+            lambda: get_operations(
+                limit=limit,
+                offset=offset,
+                search=search,
+                date_from=date_from,
+                date_to=date_to,
+                operation_type=operation_type
+            )
         )
-        return result
+    except QueryTimeoutError:
+        raise
     except Exception as e:
         logger.error(f"Error in get_diogenes_operations: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch operations: {str(e)}")
@@ -2609,15 +3582,15 @@ async def get_diogenes_reservation_details(
     
     # Permission check
     user_role = current_user.get('role', '')
-    if not check_permission(user_role, "reservations", "read"):
+    if not has_permission(user_role, "reservations", "read"):
         raise HTTPException(status_code=403, detail="No permission to view reservation details")
     
     try:
-        result = get_reservation_details(voucher, tour_operator)
+        result = await run_db(get_reservation_details, voucher, tour_operator)
         if not result:
             raise HTTPException(status_code=404, detail="Reservation not found")
-        return result
-    except HTTPException:
+        return json_bytes_response(result)
+    except (HTTPException, QueryTimeoutError):
         raise
     except Exception as e:
         logger.error(f"Error in get_diogenes_reservation_details: {e}")
@@ -2628,14 +3601,14 @@ async def get_diogenes_reservation_details(
 # ==================== ADMIN PANEL ENDPOINTS ====================
 
 @api_router.get("/database/status")
-async def get_database_status(x_user_id: Optional[str] = Header(None), sql_db: Session = Depends(get_db)):
+async def get_database_status(x_user_id: Optional[str] = Header(None)):
     """
     Get comprehensive database status including SQL Server and MongoDB statistics (Admin only)
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    current_user = get_current_user_sync(x_user_id, sql_db)
+    current_user = await run_db(_load_user, x_user_id)
     if not current_user:
         raise HTTPException(status_code=401, detail="User not found")
     
@@ -2659,13 +3632,10 @@ async def get_database_status(x_user_id: Optional[str] = Header(None), sql_db: S
         }
         
         try:
-            # Get counts from SQL Server using SQLAlchemy
-            users_count = sql_db.query(func.count(SQLUser.id)).scalar()
-            flights_count = sql_db.query(func.count(SQLFlight.id)).scalar()
-            reservations_count = sql_db.query(func.count(SQLReservation.id)).scalar()
-            operations_count = sql_db.query(func.count(SQLOperation.id)).scalar()
-            hotels_count = sql_db.query(func.count(SQLHotel.id)).scalar()
-            packages_count = sql_db.query(func.count(SQLPackage.id)).scalar()
+            # Precomputed counts from the panel_stats table
+            totals = (await run_db(panel_stats.snapshot))['totals']
+            users_count, flights_count, reservations_count = totals['users'], totals['flights'], totals['reservations']
+            operations_count, hotels_count, packages_count = totals['operations'], totals['hotels'], totals['packages']
             
             # Get total records
             total_records = users_count + flights_count + reservations_count + operations_count + hotels_count + packages_count
@@ -2729,7 +3699,7 @@ async def get_database_status(x_user_id: Optional[str] = Header(None), sql_db: S
 
 
 @api_router.get("/admin/statistics")
-async def get_admin_statistics(x_user_id: Optional[str] = Header(None), sql_db: Session = Depends(get_db)):
+async def get_admin_statistics(x_user_id: Optional[str] = Header(None)):
     """
     Get comprehensive statistics for admin dashboard
     """
@@ -2745,84 +3715,55 @@ async def get_admin_statistics(x_user_id: Optional[str] = Header(None), sql_db:
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        # Get various statistics from diogenesDB using SQLAlchemy
-        stats = {
-            'total_operations': 0,
-            'total_customers': 0,
-            'total_hotels': 0,
-            'active_reservations': 0,
-            'total_passengers': 0,
-            'hotels_by_region': [],
-            'operations_by_date': [],
-            'recent_reservations': []
-        }
-        
-        # Total operations
-        stats['total_operations'] = sql_db.query(func.count(SQLOperation.id)).scalar()
-        
-        # Total customers (using reservations as proxy)
-        stats['total_customers'] = sql_db.query(func.count(SQLReservation.id)).scalar()
-        
-        # Total hotels
-        stats['total_hotels'] = sql_db.query(func.count(SQLHotel.id)).scalar()
-        
-        # Active reservations (with future check-in dates)
-        from datetime import date
-        stats['active_reservations'] = sql_db.query(func.count(SQLReservation.id)).filter(
-            SQLReservation.check_in_date >= date.today()
-        ).scalar()
-        
-        # Total passengers
-        total_pax = sql_db.query(func.sum(SQLReservation.pax)).scalar()
-        stats['total_passengers'] = int(total_pax) if total_pax else 0
-        
-        # Hotels by region (top 10)
-        hotel_regions = sql_db.query(
-            SQLHotel.region,
-            func.count(SQLHotel.id).label('count')
-        ).filter(
-            SQLHotel.region.isnot(None),
-            SQLHotel.region != ''
-        ).group_by(SQLHotel.region).order_by(func.count(SQLHotel.id).desc()).limit(10).all()
-        
-        stats['hotels_by_region'] = [
-            {'region': region, 'count': count}
-            for region, count in hotel_regions
-        ]
-        
-        # Operations by date (last 30 days)
-        from datetime import datetime, timedelta
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        
-        operations_by_date = sql_db.query(
-            func.date(SQLOperation.date).label('date'),
-            func.count(SQLOperation.id).label('count')
-        ).filter(
-            SQLOperation.date >= thirty_days_ago
-        ).group_by(func.date(SQLOperation.date)).order_by(func.date(SQLOperation.date).desc()).limit(30).all()
-        
-        stats['operations_by_date'] = [
-            {
-                'date': op_date.strftime('%Y-%m-%d') if op_date else '',
-                'count': count
-            }
-            for op_date, count in operations_by_date
-        ]
-        
-        # Recent reservations (last 10)
-        recent_reservations = sql_db.query(SQLReservation).order_by(SQLReservation.check_in_date.desc()).limit(10).all()
-        
-        stats['recent_reservations'] = [
-            {
-                'voucher': res.id[:8] if res.id else 'N/A',
-                'tourOperator': 'N/A',
-                'checkInDate': res.check_in_date.strftime('%Y-%m-%d') if res.check_in_date else '',
-                'customerName': res.passenger_name or 'N/A',
-                'paxCount': res.pax or 0
+        def _collect(sql_db):
+            # Counts come precomputed from the panel_stats table (see panel_stats.py)
+            snapshot = panel_stats.snapshot()
+            totals, by = snapshot['totals'], snapshot['by']
+            today = date.today().isoformat()
+            thirty_days_ago = (date.today() - timedelta(days=30)).isoformat()
+            
+            hotel_regions = sorted(
+                ((region, count) for region, count in by['hotels_by_region'].items() if region and count),
+                key=lambda item: item[1], reverse=True
+            )[:10]
+            operations_by_date = sorted(
+                ((op_date, count) for op_date, count in by['operations_by_date'].items() if op_date >= thirty_days_ago and count),
+                reverse=True
+            )[:30]
+            
+            stats = {
+                'total_operations': totals['operations'],
+                'total_customers': totals['reservations'],  # Using reservations as customers proxy
+                'total_hotels': totals['hotels'],
+                # Active reservations: arrival today or later
+                'active_reservations': sum(
+                    count for arrival, count in by['reservations_by_arrival_date'].items() if arrival >= today
+                ),
+                'total_passengers': totals['passengers'],
+                'hotels_by_region': [{'region': region, 'count': count} for region, count in hotel_regions],
+                'operations_by_date': [{'date': op_date, 'count': count} for op_date, count in operations_by_date],
             }
-            for res in recent_reservations
-        ]
+            
+            # Recent reservations (last 10 by arrival date, IX_reservations_arrivalDate)
+            recent_reservations = sql_db.query(
+                SQLReservation.voucherNo, SQLReservation.source_agency, SQLReservation.arrivalDate,
+                SQLReservation.leader_name, SQLReservation.pax
+            ).order_by(SQLReservation.arrivalDate.desc()).limit(10).all()
+            
+            stats['recent_reservations'] = [
+                {
+                    'voucher': res.voucherNo or 'N/A',
+                    'tourOperator': res.source_agency or 'N/A',
+                    'checkInDate': res.arrivalDate.isoformat() if res.arrivalDate else '',
+                    'customerName': res.leader_name or 'N/A',
+                    'paxCount': res.pax or 0
+                }
+                for res in recent_reservations
+            ]
+            
+            return stats
         
+        stats = await run_db(with_sql_session, _collect)
         return stats
         
     except Exception as e:
@@ -2830,16 +3771,52 @@ async def get_admin_statistics(x_user_id: Optional[str] = Header(None), sql_db:
         raise HTTPException(status_code=500, detail=f"Failed to fetch statistics: {str(e)}")
 
 
+@api_router.post("/admin/statistics/rebuild")
+async def rebuild_admin_statistics(x_user_id: Optional[str] = Header(None)):
+    """Recompute the panel_stats table from scratch (Admin only)"""
+    if not x_user_id:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    
+    current_user = await get_current_user(x_user_id)
+    if not current_user:
+        raise HTTPException(status_code=401, detail="User not found")
+    
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    return await run_db(panel_stats.rebuild, deadline=None)
+
+
+@api_router.post("/admin/rankings/rebuild")
+async def rebuild_rankings(x_user_id: Optional[str] = Header(None)):
+    """Recompute the hotel/product ranking counters from reservations (Admin only)"""
+    current_user = await require_restore_admin(x_user_id, "Admin access required")
+    
+    result = await run_db(ranking_index.rebuild, deadline=None)
+    await log_action(current_user.get('email', 'admin'), "REBUILD", "rankings", "ranking_counters",
+                     f"Rebuilt {result['counters']} ranking counters")
+    return result
+
+
+@api_router.get("/admin/rankings/check")
+async def check_rankings(x_user_id: Optional[str] = Header(None)):
+    """Compare the ranking counters with a fresh aggregation over reservations (Admin only)"""
+    await require_restore_admin(x_user_id, "Admin access required")
+    
+    return await run_db(ranking_index.check, deadline=None)
+
+
 @api_router.get("/admin/packages")
 async def get_admin_packages(
+    request: Request,
     limit: int = Query(default=100, ge=1, le=1000),
     offset: int = Query(default=0, ge=0),
     search: Optional[str] = Query(default=None),
-    x_user_id: Optional[str] = Header(None),
-    sql_db: Session = Depends(get_db)
+    x_user_id: Optional[str] = Header(None)
 ):
     """
-    Get tour packages from diogenesDB database (packages table)
+    Get tour packages from diogenesDB database (packages table).
+    Paged and searched in memory from the package catalog (no COUNT / OFFSET queries).
     """
     if not x_user_id:
         raise HTTPException(status_code=401, detail="Authentication required")
@@ -2853,42 +3830,42 @@ async def get_admin_packages(
         raise HTTPException(status_code=403, detail="Admin access required")
     
     try:
-        # Build query
-        query = sql_db.query(SQLPackage)
-        
-        # Apply search filter
-        if search:
-            search_pattern = f"%{search}%"
-            query = query.filter(
-                (SQLPackage.hotel_code.like(search_pattern)) | 
-                (SQLPackage.description.like(search_pattern))
-            )
-        
-        # Get total count
-        total = query.count()
-        
-        # Apply pagination and ordering
-        packages = query.order_by(SQLPackage.check_in_date.desc()).offset(offset).limit(limit).all()
-        
-        # Map to response format
-        mapped_packages = []
-        for pkg in packages:
-            mapped_packages.append({
-                'id': pkg.id,
-                'hotelCode': pkg.hotel_code or '',
-                'checkIn': pkg.check_in_date.strftime('%Y-%m-%d') if pkg.check_in_date else '',
-                'checkOut': pkg.check_out_date.strftime('%Y-%m-%d') if pkg.check_out_date else '',
-                'description': pkg.description or '',
-                'packageCode': pkg.package_code or '',
-                'tourOperator': pkg.tour_operator or ''
-            })
+        def _load_packages():
+            sql_db = SessionLocal()
+            try:
+                packages, total = package_catalog.list(sql_db, search=search, order='newest', offset=offset, limit=limit)
+            finally:
+                sql_db.close()
+            
+            # Map to response format
+            mapped_packages = []
+            for pkg in packages:
+                mapped_packages.append({
+                    'id': pkg['id'],
+                    'packageCode': pkg['package_code'] or '',
+                    'name': pkg['name'] or '',
+                    'description': pkg['description'] or '',
+                    'totalNights': pkg['total_nights'] or 0,
+                    'isActive': bool(pkg['is_active']),
+                    'legCount': len(pkg['legs']),
+                    'createdAt': pkg['created_at'].isoformat() if pkg['created_at'] else '',
+                    'updatedAt': pkg['updated_at'].isoformat() if pkg['updated_at'] else ''
+                })
+            
+            return {
+                'packages': mapped_packages,
+                'total': total,
+                'limit': limit,
+                'offset': offset
+            }
         
-        return {
-            'packages': mapped_packages,
-            'total': total,
-            'limit': limit,
-            'offset': offset
-        }
+        return await serve_cached(
+            request,
+            "/admin/packages",
+            {"limit": limit, "offset": offset, "search": search},
+            ["diogenesDB.packages", "diogenesDB.package_legs"],
+            _load_packages
+        )
         
     except Exception as e:
         logger.error(f"Error in get_admin_packages: {e}")
@@ -2902,4 +3879,12 @@ app.include_router(api_router)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    client.close()
+    restore_jobs.shutdown()
+    if getattr(app.state, 'catalog_refresher', None):
+        app.state.catalog_refresher.cancel()
+    if getattr(app.state, 'stats_rebuilder', None):
+        app.state.stats_rebuilder.cancel()
+    if getattr(app.state, 'health_prober', None):
+        app.state.health_prober.cancel()
+    db_executor.shutdown()
\ No newline at end of file
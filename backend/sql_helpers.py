@@ -3,49 +3,135 @@ SQL Server Helper Functions
 Convert async MongoDB operations to sync SQL operations
 """
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from sql_models import SQLUser, SQLFlight, SQLReservation, SQLOperation, SQLHotel, SQLPackage
-from typing import List, Optional, Dict, Any
+from sqlalchemy import Time, func, inspect, select
+from sql_models import SQLUser, SQLFlight, SQLReservation, SQLOperation, SQLOperationFlight, SQLHotel, SQLPackage, SQLPackageLeg
+from row_mapper import dumps, loads
+from date_parsing import parse_date, parse_time
+from panel_stats import panel_stats
+from rankings import ranking_index
+from typing import List, Optional, Dict, Any, Sequence
 from datetime import datetime, timezone
-import json
+import uuid
+
+
+# ==================== SERIALIZATION ====================
+
+class ModelSerializer:
+    """
+    Model kolonlarını API alan adlarına eşler ve Core select() ile okur.
+    ORM nesnesi oluşturulmaz; satırlar tuple olarak gelir ve sadece istenen
+    alanlar (fields) SELECT listesine girer.
+
+    renames: model attribute -> API alan adı (ör. from_location -> from)
+    json_fields: JSON string olarak saklanıp parse edilerek dönen alanlar
+    TIME kolonları eski string formatıyla uyumlu olarak 'HH:MM' döner.
+    """
+
+    TIME_FORMAT = '%H:%M'
+
+    def __init__(self, model, renames: Optional[Dict[str, str]] = None, json_fields: Sequence[str] = ()):
+        self.model = model
+        renames = renames or {}
+        self.columns = {
+            renames.get(attr.key, attr.key): attr.columns[0]
+            for attr in inspect(model).column_attrs
+        }
+        self.attributes = {renames.get(attr.key, attr.key): attr.key for attr in inspect(model).column_attrs}
+        self.json_fields = tuple(json_fields)
+        self.time_fields = tuple(name for name, column in self.columns.items() if isinstance(column.type, Time))
+
+    @property
+    def field_names(self) -> List[str]:
+        return list(self.columns)
+
+    def select(self, fields: Optional[Sequence[str]] = None):
+        """Sadece istenen alanları seçen sorgu (bilinmeyen alan ValueError)"""
+        names = list(fields) if fields else self.field_names
+        unknown = [name for name in names if name not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return select(*(self.columns[name].label(name) for name in names))
+
+    def _rows(self, result) -> List[Dict[str, Any]]:
+        keys = tuple(result.keys())
+        rows = [dict(zip(keys, row)) for row in result]
+        json_fields = [name for name in self.json_fields if name in keys]
+        time_fields = [name for name in self.time_fields if name in keys]
+        if json_fields or time_fields:
+            for row in rows:
+                self._convert(row, json_fields, time_fields)
+        return rows
+
+    def _convert(self, row: Dict[str, Any], json_fields: Sequence[str], time_fields: Sequence[str]):
+        for name in json_fields:
+            row[name] = loads(row[name]) if row[name] else None
+        for name in time_fields:
+            if row[name] is not None:
+                row[name] = row[name].strftime(self.TIME_FORMAT)
+
+    def fetch_all(self, db: Session, query) -> List[Dict[str, Any]]:
+        return self._rows(db.execute(query))
+
+    def fetch_one(self, db: Session, query) -> Optional[Dict[str, Any]]:
+        rows = self._rows(db.execute(query.limit(1)))
+        return rows[0] if rows else None
+
+    def fetch_json(self, db: Session, query) -> bytes:
+        """Sonucu doğrudan JSON byte'larına encode et"""
+        return dumps(self.fetch_all(db, query))
+
+    def from_instance(self, instance) -> Dict[str, Any]:
+        """Yeni oluşturulmuş ORM nesnesini aynı alan adlarıyla dict'e çevir"""
+        row = {name: getattr(instance, attribute) for name, attribute in self.attributes.items()}
+        self._convert(row, self.json_fields, self.time_fields)
+        return row
+
+
+USER_SERIALIZER = ModelSerializer(SQLUser)
+FLIGHT_SERIALIZER = ModelSerializer(SQLFlight, renames={'from_location': 'from'})
+RESERVATION_SERIALIZER = ModelSerializer(SQLReservation)
+OPERATION_SERIALIZER = ModelSerializer(SQLOperation, renames={'from_location': 'from'})
+OPERATION_FLIGHT_SERIALIZER = ModelSerializer(SQLOperationFlight, renames={'from_location': 'from'})
+HOTEL_SERIALIZER = ModelSerializer(SQLHotel)
+PACKAGE_SERIALIZER = ModelSerializer(SQLPackage)
+PACKAGE_LEG_SERIALIZER = ModelSerializer(SQLPackageLeg)
+
+
+# ==================== CHANGE MARKERS ====================
+
+def get_change_marker_sql(db: Session, model) -> tuple:
+    """Row count + latest updated_at for a table (used as a cache version probe)"""
+    timestamp_column = getattr(model, 'updated_at', None) or getattr(model, 'created_at', None)
+    if timestamp_column is None:
+        return (db.query(func.count()).select_from(model).scalar(),)
+    count, last_change = db.query(func.count(), func.max(timestamp_column)).select_from(model).one()
+    return (count, last_change)
+
+
+# ==================== BULK WRITES ====================
+
+def bulk_insert_sql(db: Session, model, rows: List[Dict], batch_size: int = 1000) -> int:
+    """Insert rows keyed by column name with multi-row INSERTs, committing once"""
+    table = model.__table__
+    for start in range(0, len(rows), batch_size):
+        db.execute(table.insert(), rows[start:start + batch_size])
+    panel_stats.record(db, table.name, rows)
+    if table.name == 'reservations':
+        ranking_index.record(db, rows)
+    db.commit()
+    return len(rows)
 
 
 # ==================== USER HELPERS ====================
 
 def get_user_by_id_sql(db: Session, user_id: str) -> Optional[Dict]:
     """Get user by ID from SQL Server"""
-    user = db.query(SQLUser).filter(SQLUser.id == user_id).first()
-    if not user:
-        return None
-    
-    return {
-        "id": user.id,
-        "name": user.name,
-        "email": user.email,
-        "password": user.password,
-        "role": user.role,
-        "status": user.status,
-        "profile_picture": user.profile_picture,
-        "created_at": user.created_at
-    }
-
-
-def get_all_users_sql(db: Session) -> List[Dict]:
+    return USER_SERIALIZER.fetch_one(db, USER_SERIALIZER.select().where(SQLUser.id == user_id))
+
+
+def get_all_users_sql(db: Session, fields: Optional[Sequence[str]] = None) -> List[Dict]:
     """Get all users from SQL Server"""
-    users = db.query(SQLUser).all()
-    return [
-        {
-            "id": u.id,
-            "name": u.name,
-            "email": u.email,
-            "password": u.password,
-            "role": u.role,
-            "status": u.status,
-            "profile_picture": u.profile_picture,
-            "created_at": u.created_at
-        }
-        for u in users
-    ]
+    return USER_SERIALIZER.fetch_all(db, USER_SERIALIZER.select(fields))
 
 
 def count_users_sql(db: Session) -> int:
@@ -66,19 +152,11 @@ def create_user_sql(db: Session, user_data: Dict) -> Dict:
         created_at=user_data.get('created_at', datetime.now(timezone.utc))
     )
     db.add(new_user)
+    panel_stats.record(db, 'users', [new_user])
     db.commit()
     db.refresh(new_user)
     
-    return {
-        "id": new_user.id,
-        "name": new_user.name,
-        "email": new_user.email,
-        "password": new_user.password,
-        "role": new_user.role,
-        "status": new_user.status,
-        "profile_picture": new_user.profile_picture,
-        "created_at": new_user.created_at
-    }
+    return USER_SERIALIZER.from_instance(new_user)
 
 
 def update_user_sql(db: Session, user_id: str, user_data: Dict) -> bool:
@@ -102,6 +180,7 @@ def delete_user_sql(db: Session, user_id: str) -> bool:
         return False
     
     db.delete(user)
+    panel_stats.record(db, 'users', [user], sign=-1)
     db.commit()
     return True
 
@@ -119,28 +198,14 @@ def update_profile_picture_sql(db: Session, user_id: str, profile_picture: str)
 
 # ==================== FLIGHT HELPERS ====================
 
-def get_all_flights_sql(db: Session) -> List[Dict]:
+def get_all_flights_sql(db: Session, fields: Optional[Sequence[str]] = None) -> List[Dict]:
     """Get all flights from SQL Server"""
-    flights = db.query(SQLFlight).all()
-    return [
-        {
-            "id": f.id,
-            "flightCode": f.flightCode,
-            "airline": f.airline,
-            "from": f.from_location,
-            "to": f.to,
-            "date": f.date,
-            "time": f.time,
-            "direction": f.direction,
-            "passengers": f.passengers,
-            "hasPNR": f.hasPNR,
-            "pnr": f.pnr,
-            "daysUntilFlight": f.daysUntilFlight,
-            "created_at": f.created_at,
-            "updated_at": f.updated_at
-        }
-        for f in flights
-    ]
+    return FLIGHT_SERIALIZER.fetch_all(db, FLIGHT_SERIALIZER.select(fields))
+
+
+def get_all_flights_json(db: Session, fields: Optional[Sequence[str]] = None) -> bytes:
+    """Same as get_all_flights_sql, encoded straight to JSON bytes"""
+    return FLIGHT_SERIALIZER.fetch_json(db, FLIGHT_SERIALIZER.select(fields))
 
 
 def create_flight_sql(db: Session, flight_data: Dict) -> Dict:
@@ -151,8 +216,8 @@ def create_flight_sql(db: Session, flight_data: Dict) -> Dict:
         airline=flight_data.get('airline', ''),
         from_location=flight_data['from'],
         to=flight_data['to'],
-        date=flight_data['date'],
-        time=flight_data['time'],
+        date=parse_date(flight_data['date']),
+        time=parse_time(flight_data['time']),
         direction=flight_data['direction'],
         passengers=flight_data.get('passengers', 0),
         hasPNR=flight_data.get('hasPNR', False),
@@ -162,25 +227,11 @@ def create_flight_sql(db: Session, flight_data: Dict) -> Dict:
         updated_at=flight_data.get('updated_at', datetime.now(timezone.utc))
     )
     db.add(new_flight)
+    panel_stats.record(db, 'flights', [new_flight])
     db.commit()
     db.refresh(new_flight)
     
-    return {
-        "id": new_flight.id,
-        "flightCode": new_flight.flightCode,
-        "airline": new_flight.airline,
-        "from": new_flight.from_location,
-        "to": new_flight.to,
-        "date": new_flight.date,
-        "time": new_flight.time,
-        "direction": new_flight.direction,
-        "passengers": new_flight.passengers,
-        "hasPNR": new_flight.hasPNR,
-        "pnr": new_flight.pnr,
-        "daysUntilFlight": new_flight.daysUntilFlight,
-        "created_at": new_flight.created_at,
-        "updated_at": new_flight.updated_at
-    }
+    return FLIGHT_SERIALIZER.from_instance(new_flight)
 
 
 def update_flight_sql(db: Session, flight_id: str, flight_data: Dict) -> bool:
@@ -193,8 +244,10 @@ def update_flight_sql(db: Session, flight_id: str, flight_data: Dict) -> bool:
     flight.airline = flight_data.get('airline', flight.airline)
     flight.from_location = flight_data.get('from', flight.from_location)
     flight.to = flight_data.get('to', flight.to)
-    flight.date = flight_data.get('date', flight.date)
-    flight.time = flight_data.get('time', flight.time)
+    if 'date' in flight_data:
+        flight.date = parse_date(flight_data['date'])
+    if 'time' in flight_data:
+        flight.time = parse_time(flight_data['time'])
     flight.direction = flight_data.get('direction', flight.direction)
     flight.passengers = flight_data.get('passengers', flight.passengers)
     flight.hasPNR = flight_data.get('hasPNR', flight.hasPNR)
@@ -213,76 +266,28 @@ def delete_flight_sql(db: Session, flight_id: str) -> bool:
         return False
     
     db.delete(flight)
+    panel_stats.record(db, 'flights', [flight], sign=-1)
     db.commit()
     return True
 
 
 # ==================== RESERVATION HELPERS ====================
 
-def get_all_reservations_sql(db: Session) -> List[Dict]:
+def get_all_reservations_sql(db: Session, fields: Optional[Sequence[str]] = None) -> List[Dict]:
     """Get all reservations from SQL Server"""
-    reservations = db.query(SQLReservation).all()
-    return [
-        {
-            "id": r.id,
-            "voucherNo": r.voucherNo,
-            "leader_name": r.leader_name,
-            "leader_passport": r.leader_passport,
-            "product_code": r.product_code,
-            "product_name": r.product_name,
-            "hotel": r.hotel,
-            "arrivalDate": r.arrivalDate,
-            "departureDate": r.departureDate,
-            "pax": r.pax,
-            "pax_adults": r.pax_adults,
-            "pax_children": r.pax_children,
-            "pax_infants": r.pax_infants,
-            "status": r.status,
-            "source_agency": r.source_agency,
-            "package_id": r.package_id,
-            "current_leg": r.current_leg,
-            "room_type": r.room_type,
-            "board_type": r.board_type,
-            "destination": r.destination,
-            "notes": r.notes,
-            "created_at": r.created_at,
-            "updated_at": r.updated_at
-        }
-        for r in reservations
-    ]
+    return RESERVATION_SERIALIZER.fetch_all(db, RESERVATION_SERIALIZER.select(fields))
+
+
+def get_all_reservations_json(db: Session, fields: Optional[Sequence[str]] = None) -> bytes:
+    """Same as get_all_reservations_sql, encoded straight to JSON bytes"""
+    return RESERVATION_SERIALIZER.fetch_json(db, RESERVATION_SERIALIZER.select(fields))
 
 
 def get_reservation_by_id_sql(db: Session, reservation_id: str) -> Optional[Dict]:
     """Get reservation by ID from SQL Server"""
-    r = db.query(SQLReservation).filter(SQLReservation.id == reservation_id).first()
-    if not r:
-        return None
-    
-    return {
-        "id": r.id,
-        "voucherNo": r.voucherNo,
-        "leader_name": r.leader_name,
-        "leader_passport": r.leader_passport,
-        "product_code": r.product_code,
-        "product_name": r.product_name,
-        "hotel": r.hotel,
-        "arrivalDate": r.arrivalDate,
-        "departureDate": r.departureDate,
-        "pax": r.pax,
-        "pax_adults": r.pax_adults,
-        "pax_children": r.pax_children,
-        "pax_infants": r.pax_infants,
-        "status": r.status,
-        "source_agency": r.source_agency,
-        "package_id": r.package_id,
-        "current_leg": r.current_leg,
-        "room_type": r.room_type,
-        "board_type": r.board_type,
-        "destination": r.destination,
-        "notes": r.notes,
-        "created_at": r.created_at,
-        "updated_at": r.updated_at
-    }
+    return RESERVATION_SERIALIZER.fetch_one(
+        db, RESERVATION_SERIALIZER.select().where(SQLReservation.id == reservation_id)
+    )
 
 
 def create_reservation_sql(db: Session, reservation_data: Dict) -> Dict:
@@ -295,8 +300,8 @@ def create_reservation_sql(db: Session, reservation_data: Dict) -> Dict:
         product_code=reservation_data['product_code'],
         product_name=reservation_data['product_name'],
         hotel=reservation_data['hotel'],
-        arrivalDate=reservation_data['arrivalDate'],
-        departureDate=reservation_data['departureDate'],
+        arrivalDate=parse_date(reservation_data['arrivalDate']),
+        departureDate=parse_date(reservation_data['departureDate']),
         pax=reservation_data['pax'],
         pax_adults=reservation_data.get('pax_adults', 0),
         pax_children=reservation_data.get('pax_children', 0),
@@ -313,6 +318,8 @@ def create_reservation_sql(db: Session, reservation_data: Dict) -> Dict:
         updated_at=reservation_data.get('updated_at', datetime.now(timezone.utc))
     )
     db.add(new_reservation)
+    panel_stats.record(db, 'reservations', [new_reservation])
+    ranking_index.record(db, [new_reservation])
     db.commit()
     db.refresh(new_reservation)
     
@@ -321,108 +328,127 @@ def create_reservation_sql(db: Session, reservation_data: Dict) -> Dict:
 
 # ==================== OPERATION HELPERS ====================
 
-def get_operations_sql(db: Session, filters: Optional[Dict] = None) -> List[Dict]:
-    """Get operations from SQL Server with optional filters"""
-    query = db.query(SQLOperation)
-    
+def _filter_date(filters: Dict, key: str):
+    """Tarih filtresini çöz; verilmiş ama çözülemeyen değer ValueError (sessizce NULL karşılaştırması olmaz)"""
+    value = parse_date(filters[key])
+    if value is None:
+        raise ValueError(f"Invalid date for '{key}': {filters[key]!r}")
+    return value
+
+
+def operation_predicates(filters: Optional[Dict] = None) -> List[Any]:
+    """
+    WHERE predicates for the legacy operations filters (date, start_date/end_date, type).
+    Raises ValueError when a date filter is given but cannot be parsed.
+    """
+    predicates = []
     if filters:
         if 'date' in filters:
-            query = query.filter(SQLOperation.date == filters['date'])
+            predicates.append(SQLOperation.date == _filter_date(filters, 'date'))
         if 'start_date' in filters and 'end_date' in filters:
-            query = query.filter(
-                SQLOperation.date >= filters['start_date'],
-                SQLOperation.date <= filters['end_date']
-            )
+            predicates.append(SQLOperation.date >= _filter_date(filters, 'start_date'))
+            predicates.append(SQLOperation.date <= _filter_date(filters, 'end_date'))
         if 'type' in filters and filters['type'] != 'all':
-            query = query.filter(SQLOperation.type == filters['type'])
-    
-    operations = query.all()
-    
-    result = []
-    for op in operations:
-        # Parse JSON fields
-        arrival_flight = json.loads(op.arrivalFlight) if op.arrivalFlight else None
-        return_flight = json.loads(op.returnFlight) if op.returnFlight else None
-        transfer_flight = json.loads(op.transferFlight) if op.transferFlight else None
-        
-        result.append({
-            "id": op.id,
-            "reservationId": op.reservationId,
-            "voucherNo": op.voucherNo,
-            "arrivalFlight": arrival_flight,
-            "returnFlight": return_flight,
-            "transferFlight": transfer_flight,
-            "currentHotel": op.currentHotel,
-            "hotelCheckIn": op.hotelCheckIn,
-            "hotelCheckOut": op.hotelCheckOut,
-            "flightCode": op.flightCode,
-            "type": op.type,
-            "from": op.from_location,
-            "to": op.to,
-            "date": op.date,
-            "time": op.time,
-            "passengers": op.passengers,
-            "hotel": op.hotel,
-            "transferTime": op.transferTime,
-            "notes": op.notes,
-            "status": op.status,
-            "created_at": op.created_at,
-            "updated_at": op.updated_at
+            predicates.append(SQLOperation.type == filters['type'])
+        if filters.get('flight_code'):
+            # operation_flights (flightCode, date) index'i üzerinden
+            predicates.append(SQLOperation.id.in_(
+                select(SQLOperationFlight.operation_id).where(SQLOperationFlight.flightCode == filters['flight_code'])
+            ))
+    return predicates
+
+
+# operation_flights.leg -> operasyon dict'indeki alan adı
+OPERATION_FLIGHT_LEGS = {'arrival': 'arrivalFlight', 'return': 'returnFlight', 'transfer': 'transferFlight'}
+# API'de uçuş dict'ine giren alanlar (eski JSON içeriğiyle aynı)
+OPERATION_FLIGHT_FIELDS = ('flightCode', 'airline', 'from', 'to', 'date', 'time')
+
+
+def operation_flight_rows(operation_id: str, operation_data: Dict) -> List[Dict]:
+    """arrivalFlight / returnFlight / transferFlight dict'lerini operation_flights satırlarına çevir"""
+    rows = []
+    for leg, field in OPERATION_FLIGHT_LEGS.items():
+        flight = operation_data.get(field)
+        if not flight:
+            continue
+        rows.append({
+            'id': str(uuid.uuid4()),
+            'operation_id': operation_id,
+            'leg': leg,
+            'flightCode': str(flight.get('flightCode') or ''),
+            'airline': str(flight.get('airline') or ''),
+            'from_location': str(flight.get('from') or ''),
+            'to': str(flight.get('to') or ''),
+            'date': parse_date(flight.get('date')),
+            'time': parse_time(flight.get('time')),
         })
-    
-    return result
+    return rows
+
+
+def operation_flight_parse_failures(operation_data: Dict) -> int:
+    """Uçuş dict'lerinde dolu olup DATE / TIME'a çevrilemeyen date/time değerlerinin sayısı"""
+    failures = 0
+    for field in OPERATION_FLIGHT_LEGS.values():
+        flight = operation_data.get(field)
+        if not flight:
+            continue
+        for key, parse in (('date', parse_date), ('time', parse_time)):
+            value = flight.get(key)
+            if value not in (None, '') and str(value).strip() and parse(value) is None:
+                failures += 1
+    return failures
+
+
+def attach_operation_flights(db: Session, operations: List[Dict]) -> List[Dict]:
+    """Load flight legs for the given operation rows with one query per 1000 ids"""
+    ids = [operation['id'] for operation in operations]
+    flights_by_operation: Dict[str, Dict[str, Dict]] = {operation_id: {} for operation_id in ids}
+    for start in range(0, len(ids), 1000):
+        query = OPERATION_FLIGHT_SERIALIZER.select(('operation_id', 'leg') + OPERATION_FLIGHT_FIELDS).where(
+            SQLOperationFlight.operation_id.in_(ids[start:start + 1000])
+        )
+        for flight in OPERATION_FLIGHT_SERIALIZER.fetch_all(db, query):
+            operation_id = flight.pop('operation_id')
+            flights_by_operation[operation_id][OPERATION_FLIGHT_LEGS[flight.pop('leg')]] = flight
+    for operation in operations:
+        flights = flights_by_operation[operation['id']]
+        for field in OPERATION_FLIGHT_LEGS.values():
+            operation[field] = flights.get(field)
+    return operations
+
+
+def _operations_query(filters: Optional[Dict] = None, fields: Optional[Sequence[str]] = None):
+    return OPERATION_SERIALIZER.select(fields).where(*operation_predicates(filters))
+
+
+def get_operations_sql(db: Session, filters: Optional[Dict] = None, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Get operations from SQL Server with optional filters (with flights unless fields is given)"""
+    operations = OPERATION_SERIALIZER.fetch_all(db, _operations_query(filters, fields))
+    return operations if fields else attach_operation_flights(db, operations)
+
+
+def get_operations_json(db: Session, filters: Optional[Dict] = None, fields: Optional[Sequence[str]] = None) -> bytes:
+    """Same as get_operations_sql, encoded straight to JSON bytes"""
+    return dumps(get_operations_sql(db, filters, fields))
 
 
 def get_operation_by_id_sql(db: Session, operation_id: str) -> Optional[Dict]:
     """Get operation by ID from SQL Server"""
-    op = db.query(SQLOperation).filter(SQLOperation.id == operation_id).first()
-    if not op:
-        return None
-    
-    arrival_flight = json.loads(op.arrivalFlight) if op.arrivalFlight else None
-    return_flight = json.loads(op.returnFlight) if op.returnFlight else None
-    transfer_flight = json.loads(op.transferFlight) if op.transferFlight else None
-    
-    return {
-        "id": op.id,
-        "reservationId": op.reservationId,
-        "voucherNo": op.voucherNo,
-        "arrivalFlight": arrival_flight,
-        "returnFlight": return_flight,
-        "transferFlight": transfer_flight,
-        "currentHotel": op.currentHotel,
-        "hotelCheckIn": op.hotelCheckIn,
-        "hotelCheckOut": op.hotelCheckOut,
-        "flightCode": op.flightCode,
-        "type": op.type,
-        "from": op.from_location,
-        "to": op.to,
-        "date": op.date,
-        "time": op.time,
-        "passengers": op.passengers,
-        "hotel": op.hotel,
-        "transferTime": op.transferTime,
-        "notes": op.notes,
-        "status": op.status,
-        "created_at": op.created_at,
-        "updated_at": op.updated_at
-    }
+    operation = OPERATION_SERIALIZER.fetch_one(
+        db, OPERATION_SERIALIZER.select().where(SQLOperation.id == operation_id)
+    )
+    return attach_operation_flights(db, [operation])[0] if operation else None
 
 
 def create_operation_sql(db: Session, operation_data: Dict) -> Dict:
     """Create operation in SQL Server"""
-    # Convert flight dicts to JSON strings
-    arrival_flight_json = json.dumps(operation_data.get('arrivalFlight')) if operation_data.get('arrivalFlight') else None
-    return_flight_json = json.dumps(operation_data.get('returnFlight')) if operation_data.get('returnFlight') else None
-    transfer_flight_json = json.dumps(operation_data.get('transferFlight')) if operation_data.get('transferFlight') else None
-    
     new_operation = SQLOperation(
         id=operation_data['id'],
         reservationId=operation_data.get('reservationId'),
         voucherNo=operation_data.get('voucherNo', ''),
-        arrivalFlight=arrival_flight_json,
-        returnFlight=return_flight_json,
-        transferFlight=transfer_flight_json,
+        flights=[
+            SQLOperationFlight(**row) for row in operation_flight_rows(operation_data['id'], operation_data)
+        ],
         currentHotel=operation_data.get('currentHotel', ''),
         hotelCheckIn=operation_data.get('hotelCheckIn', ''),
         hotelCheckOut=operation_data.get('hotelCheckOut', ''),
@@ -430,7 +456,7 @@ def create_operation_sql(db: Session, operation_data: Dict) -> Dict:
         type=operation_data.get('type', 'transfer'),
         from_location=operation_data.get('from', ''),
         to=operation_data.get('to', ''),
-        date=operation_data.get('date', ''),
+        date=parse_date(operation_data.get('date')),
         time=operation_data.get('time', ''),
         passengers=operation_data.get('passengers', 0),
         hotel=operation_data.get('hotel', ''),
@@ -441,6 +467,7 @@ def create_operation_sql(db: Session, operation_data: Dict) -> Dict:
         updated_at=operation_data.get('updated_at', datetime.now(timezone.utc))
     )
     db.add(new_operation)
+    panel_stats.record(db, 'operations', [new_operation])
     db.commit()
     db.refresh(new_operation)
     
@@ -449,103 +476,44 @@ def create_operation_sql(db: Session, operation_data: Dict) -> Dict:
 
 # ==================== HOTEL HELPERS ====================
 
-def get_all_hotels_sql(db: Session, filters: Optional[Dict] = None) -> List[Dict]:
-    """Get hotels from SQL Server with optional filters"""
-    query = db.query(SQLHotel)
-    
+def hotel_predicates(filters: Optional[Dict] = None) -> List[Any]:
+    """WHERE predicates for the hotel list filters (active_only, region, category, search)"""
+    predicates = []
     if filters:
         if filters.get('active_only', True):
-            query = query.filter(SQLHotel.active == True)
+            predicates.append(SQLHotel.active == True)
         if 'region' in filters and filters['region']:
-            query = query.filter(SQLHotel.region == filters['region'])
+            predicates.append(SQLHotel.region == filters['region'])
         if 'category' in filters and filters['category']:
-            query = query.filter(SQLHotel.category == filters['category'])
+            predicates.append(SQLHotel.category == filters['category'])
         if 'search' in filters and filters['search']:
             search_term = f"%{filters['search']}%"
-            query = query.filter(
+            predicates.append(
                 (SQLHotel.name.like(search_term)) |
                 (SQLHotel.code.like(search_term)) |
                 (SQLHotel.region.like(search_term)) |
                 (SQLHotel.city.like(search_term))
             )
-    
-    hotels = query.all()
-    
-    return [
-        {
-            "id": h.id,
-            "code": h.code,
-            "name": h.name,
-            "category": h.category,
-            "region": h.region,
-            "region_code": h.region_code,
-            "transfer_region": h.transfer_region,
-            "phone1": h.phone1,
-            "phone2": h.phone2,
-            "fax": h.fax,
-            "email": h.email,
-            "email2": h.email2,
-            "email3": h.email3,
-            "website": h.website,
-            "address": h.address,
-            "address2": h.address2,
-            "city": h.city,
-            "postal_code": h.postal_code,
-            "country": h.country,
-            "service_type": h.service_type,
-            "manager": h.manager,
-            "notes": h.notes,
-            "active": h.active,
-            "latitude": h.latitude,
-            "longitude": h.longitude,
-            "stars": h.stars,
-            "paximum_id": h.paximum_id,
-            "giata": h.giata,
-            "created_at": h.created_at,
-            "updated_at": h.updated_at
-        }
-        for h in hotels
-    ]
+    return predicates
+
+
+def _hotels_query(filters: Optional[Dict] = None, fields: Optional[Sequence[str]] = None):
+    return HOTEL_SERIALIZER.select(fields).where(*hotel_predicates(filters))
+
+
+def get_all_hotels_sql(db: Session, filters: Optional[Dict] = None, fields: Optional[Sequence[str]] = None) -> List[Dict]:
+    """Get hotels from SQL Server with optional filters"""
+    return HOTEL_SERIALIZER.fetch_all(db, _hotels_query(filters, fields))
+
+
+def get_all_hotels_json(db: Session, filters: Optional[Dict] = None, fields: Optional[Sequence[str]] = None) -> bytes:
+    """Same as get_all_hotels_sql, encoded straight to JSON bytes"""
+    return HOTEL_SERIALIZER.fetch_json(db, _hotels_query(filters, fields))
 
 
 def get_hotel_by_id_sql(db: Session, hotel_id: str) -> Optional[Dict]:
     """Get hotel by ID from SQL Server"""
-    h = db.query(SQLHotel).filter(SQLHotel.id == hotel_id).first()
-    if not h:
-        return None
-    
-    return {
-        "id": h.id,
-        "code": h.code,
-        "name": h.name,
-        "category": h.category,
-        "region": h.region,
-        "region_code": h.region_code,
-        "transfer_region": h.transfer_region,
-        "phone1": h.phone1,
-        "phone2": h.phone2,
-        "fax": h.fax,
-        "email": h.email,
-        "email2": h.email2,
-        "email3": h.email3,
-        "website": h.website,
-        "address": h.address,
-        "address2": h.address2,
-        "city": h.city,
-        "postal_code": h.postal_code,
-        "country": h.country,
-        "service_type": h.service_type,
-        "manager": h.manager,
-        "notes": h.notes,
-        "active": h.active,
-        "latitude": h.latitude,
-        "longitude": h.longitude,
-        "stars": h.stars,
-        "paximum_id": h.paximum_id,
-        "giata": h.giata,
-        "created_at": h.created_at,
-        "updated_at": h.updated_at
-    }
+    return HOTEL_SERIALIZER.fetch_one(db, HOTEL_SERIALIZER.select().where(SQLHotel.id == hotel_id))
 
 
 def create_hotel_sql(db: Session, hotel_data: Dict) -> Dict:
@@ -583,7 +551,98 @@ def create_hotel_sql(db: Session, hotel_data: Dict) -> Dict:
         updated_at=hotel_data.get('updated_at', datetime.now(timezone.utc))
     )
     db.add(new_hotel)
+    panel_stats.record(db, 'hotels', [new_hotel])
     db.commit()
     db.refresh(new_hotel)
     
     return get_hotel_by_id_sql(db, new_hotel.id)
+
+
+
+# ==================== PACKAGE HELPERS ====================
+
+def attach_package_legs(db: Session, packages: List[Dict]) -> List[Dict]:
+    """Load legs for the given package rows with one query and attach them as 'legs'"""
+    ids = [package['id'] for package in packages]
+    legs_by_package: Dict[str, List[Dict]] = {package_id: [] for package_id in ids}
+    for start in range(0, len(ids), 1000):
+        query = PACKAGE_LEG_SERIALIZER.select().where(
+            SQLPackageLeg.package_id.in_(ids[start:start + 1000])
+        ).order_by(SQLPackageLeg.package_id, SQLPackageLeg.step_number)
+        for leg in PACKAGE_LEG_SERIALIZER.fetch_all(db, query):
+            legs_by_package[leg['package_id']].append(leg)
+    for package in packages:
+        package['legs'] = legs_by_package[package['id']]
+    return packages
+
+
+def package_legs_sql(package_id: str, legs: List[Dict]) -> List[SQLPackageLeg]:
+    """PackageLeg dict'lerinden ORM bacakları (kolonu olmayan alanlar atlanır)"""
+    columns = set(PACKAGE_LEG_SERIALIZER.attributes.values()) - {'id', 'package_id'}
+    return [
+        SQLPackageLeg(
+            id=str(uuid.uuid4()),
+            package_id=package_id,
+            **{key: value for key, value in leg.items() if key in columns}
+        )
+        for leg in legs
+    ]
+
+
+def package_code_exists_sql(db: Session, package_code: str, exclude_id: Optional[str] = None) -> bool:
+    query = select(SQLPackage.id).where(SQLPackage.package_code == package_code)
+    if exclude_id:
+        query = query.where(SQLPackage.id != exclude_id)
+    return db.execute(query.limit(1)).first() is not None
+
+
+def create_package_sql(db: Session, package_data: Dict) -> Dict:
+    """Create package with its legs in SQL Server"""
+    new_package = SQLPackage(
+        id=package_data['id'],
+        package_code=package_data['package_code'],
+        name=package_data['name'],
+        description=package_data.get('description'),
+        total_nights=package_data.get('total_nights', 0),
+        is_active=package_data.get('is_active', True),
+        created_at=package_data.get('created_at', datetime.now(timezone.utc)),
+        updated_at=package_data.get('updated_at', datetime.now(timezone.utc)),
+        legs=package_legs_sql(package_data['id'], package_data.get('legs', []))
+    )
+    db.add(new_package)
+    panel_stats.record(db, 'packages', [new_package])
+    db.commit()
+    db.refresh(new_package)
+    
+    package = PACKAGE_SERIALIZER.from_instance(new_package)
+    package['legs'] = [PACKAGE_LEG_SERIALIZER.from_instance(leg) for leg in new_package.legs]
+    return package
+
+
+def update_package_sql(db: Session, package_id: str, package_data: Dict) -> bool:
+    """Update package fields; a 'legs' key replaces all legs"""
+    package = db.query(SQLPackage).filter(SQLPackage.id == package_id).first()
+    if not package:
+        return False
+    
+    for key, value in package_data.items():
+        if key == 'legs':
+            package.legs = package_legs_sql(package_id, value)
+        elif key != 'id' and hasattr(package, key):
+            setattr(package, key, value)
+    package.updated_at = datetime.now(timezone.utc)
+    
+    db.commit()
+    return True
+
+
+def delete_package_sql(db: Session, package_id: str) -> bool:
+    """Delete package and its legs from SQL Server"""
+    package = db.query(SQLPackage).filter(SQLPackage.id == package_id).first()
+    if not package:
+        return False
+    
+    db.delete(package)
+    panel_stats.record(db, 'packages', [package], sign=-1)
+    db.commit()
+    return True
@@ -3,7 +3,7 @@ SQL Server Models using SQLAlchemy ORM
 All business/operational data is stored in SQL Server
 """
 
-from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Date, DateTime, Time, Text, ForeignKey, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime, timezone
@@ -26,11 +26,22 @@ SQL_SERVER_PASSWORD = os.environ['SQL_SERVER_PASSWORD']
 connection_string = f"mssql+pymssql://{SQL_SERVER_USER}:{SQL_SERVER_PASSWORD}@{SQL_SERVER_HOST}:{SQL_SERVER_PORT}/{SQL_SERVER_DB}"
 
 # Create engine
+# Pool size matches the DB executor thread pool (db_executor.DB_POOL_SIZE)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '16'))
+DB_QUERY_TIMEOUT = int(float(os.environ.get('DB_QUERY_TIMEOUT', '60')))
+
 engine = create_engine(
     connection_string,
     echo=False,
     pool_pre_ping=True,  # Verify connections before using
     pool_recycle=3600,  # Recycle connections after 1 hour
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_SIZE // 2,
+    pool_timeout=30,
+    connect_args={
+        "timeout": DB_QUERY_TIMEOUT,  # Per-query deadline (seconds)
+        "login_timeout": 15,
+    },
 )
 
 # Create session factory
@@ -59,14 +70,17 @@ class SQLUser(Base):
 class SQLFlight(Base):
     """Flight model for SQL Server"""
     __tablename__ = "flights"
+    __table_args__ = (
+        Index('IX_flights_date_time', 'date', 'time'),
+    )
     
     id = Column(String(100), primary_key=True)
     flightCode = Column(String(50), nullable=False, index=True)
     airline = Column(String(100), default="")
     from_location = Column(String(100), nullable=False)
     to = Column(String(100), nullable=False)
-    date = Column(String(20), nullable=False)
-    time = Column(String(20), nullable=False)
+    date = Column(Date, nullable=False)
+    time = Column(Time, nullable=False)
     direction = Column(String(20), nullable=False)  # arrival or departure
     passengers = Column(Integer, default=0)
     hasPNR = Column(Boolean, default=False)
@@ -79,6 +93,10 @@ class SQLFlight(Base):
 class SQLReservation(Base):
     """Reservation model for SQL Server"""
     __tablename__ = "reservations"
+    __table_args__ = (
+        Index('IX_reservations_arrivalDate', 'arrivalDate'),
+        Index('IX_reservations_leader_name', 'leader_name'),
+    )
     
     id = Column(String(100), primary_key=True)
     voucherNo = Column(String(100), nullable=False, unique=True, index=True)
@@ -87,8 +105,8 @@ class SQLReservation(Base):
     product_code = Column(String(100), nullable=False)
     product_name = Column(String(200), nullable=False)
     hotel = Column(String(200), nullable=False)
-    arrivalDate = Column(String(20), nullable=False)
-    departureDate = Column(String(20), nullable=False)
+    arrivalDate = Column(Date, nullable=False)
+    departureDate = Column(Date, nullable=False)
     pax = Column(Integer, nullable=False)
     pax_adults = Column(Integer, default=0)
     pax_children = Column(Integer, default=0)
@@ -108,15 +126,15 @@ class SQLReservation(Base):
 class SQLOperation(Base):
     """Operation model for SQL Server"""
     __tablename__ = "operations"
+    __table_args__ = (
+        Index('IX_operations_date_type', 'date', 'type'),
+    )
     
     id = Column(String(100), primary_key=True)
     reservationId = Column(String(100), nullable=True)
     voucherNo = Column(String(100), default="", index=True)
     
-    # Flight Information (stored as JSON strings)
-    arrivalFlight = Column(Text, nullable=True)  # JSON string
-    returnFlight = Column(Text, nullable=True)   # JSON string
-    transferFlight = Column(Text, nullable=True)  # JSON string
+    # Flight Information: operation_flights child rows (arrival / return / transfer)
     
     # Hotel Information
     currentHotel = Column(String(200), default="")
@@ -128,7 +146,7 @@ class SQLOperation(Base):
     type = Column(String(50), default="")
     from_location = Column(String(100), default="")
     to = Column(String(100), default="")
-    date = Column(String(20), default="")
+    date = Column(Date, nullable=True)
     time = Column(String(20), default="")
     passengers = Column(Integer, default=0)
     hotel = Column(String(200), default="")
@@ -138,11 +156,36 @@ class SQLOperation(Base):
     
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    
+    # Relationship to flight legs (loaded with one extra IN query per batch)
+    flights = relationship("SQLOperationFlight", backref="operation", cascade="all, delete-orphan", lazy="selectin")
+
+
+class SQLOperationFlight(Base):
+    """Operation flight leg model for SQL Server"""
+    __tablename__ = "operation_flights"
+    __table_args__ = (
+        Index('IX_operation_flights_operation_leg', 'operation_id', 'leg', unique=True),
+        Index('IX_operation_flights_flightCode_date', 'flightCode', 'date'),
+    )
+    
+    id = Column(String(100), primary_key=True)
+    operation_id = Column(String(100), ForeignKey('operations.id'), nullable=False)
+    leg = Column(String(20), nullable=False)  # arrival, return, transfer
+    flightCode = Column(String(50), default="")
+    airline = Column(String(100), default="")
+    from_location = Column(String(100), default="")
+    to = Column(String(100), default="")
+    date = Column(Date, nullable=True)
+    time = Column(Time, nullable=True)
 
 
 class SQLHotel(Base):
     """Hotel model for SQL Server"""
     __tablename__ = "hotels"
+    __table_args__ = (
+        Index('IX_hotels_region_category_active', 'region', 'category', 'active'),
+    )
     
     id = Column(String(100), primary_key=True)
     code = Column(String(100), nullable=False, unique=True, index=True)
@@ -179,6 +222,9 @@ class SQLHotel(Base):
 class SQLPackageLeg(Base):
     """Package Leg model for SQL Server"""
     __tablename__ = "package_legs"
+    __table_args__ = (
+        Index('IX_package_legs_package_step', 'package_id', 'step_number'),
+    )
     
     id = Column(String(100), primary_key=True)
     package_id = Column(String(100), ForeignKey('packages.id'), nullable=False)
@@ -209,7 +255,9 @@ class SQLPackage(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
     
     # Relationship to legs
-    legs = relationship("SQLPackageLeg", backref="package", cascade="all, delete-orphan")
+    legs = relationship(
+        "SQLPackageLeg", backref="package", cascade="all, delete-orphan", order_by="SQLPackageLeg.step_number"
+    )
 
 
 # ==================== DATABASE INITIALIZATION ====================
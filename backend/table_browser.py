@@ -0,0 +1,493 @@
+"""
+Table Browser
+Admin database browser'ı için tablo verisi okuma:
+    - Primary key (yoksa unique index) üzerinden keyset (seek) sayfalama, opak cursor ile
+    - sys.partitions'tan yaklaşık satır sayısı (COUNT(*) taraması yok)
+    - Parametreli filtre ve sıralama (kolon adları şemaya göre doğrulanır)
+    - Tipleri koruyan satırlar (JSON'a row_mapper.dumps ile yazılır)
+    - Tüm tabloyu belleğe almadan CSV / Parquet olarak stream eden export
+"""
+import base64
+import csv
+import io
+import json
+import logging
+import uuid
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from metadata_catalog import get_table_schema_cached
+from restore_service import get_connection
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow opsiyonel - yoksa sadece CSV export
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BATCH_SIZE = 5000
+
+FILTER_OPERATORS = {
+    'eq': '=', 'ne': '<>', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>=',
+    'contains': 'LIKE', 'startswith': 'LIKE', 'in': 'IN', 'isnull': 'IS NULL', 'notnull': 'IS NOT NULL',
+}
+
+# ORDER BY / karşılaştırma yapılamayan tipler
+UNSORTABLE_TYPES = {'text', 'ntext', 'image', 'xml', 'geography', 'geometry', 'hierarchyid', 'sql_variant'}
+
+
+class TableBrowserError(ValueError):
+    """Geçersiz kolon, filtre, sıralama ya da cursor"""
+
+
+def quote_identifier(name: str) -> str:
+    return '[' + name.replace(']', ']]') + ']'
+
+
+# ==================== CURSOR ENCODING ====================
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, time):
+        return {'t': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {'b': bytes(value).hex()}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if 'dt' in value:
+        return datetime.fromisoformat(value['dt'])
+    if 'd' in value:
+        return date.fromisoformat(value['d'])
+    if 't' in value:
+        return time.fromisoformat(value['t'])
+    if 'dec' in value:
+        return Decimal(value['dec'])
+    if 'b' in value:
+        return bytes.fromhex(value['b'])
+    raise TableBrowserError("Invalid cursor value")
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return [_decode_value(v) for v in json.loads(base64.urlsafe_b64decode(padded))]
+    except TableBrowserError:
+        raise
+    except Exception:
+        raise TableBrowserError("Invalid cursor")
+
+
+# ==================== QUERY BUILDING ====================
+
+class TablePlan:
+    """Tablo şeması, sıralama kolonları ve filtre predicate'leri"""
+
+    def __init__(self, database_name: str, table_name: str, schema_name: str = 'dbo'):
+        schema = get_table_schema_cached(database_name, table_name, schema_name)
+        if not schema.get('success'):
+            raise TableBrowserError(schema.get('message', 'Failed to read table schema'))
+        if not schema['columns']:
+            raise TableBrowserError(f"Table {schema_name}.{table_name} not found")
+
+        self.database_name = database_name
+        self.table_name = table_name
+        self.schema_name = schema_name
+        self.source = f"{quote_identifier(schema_name)}.{quote_identifier(table_name)}"
+        self.columns = schema['columns']
+        self.by_name = {c['column_name']: c for c in self.columns}
+        self.primary_key = [
+            c['column_name'] for c in sorted(
+                (c for c in self.columns if c['is_primary_key']),
+                key=lambda c: c['primary_key_ordinal'] or 0
+            )
+        ]
+        # Satırı tekil belirleyen kolonlar: primary key, yoksa en küçük unique index
+        self.row_key = self.primary_key or list(schema.get('unique_key') or [])
+        self.sortable_columns = [c['column_name'] for c in self.columns if c['data_type'] not in UNSORTABLE_TYPES]
+
+    def column(self, name: str) -> Dict[str, Any]:
+        column = self.by_name.get(name)
+        if column is None:
+            raise TableBrowserError(f"Unknown column: {name}")
+        return column
+
+    def order_columns(self, sort: Optional[str]) -> List[str]:
+        """
+        Sıralama kolonu + satır key'i (tekil, deterministik sıra).
+        Key yoksa sıralanabilir bütün kolonlar eşitlikleri bozar.
+        """
+        tiebreak = self.row_key or self.sortable_columns
+        if sort:
+            if self.column(sort)['data_type'] in UNSORTABLE_TYPES:
+                raise TableBrowserError(f"Column {sort} cannot be sorted")
+            return [sort] + [c for c in tiebreak if c != sort]
+        return list(tiebreak)
+
+    def filter_clause(self, filters: Sequence[Tuple[str, str, Optional[str]]]) -> Tuple[List[str], List[Any]]:
+        predicates, params = [], []
+        for column_name, op, value in filters:
+            self.column(column_name)
+            column = quote_identifier(column_name)
+            if op not in FILTER_OPERATORS:
+                raise TableBrowserError(f"Unknown filter operator: {op}")
+            if op in ('isnull', 'notnull'):
+                predicates.append(f"{column} {FILTER_OPERATORS[op]}")
+            elif op == 'in':
+                values = [v for v in (value or '').split(',') if v != '']
+                if not values:
+                    raise TableBrowserError(f"Filter {column_name}:in needs at least one value")
+                predicates.append(f"{column} IN ({', '.join(['%s'] * len(values))})")
+                params.extend(values)
+            elif op in ('contains', 'startswith'):
+                escaped = (value or '').replace('[', '[[]').replace('%', '[%]').replace('_', '[_]')
+                predicates.append(f"{column} LIKE %s")
+                params.append(f"%{escaped}%" if op == 'contains' else f"{escaped}%")
+            else:
+                predicates.append(f"{column} {FILTER_OPERATORS[op]} %s")
+                params.append(value)
+        return predicates, params
+
+
+def _after_predicate(columns: Sequence[str], values: Sequence[Any], descending: bool) -> Tuple[str, List[Any]]:
+    """
+    (c1, c2, ...) satır sırasında values'tan sonra gelen satırlar için predicate.
+    SQL Server'da NULL'lar ASC'de başta, DESC'te sonda sıralanır.
+    """
+    alternatives, params = [], []
+    for index, column_name in enumerate(columns):
+        parts, part_params = [], []
+        for prev_name, prev_value in zip(columns[:index], values[:index]):
+            if prev_value is None:
+                parts.append(f"{quote_identifier(prev_name)} IS NULL")
+            else:
+                parts.append(f"{quote_identifier(prev_name)} = %s")
+                part_params.append(prev_value)
+
+        column = quote_identifier(column_name)
+        value = values[index]
+        if not descending:
+            if value is None:
+                parts.append(f"{column} IS NOT NULL")
+            else:
+                parts.append(f"{column} > %s")
+                part_params.append(value)
+        else:
+            if value is None:
+                continue  # DESC'te NULL'dan sonra (eşitler hariç) satır yok
+            parts.append(f"({column} < %s OR {column} IS NULL)")
+            part_params.append(value)
+
+        alternatives.append('(' + ' AND '.join(parts) + ')')
+        params.extend(part_params)
+
+    if not alternatives:
+        return '1 = 0', []
+    return '(' + ' OR '.join(alternatives) + ')', params
+
+
+def approximate_row_count(database_name: str, table_name: str, schema_name: str = 'dbo') -> int:
+    conn = get_connection(database_name)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT SUM(p.rows) FROM sys.partitions p
+            WHERE p.object_id = OBJECT_ID(%s) AND p.index_id IN (0, 1)
+        """, (f"{quote_identifier(schema_name)}.{quote_identifier(table_name)}",))
+        return cursor.fetchone()[0] or 0
+    finally:
+        conn.close()
+
+
+# ==================== PAGE READS ====================
+
+def get_table_data(
+    database_name: str,
+    table_name: str,
+    schema_name: str = 'dbo',
+    page: int = 1,
+    page_size: int = 100,
+    cursor: Optional[str] = None,
+    sort: Optional[str] = None,
+    direction: str = 'asc',
+    filters: Sequence[Tuple[str, str, Optional[str]]] = ()
+) -> Dict[str, Any]:
+    """
+    Tablo verisinden bir sayfa oku.
+
+    Primary key ya da unique index (sort + key) varsa keyset sayfalama kullanılır:
+    sonraki sayfa için pagination.next_cursor gönderilir. Cursor yoksa ve page > 1
+    ise aynı deterministik sırayla OFFSET'e düşülür. Key'i olmayan tablolar bütün
+    sıralanabilir kolonlara göre sıralanır.
+    """
+    try:
+        plan = TablePlan(database_name, table_name, schema_name)
+        descending = direction.lower() == 'desc'
+        order_columns = plan.order_columns(sort)
+        predicates, params = plan.filter_clause(filters)
+
+        # Keyset için sıra tekil olmalı - primary key / unique index yoksa OFFSET'e düşülür
+        keyset = bool(plan.row_key)
+        if cursor:
+            if not keyset:
+                raise TableBrowserError("Cursor paging requires a primary key or unique index")
+            values = decode_cursor(cursor)
+            if len(values) != len(order_columns):
+                raise TableBrowserError("Cursor does not match the requested sort")
+            predicate, predicate_params = _after_predicate(order_columns, values, descending)
+            predicates.append(predicate)
+            params.extend(predicate_params)
+
+        select_list = ', '.join(quote_identifier(c['column_name']) for c in plan.columns)
+        where = (' WHERE ' + ' AND '.join(predicates)) if predicates else ''
+        order_by = ', '.join(
+            f"{quote_identifier(c)} {'DESC' if descending else 'ASC'}" for c in order_columns
+        ) or '(SELECT NULL)'
+
+        if cursor or page <= 1:
+            sql = f"SELECT TOP (%s) {select_list} FROM {plan.source}{where} ORDER BY {order_by}"
+            params = [page_size + 1] + params
+        else:
+            sql = (
+                f"SELECT {select_list} FROM {plan.source}{where} ORDER BY {order_by} "
+                f"OFFSET %s ROWS FETCH NEXT %s ROWS ONLY"
+            )
+            params = params + [(page - 1) * page_size, page_size + 1]
+
+        conn = get_connection(database_name)
+        try:
+            db_cursor = conn.cursor()
+            db_cursor.execute(sql, tuple(params))
+            rows = db_cursor.fetchall()
+            names = [col[0] for col in db_cursor.description]
+        finally:
+            conn.close()
+
+        has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        data = [dict(zip(names, row)) for row in rows]
+
+        next_cursor = None
+        if has_next and keyset and data:
+            last = data[-1]
+            next_cursor = encode_cursor([last[c] for c in order_columns])
+
+        total_rows = approximate_row_count(database_name, table_name, schema_name)
+        total_pages = (total_rows + page_size - 1) // page_size
+
+        return {
+            "success": True,
+            "database": database_name,
+            "table": table_name,
+            "schema": schema_name,
+            "columns": [{"name": c['column_name'], "type": c['data_type']} for c in plan.columns],
+            "primary_key": plan.primary_key,
+            "row_key": plan.row_key,
+            "data": data,
+            "pagination": {
+                "page": page,
+                "page_size": page_size,
+                "total_rows": total_rows,
+                "total_rows_estimated": True,
+                "filtered": bool(filters),
+                "total_pages": total_pages,
+                "has_next": has_next,
+                "has_prev": page > 1,
+                "mode": "keyset" if keyset else "offset",
+                "next_cursor": next_cursor
+            }
+        }
+
+    except TableBrowserError as e:
+        return {"success": False, "message": str(e), "bad_request": True}
+    except Exception as e:
+        logger.error(f"Error getting table data from {database_name}.{schema_name}.{table_name}: {e}")
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+
+# ==================== STREAMING EXPORT ====================
+
+def _export_query(plan: TablePlan, sort: Optional[str], direction: str, filters) -> Tuple[str, List[Any]]:
+    predicates, params = plan.filter_clause(filters)
+    select_list = ', '.join(quote_identifier(c['column_name']) for c in plan.columns)
+    sql = f"SELECT {select_list} FROM {plan.source}"
+    if predicates:
+        sql += ' WHERE ' + ' AND '.join(predicates)
+    # Export'ta sıralama sadece istenirse - gereksiz sort maliyeti olmasın
+    if sort:
+        order = 'DESC' if direction.lower() == 'desc' else 'ASC'
+        sql += ' ORDER BY ' + ', '.join(f"{quote_identifier(c)} {order}" for c in plan.order_columns(sort))
+    return sql, params
+
+
+def _iter_batches(database_name: str, sql: str, params: List[Any], batch_size: int) -> Iterator[List[tuple]]:
+    """Sonuçları server'dan parça parça çek - tüm tablo belleğe alınmaz"""
+    conn = get_connection(database_name, timeout=0)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, tuple(params) if params else None)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).hex()
+    return value
+
+
+def _stream_csv(plan: TablePlan, batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # Excel'in UTF-8'i tanıması için BOM
+    buffer.write('\ufeff')
+    writer.writerow([c['column_name'] for c in plan.columns])
+    for rows in batches:
+        writer.writerows([_csv_value(v) for v in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    remainder = buffer.getvalue()
+    if remainder:
+        yield remainder.encode('utf-8')
+
+
+def _arrow_type(column: Dict[str, Any]):
+    data_type = column['data_type']
+    if data_type in ('bigint', 'int', 'smallint', 'tinyint'):
+        return pa.int64()
+    if data_type == 'bit':
+        return pa.bool_()
+    if data_type in ('decimal', 'numeric'):
+        return pa.decimal128(column['precision'], column['scale'])
+    if data_type in ('money', 'smallmoney'):
+        return pa.decimal128(19, 4)
+    if data_type in ('float', 'real'):
+        return pa.float64()
+    if data_type == 'date':
+        return pa.date32()
+    if data_type in ('datetime', 'datetime2', 'smalldatetime', 'datetimeoffset'):
+        return pa.timestamp('us')
+    if data_type == 'time':
+        return pa.time64('us')
+    if data_type in ('binary', 'varbinary', 'image', 'timestamp', 'rowversion'):
+        return pa.binary()
+    return pa.string()
+
+
+class _ChunkSink:
+    """ParquetWriter için yazılanları biriktiren, tell() ile toplam offset'i tutan sink"""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _stream_parquet(plan: TablePlan, batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+    fields = [pa.field(c['column_name'], _arrow_type(c), nullable=True) for c in plan.columns]
+    schema = pa.schema(fields)
+    string_columns = {i for i, f in enumerate(fields) if pa.types.is_string(f.type)}
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode='w'), schema, compression='snappy')
+    try:
+        for rows in batches:
+            arrays = []
+            for index, field in enumerate(fields):
+                values = [row[index] for row in rows]
+                if index in string_columns:
+                    values = [None if v is None else str(v) for v in values]
+                arrays.append(pa.array(values, type=field.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def prepare_export(
+    database_name: str,
+    table_name: str,
+    schema_name: str = 'dbo',
+    fmt: str = 'csv',
+    sort: Optional[str] = None,
+    direction: str = 'asc',
+    filters: Sequence[Tuple[str, str, Optional[str]]] = (),
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Export planını doğrula ve byte chunk'ları üreten generator döndür.
+    Doğrulama hataları (TableBrowserError) stream başlamadan fırlatılır.
+    """
+    if fmt not in ('csv', 'parquet'):
+        raise TableBrowserError("format must be 'csv' or 'parquet'")
+    if fmt == 'parquet' and pa is None:
+        raise TableBrowserError("Parquet export requires pyarrow")
+
+    plan = TablePlan(database_name, table_name, schema_name)
+    sql, params = _export_query(plan, sort, direction, filters)
+    batches = _iter_batches(database_name, sql, params, batch_size)
+    return _stream_parquet(plan, batches) if fmt == 'parquet' else _stream_csv(plan, batches)
+
+
+def parse_filters(raw_filters: Optional[Sequence[str]]) -> List[Tuple[str, str, Optional[str]]]:
+    """'Kolon:op:deger' biçimindeki query parametrelerini çözümle"""
+    parsed = []
+    for raw in raw_filters or []:
+        parts = raw.split(':', 2)
+        if len(parts) < 2:
+            raise TableBrowserError(f"Invalid filter '{raw}', expected column:op[:value]")
+        parsed.append((parts[0], parts[1].lower(), parts[2] if len(parts) == 3 else None))
+    return parsed
@@ -0,0 +1,155 @@
+"""
+Traffic Series
+Geliş/gidiş grafikleri için saatlik, günlük ya da haftalık zaman serisi.
+
+flights tablosu (direction arrival/departure) ile operation_flights tablosundaki
+operasyon uçuşları (arrival bacağı geliş, return bacağı gidiş; pax operasyonun
+passengers değeri) tarih aralığına göre okunur ve pandas ile vektörel olarak
+gruplanır. Havalimanı gelişte 'to', gidişte 'from' alanıdır. Boş periyotlar
+sıfırla doldurulur ki grafik kesintisiz olsun.
+"""
+import os
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from date_parsing import parse_date
+from sql_models import SQLFlight, SQLOperation, SQLOperationFlight
+
+# Bir istekte dönebilecek en fazla periyot (ör. 60 günlük saatlik seri = 1440)
+TRAFFIC_MAX_BUCKETS = int(os.environ.get('TRAFFIC_MAX_BUCKETS', '2000'))
+
+# bucket -> pandas period frekansı (hafta Pazartesi başlar)
+BUCKETS = {'hour': 'h', 'day': 'D', 'week': 'W-SUN'}
+SOURCES = ('all', 'flights', 'operations')
+DIRECTIONS = ('arrival', 'departure')
+
+COLUMNS = ['date', 'time', 'direction', 'airport', 'pax']
+
+
+class TrafficSeriesError(ValueError):
+    """Geçersiz aralık, bucket ya da filtre"""
+
+
+def _flight_rows(db: Session, start: date, end: date) -> List[tuple]:
+    airport = case((SQLFlight.direction == 'arrival', SQLFlight.to), else_=SQLFlight.from_location)
+    return db.execute(
+        select(SQLFlight.date, SQLFlight.time, SQLFlight.direction, airport, SQLFlight.passengers)
+        .where(SQLFlight.date.between(start, end), SQLFlight.direction.in_(DIRECTIONS))
+    ).all()
+
+
+def _operation_rows(db: Session, start: date, end: date) -> List[tuple]:
+    direction = case((SQLOperationFlight.leg == 'arrival', 'arrival'), else_='departure')
+    airport = case((SQLOperationFlight.leg == 'arrival', SQLOperationFlight.to), else_=SQLOperationFlight.from_location)
+    return db.execute(
+        select(SQLOperationFlight.date, SQLOperationFlight.time, direction, airport, SQLOperation.passengers)
+        .join(SQLOperation, SQLOperation.id == SQLOperationFlight.operation_id)
+        .where(SQLOperationFlight.date.between(start, end), SQLOperationFlight.leg.in_(('arrival', 'return')))
+    ).all()
+
+
+def _period_index(start: date, end: date, bucket: str) -> pd.PeriodIndex:
+    last = pd.Timestamp(end) + pd.Timedelta(hours=23) if bucket == 'hour' else pd.Timestamp(end)
+    return pd.period_range(pd.Timestamp(start), last, freq=BUCKETS[bucket])
+
+
+def _period_label(period: pd.Period, bucket: str) -> str:
+    if bucket == 'hour':
+        return period.start_time.strftime('%Y-%m-%dT%H:00')
+    return period.start_time.date().isoformat()
+
+
+def traffic_series(
+    db: Session,
+    start: Any,
+    end: Any,
+    bucket: str = 'day',
+    airport: Optional[str] = None,
+    direction: Optional[str] = None,
+    source: str = 'all'
+) -> Dict[str, Any]:
+    """
+    Tarih aralığı için periyot bazında geliş/gidiş uçuş ve pax sayıları.
+
+    Returns:
+        series: [{period, arrivals, departures, arrival_pax, departure_pax}]
+        by_airport: aralık toplamı, havalimanı + yön bazında [{airport, direction, flights, pax}]
+    """
+    start_date, end_date = parse_date(start), parse_date(end)
+    if start_date is None or end_date is None:
+        raise TrafficSeriesError("start and end must be valid dates")
+    if end_date < start_date:
+        raise TrafficSeriesError("end must not be before start")
+    if bucket not in BUCKETS:
+        raise TrafficSeriesError(f"bucket must be one of: {', '.join(BUCKETS)}")
+    if source not in SOURCES:
+        raise TrafficSeriesError(f"source must be one of: {', '.join(SOURCES)}")
+    if direction is not None and direction not in DIRECTIONS:
+        raise TrafficSeriesError(f"direction must be one of: {', '.join(DIRECTIONS)}")
+    periods = _period_index(start_date, end_date, bucket)
+    if len(periods) > TRAFFIC_MAX_BUCKETS:
+        raise TrafficSeriesError(f"Range has {len(periods)} {bucket} buckets (max {TRAFFIC_MAX_BUCKETS})")
+
+    rows = []
+    if source in ('all', 'flights'):
+        rows += _flight_rows(db, start_date, end_date)
+    if source in ('all', 'operations'):
+        rows += _operation_rows(db, start_date, end_date)
+    df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    if airport:
+        df = df[df['airport'] == airport]
+    if direction:
+        df = df[df['direction'] == direction]
+
+    # date + time -> zaman damgası (saat yoksa gün başı), sonra periyoda indir
+    timestamps = pd.to_datetime(df['date'])
+    if bucket == 'hour':
+        hours = pd.to_numeric(df['time'].map(lambda value: value.hour if value is not None else 0), errors='coerce')
+        timestamps = timestamps + pd.to_timedelta(hours.fillna(0), unit='h')
+    df = df.assign(period=timestamps.dt.to_period(BUCKETS[bucket]), pax=df['pax'].fillna(0).astype('int64'))
+
+    grouped = df.groupby(['period', 'direction']).agg(flights=('pax', 'size'), pax=('pax', 'sum'))
+    table = (
+        grouped.unstack('direction', fill_value=0)
+        .reindex(columns=pd.MultiIndex.from_product([['flights', 'pax'], DIRECTIONS]), fill_value=0)
+        .reindex(periods, fill_value=0)
+    )
+    series = [
+        {
+            'period': _period_label(period, bucket),
+            'arrivals': int(arrivals),
+            'departures': int(departures),
+            'arrival_pax': int(arrival_pax),
+            'departure_pax': int(departure_pax),
+        }
+        for period, arrivals, departures, arrival_pax, departure_pax in zip(
+            periods,
+            table[('flights', 'arrival')], table[('flights', 'departure')],
+            table[('pax', 'arrival')], table[('pax', 'departure')],
+        )
+    ]
+
+    by_airport = (
+        df[df['airport'].fillna('') != '']
+        .groupby(['airport', 'direction'])
+        .agg(flights=('pax', 'size'), pax=('pax', 'sum'))
+        .reset_index()
+        .sort_values(['flights', 'airport'], ascending=[False, True])
+    )
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'bucket': bucket,
+        'source': source,
+        'airport': airport,
+        'direction': direction,
+        'series': series,
+        'by_airport': [
+            {'airport': row.airport, 'direction': row.direction, 'flights': int(row.flights), 'pax': int(row.pax)}
+            for row in by_airport.itertuples(index=False)
+        ],
+    }
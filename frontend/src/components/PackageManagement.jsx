@@ -1,11 +1,15 @@
 import React, { useState, useEffect } from 'react';
 import { Package, Plus, Edit, Trash2, Save, X, Hotel, MapPin, ArrowRight } from 'lucide-react';
 import { Button } from "@/components/ui/button";
-import api from '@/utils/api';
+import api, { fetchPage } from '@/utils/api';
+
+const PACKAGES_PAGE_SIZE = 50;
 
 const PackageManagement = () => {
   const [packages, setPackages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [showModal, setShowModal] = useState(false);
   const [editingPackage, setEditingPackage] = useState(null);
   const [error, setError] = useState(null);
@@ -39,8 +43,9 @@ const PackageManagement = () => {
   const fetchPackages = async () => {
     try {
       setLoading(true);
-      const response = await api.get('/packages');
-      setPackages(response.data);
+      const page = await fetchPage('/packages', { limit: PACKAGES_PAGE_SIZE });
+      setPackages(page.items);
+      setNextCursor(page.nextCursor);
     } catch (err) {
       console.error('Error fetching packages:', err);
       setError('Paketler yüklenemedi');
@@ -49,6 +54,21 @@ const PackageManagement = () => {
     }
   };
 
+  const loadMorePackages = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage('/packages', { limit: PACKAGES_PAGE_SIZE, cursor: nextCursor });
+      setPackages(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (err) {
+      console.error('Error fetching packages:', err);
+      setError('Paketler yüklenemedi');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleOpenModal = (pkg = null) => {
     if (pkg) {
       setEditingPackage(pkg);
@@ -336,6 +356,14 @@ const PackageManagement = () => {
         </div>
       )}
 
+      {!loading && nextCursor && (
+        <div className="flex justify-center">
+          <Button onClick={loadMorePackages} disabled={loadingMore} variant="outline">
+            {loadingMore ? 'Yükleniyor...' : 'Daha Fazla Yükle'}
+          </Button>
+        </div>
+      )}
+
       {/* Package Modal */}
       {showModal && (
         <div 
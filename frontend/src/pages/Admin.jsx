@@ -51,6 +51,8 @@ const Admin = () => {
   const [loadingTableData, setLoadingTableData] = useState(false);
   const [currentPage, setCurrentPage] = useState(1);
   const [pagination, setPagination] = useState(null);
+  // Keyset paging: pageCursors[n] is the cursor that loads page n + 1
+  const [pageCursors, setPageCursors] = useState([null]);
 
   const [uploadFile, setUploadFile] = useState(null);
   const [uploadType, setUploadType] = useState("flights");
@@ -182,12 +184,20 @@ const Admin = () => {
   const loadTableData = async (tableName, page = 1) => {
     try {
       setLoadingTableData(true);
+      const cursor = page === 1 ? null : pageCursors[page - 1];
+      const params = { page, page_size: 50 };
+      if (cursor) params.cursor = cursor;
       const response = await api.get(`/api/database/DIOGENESSEJOUR/tables/${tableName}/data`, {
-        params: { page, page_size: 50 }
+        params
       });
       setTableData(response.data.data || []);
       setPagination(response.data.pagination);
       setCurrentPage(page);
+      setPageCursors((prev) => {
+        const next = page === 1 ? [null] : prev.slice(0, page);
+        next[page] = response.data.pagination?.next_cursor || null;
+        return next;
+      });
     } catch (error) {
       console.error('Error loading table data:', error);
     } finally {
@@ -315,7 +325,7 @@ const Admin = () => {
       
       // Generate filename with timestamp
       const timestamp = new Date().toISOString().replace(/[:.]/g, '-').slice(0, -5);
-      link.setAttribute('download', `diogenes_backup_${timestamp}.bak`);
+      link.setAttribute('download', `diogenes_backup_${timestamp}.zip`);
       
       document.body.appendChild(link);
       link.click();
@@ -3,10 +3,58 @@ import StatCard from "@/components/StatCard";
 import ArrivalDepartureChart from "@/components/ArrivalDepartureChart";
 import TopHotels from "@/components/TopHotels";
 import TopProducts from "@/components/TopProducts";
-import { mockDashboardData, getTodayDate } from "@/lib/mockData";
+import { useState, useEffect } from "react";
+import { getTodayDate } from "@/lib/mockData";
+import { useAuth } from "@/context/AuthContext";
+
+const EMPTY_DASHBOARD = {
+  stats: {
+    totalUpcomingPassengers: 0,
+    todayArrivals: 0,
+    todayDepartures: 0,
+    totalServedTourists: 0,
+    pendingTickets: 0
+  },
+  weeklyData: [],
+  topHotels: [],
+  topProducts: []
+};
 
 const Dashboard = () => {
-  const stats = mockDashboardData.stats;
+  const { user } = useAuth();
+  const [dashboard, setDashboard] = useState(EMPTY_DASHBOARD);
+
+  // All widgets come from a single /api/dashboard request; widgets that failed
+  // or timed out on the server are missing from the response and keep their empty state
+  useEffect(() => {
+    if (!user?.id) return;
+
+    const fetchDashboard = async () => {
+      try {
+        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/dashboard`, {
+          headers: {
+            'x-user-id': user.id
+          }
+        });
+        if (!response.ok) {
+          throw new Error('Failed to fetch dashboard');
+        }
+        const data = await response.json();
+        setDashboard(prev => ({
+          stats: data.stats || prev.stats,
+          weeklyData: data.weeklyData || prev.weeklyData,
+          topHotels: data.topHotels || prev.topHotels,
+          topProducts: data.topProducts || prev.topProducts
+        }));
+      } catch (err) {
+        console.error('Error fetching dashboard:', err);
+      }
+    };
+
+    fetchDashboard();
+  }, [user?.id]);
+
+  const stats = dashboard.stats;
 
   return (
     <div className="space-y-6" data-testid="dashboard">
@@ -81,12 +129,12 @@ const Dashboard = () => {
             <span className="text-sm text-slate-600">{getTodayDate()}</span>
           </div>
         </div>
-        <ArrivalDepartureChart data={mockDashboardData.weeklyData} />
+        <ArrivalDepartureChart data={dashboard.weeklyData} />
       </div>
 
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-6">
-        <TopHotels data={mockDashboardData.topHotels} />
-        <TopProducts data={mockDashboardData.topProducts} />
+        <TopHotels data={dashboard.topHotels} />
+        <TopProducts data={dashboard.topProducts} />
       </div>
     </div>
   );
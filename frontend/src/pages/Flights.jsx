@@ -10,9 +10,11 @@ import {
   SelectValue,
 } from "@/components/ui/select";
 import { mockFlights } from "@/lib/mockFlightData";
-import api from "@/utils/api";
+import api, { fetchPage } from "@/utils/api";
 import { useAuth } from "@/context/AuthContext";
 
+const FLIGHTS_PAGE_SIZE = 200;
+
 const Flights = () => {
   const { user } = useAuth();
   const [searchTerm, setSearchTerm] = useState("");
@@ -22,21 +24,66 @@ const Flights = () => {
   const [isComparing, setIsComparing] = useState(false);
   const [compareError, setCompareError] = useState(null);
   const [flights, setFlights] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [pendingTickets, setPendingTickets] = useState([]);
 
   useEffect(() => {
     fetchFlights();
+    fetchPendingTickets();
   }, []);
 
   const fetchFlights = async () => {
     try {
-      const response = await api.get('/api/flights');
-      setFlights(response.data.length > 0 ? response.data : mockFlights);
+      const page = await fetchPage('/api/flights', { limit: FLIGHTS_PAGE_SIZE });
+      if (page.items.length === 0 && !page.nextCursor) {
+        setFlights(mockFlights);
+      } else {
+        setFlights(page.items);
+        setNextCursor(page.nextCursor);
+      }
     } catch (error) {
       console.error("Failed to fetch flights:", error);
       setFlights(mockFlights);
     }
   };
 
+  const loadMoreFlights = async () => {
+    if (!nextCursor) return;
+    try {
+      setLoadingMore(true);
+      const page = await fetchPage('/api/flights', { limit: FLIGHTS_PAGE_SIZE, cursor: nextCursor });
+      setFlights(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Failed to fetch flights:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // The warning panel must not depend on how many pages are loaded, so flights
+  // without a PNR and at most 7 days out are filtered server-side.
+  const fetchPendingTickets = async () => {
+    try {
+      const pending = [];
+      let cursor = null;
+      do {
+        const page = await fetchPage('/api/flights', {
+          limit: FLIGHTS_PAGE_SIZE,
+          cursor,
+          params: { filter: ['hasPNR:eq:false', 'daysUntilFlight:lte:7'] }
+        });
+        pending.push(...page.items);
+        cursor = page.nextCursor;
+      } while (cursor);
+      setPendingTickets(pending);
+    } catch (error) {
+      console.error("Failed to fetch pending flights:", error);
+      setPendingTickets(mockFlights.filter(f => !f.hasPNR && f.daysUntilFlight <= 7));
+    }
+  };
+
   const filteredFlights = flights.filter(flight => {
     const matchesSearch = flight.flightCode.toLowerCase().includes(searchTerm.toLowerCase());
     const matchesPNR = filterPNR === "all" || 
@@ -45,8 +92,6 @@ const Flights = () => {
     return matchesSearch && matchesPNR;
   });
 
-  const pendingTickets = flights.filter(f => !f.hasPNR && f.daysUntilFlight <= 7);
-
   const handleFileChange = (e) => {
     const file = e.target.files[0];
     if (file) {
@@ -459,6 +504,19 @@ const Flights = () => {
             </tbody>
           </table>
         </div>
+
+        {nextCursor && (
+          <div className="flex justify-center mt-6">
+            <Button
+              onClick={loadMoreFlights}
+              disabled={loadingMore}
+              variant="outline"
+              data-testid="load-more-flights"
+            >
+              {loadingMore ? "Yükleniyor..." : "Daha Fazla Yükle"}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
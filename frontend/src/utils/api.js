@@ -42,4 +42,20 @@ api.interceptors.response.use(
   }
 );
 
+// Fetch one page of a list endpoint (limit/cursor paging).
+// Repeated params (e.g. several filters) are passed as arrays; the next page's
+// cursor comes back in the X-Next-Cursor header and is null on the last page.
+export const fetchPage = async (url, { limit, cursor, params = {} } = {}) => {
+  const query = new URLSearchParams();
+  Object.entries({ ...params, limit, cursor }).forEach(([key, value]) => {
+    if (value === undefined || value === null) return;
+    (Array.isArray(value) ? value : [value]).forEach(item => query.append(key, item));
+  });
+  const response = await api.get(url, { params: query });
+  return {
+    items: response.data,
+    nextCursor: response.headers['x-next-cursor'] || null
+  };
+};
+
 export default api;
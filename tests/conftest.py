@@ -0,0 +1,147 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+# sql_models / server import sırasında bu ayarları okur; testler kendi sqlite engine'lerini kullanır
+for name, value in {
+    'SQL_SERVER_HOST': 'localhost',
+    'SQL_SERVER_PORT': '1433',
+    'SQL_SERVER_DB': 'diogenesDB',
+    'SQL_SERVER_USER': 'test',
+    'SQL_SERVER_PASSWORD': 'test',
+    'MONGO_URL': 'mongodb://localhost:1',
+    'DB_NAME': 'test',
+    'AWS_S3_BUCKET': 'test',
+    'AWS_IAM_ROLE_ARN': 'arn:aws:iam::000000000000:role/test',
+    'AWS_REGION': 'eu-central-1',
+}.items():
+    os.environ.setdefault(name, value)
+
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def sql_engine(monkeypatch):
+    """
+    Panel tabloları kurulu bellek içi sqlite engine. sql_models.SessionLocal,
+    panel_stats ve ranking_index bu engine'e yönlendirilir (executor thread'leri dahil).
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+
+    import sql_models
+    from panel_stats import panel_stats
+    from rankings import ranking_index
+
+    engine = create_engine('sqlite://', connect_args={'check_same_thread': False}, poolclass=StaticPool)
+    sql_models.Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    monkeypatch.setattr(sql_models, 'SessionLocal', session_factory)
+    for service in (panel_stats, ranking_index):
+        monkeypatch.setattr(service, 'engine', engine)
+        monkeypatch.setattr(service, '_ready', False)
+        # Yazma transaction'ı açıkken create_all çalışmasın
+        service._ensure_table()
+    monkeypatch.setattr(ranking_index, '_buckets', {})
+    monkeypatch.setattr(ranking_index, '_dirty', True)
+    monkeypatch.setattr(ranking_index, '_bootstrapped', False)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def diogenes_state(tmp_path, monkeypatch):
+    """Aktif DIOGENES database state'i geçici dosyada, başlangıçta mantıksal adla"""
+    import diogenes_service
+
+    path = tmp_path / 'diogenes_active_db.json'
+    monkeypatch.setattr(diogenes_service, 'DIOGENES_STATE_FILE', path)
+    monkeypatch.setattr(diogenes_service, '_db_state_stamp', None)
+    monkeypatch.setattr(diogenes_service, '_db_state', {
+        'database': diogenes_service.DIOGENES_DATABASE, 'previous': None, 'generation': 0
+    })
+    return path
+
+
+class FakeSQLServer:
+    """
+    restore_* modüllerinin get_connection'ı için küçük SQL Server taklidi.
+    databases: {ad: {'state': 'ONLINE', 'tables': {'dbo.Otel': [satırlar]}}}
+    """
+
+    def __init__(self):
+        self.databases = {}
+        self.connections = []
+
+    def add_database(self, name, tables, state='ONLINE'):
+        self.databases[name] = {'state': state, 'tables': {key: list(rows) for key, rows in tables.items()}}
+
+    def get_connection(self, database='master', timeout=None):
+        self.connections.append((database, timeout))
+        return _FakeSQLConnection(self, database)
+
+
+class _FakeSQLConnection:
+    def __init__(self, server, database):
+        self.server = server
+        self.database = database
+
+    def cursor(self):
+        return _FakeSQLCursor(self.server, self.database)
+
+    def close(self):
+        pass
+
+
+class _FakeSQLCursor:
+    def __init__(self, server, database):
+        self.server = server
+        self.database = database
+        self._rows = []
+
+    def _tables(self):
+        return self.server.databases[self.database]['tables']
+
+    def execute(self, sql, params=None):
+        import re
+
+        text = ' '.join(sql.split())
+        if text.startswith('SELECT state_desc FROM sys.databases'):
+            database = self.server.databases.get(params[0])
+            self._rows = [(database['state'],)] if database else []
+        elif text.startswith('SELECT SUM(p.rows) FROM sys.partitions'):
+            rows = self._tables().get(params[0])
+            self._rows = [(len(rows) if rows is not None else None,)]
+        elif text.startswith('SELECT s.name, t.name, SUM(p.rows)'):
+            self._rows = [(*key.split('.'), len(rows)) for key, rows in self._tables().items()]
+        elif text.startswith('SELECT COUNT_BIG(*), CHECKSUM_AGG'):
+            schema, table = re.search(r'FROM \[(\w+)\]\.\[(\w+)\]', text).groups()
+            rows = self._tables()[f"{schema}.{table}"]
+            self._rows = [(len(rows), hash(tuple(rows)) & 0x7FFFFFFF)]
+        elif text.startswith('SELECT OBJECT_ID'):
+            self._rows = [(1 if params[0] in self._tables() else None,)]
+        else:
+            self._rows = []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return list(self._rows)
+
+
+@pytest.fixture
+def fake_sqlserver(monkeypatch):
+    import restore_cutover
+    import restore_verify
+    import restore_warmup
+
+    server = FakeSQLServer()
+    for module in (restore_cutover, restore_verify, restore_warmup):
+        monkeypatch.setattr(module, 'get_connection', server.get_connection)
+    return server
@@ -0,0 +1,49 @@
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.dialects import mssql
+from sqlalchemy.orm import sessionmaker
+
+import dashboard
+from sql_models import Base, SQLFlight
+
+
+class CapturingSession:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(statement)
+        row = SimpleNamespace(upcoming=0, arrivals=0, departures=0, served=0, pending_tickets=0)
+        return SimpleNamespace(one=lambda: row)
+
+
+def test_stats_widget_compiles_for_mssql():
+    db = CapturingSession()
+    dashboard.stats_widget(db)
+    sql = str(db.statements[0].compile(dialect=mssql.dialect()))
+    assert 'IS 0' not in sql
+    assert 'flights.[hasPNR] = 0' in sql
+    assert 'flights.[hasPNR] IS NULL' in sql
+
+
+def test_stats_widget_counts_pending_tickets():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine, tables=[SQLFlight.__table__, Base.metadata.tables['reservations']])
+    db = sessionmaker(bind=engine)()
+    today = date.today()
+
+    def flight(code, has_pnr, day):
+        return SQLFlight(
+            id=code, flightCode=code, airline='TK', from_location='IST', to='AYT',
+            date=day, time=time(12, 0), direction='arrival', passengers=1, hasPNR=has_pnr
+        )
+    db.add_all([
+        flight('F1', False, today),
+        flight('F2', None, today + timedelta(days=1)),
+        flight('F3', True, today),
+        flight('F4', False, today - timedelta(days=1)),
+    ])
+    db.commit()
+    assert dashboard.stats_widget(db)['pendingTickets'] == 2
@@ -0,0 +1,60 @@
+from datetime import date, datetime, time
+
+import pandas as pd
+import pytest
+
+from date_parsing import normalize_date_series, normalize_time_series, parse_date, parse_time
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2026-03-01', date(2026, 3, 1)),
+    ('01.03.2026', date(2026, 3, 1)),
+    ('01/03/2026', date(2026, 3, 1)),
+    ('01-03-2026', date(2026, 3, 1)),
+    ('2026/03/01', date(2026, 3, 1)),
+    ('20260301', date(2026, 3, 1)),
+    ('2026-03-01T14:30:00', date(2026, 3, 1)),
+    ('01.03.2026 14:30', date(2026, 3, 1)),
+    (' 2026-03-01 ', date(2026, 3, 1)),
+    (datetime(2026, 3, 1, 9, 0), date(2026, 3, 1)),
+    (date(2026, 3, 1), date(2026, 3, 1)),
+])
+def test_parse_date_formats(value, expected):
+    assert parse_date(value) == expected
+
+
+@pytest.mark.parametrize('value', [None, '', '  ', 'nan', 'NaT', 'null', float('nan'), pd.NaT])
+def test_parse_date_missing(value):
+    assert parse_date(value) is None
+
+
+@pytest.mark.parametrize('value', ['yarın', '32.01.2026', '2026-13-01', 'TBA'])
+def test_parse_date_unparseable(value):
+    assert parse_date(value) is None
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('14:30', time(14, 30)),
+    ('14:30:45', time(14, 30)),
+    ('14.30', time(14, 30)),
+    ('1430', time(14, 30)),
+    ('02:30 PM', time(14, 30)),
+    ('2026-03-01T14:30:00', time(14, 30)),
+    (time(14, 30, 59), time(14, 30)),
+])
+def test_parse_time_formats(value, expected):
+    assert parse_time(value) == expected
+
+
+@pytest.mark.parametrize('value', [None, '', 'nan', '25:00', 'öğlen'])
+def test_parse_time_missing_or_unparseable(value):
+    assert parse_time(value) is None
+
+
+def test_normalize_date_series_mixes_vectorised_and_legacy():
+    series = pd.Series(['2026-03-01', '02.03.2026', None, 'TBA', pd.Timestamp('2026-03-04')])
+    assert normalize_date_series(series) == [date(2026, 3, 1), date(2026, 3, 2), None, None, date(2026, 3, 4)]
+
+
+def test_normalize_time_series():
+    assert normalize_time_series(pd.Series(['14:30', '7.05', None])) == [time(14, 30), time(7, 5), None]
@@ -0,0 +1,71 @@
+import json
+
+import diogenes_service
+
+
+def _write_external(path, database, previous):
+    # Başka bir worker'ın cut-over'ı
+    path.write_text(json.dumps({'database': database, 'previous': previous}), encoding='utf-8')
+
+
+def test_active_database_follows_state_file_changes(diogenes_state):
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR'
+    _write_external(diogenes_state, 'DIOGENESSEJOUR_20260301_041500', 'DIOGENESSEJOUR')
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR_20260301_041500'
+    state = diogenes_service.get_database_state()
+    assert state['previous'] == 'DIOGENESSEJOUR'
+    assert state['generation'] == 1
+
+    _write_external(diogenes_state, 'DIOGENESSEJOUR', 'DIOGENESSEJOUR_20260301_041500')
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR'
+    assert diogenes_service.get_database_state()['generation'] == 2
+
+
+def test_activate_database_persists_and_resolves_logical_name(diogenes_state):
+    switch = diogenes_service.activate_database('DIOGENESSEJOUR_20260301_041500', drain_timeout=0)
+    assert switch['active'] == 'DIOGENESSEJOUR_20260301_041500'
+    assert json.loads(diogenes_state.read_text(encoding='utf-8'))['database'] == 'DIOGENESSEJOUR_20260301_041500'
+    # Kendi yazdığı dosyayı tekrar okuyunca generation artmaz
+    assert diogenes_service.get_database_state()['generation'] == switch['generation']
+
+    assert diogenes_service.resolve_database_name('DIOGENESSEJOUR') == 'DIOGENESSEJOUR_20260301_041500'
+    assert diogenes_service.resolve_database_name('diogenessejour') == 'DIOGENESSEJOUR_20260301_041500'
+    assert diogenes_service.resolve_database_name('diogenesDB') == 'diogenesDB'
+
+
+def test_unreadable_diogenes_state_keeps_current_database(diogenes_state):
+    diogenes_service.activate_database('DIOGENESSEJOUR_B', drain_timeout=0)
+    diogenes_state.write_text('{not json', encoding='utf-8')
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR_B'
+
+
+class _RawConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_abandoned_connection_released_while_lock_is_held(diogenes_state, monkeypatch):
+    import threading
+
+    monkeypatch.setattr(diogenes_service, '_open_connections', {0: 1})
+    monkeypatch.setattr(diogenes_service, '_released_generations', diogenes_service.deque())
+    raw = _RawConnection()
+    tracked = diogenes_service._TrackedConnection(raw, 0)
+
+    def collect_under_lock():
+        # GC, kilidi tutan thread içinde __del__'i çalıştırabilir
+        with diogenes_service._db_state_lock:
+            tracked.__del__()
+
+    worker = threading.Thread(target=collect_under_lock, daemon=True)
+    worker.start()
+    worker.join(timeout=2)
+    assert not worker.is_alive()
+    assert raw.closed
+    assert diogenes_service.get_database_state()['open_connections'] == {}
+    # Açık bağlantı kalmadığı için drain beklemeden biter
+    switch = diogenes_service.activate_database('DIOGENESSEJOUR_B', drain_timeout=1)
+    assert switch['drained']
@@ -0,0 +1,51 @@
+import asyncio
+
+from health import HealthProber
+
+
+def test_slow_deep_check_does_not_stale_readiness():
+    async def scenario():
+        prober = HealthProber(interval=0.02, timeout=1, deep_interval=60, stale_after=0.3)
+
+        async def ping():
+            return True
+
+        async def slow_counts():
+            await asyncio.sleep(0.6)
+            return {'reservations': 3}
+
+        prober.probe('sql_server', ping)
+        prober.deep(slow_counts)
+        runner = asyncio.create_task(prober.run_forever())
+        try:
+            await asyncio.sleep(0.45)
+            during = prober.readiness()
+            await asyncio.sleep(0.35)
+            return during, prober.readiness(), prober.deep_snapshot()
+        finally:
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+
+    during, after, deep = asyncio.run(scenario())
+    # Deep sayım sürerken de probe turları dönmeye devam eder
+    assert (during['status'], during['ready']) == ('ready', True)
+    assert after['ready']
+    assert deep['data'] == {'reservations': 3}
+
+
+def test_failing_probe_marks_unavailable():
+    async def scenario():
+        prober = HealthProber(interval=1, timeout=0.05)
+
+        async def down():
+            raise ConnectionError('refused')
+
+        prober.probe('sql_server', down)
+        prober.probe('mongo', down, critical=False)
+        await prober.run_once()
+        return prober.readiness()
+
+    readiness = asyncio.run(scenario())
+    assert (readiness['status'], readiness['ready']) == ('unavailable', False)
+    assert readiness['probes']['sql_server']['error'] == 'refused'
+    assert readiness['probes']['sql_server']['consecutive_failures'] == 1
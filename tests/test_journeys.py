@@ -0,0 +1,92 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy.orm import Session
+
+import journeys
+from package_catalog import PackageCatalog
+from sql_models import SQLPackage, SQLPackageLeg, SQLReservation
+
+
+class StaticVersions:
+    """Tablo versiyonları değişmez; katalog ve schedule cache'i ilk yüklemede kalır"""
+
+    def refresh(self, tables):
+        pass
+
+    def current(self, tables):
+        return tuple((table, 1) for table in tables)
+
+
+def _reservation(reservation_id, package_id=None, current_leg=0, **overrides):
+    row = SQLReservation(
+        id=reservation_id, voucherNo=f"V-{reservation_id}", leader_name='Test', leader_passport='P1',
+        product_code='PRD', product_name='Product', hotel='Otel A', destination='Antalya',
+        arrivalDate=date(2026, 10, 5), departureDate=date(2026, 10, 12), pax=2, status='confirmed',
+        package_id=package_id, current_leg=current_leg,
+        created_at=datetime.now(timezone.utc), updated_at=datetime.now(timezone.utc),
+    )
+    for key, value in overrides.items():
+        setattr(row, key, value)
+    return row
+
+
+@pytest.fixture
+def db(sql_engine, monkeypatch):
+    catalog = PackageCatalog(versions=StaticVersions())
+    monkeypatch.setattr(journeys, 'package_catalog', catalog)
+    monkeypatch.setattr(journeys, 'journey_engine', journeys.JourneyEngine(versions=StaticVersions()))
+    with Session(sql_engine) as session:
+        session.add(SQLPackage(id='pkg-1', package_code='TUR-1', name='Tur', total_nights=5))
+        session.add_all([
+            SQLPackageLeg(id='leg-1', package_id='pkg-1', step_number=1, leg_type='airport_pickup', location='AYT'),
+            SQLPackageLeg(id='leg-2', package_id='pkg-1', step_number=2, leg_type='hotel', location='Antalya',
+                          hotel_name='Otel A', duration_nights=3),
+            SQLPackageLeg(id='leg-3', package_id='pkg-1', step_number=3, leg_type='accommodation', location='Kapadokya',
+                          hotel_name='Otel B', duration_nights=2),
+        ])
+        session.add_all([
+            _reservation('r-pkg', package_id='pkg-1', current_leg=2),
+            _reservation('r-single'),
+            _reservation('r-missing-package', package_id='nope'),
+        ])
+        session.commit()
+        yield session
+
+
+def test_single_leg_journey_keeps_raw_iso_dates(db):
+    (entry,) = journeys.reservation_journeys(db, ['r-single'])
+    assert entry['package'] is None
+    assert entry['journey'] == [{
+        'step_number': 1, 'leg_type': 'hotel', 'location': 'Antalya', 'hotel_name': 'Otel A',
+        'check_in_date': '2026-10-05', 'check_out_date': '2026-10-12', 'duration_nights': 0,
+        'room_type': None, 'board_type': None, 'status': 'confirmed',
+    }]
+
+
+def test_single_leg_journey_passes_legacy_strings_through():
+    (leg,) = journeys.single_leg_journey({'arrivalDate': '2026-10-05', 'status': 'pending'})
+    assert (leg['check_in_date'], leg['check_out_date'], leg['location']) == ('2026-10-05', '', 'N/A')
+
+
+def test_package_journey_dates_and_status(db):
+    entries = {entry['reservation']['id']: entry for entry in journeys.reservation_journeys(db, ['r-pkg', 'r-missing-package'])}
+    legs = entries['r-pkg']['journey']
+    assert [(leg['check_in_date'], leg['check_out_date'], leg['status']) for leg in legs] == [
+        ('05.10.2026', '05.10.2026', 'completed'),
+        ('05.10.2026', '08.10.2026', 'in_progress'),
+        ('08.10.2026', '10.10.2026', 'pending'),
+    ]
+    assert entries['r-pkg']['package']['package_code'] == 'TUR-1'
+    # Paketi bulunamayan rezervasyon tek bacaklı yolculuğa düşer
+    assert entries['r-missing-package']['package'] is None
+
+
+def test_package_schedule_is_cached_per_arrival(db):
+    first = journeys.package_schedule(db, 'pkg-1', '2026-10-05')
+    second = journeys.package_schedule(db, 'pkg-1', '05.10.2026')
+    assert first == second
+    assert journeys.journey_engine.stats()['hits'] == 1
+    assert journeys.package_schedule(db, 'nope', '2026-10-05') is None
+    with pytest.raises(journeys.JourneyError):
+        journeys.package_schedule(db, 'pkg-1', 'TBA')
@@ -0,0 +1,68 @@
+from datetime import date, time
+
+import pytest
+from sqlalchemy import update
+from sqlalchemy.dialects import mssql
+
+from list_query import ListQuery, ListQueryError
+from sql_helpers import FLIGHT_SERIALIZER
+from sql_models import SQLFlight
+from table_browser import parse_filters
+
+
+def _flight(flight_id, has_pnr, days):
+    return SQLFlight(id=flight_id, flightCode=f"TK{flight_id}", from_location='IST', to='AYT',
+                     date=date(2026, 10, 20), time=time(9, 0), direction='arrival',
+                     hasPNR=has_pnr, daysUntilFlight=days)
+
+
+@pytest.fixture
+def session(sql_engine):
+    import sql_models
+
+    db = sql_models.SessionLocal()
+    db.add_all([_flight('1', True, 2), _flight('2', False, 3), _flight('3', None, 5), _flight('4', None, 30)])
+    db.commit()
+    # Kolon default'u None'ı False'a çevirir; eski kayıtlardaki gibi NULL yaz
+    db.execute(update(SQLFlight).where(SQLFlight.id.in_(['3', '4'])).values(hasPNR=None))
+    db.commit()
+    yield db
+    db.close()
+
+
+def _ids(db, *filters, **kwargs):
+    query = ListQuery(FLIGHT_SERIALIZER, filters=parse_filters(list(filters)), **kwargs)
+    rows, _ = query.fetch(db)
+    return [row['id'] for row in rows]
+
+
+def test_boolean_filters_treat_null_as_false(session):
+    assert _ids(session, 'hasPNR:eq:false') == ['2', '3', '4']
+    assert _ids(session, 'hasPNR:ne:true') == ['2', '3', '4']
+    assert _ids(session, 'hasPNR:eq:true') == ['1']
+    assert _ids(session, 'hasPNR:ne:false') == ['1']
+    assert _ids(session, 'hasPNR:in:false') == ['2', '3', '4']
+    # Uçuşlar sayfasındaki uyarı paneli filtresi
+    assert _ids(session, 'hasPNR:eq:false', 'daysUntilFlight:lte:7') == ['2', '3']
+    assert _ids(session, 'hasPNR:isnull') == ['3', '4']
+
+
+def test_boolean_filter_compiles_for_mssql():
+    query = ListQuery(FLIGHT_SERIALIZER, filters=parse_filters(['hasPNR:eq:false']))
+    sql = str(query.statement().compile(dialect=mssql.dialect()))
+    assert 'IS 0' not in sql
+    assert 'flights.[hasPNR] = 0 OR flights.[hasPNR] IS NULL' in sql
+
+
+def test_keyset_paging_and_invalid_filters(session):
+    query = ListQuery(FLIGHT_SERIALIZER, limit=2, sort='-daysUntilFlight')
+    rows, cursor = query.fetch(session)
+    assert [row['id'] for row in rows] == ['4', '3']
+    rest = ListQuery(FLIGHT_SERIALIZER, limit=2, cursor=cursor, sort='-daysUntilFlight')
+    rows, cursor = rest.fetch(session)
+    assert ([row['id'] for row in rows], cursor) == (['2', '1'], None)
+
+    with pytest.raises(ListQueryError):
+        ListQuery(FLIGHT_SERIALIZER, filters=parse_filters(['hasPNR:like:x']))
+    with pytest.raises(ListQueryError):
+        ListQuery(FLIGHT_SERIALIZER, filters=parse_filters(['nope:eq:1']))
@@ -0,0 +1,49 @@
+import metadata_catalog as catalog_module
+from metadata_catalog import MetadataCatalog, get_table_schema_cached
+
+
+def _install(monkeypatch, tables):
+    calls = []
+
+    def fetch_databases():
+        return [{'name': 'diogenesDB', 'database_id': 5, 'create_date': None, 'state': 'ONLINE',
+                 'recovery_model': 'FULL', 'compatibility_level': 150}]
+
+    def fetch_database_metadata(name):
+        calls.append(name)
+        return {key: dict(table) for key, table in tables.items()}
+
+    catalog = MetadataCatalog(parallelism=1)
+    monkeypatch.setattr(catalog_module, 'fetch_databases', fetch_databases)
+    monkeypatch.setattr(catalog_module, 'fetch_database_metadata', fetch_database_metadata)
+    monkeypatch.setattr(catalog_module, 'metadata_catalog', catalog)
+    return catalog, calls
+
+
+HOTELS = {'dbo.hotels': {'table_name': 'hotels', 'schema_name': 'dbo', 'row_count': 2,
+                         'columns': [{'column_name': 'id', 'data_type': 'int', 'max_length': 4, 'precision': 10,
+                                      'scale': 0, 'is_nullable': False, 'is_primary_key': True}],
+                         'unique_key': ['id']}}
+
+
+def test_unknown_table_refreshes_database_once_per_window(monkeypatch):
+    catalog, calls = _install(monkeypatch, HOTELS)
+    catalog.refresh()
+    assert calls == ['diogenesDB']
+
+    for _ in range(20):
+        schema = get_table_schema_cached('diogenesDB', 'no_such_table')
+        assert (schema['columns'], schema['count']) == ([], 0)
+    # İlk miss yeniler, sonrakiler pencere içinde boş sonuç döner
+    assert calls == ['diogenesDB', 'diogenesDB']
+
+    assert get_table_schema_cached('diogenesDB', 'hotels')['unique_key'] == ['id']
+    assert len(calls) == 2
+
+
+def test_refresh_on_miss_window_expires(monkeypatch):
+    catalog, calls = _install(monkeypatch, HOTELS)
+    assert catalog.refresh_on_miss('diogenesDB', interval=0)
+    assert catalog.refresh_on_miss('diogenesDB', interval=0)
+    assert not catalog.refresh_on_miss('DIOGENESDB', interval=60)
+    assert calls == ['diogenesDB', 'diogenesDB']
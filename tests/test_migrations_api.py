@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+
+import server
+
+
+def test_run_migrations_refreshes_catalog_when_applied(monkeypatch):
+    refreshed = []
+
+    async def require_restore_admin(x_user_id, detail):
+        return {'email': 'admin@example.com', 'role': 'admin'}
+
+    async def log_action(*args):
+        pass
+
+    results = iter([[{'version': 3, 'name': 'operation_flights', 'duration_ms': 12}], []])
+    monkeypatch.setattr(server, 'require_restore_admin', require_restore_admin)
+    monkeypatch.setattr(server, 'log_action', log_action)
+    monkeypatch.setattr(server.migrations, 'run', lambda target=None: next(results))
+    monkeypatch.setattr(server.panel_stats, 'rebuild', lambda: None)
+    monkeypatch.setattr(server.ranking_index, 'rebuild', lambda: None)
+    monkeypatch.setattr(server.metadata_catalog, 'refresh', lambda databases=None: refreshed.append(databases))
+    client = TestClient(server.app)
+
+    response = client.post('/api/database/migrations/run', json={}, headers={'X-User-Id': 'admin-1'})
+    assert response.status_code == 200, response.text
+    assert [m['version'] for m in response.json()['applied']] == [3]
+    assert refreshed == [['diogenesDB']]
+
+    # Uygulanacak migration yoksa catalog yenilenmez
+    response = client.post('/api/database/migrations/run', json={}, headers={'X-User-Id': 'admin-1'})
+    assert response.json()['applied'] == []
+    assert refreshed == [['diogenesDB']]
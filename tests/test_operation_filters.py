@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.dialects import mssql
+
+from sql_helpers import operation_predicates
+
+
+def _compiled(predicates):
+    return [
+        str(predicate.compile(dialect=mssql.dialect(), compile_kwargs={'literal_binds': True}))
+        for predicate in predicates
+    ]
+
+
+def test_operation_predicates_parse_legacy_date_formats():
+    predicates = operation_predicates({'start_date': '01.03.2026', 'end_date': '2026-03-31', 'type': 'all'})
+    assert [predicate.right.value for predicate in predicates] == [date(2026, 3, 1), date(2026, 3, 31)]
+
+
+@pytest.mark.parametrize('filters', [
+    {'date': 'not-a-date'},
+    {'start_date': '2026-03-01', 'end_date': '31.02.2026'},
+    {'start_date': 'yesterday', 'end_date': '2026-03-01'},
+])
+def test_operation_predicates_reject_unparseable_dates(filters):
+    with pytest.raises(ValueError):
+        operation_predicates(filters)
+
+
+def test_operation_predicates_without_filters():
+    assert operation_predicates(None) == []
+    assert _compiled(operation_predicates({'type': 'arrival'})) == ["operations.type = 'arrival'"]
+
+
+def test_operation_flight_rows_and_parse_failures():
+    from datetime import time
+
+    from sql_helpers import operation_flight_parse_failures, operation_flight_rows
+
+    operation = {
+        'arrivalFlight': {'flightCode': 'TK1', 'date': '01.03.2026', 'time': '14.30'},
+        'returnFlight': {'flightCode': 'TK2', 'date': 'TBA', 'time': 'öğlen'},
+        'transferFlight': {'flightCode': 'TK3', 'date': '', 'time': None},
+    }
+    rows = {row['leg']: row for row in operation_flight_rows('op-1', operation)}
+    assert (rows['arrival']['date'], rows['arrival']['time']) == (date(2026, 3, 1), time(14, 30))
+    assert (rows['return']['date'], rows['return']['time']) == (None, None)
+    # Boş değerler hata değildir; dolu ama çözülemeyen tarih ve saat sayılır
+    assert operation_flight_parse_failures(operation) == 2
+    assert operation_flight_parse_failures({'arrivalFlight': operation['arrivalFlight']}) == 0
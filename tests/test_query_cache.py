@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from query_cache import QueryCache, TableVersions, normalize_params
+
+
+@pytest.fixture
+def cache():
+    return QueryCache(TableVersions(probe_interval=0))
+
+
+def test_hit_until_table_version_changes(cache):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return [{'id': len(calls)}]
+
+    first = cache.get_or_load('/flights', {'page': 1}, ['diogenesDB.flights'], loader)
+    second = cache.get_or_load('/flights', {'page': 1}, ['diogenesDB.flights'], loader)
+    assert second is first
+    assert first.body == b'[{"id":1}]'
+
+    cache.versions.bump('diogenesDB.flights')
+    third = cache.get_or_load('/flights', {'page': 1}, ['diogenesDB.flights'], loader)
+    assert third.body == b'[{"id":2}]'
+    stats = cache.stats()['endpoints']['/flights']
+    assert (stats['hits'], stats['misses'], stats['stale']) == (1, 2, 1)
+
+
+def test_loader_errors_do_not_leak_key_locks(cache):
+    def loader():
+        raise ValueError('Invalid arrival_date')
+
+    for day in range(100):
+        with pytest.raises(ValueError):
+            cache.get_or_load('/reservations/journeys', {'arrival_date': f'bad-{day}'}, ['t'], loader)
+    assert cache._key_locks == {}
+    assert cache.stats()['entries'] == 0
+
+
+def test_concurrent_misses_load_once(cache):
+    calls = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return b'[]'
+
+    threads = [
+        threading.Thread(target=cache.get_or_load, args=('/hotels', None, ['t'], loader))
+        for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert cache._key_locks == {}
+
+
+def test_lru_eviction_respects_byte_budget():
+    cache = QueryCache(TableVersions(probe_interval=0), max_bytes=20)
+    for page in range(3):
+        cache.get_or_load('/flights', {'page': page}, ['t'], lambda: b'0123456789')
+    stats = cache.stats()
+    assert (stats['entries'], stats['bytes_used'], stats['evictions']) == (2, 20, 1)
+
+
+def test_normalize_params_drops_empty_values():
+    assert normalize_params({'b': ' x ', 'a': None, 'c': '  '}) == '{"b":"x"}'
@@ -0,0 +1,53 @@
+from datetime import date, datetime, timezone
+
+from sqlalchemy.orm import Session
+
+from rankings import RankingIndex, ranking_index
+from sql_helpers import bulk_insert_sql
+from sql_models import SQLReservation
+
+
+def _reservation(index, **overrides):
+    row = {
+        'id': f"r{index}", 'voucherNo': f"V{index}", 'leader_name': 'Test', 'leader_passport': 'P1',
+        'product_code': f"P{index % 3}", 'product_name': f"Product {index % 3}", 'hotel': f"Hotel {index % 4}",
+        'arrivalDate': date(2026, 10, 5), 'departureDate': date(2026, 10, 12), 'pax': 1 + index % 3,
+        'status': 'confirmed', 'source_agency': 'THV',
+        'created_at': datetime.now(timezone.utc), 'updated_at': datetime.now(timezone.utc),
+    }
+    row.update(overrides)
+    return row
+
+
+def test_counters_follow_inserts_and_match_rebuild(sql_engine):
+    with Session(sql_engine) as db:
+        bulk_insert_sql(db, SQLReservation, [_reservation(i) for i in range(12)])
+        bulk_insert_sql(db, SQLReservation, [
+            _reservation(100, hotel='Hotel 3', pax=9, status='cancelled'),
+            _reservation(101, hotel='Hotel 9', pax=2, arrivalDate=date(2026, 11, 1), source_agency='ABC'),
+        ])
+    assert ranking_index.check()['consistent']
+
+    top = ranking_index.top('hotel', k=2)
+    # Her otelde 6 pax (eşitlikte ada göre); iptal edilen Hotel 3 rezervasyonu sayılmaz
+    assert [(entry['key'], entry['pax']) for entry in top] == [('Hotel 0', 6), ('Hotel 1', 6)]
+    assert ranking_index.top('hotel', k=5, period='2026-11') == [
+        {'key': 'Hotel 9', 'label': 'Hotel 9', 'pax': 2, 'reservations': 1}
+    ]
+    assert [entry['key'] for entry in ranking_index.top('product', k=3, by='reservations', agency='THV')] == ['P0', 'P1', 'P2']
+
+
+def test_empty_counters_are_cached_after_first_rebuild(sql_engine, monkeypatch):
+    index = RankingIndex(sql_engine, ttl=3600)
+    rebuilds = []
+    original = index.rebuild
+    monkeypatch.setattr(index, 'rebuild', lambda: rebuilds.append(1) or original())
+    loads = []
+    original_load = index._load_counters
+    monkeypatch.setattr(index, '_load_counters', lambda: loads.append(1) or original_load())
+
+    for _ in range(5):
+        assert index.top('hotel') == []
+    assert len(rebuilds) == 1
+    # İlk okuma: yükle, rebuild, tekrar yükle; sonrakiler cache'ten
+    assert len(loads) == 2
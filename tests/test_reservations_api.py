@@ -0,0 +1,74 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import server
+from rankings import ranking_index
+from sql_models import SQLReservation
+
+PAYLOAD = {
+    'voucherNo': 'V-1', 'leader_name': 'Ayşe Test', 'leader_passport': 'U123', 'product_code': 'ANT-3',
+    'product_name': 'Antalya 3 gece', 'hotel': 'Otel A', 'arrivalDate': '05.10.2026',
+    'departureDate': '2026-10-08', 'pax': 3, 'status': 'confirmed',
+}
+
+
+@pytest.fixture
+def client(sql_engine, monkeypatch):
+    import sql_models
+
+    users = {'admin-1': {'id': 'admin-1', 'email': 'admin@example.com', 'role': 'admin'}}
+    actions = []
+
+    async def get_current_user(user_id):
+        return users.get(user_id)
+
+    async def log_action(*args):
+        actions.append(args)
+
+    monkeypatch.setattr(server, 'SessionLocal', sql_models.SessionLocal)
+    monkeypatch.setattr(server, 'get_current_user', get_current_user)
+    monkeypatch.setattr(server, 'log_action', log_action)
+    test_client = TestClient(server.app)
+    test_client.actions = actions
+    return test_client
+
+
+def test_create_reservation_writes_sql_and_counters(client, sql_engine):
+    response = client.post('/api/reservations', json=PAYLOAD, headers={'X-User-Id': 'admin-1'})
+    assert response.status_code == 200, response.text
+    created = response.json()
+    assert created['voucherNo'] == 'V-1'
+
+    with Session(sql_engine) as db:
+        row = db.execute(select(SQLReservation).where(SQLReservation.id == created['id'])).scalar_one()
+    assert (row.arrivalDate.isoformat(), row.departureDate.isoformat(), row.pax) == ('2026-10-05', '2026-10-08', 3)
+    assert ranking_index.top('hotel', period='2026-10') == [{'key': 'Otel A', 'label': 'Otel A', 'pax': 3, 'reservations': 1}]
+    assert client.actions[0][1:3] == ('CREATE', 'reservations')
+
+
+def test_create_reservation_rejects_unparseable_dates(client):
+    response = client.post('/api/reservations', json={**PAYLOAD, 'arrivalDate': 'TBA'}, headers={'X-User-Id': 'admin-1'})
+    assert response.status_code == 400
+
+
+def test_create_reservation_requires_user(client):
+    assert client.post('/api/reservations', json=PAYLOAD).status_code == 401
+
+
+def test_paged_reservation_list_exposes_next_cursor(client):
+    for voucher in ('V-1', 'V-2'):
+        response = client.post('/api/reservations', json={**PAYLOAD, 'voucherNo': voucher}, headers={'X-User-Id': 'admin-1'})
+        assert response.status_code == 200, response.text
+
+    headers = {'X-User-Id': 'admin-1', 'Origin': 'http://localhost:3000'}
+    first = client.get('/api/reservations', params={'limit': 1, 'sort': 'voucherNo'}, headers=headers)
+    assert first.status_code == 200, first.text
+    assert [row['voucherNo'] for row in first.json()] == ['V-1']
+    # Tarayıcı cursor'ı ancak CORS ile açılmış başlıktan okuyabilir
+    assert 'x-next-cursor' in first.headers['access-control-expose-headers'].lower()
+
+    second = client.get('/api/reservations', params={'limit': 1, 'sort': 'voucherNo', 'cursor': first.headers['x-next-cursor']}, headers=headers)
+    assert [row['voucherNo'] for row in second.json()] == ['V-2']
+    assert 'x-next-cursor' not in second.headers
@@ -0,0 +1,60 @@
+import asyncio
+import json
+
+import pytest
+
+import diogenes_service
+import restore_cutover
+from query_cache import table_versions
+
+TABLES = {
+    'dbo.Otel': [('ANT', 'Otel A')],
+    'dbo.Musteri': [(1, 'Ayşe')],
+    'dbo.MusteriOpr': [(1, '2026-03-01')],
+}
+
+
+def test_validate_database_reports_missing_and_empty_tables(fake_sqlserver):
+    fake_sqlserver.add_database('DIOGENESSEJOUR_A', {'dbo.Otel': [], 'dbo.Musteri': [(1, 'Ayşe')]})
+    fake_sqlserver.add_database('DIOGENESSEJOUR_B', TABLES, state='RESTORING')
+    report = restore_cutover.validate_database('DIOGENESSEJOUR_A')
+    assert not report['valid']
+    assert report['problems'] == ['Table Otel is empty', 'Table MusteriOpr is missing']
+    assert restore_cutover.validate_database('DIOGENESSEJOUR_B')['problems'] == ['Database state is RESTORING']
+    assert restore_cutover.validate_database('NOPE')['problems'] == ['Database state is MISSING']
+
+
+def test_cut_over_switches_active_database_and_rolls_back(fake_sqlserver, diogenes_state):
+    fake_sqlserver.add_database('DIOGENESSEJOUR', TABLES)
+    fake_sqlserver.add_database('DIOGENESSEJOUR_20260301_041500', TABLES)
+    table_versions.bump('DIOGENESSEJOUR.Otel')  # cache'te bilinen bir tablo
+    version_before = table_versions.current(['DIOGENESSEJOUR.Otel'])
+
+    result = asyncio.run(restore_cutover.cut_over('DIOGENESSEJOUR_20260301_041500', drain_timeout=0))
+    assert result['validation']['valid']
+    assert result['switch']['active'] == 'DIOGENESSEJOUR_20260301_041500'
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR_20260301_041500'
+    assert json.loads(diogenes_state.read_text(encoding='utf-8'))['previous'] == 'DIOGENESSEJOUR'
+    # Mantıksal ada bağlı cache anahtarları geçersiz
+    assert table_versions.current(['DIOGENESSEJOUR.Otel']) != version_before
+
+    asyncio.run(restore_cutover.rollback(drain_timeout=0))
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR'
+
+
+def test_cut_over_refuses_invalid_database(fake_sqlserver, diogenes_state):
+    fake_sqlserver.add_database('DIOGENESSEJOUR_BROKEN', {'dbo.Otel': []})
+    with pytest.raises(restore_cutover.CutoverError):
+        asyncio.run(restore_cutover.cut_over('DIOGENESSEJOUR_BROKEN'))
+    assert diogenes_service.get_active_database() == 'DIOGENESSEJOUR'
+
+
+def test_rollback_without_previous_database(diogenes_state):
+    with pytest.raises(restore_cutover.CutoverError):
+        asyncio.run(restore_cutover.rollback())
+
+
+def test_shadow_database_name_matches_verify_key():
+    from restore_verify import snapshot_key
+
+    assert snapshot_key(restore_cutover.shadow_database_name()) == 'DIOGENESSEJOUR'
@@ -0,0 +1,140 @@
+import asyncio
+
+from rds_standin import RDSStandIn
+from restore_jobs import RestoreJobManager, sse_events
+
+
+def _manager(tmp_path, duration=0.05):
+    standin = RDSStandIn(duration=duration)
+    return RestoreJobManager(
+        standin.start_restore, standin.check_restore_status,
+        state_path=tmp_path / 'restore_jobs.json', poll_interval=0.01, timeout=5
+    )
+
+
+def test_restore_job_runs_to_success_and_calls_hooks(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        restored = []
+
+        @manager.on_success
+        async def warmup(job):
+            restored.append(job['target_db'])
+            manager.annotate(job['job_id'], warmup={'success': True})
+
+        result = await manager.submit('sql-backups/DIOGENESSEJOUR_26_02.bak', 'DIOGENESSEJOUR_20260226_010000',
+                                      requested_by='admin@example.com')
+        assert result['success']
+        job = await manager.wait(result['job']['job_id'], timeout=5)
+        return manager, restored, job
+
+    manager, restored, job = asyncio.run(scenario())
+    assert job['status'] == 'SUCCESS'
+    assert job['percent_complete'] == 100
+    assert job['finished_at'] is not None
+    assert job['warmup'] == {'success': True}
+    assert restored == ['DIOGENESSEJOUR_20260226_010000']
+
+    # Kayıtlar dosyada; yeni bir manager aynı job'u görür
+    reloaded = _manager(tmp_path)
+    reloaded.load()
+    assert reloaded.get(job['job_id'])['status'] == 'SUCCESS'
+    assert reloaded.find_by_task(job['task_id'])['job_id'] == job['job_id']
+
+
+def test_failed_restore_skips_success_hooks(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        hooks = []
+
+        @manager.on_success
+        async def hook(job):
+            hooks.append(job)
+
+        result = await manager.submit('sql-backups/fail_me.bak', 'DIOGENESSEJOUR_X')
+        return await manager.wait(result['job']['job_id'], timeout=5), hooks
+
+    job, hooks = asyncio.run(scenario())
+    assert job['status'] == 'ERROR'
+    assert job['task_info'] == 'Simulated restore failure'
+    assert hooks == []
+
+
+def test_sse_stream_ends_at_terminal_status(tmp_path):
+    async def scenario():
+        manager = _manager(tmp_path)
+        result = await manager.submit('sql-backups/ok.bak', 'DIOGENESSEJOUR_Y')
+        return [event async for event in sse_events(manager, result['job']['job_id'], keepalive=1)]
+
+    events = asyncio.run(scenario())
+    assert all(event.startswith('event: progress\n') for event in events)
+    assert '"status": "SUCCESS"' in events[-1]
+
+
+def test_resume_continues_unfinished_jobs(tmp_path):
+    async def start():
+        manager = _manager(tmp_path, duration=0.2)
+        result = await manager.submit('sql-backups/ok.bak', 'DIOGENESSEJOUR_Z')
+        # Process kapanıyor: poller iptal edilir, job dosyada açık kalır
+        manager.shutdown()
+        await asyncio.sleep(0)
+        return manager, result['job']['job_id']
+
+    first, job_id = asyncio.run(start())
+    assert first.get(job_id)['status'] not in ('SUCCESS', 'ERROR')
+
+    async def resume():
+        manager = RestoreJobManager(first.start_fn, first.status_fn, state_path=first.state_path,
+                                    poll_interval=0.01, timeout=5)
+        manager.load()
+        manager.resume()
+        return await manager.wait(job_id, timeout=5)
+
+    assert asyncio.run(resume())['status'] == 'SUCCESS'
+
+
+def test_slow_restore_is_flagged_stalled_and_still_runs_hooks(tmp_path):
+    async def scenario():
+        standin = RDSStandIn(duration=0.2)
+        manager = RestoreJobManager(
+            standin.start_restore, standin.check_restore_status,
+            state_path=tmp_path / 'restore_jobs.json', poll_interval=0.01, timeout=0.05
+        )
+        restored = []
+
+        @manager.on_success
+        async def warmup(job):
+            restored.append(job['target_db'])
+
+        result = await manager.submit('sql-backups/big.bak', 'DIOGENESSEJOUR_BIG')
+        job = await manager.wait(result['job']['job_id'], timeout=5)
+        return job, restored
+
+    job, restored = asyncio.run(scenario())
+    assert job['status'] == 'SUCCESS'
+    assert job['stalled'] is True
+    assert restored == ['DIOGENESSEJOUR_BIG']
+
+
+def test_legacy_timeout_job_is_resumed(tmp_path):
+    async def start():
+        manager = _manager(tmp_path, duration=0.2)
+        result = await manager.submit('sql-backups/ok.bak', 'DIOGENESSEJOUR_T')
+        manager.shutdown()
+        await asyncio.sleep(0)
+        # Eski sürüm 20 dakika sonra job'u TIMEOUT diye kapatmıştı
+        manager._update(result['job']['job_id'], status='TIMEOUT', error='Restore not finished after 1200s')
+        return manager, result['job']['job_id']
+
+    first, job_id = asyncio.run(start())
+
+    async def resume():
+        manager = RestoreJobManager(first.start_fn, first.status_fn, state_path=first.state_path,
+                                    poll_interval=0.01, timeout=5)
+        manager.load()
+        manager.resume()
+        return await manager.wait(job_id, timeout=5)
+
+    job = asyncio.run(resume())
+    assert job['status'] == 'SUCCESS'
+    assert job['error'] is None
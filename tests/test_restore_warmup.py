@@ -0,0 +1,85 @@
+import pytest
+
+import restore_warmup
+
+
+class FakeCursor:
+    def __init__(self):
+        self.executed = []
+        self._result = None
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql)
+        if sql.startswith('SELECT 1 FROM sys.indexes'):
+            self._result = None
+        elif sql.startswith('SELECT OBJECT_ID'):
+            self._result = (1,)
+        elif sql.startswith('SELECT COUNT_BIG'):
+            self._result = (42, 0)
+
+    def fetchone(self):
+        return self._result
+
+    def fetchall(self):
+        return []
+
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_ = FakeCursor()
+        self.closed = False
+
+    def cursor(self):
+        return self.cursor_
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    def get_connection(database='master', timeout=None):
+        conn = FakeConnection()
+        opened.append({'database': database, 'timeout': timeout, 'conn': conn})
+        return conn
+    monkeypatch.setattr(restore_warmup, 'get_connection', get_connection)
+    return opened
+
+
+def test_warmup_steps_use_warmup_query_timeout(connections, monkeypatch):
+    monkeypatch.setattr(restore_warmup, 'WARMUP_QUERY_TIMEOUT', 0)
+    restore_warmup.update_statistics('DIOGENESSEJOUR_NEW')
+    assert restore_warmup.ensure_indexes('DIOGENESSEJOUR_NEW') == {
+        index_name: 'created' for _, index_name, _ in restore_warmup.REQUIRED_INDEXES
+    }
+    assert restore_warmup.preread_hot_tables('DIOGENESSEJOUR_NEW') == {table: 42 for table in restore_warmup.HOT_TABLES}
+    assert [(entry['database'], entry['timeout']) for entry in connections] == [('DIOGENESSEJOUR_NEW', 0)] * 3
+    assert all(entry['conn'].closed for entry in connections)
+
+
+def test_warmup_pipeline_reports_failed_steps_and_continues():
+    pipeline = restore_warmup.WarmupPipeline()
+    calls = []
+
+    @pipeline.step('broken')
+    def broken(database_name):
+        raise RuntimeError('boom')
+
+    @pipeline.step('works')
+    def works(database_name):
+        calls.append(database_name)
+        return 'ok'
+
+    @pipeline.step('skipped', when=lambda database_name: False)
+    def skipped(database_name):
+        calls.append('never')
+
+    report = pipeline.run('DB1')
+    assert not report['success']
+    assert [(step['name'], step['status']) for step in report['steps']] == [
+        ('broken', 'failed'), ('works', 'success'), ('skipped', 'skipped')
+    ]
+    assert calls == ['DB1']
+    assert pipeline.last_reports()['DB1'] is report
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+
+import pytest
+
+import schema_migrations
+from date_parsing import parse_date
+
+
+class FakeConnection:
+    """Çalıştırılan SQL'i kaydeden, INFORMATION_SCHEMA sorgularına sahte cevap veren bağlantı"""
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def execute(self, statement, params=None):
+        self.engine.statements.append((str(statement).strip(), params))
+        return FakeResult(0)
+
+
+class FakeResult:
+    def __init__(self, value):
+        self.value = value
+
+    def scalar(self):
+        return self.value
+
+
+class FakeEngine:
+    def __init__(self):
+        self.statements = []
+
+    @contextmanager
+    def begin(self):
+        yield FakeConnection(self)
+
+    def executed(self):
+        return [statement for statement, _ in self.statements]
+
+    def renames(self):
+        return [(params['old_name'], params['new_name']) for statement, params in self.statements if 'sp_rename' in statement]
+
+
+@pytest.fixture
+def fake_migration(monkeypatch):
+    columns = {
+        'arrivalDate': {'data_type': 'nvarchar', 'nullable': False, 'max_length': 20},
+    }
+    backfill = {'converted': 10, 'unparsed': 0}
+    monkeypatch.setattr(schema_migrations, 'column_info', lambda conn, table, column: columns.get(column))
+    monkeypatch.setattr(schema_migrations, 'backfill_column', lambda *args, **kwargs: dict(backfill))
+    return FakeEngine(), columns, backfill
+
+
+def test_convert_column_type_swaps_when_everything_parses(fake_migration):
+    engine, _, _ = fake_migration
+    result = schema_migrations.convert_column_type(engine, 'reservations', 'arrivalDate', 'DATE', parse_date)
+    executed = engine.executed()
+    assert result == {'converted': 10, 'unparsed': 0}
+    assert any('DROP COLUMN [arrivalDate]' in statement for statement in executed)
+    assert engine.renames() == [('reservations.arrivalDate__typed', 'arrivalDate')]
+    # Kaynak NOT NULL ve NULL kalmadı: kısıt geri konur
+    assert any('ALTER COLUMN [arrivalDate] DATE NOT NULL' in statement for statement in executed)
+
+
+def test_convert_column_type_keeps_legacy_column_when_values_fail(fake_migration, caplog):
+    engine, _, backfill = fake_migration
+    backfill['unparsed'] = 3
+    result = schema_migrations.convert_column_type(engine, 'reservations', 'arrivalDate', 'DATE', parse_date)
+    executed = engine.executed()
+    assert result['unparsed'] == 3
+    assert result['legacy_column'] == 'arrivalDate_legacy'
+    assert not any('DROP COLUMN' in statement for statement in executed)
+    assert engine.renames() == [
+        ('reservations.arrivalDate', 'arrivalDate_legacy'),
+        ('reservations.arrivalDate__typed', 'arrivalDate'),
+    ]
+    # Legacy kolon yeni satırlarda boş kalabilmeli; typed kolon NOT NULL yapılmaz
+    assert any('ALTER COLUMN [arrivalDate_legacy] nvarchar(20) NULL' in statement for statement in executed)
+    assert not any('NOT NULL' in statement for statement in executed)
+    assert '3 values could not be parsed' in caplog.text
+
+
+def test_convert_column_type_refuses_to_overwrite_existing_legacy_column(fake_migration):
+    engine, columns, backfill = fake_migration
+    backfill['unparsed'] = 1
+    columns['arrivalDate_legacy'] = {'data_type': 'nvarchar', 'nullable': True, 'max_length': 20}
+    with pytest.raises(RuntimeError):
+        schema_migrations.convert_column_type(engine, 'reservations', 'arrivalDate', 'DATE', parse_date)
+    assert engine.renames() == []
+
+
+def test_convert_column_type_skips_typed_column(fake_migration):
+    engine, columns, _ = fake_migration
+    columns['arrivalDate'] = {'data_type': 'date', 'nullable': True, 'max_length': None}
+    assert schema_migrations.convert_column_type(engine, 'reservations', 'arrivalDate', 'DATE', parse_date) == {'skipped': 'already typed'}
+    assert engine.statements == []
+
+
+def test_migration_runner_applies_each_version_once_under_lock(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    runner = schema_migrations.MigrationRunner(engine)
+    calls = []
+
+    @runner.migration(1, 'first')
+    def first(engine):
+        calls.append(1)
+
+    @runner.migration(2, 'second')
+    def second(engine):
+        calls.append(2)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: runner.run(), range(4)))
+    assert calls == [1, 2]
+    assert sorted(len(applied) for applied in results) == [0, 0, 0, 2]
+    assert [entry['applied_at'] is not None for entry in runner.status()] == [True, True]
@@ -0,0 +1,100 @@
+import re
+
+import pytest
+
+import table_browser
+
+
+def _column(name, data_type='int', pk_ordinal=None):
+    return {'column_name': name, 'data_type': data_type, 'is_primary_key': pk_ordinal is not None,
+            'primary_key_ordinal': pk_ordinal}
+
+
+SCHEMAS = {
+    'WithPk': {'columns': [_column('Id', pk_ordinal=1), _column('Name', 'nvarchar')], 'unique_key': []},
+    'WithUnique': {'columns': [_column('Code', 'nvarchar'), _column('Name', 'nvarchar')], 'unique_key': ['Code']},
+    'Heap': {'columns': [_column('Voucher', 'nvarchar'), _column('Note', 'ntext'), _column('Sira')], 'unique_key': []},
+}
+
+
+class RecordingCursor:
+    def __init__(self, log, rows):
+        self.log = log
+        self.rows = rows
+        self.description = []
+
+    def execute(self, sql, params=None):
+        sql = ' '.join(sql.split())
+        self.log.append((sql, params))
+        if ' FROM [dbo]' in sql:
+            select_list = sql.split(' FROM ')[0]
+            self.description = [(name,) for name in re.findall(r'\[(\w+)\]', select_list)]
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return (len(self.rows),)
+
+
+class RecordingConnection:
+    def __init__(self, log, rows):
+        self.log, self.rows = log, rows
+
+    def cursor(self):
+        return RecordingCursor(self.log, self.rows)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    log = []
+    rows = [('A', 'a'), ('B', 'b'), ('C', 'c')]
+
+    def schema(database_name, table_name, schema_name='dbo'):
+        return {'success': True, **SCHEMAS[table_name]}
+    monkeypatch.setattr(table_browser, 'get_table_schema_cached', schema)
+    monkeypatch.setattr(table_browser, 'get_connection', lambda database, timeout=None: RecordingConnection(log, rows))
+    return log
+
+
+def test_primary_key_tables_use_keyset(browser):
+    result = table_browser.get_table_data('DB', 'WithPk', page_size=2)
+    assert 'ORDER BY [Id] ASC' in browser[0][0]
+    assert result['pagination']['mode'] == 'keyset'
+
+
+def test_unique_index_enables_keyset_and_orders_by_it(browser):
+    result = table_browser.get_table_data('DB', 'WithUnique', page_size=2, sort='Name', direction='desc')
+    assert 'ORDER BY [Name] DESC, [Code] DESC' in browser[0][0]
+    assert result['pagination']['mode'] == 'keyset'
+    assert result['row_key'] == ['Code']
+    assert table_browser.decode_cursor(result['pagination']['next_cursor']) == ['b', 'B']
+
+
+def test_heap_offset_paging_orders_by_all_sortable_columns(browser):
+    result = table_browser.get_table_data('DB', 'Heap', page=3, page_size=2)
+    sql, params = browser[0]
+    assert sql.endswith('ORDER BY [Voucher] ASC, [Sira] ASC OFFSET %s ROWS FETCH NEXT %s ROWS ONLY')
+    assert params == (4, 3)
+    assert result['pagination']['mode'] == 'offset'
+
+    sorted_result = table_browser.get_table_data('DB', 'Heap', page=2, page_size=2, sort='Sira')
+    assert 'ORDER BY [Sira] ASC, [Voucher] ASC OFFSET' in browser[2][0]
+    assert sorted_result['success']
+
+
+def test_heap_rejects_cursor(browser):
+    result = table_browser.get_table_data('DB', 'Heap', cursor=table_browser.encode_cursor(['x', 1]))
+    assert result == {'success': False, 'message': 'Cursor paging requires a primary key or unique index', 'bad_request': True}
+
+
+def test_unexpected_errors_are_logged(browser, monkeypatch, caplog):
+    def broken(database, timeout=None):
+        raise RuntimeError('connection refused')
+    monkeypatch.setattr(table_browser, 'get_connection', broken)
+    result = table_browser.get_table_data('DB', 'WithPk')
+    assert result == {'success': False, 'message': 'connection refused'}
+    assert 'Error getting table data from DB.dbo.WithPk: connection refused' in caplog.text
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+import server
+from sql_models import SQLUser
+
+
+class FakeCollection:
+    def __init__(self):
+        self.documents = []
+
+    async def insert_one(self, document):
+        self.documents.append(document)
+
+
+@pytest.fixture
+def client(sql_engine, monkeypatch):
+    import sql_models
+
+    with Session(sql_engine) as db:
+        db.add(SQLUser(
+            id='admin-1', name='Admin', email='admin@example.com', password=server.pwd_context.hash('secret'),
+            role='admin', status='active', created_at=datetime.now(timezone.utc)
+        ))
+        db.commit()
+    logs = FakeCollection()
+    monkeypatch.setattr(server, 'SessionLocal', sql_models.SessionLocal)
+    monkeypatch.setattr(server, 'mongo_db', SimpleNamespace(logs=logs))
+    test_client = TestClient(server.app)
+    test_client.logs = logs
+    return test_client
+
+
+def test_login_reads_user_on_executor_session(client):
+    response = client.post('/api/login', json={'email': 'admin@example.com', 'password': 'secret'})
+    assert response.status_code == 200, response.text
+    assert response.json()['id'] == 'admin-1'
+    assert client.logs.documents[-1]['action'] == 'LOGIN_SUCCESS'
+
+
+def test_login_rejects_wrong_password(client):
+    response = client.post('/api/login', json={'email': 'admin@example.com', 'password': 'nope'})
+    assert response.status_code == 401
+    assert client.logs.documents[-1]['details'] == 'Wrong password'
+
+
+def test_list_users(client):
+    response = client.get('/api/users', headers={'X-User-Id': 'admin-1'})
+    assert response.status_code == 200, response.text
+    assert [user['email'] for user in response.json()] == ['admin@example.com']
+
+
+def test_admin_statistics_uses_its_own_session(client):
+    response = client.get('/api/admin/statistics', headers={'X-User-Id': 'admin-1'})
+    assert response.status_code == 200, response.text
+    assert response.json()['recent_reservations'] == []